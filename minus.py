@@ -24,12 +24,16 @@ Performance:
 # EARLY BANDWIDTH FALLBACK CHECK
 # Must run BEFORE any imports that might touch DRM/GStreamer
 # ============================================================================
+# The OCR/VLM/ASR workers are started with the 'spawn' method, which re-runs
+# this file in every worker process as __mp_main__ (on each restart too).
+# Everything below that a worker doesn't need - this check, console
+# blanking, the optional subsystem imports - is skipped there.
 import os as _os
 import subprocess as _subprocess
 import time as _time
 
 _FALLBACK_MARKER = '/tmp/minus_bandwidth_fallback_needed'
-if _os.path.exists(_FALLBACK_MARKER):
+if __name__ != '__mp_main__' and _os.path.exists(_FALLBACK_MARKER):
     try:
         with open(_FALLBACK_MARKER, 'r') as _f:
             _connector_id = _f.read().strip()
@@ -92,7 +96,6 @@ del _os, _subprocess, _time, _FALLBACK_MARKER
 
 import argparse
 import gc
-import glob
 import os
 import sys
 import signal
@@ -108,9 +111,6 @@ from pathlib import Path
 from datetime import datetime
 # Process-based OCR/VLM workers handle timeouts internally (no ThreadPoolExecutor needed)
 
-import numpy as np
-import cv2
-
 # System settings file
 SYSTEM_SETTINGS_FILE = Path.home() / '.minus_system_settings.json'
 
@@ -131,56 +131,69 @@ def _norm_alnum(s: str) -> str:
 
 
 # Blank the console immediately on import (before any output)
-blank_console()
+if __name__ != '__mp_main__':
+    blank_console()
 
 
 # Note: Previously had SuppressLibjpegWarnings context manager here but it caused
 # file descriptor leaks over time (~500k calls over 13hrs exhausted FD limit).
 # libjpeg warnings are harmless, so we just let them through now.
 
-# Set up logging with rotation (max 5MB, keep 3 backups)
-log_format = '%(asctime)s [%(levelname).1s] %(message)s'
-log_datefmt = '%Y-%m-%d %H:%M:%S'
+# Set up logging with rotation (max 5MB, keep 3 backups). Main process
+# only: spawned workers log through their own basicConfig, so they don't
+# each run a listener thread and log ring and rotate /tmp/minus.log.
+if __name__ != '__mp_main__':
+    log_format = '%(asctime)s [%(levelname).1s] %(message)s'
+    log_datefmt = '%Y-%m-%d %H:%M:%S'
 
-# Configure root logger
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
+    # Configure root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
 
-# Remove any existing handlers to prevent duplicates
-for handler in root_logger.handlers[:]:
-    root_logger.removeHandler(handler)
+    # Remove any existing handlers to prevent duplicates
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
 
-# Add file handler with rotation
-# Use /tmp/minus.log - sudoers allows passwordless management
-log_file = Path('/tmp/minus.log')
-try:
-    if log_file.exists():
-        try:
-            with open(log_file, 'a'):
-                pass
-        except PermissionError:
-            # Use sudo to fix permissions (sudoers.d/minus allows this)
-            import subprocess
-            subprocess.run(['sudo', 'rm', '-f', str(log_file)], capture_output=True)
-    if not log_file.exists():
-        log_file.touch(mode=0o666)
-except Exception:
-    pass
-
-file_handler = logging.handlers.RotatingFileHandler(
-    log_file,
-    maxBytes=5*1024*1024,  # 5MB
-    backupCount=3
-)
-file_handler.setFormatter(logging.Formatter(log_format, log_datefmt))
-file_handler.setLevel(logging.INFO)
-root_logger.addHandler(file_handler)
-
-# Add console handler for terminal output
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(logging.Formatter(log_format, log_datefmt))
-console_handler.setLevel(logging.INFO)
-root_logger.addHandler(console_handler)
+    # Add file handler with rotation
+    # Use /tmp/minus.log - sudoers allows passwordless management
+    log_file = Path('/tmp/minus.log')
+    try:
+        if log_file.exists():
+            try:
+                with open(log_file, 'a'):
+                    pass
+            except PermissionError:
+                # Use sudo to fix permissions (sudoers.d/minus allows this)
+                import subprocess
+                subprocess.run(['sudo', 'rm', '-f', str(log_file)], capture_output=True)
+        if not log_file.exists():
+            log_file.touch(mode=0o666)
+    except Exception:
+        pass
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=5*1024*1024,  # 5MB
+        backupCount=3
+    )
+    file_handler.setFormatter(logging.Formatter(log_format, log_datefmt))
+    file_handler.setLevel(logging.INFO)
+    root_logger.addHandler(file_handler)
+
+    # Add console handler for terminal output
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(log_format, log_datefmt))
+    console_handler.setLevel(logging.INFO)
+    root_logger.addHandler(console_handler)
+
+    # Keep recent records in memory for /api/logs (see log_ring.py)
+    from log_ring import install_log_ring
+    install_log_ring(root_logger, logging.Formatter(log_format, log_datefmt))
+
+    # Hot threads only enqueue records; formatting, file I/O and rotation run
+    # on a listener thread (see log_queue.py)
+    from log_queue import LogThrottle, start_queued_logging
+    start_queued_logging(root_logger)
 
 logger = logging.getLogger('Minus')
 
@@ -191,113 +204,74 @@ os.environ['OPENCV_LOG_LEVEL'] = 'ERROR'
 from drm import probe_drm_output
 from v4l2 import probe_v4l2_device
 from config import MinusConfig, USTREAMER_PATH, OCR_MODEL_DIR
-from capture import UstreamerCapture
-from screenshots import ScreenshotManager
 from skip_detection import check_skip_opportunity, extract_ad_seconds_remaining
+from vote_window import VoteWindow
+from metrics import histogram
+from thermal_governor import get_thermal_governor, read_axera_temperature, read_thermal_zones
+from placement import apply_placement, apply_to_process
+from startup import StartupGraph, FIRST_PROTECTED_FRAME
+import tracing
+
+BLOCK_START_LATENCY = histogram(
+    'minus_block_start_latency_seconds',
+    'Capture of the frame that triggered blocking to overlay shown',
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0))
+UNBLOCK_LATENCY = histogram(
+    'minus_unblock_latency_seconds',
+    'Capture of the frame that ended blocking to overlay hidden',
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0))
+
+# Frame handling and the detection/health modules: not needed in the
+# spawned workers. A subsystem module that fails to import disables its
+# feature. Heavy runtimes (RKNN, Axera, faster-whisper) load only inside
+# the worker processes. The display (GStreamer), audio, Fire TV, Wi-Fi,
+# overlay, IR and LED modules are imported where Minus constructs them,
+# and the web UI (Flask) when run() starts it.
+if __name__ != '__mp_main__':
+    import numpy as np
+    import cv2
+    from capture import UstreamerCapture
+    from screenshots import ScreenshotManager
+
+    # Import OCR module (the RKNN runtime itself loads only in the worker)
+    try:
+        from ocr_worker import OCRProcess, is_ocr_available
+        HAS_OCR = is_ocr_available()
+        if not HAS_OCR:
+            logger.warning("OCR module not available: rknnlite not installed")
+    except ImportError as e:
+        logger.warning(f"OCR module not available: {e}")
+        HAS_OCR = False
+
+    # Import VLM module (process-based for hard 2s timeout)
+    try:
+        from vlm_worker import VLMProcess
+        HAS_VLM = True
+    except ImportError as e:
+        logger.warning(f"VLM module not available: {e}")
+        HAS_VLM = False
+
+    # Import ASR module (faster-whisper-driven, runs in a subprocess worker
+    # for hard-timeout safety — see src/asr_worker.py). Optional — installs
+    # without faster-whisper will skip the audio-tap branch and the ASR
+    # thread, leaving the audio pipeline byte-identical to the pre-ASR shape.
+    try:
+        from asr import ASRManager, is_asr_available
+        HAS_ASR = True
+    except ImportError as e:
+        logger.warning(f"ASR module not available: {e}")
+        HAS_ASR = False
+        def is_asr_available():
+            return False
 
-# Import OCR module
-try:
-    from ocr_worker import OCRProcess
-    from ocr import PaddleOCR
-    HAS_OCR = True
-except ImportError as e:
-    logger.warning(f"OCR module not available: {e}")
-    HAS_OCR = False
-    PaddleOCR = None
-
-# Import AdBlocker module
-try:
-    from ad_blocker import AdBlocker
-    HAS_ADBLOCKER = True
-except ImportError as e:
-    logger.warning(f"AdBlocker module not available: {e}")
-    HAS_ADBLOCKER = False
-
-# Import VLM module (process-based for hard 2s timeout)
-try:
-    from vlm_worker import VLMProcess
-    HAS_VLM = True
-except ImportError as e:
-    logger.warning(f"VLM module not available: {e}")
-    HAS_VLM = False
-
-# Import Audio module
-try:
-    from audio import AudioPassthrough, AudioASRTap
-    HAS_AUDIO = True
-except ImportError as e:
-    logger.warning(f"Audio module not available: {e}")
-    HAS_AUDIO = False
-
-# Import ASR module (faster-whisper-driven, runs in a subprocess worker
-# for hard-timeout safety — see src/asr_worker.py). Optional — installs
-# without faster-whisper will skip the audio-tap branch and the ASR
-# thread, leaving the audio pipeline byte-identical to the pre-ASR shape.
-try:
-    from asr import ASRManager, is_asr_available
-    HAS_ASR = True
-except ImportError as e:
-    logger.warning(f"ASR module not available: {e}")
-    HAS_ASR = False
-    def is_asr_available():
-        return False
+    # Import Health Monitor
+    try:
+        from health import HealthMonitor
+        HAS_HEALTH = True
+    except ImportError as e:
+        logger.warning(f"Health module not available: {e}")
+        HAS_HEALTH = False
 
-# Import Health Monitor
-try:
-    from health import HealthMonitor
-    HAS_HEALTH = True
-except ImportError as e:
-    logger.warning(f"Health module not available: {e}")
-    HAS_HEALTH = False
-
-# Import Web UI
-try:
-    from webui import WebUI
-    HAS_WEBUI = True
-except ImportError as e:
-    logger.warning(f"WebUI module not available: {e}")
-    HAS_WEBUI = False
-
-# Import Fire TV Setup Manager
-try:
-    from fire_tv_setup import FireTVSetupManager
-    from autonomous_mode import AutonomousMode
-    HAS_FIRE_TV = True
-except ImportError as e:
-    logger.warning(f"Fire TV module not available: {e}")
-    HAS_FIRE_TV = False
-
-# Import IR Transmitter (REI 8K HDMI switch control via PWM3)
-try:
-    from ir_transmitter import IRTransmitter
-    HAS_IR = True
-except ImportError as e:
-    logger.warning(f"IR transmitter module not available: {e}")
-    HAS_IR = False
-
-# Import Status LED controller (WS2812B status strip on SPI0 MOSI)
-try:
-    from status_led_controller import StatusLEDController
-    HAS_STATUS_LEDS = True
-except ImportError as e:
-    logger.warning(f"Status LED module not available: {e}")
-    HAS_STATUS_LEDS = False
-
-# Import Notification Overlay
-try:
-    from overlay import NotificationOverlay, SystemNotification
-    HAS_OVERLAY = True
-except ImportError as e:
-    logger.warning(f"Overlay module not available: {e}")
-    HAS_OVERLAY = False
-
-# Import WiFi Manager
-try:
-    from wifi_manager import get_wifi_manager, WiFiManager
-    HAS_WIFI_MANAGER = True
-except ImportError as e:
-    logger.warning(f"WiFi Manager module not available: {e}")
-    HAS_WIFI_MANAGER = False
 
 
 class Minus:
@@ -309,6 +283,9 @@ class Minus:
     """
 
     def __init__(self, config: MinusConfig = None):
+        # Boot phases and readiness (served at /api/boot)
+        self.boot = StartupGraph()
+        init_start = self.boot.now()
         if config is None:
             config = MinusConfig()
         self.config = config
@@ -326,6 +303,7 @@ class Minus:
         self.ad_blocker = None
         self.audio = None
         self.health_monitor = None
+        self.thermal_governor = get_thermal_governor()
         self.ml_thread = None
         self.vlm_thread = None
 
@@ -402,8 +380,8 @@ class Minus:
         # mid-show VLM-only false triggers reappear (the iter4 failure
         # mode); the comment block at the rollback point should document
         # whatever LFM2-era regression motivated it.
-        self.vlm_decision_history = []      # List of (timestamp, is_ad) tuples
         self.vlm_history_window = 8.0       # Look at last 8 seconds of decisions (iter4 sweep + LFM2 sweep agree)
+        self.vlm_decision_history = VoteWindow(self.vlm_history_window)  # (timestamp, is_ad, confidence) votes, O(1) agreement
         self.vlm_min_decisions = 3          # Need 3 decisions to act solo (iter4 hardened 4→3→5 against iter4-FPs; LFM2 retune 5→3 — see comment block above)
         self.vlm_start_agreement = 0.70     # 70% ad agreement to START blocking solo (+0.10 hysteresis → 0.80 effective; LFM2 retune 0.80→0.70 — see comment block above; OCR-corroborated uses immediate shortcut at ~line 2778)
         self.vlm_stop_agreement = 0.75      # Need 75% no-ad agreement to STOP blocking
@@ -605,6 +583,10 @@ class Minus:
         self.scene_change_threshold = self.config.scene_change_threshold
         self.max_scene_skip = 30  # Force OCR after this many consecutive skips
 
+        # Per-frame "skipped"/"no text" lines: at most one per key every 10s,
+        # with a suppressed count (see log_queue.LogThrottle)
+        self.frame_log_throttle = LogThrottle(10.0)
+
         # Static screen suppression - disable blocking for still ads
         # (e.g., paused video with ad, YouTube landing page with sponsored content)
         self.STATIC_TIME_THRESHOLD = 2.5  # Seconds of static screen to trigger suppression
@@ -685,13 +667,23 @@ class Minus:
         self.vlm_max_scene_skip = 10  # Force VLM after this many consecutive skips
 
         # Screenshot manager (organizes into ads/, non_ads/, vlm_spastic/, static/ subdirs)
+        # Writes go through a background thread so detection loops never
+        # block on PNG encoding / SD-card I/O.
         self.screenshot_manager = ScreenshotManager(
             base_dir=Path(config.screenshot_dir),
-            max_screenshots=config.max_screenshots
+            max_screenshots=config.max_screenshots,
+            async_writes=True
         )
 
         # Web UI state
         self.webui = None
+        self._published_blocking = False  # Last blocking state pushed to the web UI
+        # Capture time of the newest frame each detector has acted on, and
+        # the block start/stop decision awaiting its overlay change; used
+        # for the block-start / unblock latency histograms
+        self._ocr_frame_ts = 0.0
+        self._vlm_frame_ts = 0.0
+        self._pending_flip = None  # ('start' | 'stop', frame capture time)
         self.start_time = time.time()
         self.blocking_paused_until = 0  # Timestamp when pause expires
         # HDMI reconnect grace period: when the TV reconnects, blocking is
@@ -720,18 +712,32 @@ class Minus:
         self._fire_tv_setup_thread = None
 
         # Night mode - automatic overnight YouTube playback for training data
-        self.autonomous_mode = AutonomousMode()
+        self.autonomous_mode = None
+        try:
+            from autonomous_mode import AutonomousMode
+            self.autonomous_mode = AutonomousMode()
+        except ImportError as e:
+            logger.warning(f"Autonomous mode not available: {e}")
 
         # IR transmitter (REI 8K HDMI switch). Constructor is hardware-free;
         # initialize() / first send() is what touches the PWM sysfs.
-        self.ir_transmitter = IRTransmitter() if HAS_IR else None
+        self.ir_transmitter = None
+        try:
+            from ir_transmitter import IRTransmitter
+            self.ir_transmitter = IRTransmitter()
+        except ImportError as e:
+            logger.warning(f"IR transmitter module not available: {e}")
 
         # Status LED strip (7× WS2812B on SPI0 MOSI). Constructor is hardware-
         # free; start() touches /dev/spidev0.0. If the user has the toggle
         # persisted to enabled, the thread is started near the end of __init__
         # so the "initializing" state shows until ad_blocker fires up.
-        self.status_leds = (
-            StatusLEDController() if HAS_STATUS_LEDS else None)
+        self.status_leds = None
+        try:
+            from status_led_controller import StatusLEDController
+            self.status_leds = StatusLEDController()
+        except ImportError as e:
+            logger.warning(f"Status LED module not available: {e}")
         if self.status_leds is not None:
             # Gate the strip on the HDMI-TX display being connected when
             # ``leds_require_display`` is set (default). State machine still
@@ -810,13 +816,10 @@ class Minus:
         elif HAS_OCR:
             det_model, rec_model, dict_path = self._find_model_paths()
             if det_model:
-                # Use process-based OCR for hard timeout capability
+                # Use process-based OCR for hard timeout capability. The
+                # worker is spawned and warmed up by the 'ocr_model' boot
+                # phase in run(), in parallel with display bring-up
                 self.ocr = OCRProcess()
-                if self.ocr.start():
-                    logger.info("OCR process started (hard 1.2s timeout with keepalive)")
-                else:
-                    self.ocr = None
-                    logger.error("OCR process failed to start - continuing without OCR")
             else:
                 logger.warning("OCR model files not found - continuing without OCR")
         else:
@@ -824,7 +827,11 @@ class Minus:
             self.ocr_disabled = True
 
         # Initialize ad blocker (manages display pipeline with input-selector)
-        if HAS_ADBLOCKER:
+        try:
+            from ad_blocker import AdBlocker
+        except ImportError as e:
+            logger.warning(f"AdBlocker module not available: {e}")
+        else:
             try:
                 self.ad_blocker = AdBlocker(
                     connector_id=config.drm_connector_id,
@@ -864,6 +871,7 @@ class Minus:
         self.asr = None
         if HAS_ASR and is_asr_available():
             try:
+                from audio import AudioASRTap
                 self.asr_tap = AudioASRTap()
                 self.asr = ASRManager(self.asr_tap)
                 # Honour the persisted on/off toggle. When off we still
@@ -885,7 +893,11 @@ class Minus:
                         "available — running without ASR")
 
         # Initialize Audio passthrough
-        if HAS_AUDIO:
+        try:
+            from audio import AudioPassthrough
+        except ImportError as e:
+            logger.warning(f"Audio module not available: {e}")
+        else:
             try:
                 self.audio = AudioPassthrough(
                     capture_device=config.audio_capture_device,  # HDMI-RX audio (hw:4,0)
@@ -918,7 +930,11 @@ class Minus:
 
         # Initialize System Notification overlay (for VLM status, etc.)
         self.system_notification = None
-        if HAS_OVERLAY:
+        try:
+            from overlay import SystemNotification
+        except ImportError as e:
+            logger.warning(f"Overlay module not available: {e}")
+        else:
             try:
                 self.system_notification = SystemNotification(ustreamer_port=config.ustreamer_port)
                 logger.info("System notification overlay initialized")
@@ -926,6 +942,8 @@ class Minus:
                 logger.warning(f"System notification init failed: {e}")
                 self.system_notification = None
 
+        self.boot.record('init', init_start)
+
     def _find_model_paths(self):
         """Find PaddleOCR model paths.
         Search order: local models dir, then configurable OCR_MODEL_DIR (env MINUS_OCR_MODEL_DIR).
@@ -1194,6 +1212,7 @@ class Minus:
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
             )
+            apply_to_process('capture', self.ustreamer_process.pid)
 
             time.sleep(2)
 
@@ -1340,6 +1359,140 @@ class Minus:
 
     # ===== Device Setup Methods =====
 
+    def _start_model_loads(self):
+        """Kick off the OCR, VLM and ASR model loads as boot phases.
+
+        Each loads in its own worker process, so they overlap with each
+        other and with ustreamer/display bring-up on the main thread. The
+        OCR/VLM loops wait on these phases instead of sleeping.
+        """
+        if self.ocr is not None:
+            self.boot.start('ocr_model', self._load_ocr_model)
+        else:
+            self.boot.skip('ocr_model', 'OCR disabled or unavailable')
+
+        if self.vlm is not None:
+            # vlm_preload=False keeps the old behaviour of loading only once
+            # there's a picture to classify
+            self.boot.start('vlm_model', self._load_vlm_model,
+                            after=() if self.vlm_preload else ('hdmi_signal',))
+        else:
+            self.boot.skip('vlm_model', 'VLM unavailable')
+
+        if self.asr is not None and self.asr.enabled:
+            self.boot.start('asr_model', self.asr.preload)
+        else:
+            self.boot.skip('asr_model', 'ASR disabled or unavailable')
+
+    def _start_wifi_manager(self) -> bool:
+        """Start the WiFi manager and monitor thread (~5s, off the display path)."""
+        try:
+            from wifi_manager import get_wifi_manager
+        except ImportError as e:
+            logger.warning(f"WiFi Manager module not available: {e}")
+            return False
+        try:
+            wifi_manager = get_wifi_manager()
+
+            # Define callbacks for AP mode events
+            def on_ap_started():
+                logger.info("[WiFi] AP mode started - captive portal available")
+                self._set_led_state('wifi_setup')
+                if self.system_notification is not None:
+                    try:
+                        from overlay import SystemNotification
+                        overlay = SystemNotification(ustreamer_port=self.config.ustreamer_port)
+                        overlay.show(
+                            "Connect to WiFi: Minus\nPassword: minussetup\nOpen browser to configure",
+                            duration=0,  # Persistent until AP stops
+                            position='center'
+                        )
+                    except Exception as e:
+                        logger.warning(f"Failed to show AP overlay: {e}")
+
+            def on_ap_stopped():
+                logger.info("[WiFi] AP mode stopped - connected to WiFi")
+                self._set_led_state('idle')
+                if self.system_notification is not None:
+                    try:
+                        from overlay import SystemNotification
+                        overlay = SystemNotification(ustreamer_port=self.config.ustreamer_port)
+                        overlay.hide()
+                    except Exception as e:
+                        logger.warning(f"Failed to hide AP overlay: {e}")
+
+            wifi_manager._on_ap_started = on_ap_started
+            wifi_manager._on_ap_stopped = on_ap_stopped
+
+            # Start the WiFi monitor thread
+            wifi_manager.start_monitor()
+            self.wifi_manager = wifi_manager
+            logger.info("[WiFi] WiFi manager and monitor started")
+
+            # Log current WiFi status
+            status = wifi_manager.get_status()
+            if status.connected:
+                logger.info(f"[WiFi] Connected to: {status.ssid} ({status.ip_address})")
+            else:
+                logger.info("[WiFi] Not connected - AP will start in 30 seconds if no connection")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to start WiFi manager: {e}")
+            self.wifi_manager = None
+            return False
+
+    def _start_webui(self) -> bool:
+        """Import and start the web UI (Flask loads here, not at import)."""
+        try:
+            from webui import WebUI
+        except ImportError as e:
+            logger.warning(f"WebUI module not available: {e}")
+            return False
+        try:
+            webui = WebUI(
+                minus_instance=self,
+                port=self.config.webui_port,
+                ustreamer_port=self.config.ustreamer_port
+            )
+            webui.start()
+            self.webui = webui
+            logger.info(f"Web UI available at http://0.0.0.0:{self.config.webui_port}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to start Web UI: {e}")
+            self.webui = None
+            return False
+
+    def _start_autonomous_mode(self):
+        """Wire up autonomous mode and start it if it was left enabled."""
+        # Pass self (MinusAdBlocker) not self.ad_blocker (AdBlocker)
+        # Autonomous mode needs: audio module, last_ocr_texts
+        self.autonomous_mode.set_ad_blocker(self)
+        if hasattr(self, 'vlm') and self.vlm:
+            self.autonomous_mode.set_vlm(self.vlm)
+        if hasattr(self, 'frame_capture') and self.frame_capture:
+            self.autonomous_mode.set_frame_capture(self.frame_capture)
+
+        # Track autonomous active/inactive transitions and reflect on the
+        # status LEDs. Don't override blocking — when an ad is blocked
+        # while autonomous is running, blocking visuals win and we'll
+        # come back to autonomous after hide().
+        self._autonomous_was_active = False
+        def _on_autonomous_status(status):
+            active = bool(status.get('active'))
+            if active and not self._autonomous_was_active:
+                self._autonomous_was_active = True
+                if not self.blocking_active:
+                    self._set_led_state('autonomous')
+            elif not active and self._autonomous_was_active:
+                self._autonomous_was_active = False
+                if not self.blocking_active:
+                    # Fall back to whatever baseline applies (paused?
+                    # — unlikely while autonomous was running but possible).
+                    self._set_led_state(self._baseline_led_state())
+        self.autonomous_mode.set_status_callback(_on_autonomous_status)
+        self.autonomous_mode.start_if_enabled()
+
     def _start_device_setup_delayed(self, delay_seconds: float = 15.0):
         """Start device setup after a delay (to let display stabilize first).
 
@@ -1389,8 +1542,10 @@ class Minus:
 
     def _start_fire_tv_setup(self, saved_ip: str = None, device_type: str = 'fire_tv'):
         """Start Fire TV / Google TV setup flow."""
-        if not HAS_FIRE_TV:
-            logger.info("[FireTV] Fire TV module not available")
+        try:
+            from fire_tv_setup import FireTVSetupManager
+        except ImportError as e:
+            logger.info(f"[FireTV] Fire TV module not available: {e}")
             return
 
         device_name = "Google TV" if device_type == 'google_tv' else "Fire TV"
@@ -1560,7 +1715,7 @@ class Minus:
         logger.info(f"[FireTV] State changed to: {new_state}")
 
         # If we're waiting for auth, hook into OCR to detect the dialog
-        if new_state == FireTVSetupManager.STATE_WAITING_AUTH:
+        if new_state == self.fire_tv_setup.STATE_WAITING_AUTH:
             logger.info("[FireTV] Waiting for ADB authorization - OCR will detect dialog")
 
     def _on_fire_tv_connected(self, device_info: dict):
@@ -1595,7 +1750,7 @@ class Minus:
         if not self.fire_tv_setup:
             return False
 
-        if self.fire_tv_setup.state != FireTVSetupManager.STATE_WAITING_AUTH:
+        if self.fire_tv_setup.state != self.fire_tv_setup.STATE_WAITING_AUTH:
             return False
 
         return self.fire_tv_setup.check_for_auth_dialog(ocr_results)
@@ -2051,6 +2206,7 @@ class Minus:
             # Memory/health
             'memory_percent': health_status.memory_percent if health_status else 0,
             'temperature_c': self._get_soc_temperature(),
+            'thermal': self.thermal_governor.status(),
             'ustreamer_ok': health_status.ustreamer_responding if health_status else True,
             'video_ok': health_status.video_pipeline_ok if health_status else True,
 
@@ -2079,17 +2235,20 @@ class Minus:
         throttle trip (~85°C) fires on whichever zone gets there first.
         Returns None if sysfs is unreadable so the UI can show '--'.
         """
-        temps = []
         try:
-            for zone in glob.glob('/sys/class/thermal/thermal_zone*/temp'):
-                try:
-                    with open(zone) as f:
-                        temps.append(int(f.read().strip()) / 1000.0)
-                except (OSError, ValueError):
-                    continue
+            temps = read_thermal_zones()
         except Exception:
             return None
-        return round(max(temps), 1) if temps else None
+        return round(max(temps.values()), 1) if temps else None
+
+    @staticmethod
+    def _read_thermal_sensors():
+        """Thermal governor input: sysfs zones plus the Axera card."""
+        temps = read_thermal_zones()
+        axera = read_axera_temperature()
+        if axera is not None:
+            temps['axera'] = axera
+        return temps
 
     def _get_bandwidth_status(self) -> dict:
         """Get HDMI bandwidth/color format status for API."""
@@ -2152,15 +2311,7 @@ class Minus:
 
     def _add_vlm_decision(self, is_ad: bool, confidence: float = 0.75):
         """Add a VLM decision to the sliding window history with confidence."""
-        now = time.time()
-        self.vlm_decision_history.append((now, is_ad, confidence))
-
-        # Prune old decisions outside the window
-        cutoff = now - self.vlm_history_window
-        self.vlm_decision_history = [
-            entry for entry in self.vlm_decision_history
-            if entry[0] >= cutoff
-        ]
+        self.vlm_decision_history.append(is_ad, confidence)
 
     def _transition_hold_active(self, is_transition: bool) -> bool:
         """Whether to hold a block through a 'transition' frame.
@@ -2263,7 +2414,9 @@ class Minus:
         """
         Calculate VLM agreement percentage from sliding window using confidence-weighted votes.
 
-        High-confidence decisions count more than low-confidence ones.
+        High-confidence decisions count more than low-confidence ones. The
+        window keeps running weighted sums, so this is O(1) and cheap to call
+        under `_state_lock`.
 
         Returns:
             (ad_ratio, no_ad_ratio, total_decisions)
@@ -2271,36 +2424,13 @@ class Minus:
             - no_ad_ratio: confidence-weighted fraction of 'no-ad' decisions (0.0-1.0)
             - total_decisions: number of decisions in window
         """
-        if not self.vlm_decision_history:
-            return 0.0, 0.0, 0
-
-        now = time.time()
-        cutoff = now - self.vlm_history_window
-
-        # Filter to recent decisions (handle both old and new tuple formats)
-        recent = []
-        for entry in self.vlm_decision_history:
-            if entry[0] >= cutoff:
-                if len(entry) == 3:
-                    recent.append(entry)  # (time, is_ad, confidence)
-                else:
-                    # Legacy format without confidence - use default 0.75
-                    recent.append((entry[0], entry[1], 0.75))
-
-        if not recent:
-            return 0.0, 0.0, 0
-
-        total = len(recent)
-
-        # Confidence-weighted voting
-        ad_weight = sum(conf for _, is_ad, conf in recent if is_ad)
-        no_ad_weight = sum(conf for _, is_ad, conf in recent if not is_ad)
-        total_weight = ad_weight + no_ad_weight
+        return self.vlm_decision_history.agreement()
 
-        if total_weight == 0:
-            return 0.0, 0.0, total
-
-        return ad_weight / total_weight, no_ad_weight / total_weight, total
+    def _vlm_in_cooldown(self) -> bool:
+        """Whether the VLM state-change rate limit is still holding."""
+        if not self.vlm_cooldown_active:
+            return False
+        return time.time() - self.vlm_last_state_change < self.vlm_min_state_duration
 
     def _should_vlm_start_blocking(self) -> bool:
         """
@@ -2308,30 +2438,21 @@ class Minus:
 
         Uses hysteresis: if we're NOT currently blocking, we need higher agreement to START.
         """
-        ad_ratio, _, total = self._get_vlm_agreement()
-
-        if total < self.vlm_min_decisions:
-            return False  # Not enough data
-
-        # Check cooldown
-        now = time.time()
-        if self.vlm_cooldown_active:
-            time_since_change = now - self.vlm_last_state_change
-            if time_since_change < self.vlm_min_state_duration:
-                return False  # Still in cooldown
+        if self._vlm_in_cooldown():
+            return False  # Still in cooldown
 
         # Need strong ad agreement to start. Caller only reaches this function
         # when VLM is acting alone — the OCR-corroborated path at ~line 2778
         # takes an immediate shortcut and bypasses the sliding window entirely.
-        threshold = self.vlm_start_agreement
-        if not self.vlm_ad_detected:
-            # Not currently detecting - need even stronger evidence to start
-            threshold += self.vlm_hysteresis_boost
-        # Cap so hysteresis + raised base can't push us past what real-world
+        # Not currently detecting - need even stronger evidence to start.
+        # Capped so hysteresis + raised base can't push us past what real-world
         # noise allows (a few spurious "no" responses would block triggering forever).
-        threshold = min(threshold, self.vlm_start_threshold_cap)
-
-        return ad_ratio >= threshold
+        return self.vlm_decision_history.passes(
+            True, self.vlm_start_agreement,
+            min_count=self.vlm_min_decisions,
+            boost=0.0 if self.vlm_ad_detected else self.vlm_hysteresis_boost,
+            cap=self.vlm_start_threshold_cap,
+        )
 
     def _should_vlm_stop_blocking(self) -> bool:
         """
@@ -2339,25 +2460,16 @@ class Minus:
 
         Uses hysteresis: if we ARE currently blocking, we need higher agreement to STOP.
         """
-        _, no_ad_ratio, total = self._get_vlm_agreement()
-
-        if total < self.vlm_min_decisions:
-            return False  # Not enough data - keep current state
-
-        # Check cooldown
-        now = time.time()
-        if self.vlm_cooldown_active:
-            time_since_change = now - self.vlm_last_state_change
-            if time_since_change < self.vlm_min_state_duration:
-                return False  # Still in cooldown
-
-        # Need strong no-ad agreement to stop
-        threshold = self.vlm_stop_agreement
-        if self.vlm_ad_detected:
-            # Currently detecting - need even stronger evidence to stop
-            threshold += self.vlm_hysteresis_boost
-
-        return no_ad_ratio >= threshold
+        if self._vlm_in_cooldown():
+            return False  # Still in cooldown
+
+        # Need strong no-ad agreement to stop; currently detecting - need even
+        # stronger evidence to stop
+        return self.vlm_decision_history.passes(
+            False, self.vlm_stop_agreement,
+            min_count=self.vlm_min_decisions,
+            boost=self.vlm_hysteresis_boost if self.vlm_ad_detected else 0.0,
+        )
 
     # =========================================================================
     # System Settings
@@ -2576,6 +2688,22 @@ class Minus:
         self._save_system_settings()
         return {'success': True, 'replacement_modes': self._system_settings['replacement_modes']}
 
+    def _load_ocr_model(self) -> bool:
+        """Start the OCR worker process and wait for its warmup.
+
+        Returns:
+            True if OCR is ready, False otherwise (OCR is then disabled)
+        """
+        ocr = self.ocr
+        if ocr is None:
+            return False
+        if ocr.start():
+            logger.info("OCR process started (hard 1.2s timeout with keepalive)")
+            return True
+        self.ocr = None
+        logger.error("OCR process failed to start - continuing without OCR")
+        return False
+
     def _load_vlm_model(self) -> bool:
         """Load VLM model with retry logic.
 
@@ -2662,7 +2790,23 @@ class Minus:
         return present
 
     def check_hdmi_signal(self):
-        """Check HDMI signal and return resolution."""
+        """Check HDMI signal and return resolution.
+
+        Queries the DV timings with the ioctl directly; v4l2-ctl is the
+        fallback when the device can't be queried that way.
+        """
+        try:
+            from hdmi_source_watcher import read_dv_timings
+            timings = read_dv_timings(self.device)
+            if timings is None:
+                return None
+            return (timings.width, timings.height, timings.fps)
+        except OSError as e:
+            logger.debug(f"DV timings ioctl unavailable ({e}), using v4l2-ctl")
+        except Exception as e:
+            logger.error(f"Signal check error: {e}")
+            return None
+
         try:
             result = subprocess.run(
                 ['v4l2-ctl', '-d', self.device, '--query-dv-timings'],
@@ -2832,6 +2976,7 @@ class Minus:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
+        apply_to_process('capture', self.ustreamer_process.pid)
 
         time.sleep(2)
 
@@ -2910,16 +3055,22 @@ class Minus:
                     # pipeline (and tap) is producing buffers. Safe to
                     # call even if asr is None. Skip when disabled via the
                     # persisted toggle (worker not spawned, no model load).
+                    # Started from a thread: at boot it waits for the
+                    # 'asr_model' preload rather than holding up the display.
                     if self.asr is not None and self.asr.enabled:
-                        try:
-                            self.asr.start()
-                        except Exception as e:
-                            logger.warning(f"ASR start failed: {e}")
+                        threading.Thread(target=self._start_asr, daemon=True,
+                                         name='ASRStart').start()
                 else:
                     logger.warning("Audio passthrough failed to start")
 
         return display_ok
 
+    def _start_asr(self):
+        try:
+            self.asr.start()
+        except Exception as e:
+            logger.warning(f"ASR start failed: {e}")
+
     def start_display(self):
         """Start ustreamer and display pipeline."""
         # Kill any existing GStreamer processes (ustreamer handled in start_ustreamer)
@@ -2952,8 +3103,10 @@ class Minus:
 
     def _update_blocking_state(self):
         """Update combined blocking state using weighted OCR/VLM model."""
+        lock_wait_start = time.time()
         with self._state_lock:
             now = time.time()
+            tracing.add_span('decision.lock_wait', lock_wait_start, now)
             ocr_recent = (now - self.last_ocr_ad_time) < self.OCR_TRUST_WINDOW
 
             # Starting blocking
@@ -3061,6 +3214,8 @@ class Minus:
                 if should_start:
                     self.ad_detected = True
                     self.blocking_start_time = now
+                    self._pending_flip = ('start', getattr(
+                        self, '_ocr_frame_ts' if source in ('ocr', 'both') else '_vlm_frame_ts', 0.0))
                     self.blocking_source = source
                     self.blocking_asr_confirmed = asr_confirmed
                     # Falloff counter: if the last block ended recently (within the
@@ -3283,6 +3438,8 @@ class Minus:
 
                 if should_stop:
                     self.ad_detected = False
+                    self._pending_flip = ('stop', max(getattr(self, '_ocr_frame_ts', 0.0),
+                                                      getattr(self, '_vlm_frame_ts', 0.0)))
                     source_was = self.blocking_source
                     self.blocking_source = None
                     self.blocking_asr_confirmed = False
@@ -3320,12 +3477,23 @@ class Minus:
 
             if self.ad_blocker:
                 if should_show_blocking:
-                    self.ad_blocker.show(
-                        self._display_source(),
-                        ocr_trigger_text=self._first_match_for_overlay(),
-                    )
+                    with tracing.span('blocker.show'):
+                        self.ad_blocker.show(
+                            self._display_source(),
+                            ocr_trigger_text=self._first_match_for_overlay(),
+                        )
                 else:
-                    self.ad_blocker.hide()
+                    with tracing.span('blocker.hide'):
+                        self.ad_blocker.hide()
+
+            # Push blocking flips to web UI clients right away
+            should_show_blocking = bool(should_show_blocking)
+            if should_show_blocking != getattr(self, '_published_blocking', False):
+                self._published_blocking = should_show_blocking
+                self._observe_flip_latency(should_show_blocking)
+                if getattr(self, 'webui', None) is not None:
+                    self.webui.notify_status_changed()
+            self._pending_flip = None
 
             # Also control audio based on blocking state (same logic)
             # But respect ad_blocker test mode - don't unmute during tests
@@ -3334,16 +3502,42 @@ class Minus:
                     self.audio.mute()
                 elif not (self.ad_blocker and self.ad_blocker.is_test_mode_active()):
                     self.audio.unmute()
+            tracing.add_span('decision', lock_wait_start, time.time(),
+                             blocking=should_show_blocking)
+
+    def _observe_flip_latency(self, shown: bool):
+        """Record detection-to-overlay latency for a block start/stop.
+
+        Only flips caused by a detection decision count; pause/resume and
+        static-screen suppression also show/hide the overlay but have no
+        triggering frame.
+        """
+        pending = getattr(self, '_pending_flip', None)
+        if not pending or pending[0] != ('start' if shown else 'stop') or not pending[1]:
+            return
+        latency = time.time() - pending[1]
+        if 0 <= latency < 60:
+            (BLOCK_START_LATENCY if shown else UNBLOCK_LATENCY).observe(latency)
+
+    def _wait_for_model(self, phase: str) -> bool:
+        """Block a detection loop until its model phase finishes.
+
+        Returns True if the model loaded; False if it failed, was skipped,
+        or Minus stopped first.
+        """
+        while self.running and not self.boot.is_done(phase):
+            self.boot.wait(phase, timeout=1.0)
+        return self.running and self.boot.wait(phase, timeout=0)
 
     def ml_worker(self):
         """OCR processing thread."""
-        # Lower priority so video passthrough takes precedence
-        try:
-            os.nice(10)  # Higher nice = lower priority
-        except OSError:
-            pass  # May fail without permissions
+        # Lower priority (nice 10) so video passthrough takes precedence;
+        # cores per config.PLACEMENT_POLICY
+        apply_placement('ocr_loop')
         logger.info("OCR worker thread started")
-        time.sleep(2)
+        if not self._wait_for_model('ocr_model') or self.ocr is None:
+            logger.error("OCR model not ready - OCR loop not running")
+            return
 
         if self.frame_capture is None:
             logger.error("Frame capture not initialized")
@@ -3360,6 +3554,7 @@ class Minus:
                     time.sleep(1.0)
                     continue
 
+                tracing.start_trace('ocr_frame')
                 start_time = time.time()
                 frame = self.frame_capture.capture()
                 capture_time = (time.time() - start_time) * 1000
@@ -3367,6 +3562,7 @@ class Minus:
                 if frame is None:
                     time.sleep(0.5)
                     continue
+                self._ocr_frame_ts = start_time
 
                 self.frame_count += 1
 
@@ -3501,8 +3697,9 @@ class Minus:
                     self.scene_skip_count += 1
                     # Cap consecutive skips to catch ads that appear without scene change
                     if self.scene_skip_count < self.max_scene_skip:
-                        if self.scene_skip_count % 10 == 1:
-                            logger.info(f"OCR #{self.frame_count}: SKIPPED - scene unchanged (skipped {self.scene_skip_count} total)")
+                        suppressed = self.frame_log_throttle.ready('ocr_skip')
+                        if suppressed is not None:
+                            logger.info(f"OCR #{self.frame_count}: SKIPPED - scene unchanged (skipped {self.scene_skip_count} total, {suppressed} lines suppressed)")
                         time.sleep(0.1)
                         continue
                     else:
@@ -3513,6 +3710,10 @@ class Minus:
                 # Run OCR - OCRProcess has hard 1.2s timeout with process kill
                 ocr_results = self.ocr.ocr(frame_rgb)
                 ocr_time = (time.time() - start_time) * 1000 - capture_time
+                self.thermal_governor.record_latency('ocr', ocr_time / 1000.0)
+                if self.display_connected:
+                    # First OCR pass over live video: ads get blocked from here
+                    self.boot.mark(FIRST_PROTECTED_FRAME, after=('display', 'ocr_model'))
 
                 # Empty results could mean timeout (process was killed and restarted)
                 if not ocr_results:
@@ -3531,7 +3732,8 @@ class Minus:
                     if self._check_ocr_for_fire_tv_dialog(ocr_text_list):
                         logger.info("[FireTV] ADB authorization dialog detected on screen!")
 
-                ad_detected, matched_keywords, all_texts, is_terminal = self.ocr.check_ad_keywords(ocr_results)
+                with tracing.span('ocr.keywords'):
+                    ad_detected, matched_keywords, all_texts, is_terminal = self.ocr.check_ad_keywords(ocr_results)
 
                 # Store OCR texts and check for home screen / video interface keywords
                 self.last_ocr_texts = all_texts
@@ -3556,7 +3758,8 @@ class Minus:
                             and not getattr(self, 'static_blocking_suppressed',
                                             False)
                             and self.screenshot_manager is not None):
-                        self.screenshot_manager.save_non_ad_screenshot(frame)
+                        self.screenshot_manager.save_non_ad_screenshot(
+                            frame, source='sampler')
                         self._last_nonad_sample_time = _nonad_now
                 except Exception as _e:
                     logger.debug(
@@ -3876,7 +4079,7 @@ class Minus:
                 if all_texts:
                     text_preview = ' | '.join(all_texts)[:120]
                     logger.info(f"OCR #{self.frame_count}: cap={capture_time:.0f}ms ocr={ocr_time:.0f}ms{blocking_info} - {text_preview}")
-                elif self.frame_count % 10 == 0:
+                elif self.frame_log_throttle.ready('ocr_no_text') is not None:
                     logger.info(f"OCR #{self.frame_count}: cap={capture_time:.0f}ms ocr={ocr_time:.0f}ms, no text{blocking_info}")
 
                 self.prev_frame = frame.copy()
@@ -3890,19 +4093,18 @@ class Minus:
             except Exception as e:
                 logger.exception(f"OCR worker error: {e}")
 
-            time.sleep(0.1)
+            # 0.1s normally; longer while the thermal governor backs off
+            time.sleep(self.thermal_governor.ocr_pause_s)
 
         logger.info("OCR worker thread stopped")
 
     def vlm_worker(self):
         """VLM processing thread."""
-        # Lower priority so video passthrough takes precedence
-        try:
-            os.nice(10)  # Higher nice = lower priority
-        except OSError:
-            pass  # May fail without permissions
+        # Lower priority (nice 10) so video passthrough takes precedence;
+        # cores per config.PLACEMENT_POLICY
+        apply_placement('vlm_loop')
         logger.info("VLM worker thread started")
-        time.sleep(3)
+        self._wait_for_model('vlm_model')
 
         if self.frame_capture is None:
             logger.error("Frame capture not initialized for VLM")
@@ -3940,6 +4142,7 @@ class Minus:
                     time.sleep(1.0)
                     continue
 
+                tracing.start_trace('vlm_frame')
                 start_time = time.time()
                 frame = self.frame_capture.capture()
 
@@ -3954,17 +4157,20 @@ class Minus:
                     self.vlm_scene_skip_count += 1
                     # Cap consecutive skips to catch ads
                     if self.vlm_scene_skip_count < self.vlm_max_scene_skip:
-                        if self.vlm_scene_skip_count % 10 == 1:
-                            logger.info(f"VLM #{self.vlm_frame_count}: SKIPPED - scene unchanged (skipped {self.vlm_scene_skip_count} total)")
+                        suppressed = self.frame_log_throttle.ready('vlm_skip')
+                        if suppressed is not None:
+                            logger.info(f"VLM #{self.vlm_frame_count}: SKIPPED - scene unchanged (skipped {self.vlm_scene_skip_count} total, {suppressed} lines suppressed)")
                         time.sleep(0.5)
                         continue
                     else:
                         logger.debug(f"VLM #{self.vlm_frame_count}: Force run after {self.vlm_scene_skip_count} skips")
 
-                cv2.imwrite(vlm_image_path, frame)
+                with tracing.span('vlm.write_frame'):
+                    cv2.imwrite(vlm_image_path, frame)
 
                 # Run VLM - VLMProcess has hard 2s timeout with process kill
                 is_ad, response, elapsed, confidence = self.vlm.detect_ad(vlm_image_path)
+                self._vlm_frame_ts = start_time
 
                 # Check if VLM was killed (response will be "KILLED")
                 if response == "KILLED":
@@ -3972,6 +4178,9 @@ class Minus:
                     self.vlm_prev_frame = frame.copy()
                     self.vlm_scene_skip_count = 0
                     continue
+                self.thermal_governor.record_latency('vlm', elapsed)
+                if self.display_connected:
+                    self.boot.mark('first_vlm_frame', after=('display', 'vlm_model'))
 
                 # Discard slow VLM responses - scene likely changed during inference
                 VLM_MAX_RELEVANT_TIME = 2.0
@@ -4079,7 +4288,8 @@ class Minus:
             except Exception as e:
                 logger.exception(f"VLM worker error: {e}")
 
-            time.sleep(0.5)
+            # 0.5s normally; longer while the thermal governor backs off
+            time.sleep(self.thermal_governor.vlm_pause_s)
 
         # Clean up VLM frame file
         try:
@@ -4093,6 +4303,10 @@ class Minus:
         """Start the stream processing."""
         logger.info("Starting Minus...")
 
+        # Keep this thread, and every thread it starts without a role of its
+        # own, off the cores reserved for capture and encode
+        apply_placement('main')
+
         # Status LEDs: if the user persisted the toggle as enabled, start the
         # animation thread now and show the "initializing" white pulse until
         # the rest of the boot sequence settles into idle / blocking / etc.
@@ -4103,149 +4317,90 @@ class Minus:
             except Exception as e:
                 logger.warning(f"Status LEDs start failed: {e}")
 
-        # Start web UI early so it's accessible even when waiting for HDMI signal
-        if HAS_WEBUI:
-            try:
-                self.webui = WebUI(
-                    minus_instance=self,
-                    port=self.config.webui_port,
-                    ustreamer_port=self.config.ustreamer_port
-                )
-                self.webui.start()
-                logger.info(f"Web UI available at http://0.0.0.0:{self.config.webui_port}")
-            except Exception as e:
-                logger.warning(f"Failed to start Web UI: {e}")
-                self.webui = None
+        # Model loads run in their worker processes from here on, alongside
+        # everything below (see _start_model_loads)
+        self._start_model_loads()
+
+        # Start web UI early so it's accessible even when waiting for HDMI
+        # signal; importing Flask runs alongside the HDMI check
+        self.boot.start('webui', self._start_webui)
 
         # Check HDMI signal IMMEDIATELY - we want to show display ASAP (within 3-5s)
-        # This is done BEFORE WiFi manager (which takes ~5s) to minimize startup delay
-        signal_info = self.check_hdmi_signal()
+        with self.boot.phase('hdmi_check'):
+            signal_info = self.check_hdmi_signal()
 
-        # If HDMI signal present, show loading display IMMEDIATELY
-        # The loading mode uses videotestsrc (no ustreamer needed) so it starts instantly
-        if signal_info and self.ad_blocker:
-            logger.info("HDMI signal detected - showing loading display while initializing...")
-            self.ad_blocker.start_loading_mode()
+            # If HDMI signal present, show loading display IMMEDIATELY
+            # The loading mode uses videotestsrc (no ustreamer needed) so it starts instantly
+            if signal_info and self.ad_blocker:
+                logger.info("HDMI signal detected - showing loading display while initializing...")
+                self.ad_blocker.start_loading_mode()
 
-        # Start WiFi manager and monitor thread
+        # Start WiFi manager and monitor thread in the background (~5s)
         # If no WiFi, it will auto-start AP mode after 30 seconds
-        if HAS_WIFI_MANAGER:
-            try:
-                self.wifi_manager = get_wifi_manager()
-
-                # Define callbacks for AP mode events
-                def on_ap_started():
-                    logger.info("[WiFi] AP mode started - captive portal available")
-                    self._set_led_state('wifi_setup')
-                    if HAS_OVERLAY:
-                        try:
-                            overlay = SystemNotification(ustreamer_port=self.config.ustreamer_port)
-                            overlay.show(
-                                "Connect to WiFi: Minus\nPassword: minussetup\nOpen browser to configure",
-                                duration=0,  # Persistent until AP stops
-                                position='center'
-                            )
-                        except Exception as e:
-                            logger.warning(f"Failed to show AP overlay: {e}")
-
-                def on_ap_stopped():
-                    logger.info("[WiFi] AP mode stopped - connected to WiFi")
-                    self._set_led_state('idle')
-                    if HAS_OVERLAY:
-                        try:
-                            overlay = SystemNotification(ustreamer_port=self.config.ustreamer_port)
-                            overlay.hide()
-                        except Exception as e:
-                            logger.warning(f"Failed to hide AP overlay: {e}")
-
-                self.wifi_manager._on_ap_started = on_ap_started
-                self.wifi_manager._on_ap_stopped = on_ap_stopped
-
-                # Start the WiFi monitor thread
-                self.wifi_manager.start_monitor()
-                logger.info("[WiFi] WiFi manager and monitor started")
-
-                # Log current WiFi status
-                status = self.wifi_manager.get_status()
-                if status.connected:
-                    logger.info(f"[WiFi] Connected to: {status.ssid} ({status.ip_address})")
-                else:
-                    logger.info("[WiFi] Not connected - AP will start in 30 seconds if no connection")
-            except Exception as e:
-                logger.warning(f"Failed to start WiFi manager: {e}")
-                self.wifi_manager = None
-        else:
-            self.wifi_manager = None
+        self.wifi_manager = None
+        self.boot.start('wifi', self._start_wifi_manager)
 
         # Start health monitor early so status is available
         if self.health_monitor:
             self.health_monitor.start()
             logger.info("Health monitor started")
 
-        # Note: HDMI check and start_loading_mode() already done above (before WiFi manager)
+        # Thermal governor: backs inference cadence off before the SoC or
+        # Axera card throttles, and restores it as they cool
+        self.thermal_governor.start(self._read_thermal_sensors)
+
+        # Note: HDMI check and start_loading_mode() already done above
         # signal_info variable is already set from that earlier check
 
-        # Start VLM preload in a background thread (non-blocking)
-        # This runs while the loading display is showing and main startup continues
-        vlm_preloaded = False
-        vlm_preload_thread = None
-        if self.vlm_preload and self.vlm:
-            def _preload_vlm():
-                nonlocal vlm_preloaded
-                logger.info("Preloading VLM model in background thread...")
-                vlm_preloaded = self._load_vlm_model()
-                if vlm_preloaded:
-                    logger.info("VLM preload complete - model ready")
-
-            vlm_preload_thread = threading.Thread(target=_preload_vlm, daemon=True)
-            vlm_preload_thread.start()
-            logger.info("VLM preload started in background")
-
-        # If no HDMI signal, handle the no-signal case
-        if not signal_info:
-            logger.warning("No HDMI signal detected - starting in no-signal mode")
-            # Start display in no-signal mode to show "NO HDMI INPUT"
-            no_signal_display_ok = False
-            if self.ad_blocker:
-                no_signal_display_ok = self.ad_blocker.start_no_signal_mode()
-                if no_signal_display_ok:
-                    logger.info("Display showing NO SIGNAL message - waiting for HDMI...")
+        # 'hdmi_signal' gates the VLM load when vlm_preload is off
+        with self.boot.phase('hdmi_signal', after=('hdmi_check',)) as hdmi_phase:
+            # If no HDMI signal, handle the no-signal case
+            if not signal_info:
+                logger.warning("No HDMI signal detected - starting in no-signal mode")
+                # Start display in no-signal mode to show "NO HDMI INPUT"
+                no_signal_display_ok = False
+                if self.ad_blocker:
+                    no_signal_display_ok = self.ad_blocker.start_no_signal_mode()
+                    if no_signal_display_ok:
+                        logger.info("Display showing NO SIGNAL message - waiting for HDMI...")
+                    else:
+                        logger.warning("Could not start no-signal display (DRM unavailable?) - waiting for HDMI without display")
                 else:
-                    logger.warning("Could not start no-signal display (DRM unavailable?) - waiting for HDMI without display")
-            else:
-                logger.warning("No ad_blocker available - waiting for HDMI without display")
+                    logger.warning("No ad_blocker available - waiting for HDMI without display")
 
-            # Poll for HDMI signal every 2 seconds (even if no-signal display failed)
-            self.running = True
-            try:
-                poll_count = 0
-                while self.running:
-                    time.sleep(2)
-                    poll_count += 1
-                    if poll_count % 15 == 0:  # Log every 30 seconds
-                        logger.info("Still waiting for HDMI input...")
-
-                    # Retry no-signal display periodically if it failed initially
-                    if not no_signal_display_ok and self.ad_blocker and poll_count % 5 == 0:
-                        no_signal_display_ok = self.ad_blocker.start_no_signal_mode()
-                        if no_signal_display_ok:
-                            logger.info("No-signal display now working")
-
-                    signal_info = self.check_hdmi_signal()
-                    if signal_info:
-                        width, height, fps = signal_info
-                        logger.info(f"HDMI signal detected: {width}x{height} @ {fps}fps - switching to loading mode")
-                        # Switch to loading mode while we start the display
-                        if self.ad_blocker:
-                            self.ad_blocker.start_loading_mode()
-                        break
-            except KeyboardInterrupt:
-                self.stop()
-                return True
+                # Poll for HDMI signal every 2 seconds (even if no-signal display failed)
+                self.running = True
+                try:
+                    poll_count = 0
+                    while self.running:
+                        time.sleep(2)
+                        poll_count += 1
+                        if poll_count % 15 == 0:  # Log every 30 seconds
+                            logger.info("Still waiting for HDMI input...")
+
+                        # Retry no-signal display periodically if it failed initially
+                        if not no_signal_display_ok and self.ad_blocker and poll_count % 5 == 0:
+                            no_signal_display_ok = self.ad_blocker.start_no_signal_mode()
+                            if no_signal_display_ok:
+                                logger.info("No-signal display now working")
+
+                        signal_info = self.check_hdmi_signal()
+                        if signal_info:
+                            width, height, fps = signal_info
+                            logger.info(f"HDMI signal detected: {width}x{height} @ {fps}fps - switching to loading mode")
+                            # Switch to loading mode while we start the display
+                            if self.ad_blocker:
+                                self.ad_blocker.start_loading_mode()
+                            break
+                except KeyboardInterrupt:
+                    hdmi_phase.ok = False
+                    self.stop()
+                    return True
 
-            if not self.running:
-                self.stop()
-                return True
+                if not self.running:
+                    hdmi_phase.ok = False
+                    self.stop()
+                    return True
 
         width, height, fps = signal_info
         logger.info(f"HDMI signal: {width}x{height} @ {fps}fps")
@@ -4260,32 +4415,35 @@ class Minus:
         self.running = True
 
         # Start display (will transition from loading to live when ready)
-        if not self.start_display():
-            logger.warning("Failed to start display - will retry in background")
-            self.display_connected = False
-            self.display_error = "Display output not available. Check HDMI-TX connection to TV/monitor."
-            # Start retry loop in background
-            self._start_display_retry_loop()
-        else:
-            self.display_connected = True
-            self.display_error = None
-            # Reset signal lost flag - display is running so signal is present
-            # This fixes race condition where health monitor may have triggered
-            # signal lost callback during startup before ustreamer was ready
-            self._hdmi_signal_lost = False
-            # Resume audio watchdog if it was paused during startup
-            if self.audio:
-                self.audio.resume_watchdog()
-                self.audio.unmute()
-            logger.info("Display running at 30 FPS with instant ad blocking")
+        with self.boot.phase('display', after=('hdmi_signal',)) as display_phase:
+            if not self.start_display():
+                logger.warning("Failed to start display - will retry in background")
+                display_phase.ok = False
+                self.display_connected = False
+                self.display_error = "Display output not available. Check HDMI-TX connection to TV/monitor."
+                # Start retry loop in background
+                self._start_display_retry_loop()
+            else:
+                self.display_connected = True
+                self.display_error = None
+                # Reset signal lost flag - display is running so signal is present
+                # This fixes race condition where health monitor may have triggered
+                # signal lost callback during startup before ustreamer was ready
+                self._hdmi_signal_lost = False
+                # Resume audio watchdog if it was paused during startup
+                if self.audio:
+                    self.audio.resume_watchdog()
+                    self.audio.unmute()
+                logger.info("Display running at 30 FPS with instant ad blocking")
 
+        # The OCR/VLM loops start now and wait on their model phases
         if self.ocr:
             self.ml_thread = threading.Thread(target=self.ml_worker, daemon=True)
             self.ml_thread.start()
 
-            if PaddleOCR:
-                all_keywords = PaddleOCR.AD_KEYWORDS_EXACT + PaddleOCR.AD_KEYWORDS_WORD
-                logger.info(f"OCR watching for ad keywords: {all_keywords}")
+        if self.vlm:
+            self.vlm_thread = threading.Thread(target=self.vlm_worker, daemon=True)
+            self.vlm_thread.start()
 
         # Note: Health monitor and Web UI already started at beginning of run()
 
@@ -4293,55 +4451,12 @@ class Minus:
         # 5 second delay ensures display is stable before scanning
         self._start_device_setup_delayed(delay_seconds=5.0)
 
-        # Load VLM model and start worker thread
-        # If vlm_preload=True, wait for background preload to finish. Otherwise load now.
-        if self.vlm:
-            if vlm_preload_thread and vlm_preload_thread.is_alive():
-                # Wait for background preload to complete (should be nearly done by now)
-                logger.info("Waiting for VLM preload to complete...")
-                vlm_preload_thread.join(timeout=60)  # Max 60s wait
-                if vlm_preload_thread.is_alive():
-                    logger.warning("VLM preload still running after 60s, continuing anyway")
-            elif not vlm_preloaded and not self.vlm_preload:
-                # Load VLM now (vlm_preload=False means wait for HDMI)
-                logger.info("Loading VLM model after HDMI detected (vlm_preload=False)...")
-                vlm_preloaded = self._load_vlm_model()
-
-            # Start VLM worker thread if model is loaded (check vlm.is_ready)
-            if self.vlm.is_ready:
-                self.vlm_thread = threading.Thread(target=self.vlm_worker, daemon=True)
-                self.vlm_thread.start()
-                logger.info("VLM worker started (process-based with hard 2s timeout)")
-
-        # Start night mode if it was enabled (persisted setting)
+        # Start night mode if it was enabled (persisted setting) once there
+        # is a picture and the VLM it drives is up. Not gated on 'display':
+        # a failed display start keeps retrying in the background.
         if self.autonomous_mode:
-            # Pass self (MinusAdBlocker) not self.ad_blocker (AdBlocker)
-            # Autonomous mode needs: audio module, last_ocr_texts
-            self.autonomous_mode.set_ad_blocker(self)
-            if hasattr(self, 'vlm') and self.vlm:
-                self.autonomous_mode.set_vlm(self.vlm)
-            if hasattr(self, 'frame_capture') and self.frame_capture:
-                self.autonomous_mode.set_frame_capture(self.frame_capture)
-
-            # Track autonomous active/inactive transitions and reflect on the
-            # status LEDs. Don't override blocking — when an ad is blocked
-            # while autonomous is running, blocking visuals win and we'll
-            # come back to autonomous after hide().
-            self._autonomous_was_active = False
-            def _on_autonomous_status(status):
-                active = bool(status.get('active'))
-                if active and not self._autonomous_was_active:
-                    self._autonomous_was_active = True
-                    if not self.blocking_active:
-                        self._set_led_state('autonomous')
-                elif not active and self._autonomous_was_active:
-                    self._autonomous_was_active = False
-                    if not self.blocking_active:
-                        # Fall back to whatever baseline applies (paused?
-                        # — unlikely while autonomous was running but possible).
-                        self._set_led_state(self._baseline_led_state())
-            self.autonomous_mode.set_status_callback(_on_autonomous_status)
-            self.autonomous_mode.start_if_enabled()
+            self.boot.start('autonomous', self._start_autonomous_mode,
+                            after=('hdmi_signal', 'vlm_model'))
 
         logger.info("Minus running - press Ctrl+C to stop")
 
@@ -4424,6 +4539,8 @@ class Minus:
         if self.health_monitor:
             self.health_monitor.stop()
 
+        self.thermal_governor.stop()
+
         # Stop web UI
         if self.webui:
             self.webui.stop()
@@ -4432,6 +4549,10 @@ class Minus:
         if self.frame_capture:
             self.frame_capture.cleanup()
 
+        # Flush queued screenshot writes to disk
+        if self.screenshot_manager:
+            self.screenshot_manager.stop()
+
         if self.ustreamer_process:
             self.ustreamer_process.terminate()
             try:
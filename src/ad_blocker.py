@@ -7,13 +7,27 @@ Uses ustreamer's native blocking mode for smooth 60fps overlays and animations.
 Architecture:
 - Simple GStreamer pipeline with queue element for smooth video display
 - All overlay compositing done in ustreamer's MPP encoder (60fps preview!)
-- Control via HTTP API to ustreamer's /blocking endpoints
+- Control via HTTP API to ustreamer's /blocking endpoints, through the
+  shared keep-alive client in ustreamer_control (which coalesces
+  /blocking/set updates and publishes /dev/shm/minus_blocking_state)
 
 Features:
 - 60fps live preview window (vs ~4fps with GStreamer gdkpixbufoverlay)
 - Smooth animations via rapid API updates
 - Spanish vocabulary practice during ad blocks
 - Pixelated background from pre-ad content
+
+Block onset:
+Until the first overlaid frame is encoded the ad itself is on screen, so
+show() used to pay for every round trip it made (background decode +
+pixelate + upload, the full /blocking/set, text after the animation).
+While idle, the snapshot-buffer thread now keeps the next block pre-armed
+in ustreamer with blocking still disabled: pixelated background, first
+vocab/fact text, word color, scales and preview geometry, refreshed every
+PREARM_INTERVAL_S (which also re-arms after a ustreamer restart). show()
+then sends one 'enabled=true' call. minus_block_onset_seconds records
+show() -> first frame reaching the display sink after ustreamer
+acknowledged the enable, labelled by path (prearmed / full).
 """
 
 import os
@@ -40,6 +54,9 @@ from gi.repository import Gst
 from vocabulary import SPANISH_VOCABULARY, VOCABULARY_COMBINED
 from facts import DID_YOU_KNOW
 from config import MinusConfig
+from metrics import histogram
+from ustreamer_control import get_ustreamer_control
+from replacement_cache import get_photo_frame_cache
 from drm import (
     get_color_format, set_color_format, is_connector_connected,
     check_hdmi_i2c_errors, COLOR_FORMAT_YCBCR420, COLOR_FORMAT_NAMES,
@@ -49,6 +66,25 @@ from drm import (
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Pixelated background: one block per PIXELATE_FACTOR source pixels,
+# sent PIXELATE_OUTPUT_WIDTH wide (ustreamer scales it to the output)
+PIXELATE_FACTOR = 20
+PIXELATE_OUTPUT_WIDTH = 960
+# Re-push the idle pre-armed blocking state this often
+PREARM_INTERVAL_S = float(os.environ.get('MINUS_PREARM_INTERVAL', '4.0'))
+# show() -> first overlaid frame; slower onsets are logged
+BLOCK_ONSET_BUDGET_S = float(os.environ.get('MINUS_BLOCK_ONSET_BUDGET', '0.1'))
+
+_ONSET_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+BLOCK_ENABLE_ACK = histogram(
+    'minus_block_enable_ack_seconds',
+    'show() call to ustreamer acknowledging blocking enable', ['path'],
+    buckets=_ONSET_BUCKETS)
+BLOCK_ONSET = histogram(
+    'minus_block_onset_seconds',
+    'show() call to first overlaid frame at the display sink', ['path'],
+    buckets=_ONSET_BUCKETS)
+
 
 
 class DRMAdBlocker:
@@ -66,6 +102,7 @@ class DRMAdBlocker:
         self.connector_id = connector_id
         self.plane_id = plane_id
         self.ustreamer_port = ustreamer_port
+        self._control = get_ustreamer_control(ustreamer_port)
         self.minus = minus_instance
         self.output_width = output_width or 1920
         self.output_height = output_height or 1080
@@ -199,6 +236,16 @@ class DRMAdBlocker:
         self._stop_snapshot_buffer = threading.Event()
         self._snapshot_interval = 2.0
 
+        # Next block's state, already pushed to ustreamer while idle (see
+        # _prearm). None means show() has to send everything itself.
+        self._prearmed = None
+        # Block started with its text already on screen: the first rotation
+        # waits a full dwell instead of replacing it straight away
+        self._block_text_armed = False
+        # [show() time, path, buffers still queued from before the enable]
+        # until the first overlaid frame reaches the display sink
+        self._onset_pending = None
+
         # Adaptive bandwidth fallback for problematic HDMI cables
         # Uses i2c error detection: when HDMI signal fails at high bandwidth,
         # the dwhdmi driver floods dmesg with "i2c read err!" messages.
@@ -285,28 +332,26 @@ class DRMAdBlocker:
             )
 
     def _blocking_api_call(self, endpoint, params=None, data=None, method='GET', timeout=0.1):
-        """Make an API call to ustreamer blocking endpoint."""
-        try:
-            url = f"http://localhost:{self.ustreamer_port}{endpoint}"
-            if params:
-                url += '?' + urllib.parse.urlencode(params)
+        """Make an API call to ustreamer blocking endpoint and return its reply.
 
-            if method == 'POST' and data:
-                req = urllib.request.Request(url, data=data, method='POST')
-                req.add_header('Content-Type', 'image/jpeg')
-            else:
-                req = urllib.request.Request(url)
+        /blocking/set goes out together with any pending _blocking_set()
+        fields; use this form when the result or ordering against the
+        caller matters (enable/disable, pre-arm).
+        """
+        if endpoint == '/blocking/set' and method == 'GET':
+            return self._control.set_blocking(params or {}, timeout=timeout)
+        return self._control.call(endpoint, params, data=data, method=method, timeout=timeout)
 
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                return json.loads(response.read().decode('utf-8'))
-        except urllib.error.URLError as e:
-            # Network errors - log at INFO since these indicate connectivity issues
-            logger.info(f"[DRMAdBlocker] API connection error ({endpoint}): {e}")
-            return None
-        except Exception as e:
-            # Other errors (JSON parse, etc.) - log at DEBUG
-            logger.debug(f"[DRMAdBlocker] API call error ({endpoint}): {e}")
-            return None
+    def _blocking_set(self, params):
+        """Queue /blocking/set fields; sent (coalesced) within one tick."""
+        self._control.set_blocking(params, wait=False)
+
+    def _blocking_queue(self, params):
+        """_blocking_set() whose reply _blocking_result() can wait for."""
+        return self._control.queue_blocking(params)
+
+    def _blocking_result(self, pending):
+        return self._control.result(pending)
 
     def _color_settings_neutral(self, settings=None):
         """True when color settings are identity (no adjustment needed)."""
@@ -336,9 +381,9 @@ class DRMAdBlocker:
                 if self._pipeline_has_colorbalance else ""
             )
             pipeline_str = (
-                f"souphttpsrc location=http://localhost:{self.ustreamer_port}/stream "
+                f"souphttpsrc name=videosrc location=http://localhost:{self.ustreamer_port}/stream "
                 f"is-live=true blocksize=524288 timeout=10 retries=-1 keep-alive=true ! "
-                f"multipartdemux ! jpegparse ! mppjpegdec ! video/x-raw,format=NV12 ! "
+                f"multipartdemux ! jpegparse ! mppjpegdec name=videodec ! video/x-raw,format=NV12 ! "
                 f"{colorbalance_part}"
                 f"queue max-size-buffers=3 leaky=downstream name=videoqueue ! "
                 f"identity name=fpsprobe ! "
@@ -373,6 +418,8 @@ class DRMAdBlocker:
     def _fps_probe_callback(self, pad, info, user_data):
         current_time = time.time()
         self._last_buffer_time = current_time
+        if self._onset_pending is not None:
+            self._observe_onset_frame()
 
         if self._consecutive_failures > 0:
             if current_time - self._last_restart_time > self._success_reset_time:
@@ -1313,9 +1360,31 @@ class DRMAdBlocker:
                 logger.debug(f"[DRMAdBlocker] get_replacement_modes failed: {e}")
         return {'vocab', 'fact', 'haiku'}
 
+    def _content_kind_locked(self, now):
+        """True while the last break's content kind is still in its cooldown."""
+        return bool(self._locked_content_kind) and now <= self._content_kind_lock_until
+
+    def _pick_content_item(self, kind):
+        """Vocab tuple or (title, body) fact for `kind`; None for photos."""
+        if kind == 'photos':
+            return None
+        if kind == 'fact':
+            return random.choice(DID_YOU_KNOW)
+        return random.choice(VOCABULARY_COMBINED)
+
+    def _format_content(self, kind, item, header):
+        if kind == 'photos':
+            return ""  # Photo mode hides the large text
+        if kind == 'fact':
+            return self._format_fact(header, item)
+        return self._format_vocab(header, item)
+
     def _render_vocab(self, header):
         vocab = random.choice(VOCABULARY_COMBINED)
         self._current_vocab = vocab
+        return self._format_vocab(header, vocab)
+
+    def _format_vocab(self, header, vocab):
         # 4-tuple -> single example; 5-tuple -> two examples on own lines
         spanish, pronunciation, english = vocab[0], vocab[1], vocab[2]
         examples = [ex for ex in vocab[3:] if ex]
@@ -1324,7 +1393,10 @@ class DRMAdBlocker:
         return f"{prefix}{spanish}\n({pronunciation})\n\n= {english}\n\n{example_block}"
 
     def _render_fact(self, header):
-        title, body = random.choice(DID_YOU_KNOW)
+        return self._format_fact(header, random.choice(DID_YOU_KNOW))
+
+    def _format_fact(self, header, fact):
+        title, body = fact
         prefix = f"{header}\n\n" if header else ""
         return f"{prefix}DID YOU KNOW?\n{title}\n\n{body}"
 
@@ -1378,6 +1450,13 @@ class DRMAdBlocker:
             return "[ NO SIGNAL ]\n\nHDMI DISCONNECTED\n\nWaiting for signal..."
         if source == 'no_hdmi_device':
             return "[ NO SIGNAL ]\n\nWAITING FOR HDMI..."
+        header = self._blocking_header(source)
+        kind = self._pick_content_kind()
+        if kind == 'fact':
+            return self._render_fact(header)
+        return self._render_vocab(header)
+
+    def _blocking_header(self, source):
         if not self._debug_overlay_enabled:
             header = ""
         elif source == 'ocr':
@@ -1394,11 +1473,7 @@ class DRMAdBlocker:
             header = "[ BLOCKING // OCR+VLM+ASR ]"
         else:
             header = "[ BLOCKING ]"
-
-        kind = self._pick_content_kind()
-        if kind == 'fact':
-            return self._render_fact(header)
-        return self._render_vocab(header)
+        return header
 
     def _get_debug_text(self):
         uptime_str = "N/A"
@@ -1472,14 +1547,13 @@ class DRMAdBlocker:
         """
         try:
             _name, y, u, v = random.choice(self.WORD_COLOR_PALETTE)
-            self._blocking_api_call(
-                '/blocking/set',
-                {'word_y': str(y), 'word_u': str(u), 'word_v': str(v)},
-            )
+            self._blocking_set({'word_y': str(y), 'word_u': str(u), 'word_v': str(v)})
         except Exception as e:
             logger.debug(f"[DRMAdBlocker] word color randomize skipped: {e}")
 
-    def _rotation_loop(self, source):
+    def _rotation_loop(self, source, first_wait=0.0):
+        if first_wait and self._stop_rotation.wait(first_wait):
+            return
         while not self._stop_rotation.is_set():
             kind = self._pick_content_kind()
             # Every rotation re-asserts preview_enabled + preview_grayscale
@@ -1492,67 +1566,48 @@ class DRMAdBlocker:
                 'preview_grayscale': 'true' if self._preview_grayscale else 'false',
                 'text_ocr': self._render_ocr_text(),
             }
-            if kind == 'photos':
+            if kind == 'photos' and self._push_photo_background():
                 # Photo-cycling replacement mode: swap the background image
                 # every ~5s, hide the large text so the photo reads as a
                 # screensaver. Stats + countdown bar stay on top. Preview
                 # window stays (greyscaled) so the user can still peek at
                 # the ad.
-                self._push_photo_background()
-                self._blocking_api_call('/blocking/set', {'text_vocab': '', **preview_state})
+                self._blocking_set({'text_vocab': '', **preview_state})
                 self._stop_rotation.wait(5.0)
             else:
+                # Text kinds, and photo blocks before any frame is ready
+                # (the frames are rendered while idle, not mid-block)
                 self._randomize_word_color()
                 text = self._get_blocking_text(source)
-                self._blocking_api_call('/blocking/set', {'text_vocab': text, **preview_state})
+                self._blocking_set({'text_vocab': text, **preview_state})
                 self._stop_rotation.wait(random.uniform(11.0, 15.0))
 
     def _push_photo_background(self):
         """Send a random library photo to ustreamer as the blocking bg.
 
         ustreamer scales whatever we POST to fill the composite frame, so a
-        raw photo of arbitrary aspect gets STRETCHED/distorted. We letterbox
-        it to the display aspect first (fit-within + black bars), so the
-        encoder's full-frame scale is aspect-preserving. Runs on the ~5s
-        photo-swap cadence (not a hot path), so the decode+pad+encode is fine.
+        raw photo of arbitrary aspect would get STRETCHED. Frames are
+        letterboxed to the display size ahead of time by the photo frame
+        cache (replacement_cache.py), so this is a file read and a POST.
+        Nothing is rendered here: with no frame ready yet (first photo
+        block after boot or an upload) this returns False and the cache
+        catches up from the idle pre-arm tick once the block ends.
         """
         try:
-            from photo_library import get_photo_library
-            lib = get_photo_library()
-            photo_id = lib.random_photo_id()
-            if not photo_id:
+            picked = get_photo_frame_cache().random_frame()
+            if picked is None:
+                logger.debug("[DRMAdBlocker] No photo frame ready, keeping the current background")
                 return False
-            data = lib.get_photo_bytes(photo_id)
-            if not data:
-                return False
-            # Letterbox to display aspect to avoid stretching.
-            try:
-                import numpy as np
-                W, H = int(self.output_width), int(self.output_height)
-                img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
-                if img is not None and W > 0 and H > 0:
-                    ih, iw = img.shape[:2]
-                    scale = min(W / iw, H / ih)
-                    nw, nh = max(1, int(round(iw * scale))), max(1, int(round(ih * scale)))
-                    resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_AREA)
-                    canvas = np.zeros((H, W, 3), dtype=np.uint8)  # black bars
-                    x, y = (W - nw) // 2, (H - nh) // 2
-                    canvas[y:y + nh, x:x + nw] = resized
-                    ok, enc = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    if ok:
-                        data = enc.tobytes()
-            except Exception as e:
-                logger.debug(f"[DRMAdBlocker] photo letterbox skipped (sending raw): {e}")
             result = self._blocking_api_call(
-                '/blocking/background', data=data, method='POST', timeout=0.8)
+                '/blocking/background', data=picked[1], method='POST', timeout=0.8)
             return bool(result and result.get('ok', False))
         except Exception as e:
             logger.warning(f"[DRMAdBlocker] photo background push failed: {e}")
             return False
 
-    def _start_rotation(self, source):
+    def _start_rotation(self, source, first_wait=0.0):
         self._stop_rotation.clear()
-        self._rotation_thread = threading.Thread(target=self._rotation_loop, args=(source,), daemon=True)
+        self._rotation_thread = threading.Thread(target=self._rotation_loop, args=(source, first_wait), daemon=True)
         self._rotation_thread.start()
 
     def _stop_rotation_thread(self):
@@ -1564,12 +1619,12 @@ class DRMAdBlocker:
     def _debug_loop(self):
         while not self._stop_debug.is_set():
             if self._debug_overlay_enabled:
-                self._blocking_api_call('/blocking/set', {'text_stats': self._get_debug_text()})
+                self._blocking_set({'text_stats': self._get_debug_text()})
             self._stop_debug.wait(self._debug_interval)
 
     def _start_debug(self):
         if not self._debug_overlay_enabled:
-            self._blocking_api_call('/blocking/set', {'text_stats': ''})
+            self._blocking_set({'text_stats': ''})
             return
         self._stop_debug.clear()
         self._debug_thread = threading.Thread(target=self._debug_loop, daemon=True, name="DebugUpdate")
@@ -1605,6 +1660,11 @@ class DRMAdBlocker:
                 # Log only first failure and every 10th to avoid spam
                 if consecutive_failures == 1 or consecutive_failures % 10 == 0:
                     logger.debug(f"[DRMAdBlocker] Snapshot buffer fetch failed ({consecutive_failures}x): {e}")
+            if consecutive_failures == 0:
+                try:
+                    self._prearm()
+                except Exception as e:
+                    logger.debug(f"[DRMAdBlocker] Pre-arm failed: {e}")
             self._stop_snapshot_buffer.wait(self._snapshot_interval)
 
     def _generate_fallback_background(self):
@@ -1632,61 +1692,66 @@ class DRMAdBlocker:
             logger.debug(f"[DRMAdBlocker] Fallback gradient generation failed: {e}")
             return None
 
+    def _background_jpeg(self):
+        """Blocking background as (jpeg_bytes, origin), or (None, reason).
+
+        Pixelates and darkens the oldest buffered snapshot (the pre-ad
+        frame). While the buffer is still empty (early boot / post-restart)
+        it falls back to a cheap radial gradient so the overlay isn't flat
+        black while we wait for the first capture.
+        """
+        try:
+            if not self._snapshot_buffer:
+                fallback = self._generate_fallback_background()
+                if fallback:
+                    return fallback, "fallback gradient, snapshot buffer empty"
+                return None, "no snapshots in buffer"
+            # Copy data immediately to avoid race with buffer updates
+            snapshot_entry = self._snapshot_buffer[0]
+            snapshot_data = bytes(snapshot_entry['data'])  # Make a copy
+        except (IndexError, KeyError):
+            return None, "snapshot buffer race condition"
+
+        try:
+            import cv2
+            import numpy as np
+            nparr = np.frombuffer(snapshot_data, np.uint8)
+            # libjpeg decodes straight to 1/8 scale (DCT scaling), so a 4K
+            # snapshot is never expanded to full size. The block grid is
+            # built from that thumbnail, darkened there, and only blown up
+            # to PIXELATE_OUTPUT_WIDTH; ustreamer's encoder scales it to the
+            # output like any other background.
+            img = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_8)
+            if img is not None:
+                h, w = img.shape[:2]
+                cols = max(1, w * 8 // PIXELATE_FACTOR)
+                rows = max(1, h * 8 // PIXELATE_FACTOR)
+                small = cv2.resize(img, (cols, rows), interpolation=cv2.INTER_AREA)
+                small = cv2.convertScaleAbs(small, alpha=0.6)
+                block = max(1, PIXELATE_OUTPUT_WIDTH // cols)
+                pixelated = cv2.resize(small, (cols * block, rows * block),
+                                       interpolation=cv2.INTER_NEAREST)
+                _, encoded = cv2.imencode('.jpg', pixelated, [cv2.IMWRITE_JPEG_QUALITY, 80])
+                return encoded.tobytes(), f"pixelated {cols}x{rows} blocks"
+            logger.warning("[DRMAdBlocker] Failed to decode snapshot for pixelation")
+        except ImportError:
+            logger.warning("[DRMAdBlocker] OpenCV not available for pixelation")
+        except Exception as e:
+            logger.warning(f"[DRMAdBlocker] Pixelation failed: {e}")
+        return snapshot_data, "snapshot, not pixelated"
+
     def _upload_background(self):
         """Upload pixelated background. Thread-safe for async execution."""
         try:
-            # Thread-safe: copy snapshot data atomically to avoid race conditions
-            try:
-                if not self._snapshot_buffer:
-                    # Buffer empty (early boot / post-restart). Upload a cheap
-                    # radial gradient as fallback so the overlay isn't flat
-                    # black while we wait for the first capture.
-                    fallback = self._generate_fallback_background()
-                    if fallback:
-                        self._blocking_api_call(
-                            '/blocking/background', data=fallback,
-                            method='POST', timeout=0.5)
-                        logger.info(
-                            "[DRMAdBlocker] Uploaded fallback gradient "
-                            "(snapshot buffer empty)"
-                        )
-                        return True
-                    logger.warning("[DRMAdBlocker] No snapshots in buffer for background")
-                    return False
-                # Copy data immediately to avoid race with buffer updates
-                snapshot_entry = self._snapshot_buffer[0]
-                snapshot_data = bytes(snapshot_entry['data'])  # Make a copy
-            except (IndexError, KeyError):
-                logger.warning("[DRMAdBlocker] Snapshot buffer race condition - skipping background")
+            data, origin = self._background_jpeg()
+            if data is None:
+                logger.warning(f"[DRMAdBlocker] No background to upload ({origin})")
                 return False
 
-            logger.info(f"[DRMAdBlocker] Uploading background ({len(self._snapshot_buffer)} snapshots in buffer)")
-
-            try:
-                import cv2
-                import numpy as np
-                nparr = np.frombuffer(snapshot_data, np.uint8)
-                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                if img is not None:
-                    h, w = img.shape[:2]
-                    factor = 20
-                    small = cv2.resize(img, (max(1, w // factor), max(1, h // factor)), interpolation=cv2.INTER_LINEAR)
-                    pixelated = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
-                    pixelated = (pixelated * 0.6).astype(np.uint8)
-                    _, encoded = cv2.imencode('.jpg', pixelated, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    snapshot_data = encoded.tobytes()
-                    logger.info(f"[DRMAdBlocker] Pixelated background: {w}x{h}, {len(snapshot_data)} bytes")
-                else:
-                    logger.warning("[DRMAdBlocker] Failed to decode snapshot for pixelation")
-            except ImportError:
-                logger.warning("[DRMAdBlocker] OpenCV not available for pixelation")
-            except Exception as e:
-                logger.warning(f"[DRMAdBlocker] Pixelation failed: {e}")
-
-            result = self._blocking_api_call('/blocking/background', data=snapshot_data, method='POST', timeout=0.5)
+            result = self._blocking_api_call('/blocking/background', data=data, method='POST', timeout=0.5)
             success = result is not None and result.get('ok', False)
             if success:
-                logger.info(f"[DRMAdBlocker] Background uploaded successfully")
+                logger.info(f"[DRMAdBlocker] Background uploaded ({origin}, {len(data)} bytes)")
             else:
                 logger.warning(f"[DRMAdBlocker] Background upload failed: {result}")
             return success
@@ -1696,6 +1761,164 @@ class DRMAdBlocker:
             logger.exception(f"[DRMAdBlocker] Background upload error: {e}")
             return False
 
+    def _text_scales(self):
+        """(vocab_scale, stats_scale) for the current frame width.
+
+        Scales are designed for 4K @ 10/4: at 1080p (1920 width)
+        vocab_scale=5, stats_scale=2; at 4K (3840 width) 10 and 4.
+        """
+        vocab_scale = max(3, min(12, self._frame_width // 384))
+        stats_scale = max(2, min(5, self._frame_width // 960))
+        return vocab_scale, stats_scale
+
+    def _prearm_key(self):
+        """Settings the pre-armed state was built for; any change re-arms."""
+        return (self._frame_width, self._frame_height, self._animation_enabled,
+                self._debug_overlay_enabled, self._pixelated_background_enabled,
+                self._box_alpha, self._text_y, self._text_u, self._text_v)
+
+    def _prearm(self):
+        """Keep the next block ready in ustreamer while blocking is off.
+
+        Runs on the snapshot-buffer thread. Pushes what show() would
+        otherwise send (first text, word color, scales, colors, starting
+        preview geometry) without touching 'enabled', then uploads a fresh
+        pixelated background. The chosen content is remembered so show()
+        commits to it. Re-pushed every PREARM_INTERVAL_S; returns True
+        while armed.
+
+        The fields are queued under the lock, so a show() that follows
+        always lands after them, but the reply is awaited outside it:
+        show() never waits on a pre-arm round trip.
+        """
+        now = time.time()
+        with self._lock:
+            if self.is_visible or self._animating:
+                self._prearmed = None
+                return False
+            armed = self._prearmed
+            key = self._prearm_key()
+            if armed and armed['key'] == key and now - armed['time'] < PREARM_INTERVAL_S:
+                return True
+
+            # Same choice show() would make: the cooldown lock if active,
+            # otherwise a roll made once and kept until used
+            locked = self._content_kind_locked(now)
+            if locked:
+                kind = self._locked_content_kind
+            elif armed and not armed['locked']:
+                kind = armed['kind']
+            else:
+                kind = self._roll_replacement_mode()
+            if armed and armed['kind'] == kind:
+                item, word = armed['item'], armed['word']
+            else:
+                item = self._pick_content_item(kind)
+                word = random.choice(self.WORD_COLOR_PALETTE)
+            text = self._format_content(kind, item, self._blocking_header('default'))
+
+            if self._animation_enabled:
+                x, y, w, h = 0, 0, self._frame_width, self._frame_height
+            else:
+                x = self._frame_width - self._preview_w - self._preview_padding
+                y = self._frame_height - self._preview_h - self._preview_padding
+                w, h = self._preview_w, self._preview_h
+            vocab_scale, stats_scale = self._text_scales()
+            _name, word_y, word_u, word_v = word
+            pending = self._blocking_queue({
+                'preview_x': str(x), 'preview_y': str(y),
+                'preview_w': str(w), 'preview_h': str(h),
+                'text_vocab': text, 'text_stats': '',
+                'text_vocab_scale': str(vocab_scale),
+                'text_stats_scale': str(stats_scale),
+                'box_alpha': str(self._box_alpha),
+                'text_y': str(self._text_y),
+                'text_u': str(self._text_u),
+                'text_v': str(self._text_v),
+                'word_y': str(word_y), 'word_u': str(word_u), 'word_v': str(word_v),
+            })
+            prearmed = {'kind': kind, 'item': item, 'word': word, 'text': text,
+                        'locked': locked, 'key': key, 'time': now, 'background': False,
+                        'pending': pending}
+            self._prearmed = prearmed
+
+        if self._blocking_result(pending) is None:
+            with self._lock:
+                if self._prearmed is prearmed:
+                    self._prearmed = None
+            return False
+
+        if self._pixelated_background_enabled:
+            # Outside the lock: decode + pixelate + POST must not delay show()
+            data, origin = self._background_jpeg()
+            result = None
+            if data is not None:
+                result = self._blocking_api_call(
+                    '/blocking/background', data=data, method='POST', timeout=0.5)
+            if result is not None and result.get('ok', False):
+                prearmed['background'] = True
+            else:
+                logger.debug(f"[DRMAdBlocker] Pre-arm background not uploaded ({origin}): {result}")
+        if 'photos' in self._get_enabled_replacement_modes():
+            # Display-sized photo frames are rendered while idle, never mid-block
+            get_photo_frame_cache().set_resolution(self.output_width, self.output_height)
+        return True
+
+    @staticmethod
+    def _prearm_failed(armed):
+        """The pre-arm request already came back without reaching ustreamer.
+
+        Still pending is fine: show()'s own call goes out with or after it.
+        """
+        pending = armed['pending']
+        return pending is not None and pending.done and pending.result is None
+
+    def _record_enable_ack(self, decided_at, path, result):
+        """Observe show() -> enable acknowledged, then wait for the first frame.
+
+        The overlay is composited into every frame encoded after the
+        enable, so the first buffer reaching the display sink past the ones
+        already queued is the first overlaid frame.
+        """
+        if result is None:
+            return
+        acked_at = time.monotonic()
+        BLOCK_ENABLE_ACK.labels(path=path).observe(acked_at - decided_at)
+        if self.pipeline is None:
+            # No display pipeline (web stream only): the ack is all we see
+            self._finish_onset(decided_at, path, acked_at)
+            return
+        queued = 0
+        try:
+            queue = self.pipeline.get_by_name('videoqueue')
+            if queue is not None:
+                queued = int(queue.get_property('current-level-buffers'))
+        except Exception:
+            pass
+        self._onset_pending = [decided_at, path, queued]
+
+    def _observe_onset_frame(self):
+        """Pad-probe side of the onset measurement (streaming thread)."""
+        pending = self._onset_pending
+        if pending is None:
+            return
+        if pending[2] > 0:
+            pending[2] -= 1  # Encoded before the enable
+            return
+        self._onset_pending = None
+        self._finish_onset(pending[0], pending[1], time.monotonic())
+
+    def _finish_onset(self, decided_at, path, shown_at):
+        onset = shown_at - decided_at
+        if not 0 <= onset < 10:
+            return
+        BLOCK_ONSET.labels(path=path).observe(onset)
+        if onset > BLOCK_ONSET_BUDGET_S:
+            logger.info(f"[DRMAdBlocker] Block onset {onset * 1000:.0f}ms ({path}), "
+                        f"over the {BLOCK_ONSET_BUDGET_S * 1000:.0f}ms budget")
+        else:
+            logger.debug(f"[DRMAdBlocker] Block onset {onset * 1000:.0f}ms ({path})")
+
     def _ease_out(self, t):
         return 1 - (1 - t) ** 2
 
@@ -1746,7 +1969,7 @@ class DRMAdBlocker:
                 w = int(corner_w + (full_w - corner_w) * t)
                 h = int(corner_h + (full_h - corner_h) * t)
 
-            self._blocking_api_call('/blocking/set', {'preview_x': str(x), 'preview_y': str(y), 'preview_w': str(w), 'preview_h': str(h)})
+            self._blocking_set({'preview_x': str(x), 'preview_y': str(y), 'preview_w': str(w), 'preview_h': str(h)})
 
             if progress >= 1.0:
                 break
@@ -1754,9 +1977,9 @@ class DRMAdBlocker:
 
         # Set final position
         if direction == 'start':
-            self._blocking_api_call('/blocking/set', {'preview_x': str(corner_x), 'preview_y': str(corner_y), 'preview_w': str(corner_w), 'preview_h': str(corner_h)})
+            self._blocking_set({'preview_x': str(corner_x), 'preview_y': str(corner_y), 'preview_w': str(corner_w), 'preview_h': str(corner_h)})
         else:
-            self._blocking_api_call('/blocking/set', {'preview_x': '0', 'preview_y': '0', 'preview_w': str(full_w), 'preview_h': str(full_h)})
+            self._blocking_set({'preview_x': '0', 'preview_y': '0', 'preview_w': str(full_w), 'preview_h': str(full_h)})
 
         self._animating = False
         self._animation_direction = None
@@ -1768,23 +1991,23 @@ class DRMAdBlocker:
     def _on_start_animation_complete(self):
         logger.debug("[DRMAdBlocker] Start animation complete")
         source = self._animation_source or 'default'
-        self._blocking_api_call('/blocking/set', {'text_vocab': self._get_blocking_text(source)})
-        self._start_rotation(source)
+        if self._block_text_armed:
+            # Pre-armed text has been up since the enable; give it a full dwell
+            first_wait = random.uniform(11.0, 15.0)
+        else:
+            self._blocking_set({'text_vocab': self._get_blocking_text(source)})
+            first_wait = 0.0
+        self._block_text_armed = False
+        self._start_rotation(source, first_wait)
         self._current_block_start = time.time()
         self._total_ads_blocked += 1
         self._start_debug()
 
     def _on_end_animation_complete(self):
         logger.debug("[DRMAdBlocker] End animation complete")
+        # Also publishes '0' to /dev/shm/minus_blocking_state
         self._blocking_api_call('/blocking/set', {'enabled': 'false'}, timeout=0.5)
 
-        # Write blocking state to file for zero-overhead checks (avoids HTTP)
-        try:
-            with open('/dev/shm/minus_blocking_state', 'w') as f:
-                f.write('0')
-        except Exception as e:
-            logger.debug(f"[DRMAdBlocker] Failed to write blocking state file: {e}")
-
         if self.audio:
             self.audio.unmute()
 
@@ -1801,7 +2024,7 @@ class DRMAdBlocker:
         self._preview_enabled = enabled
         logger.info(f"[DRMAdBlocker] Preview {'enabled' if enabled else 'disabled'}")
         if self.is_visible:
-            self._blocking_api_call('/blocking/set', {'preview_enabled': 'true' if enabled else 'false'})
+            self._blocking_set({'preview_enabled': 'true' if enabled else 'false'})
 
     def set_ad_seconds_remaining(self, seconds):
         """Called from the OCR loop when an "Ad N:MM" timer is spotted."""
@@ -1849,7 +2072,7 @@ class DRMAdBlocker:
         self._preview_grayscale = enabled
         logger.info(f"[DRMAdBlocker] Preview greyscale {'enabled' if enabled else 'disabled'}")
         if self.is_visible:
-            self._blocking_api_call('/blocking/set', {'preview_grayscale': 'true' if enabled else 'false'})
+            self._blocking_set({'preview_grayscale': 'true' if enabled else 'false'})
 
     def is_debug_overlay_enabled(self):
         return self._debug_overlay_enabled
@@ -1861,7 +2084,7 @@ class DRMAdBlocker:
             # Re-render the vocab so the [BLOCKING // ...] header appears or
             # disappears immediately, plus push the top-right OCR text in
             # whichever direction (filled when on, empty when off).
-            self._blocking_api_call('/blocking/set', {
+            self._blocking_set({
                 'text_vocab': self._get_blocking_text(self.current_source or 'default'),
                 'text_ocr': self._render_ocr_text(),
             })
@@ -1870,7 +2093,7 @@ class DRMAdBlocker:
                     self._start_debug()
             else:
                 self._stop_debug_thread()
-                self._blocking_api_call('/blocking/set', {'text_stats': ''})
+                self._blocking_set({'text_stats': ''})
 
     def set_ocr_trigger_text(self, raw, source=None):
         """Update the top-right OCR snippet during an active block.
@@ -1881,7 +2104,7 @@ class DRMAdBlocker:
         eff_source = source if source is not None else (self.current_source or 'default')
         self._ocr_trigger_text = self._format_ocr_trigger(raw, eff_source)
         if self.is_visible:
-            self._blocking_api_call('/blocking/set', {'text_ocr': self._render_ocr_text()})
+            self._blocking_set({'text_ocr': self._render_ocr_text()})
 
     def is_pixelated_background_enabled(self):
         return self._pixelated_background_enabled
@@ -1934,6 +2157,7 @@ class DRMAdBlocker:
         return self._test_blocking_until > time.time()
 
     def show(self, source='default', ocr_trigger_text=''):
+        decided_at = time.monotonic()
         with self._lock:
             # Note: We still enable ustreamer blocking even without display pipeline
             # because blocking overlay works via ustreamer (for web stream) independently
@@ -1952,19 +2176,19 @@ class DRMAdBlocker:
                 if self.current_source != source:
                     self.current_source = source
                     # Update overlay text to reflect new source (e.g., OCR -> OCR+VLM)
-                    self._blocking_api_call('/blocking/set', {
+                    self._blocking_set({
                         'text_vocab': self._get_blocking_text(source),
                         'text_ocr': self._render_ocr_text(),
                     })
                 else:
                     # Same source, fresh trigger snippet — push only the OCR text.
-                    self._blocking_api_call('/blocking/set', {'text_ocr': self._render_ocr_text()})
+                    self._blocking_set({'text_ocr': self._render_ocr_text()})
                 return
 
             if self._animating and self._animation_direction == 'start':
                 if self.current_source != source:
                     self.current_source = source
-                    self._blocking_api_call('/blocking/set', {
+                    self._blocking_set({
                         'text_vocab': self._get_blocking_text(source),
                         'text_ocr': self._render_ocr_text(),
                     })
@@ -1979,54 +2203,71 @@ class DRMAdBlocker:
             # we reuse it — avoids flip-flopping between styles during an
             # ad cluster). If the user has enabled 'photos' mode and uploaded
             # at least one photo, we may roll into photo-cycling instead.
+            # A pre-armed block already made that roll.
             now = time.time()
-            reused = bool(self._locked_content_kind) and now <= self._content_kind_lock_until
+            reused = self._content_kind_locked(now)
+            armed = self._prearmed
+            self._prearmed = None
             if not reused:
-                self._locked_content_kind = self._roll_replacement_mode()
-            logger.info(f"[DRMAdBlocker] Starting blocking ({source}) kind={self._locked_content_kind} {'reused' if reused else 'rolled'} lock_until_in={self._content_kind_lock_until - now:.1f}s")
+                if armed and not armed['locked']:
+                    self._locked_content_kind = armed['kind']
+                else:
+                    self._locked_content_kind = self._roll_replacement_mode()
+            if armed and (armed['kind'] != self._locked_content_kind
+                          or armed['key'] != self._prearm_key()
+                          or self._prearm_failed(armed)):
+                armed = None
+            path = 'prearmed' if armed else 'full'
+            logger.info(f"[DRMAdBlocker] Starting blocking ({source}) kind={self._locked_content_kind} {'reused' if reused else 'rolled'} lock_until_in={self._content_kind_lock_until - now:.1f}s path={path}")
 
             # Mute audio immediately
             if self.audio:
                 self.audio.mute()
 
-            # Calculate text scales based on resolution (scales designed for 4K @ 10/4)
-            # At 1080p (1920 width): vocab_scale=5, stats_scale=2
-            # At 4K (3840 width): vocab_scale=10, stats_scale=4
-            vocab_scale = max(3, min(12, self._frame_width // 384))
-            stats_scale = max(2, min(5, self._frame_width // 960))
-
-            # Enable blocking immediately (background will upload async)
-            self._blocking_api_call('/blocking/set', {
-                'enabled': 'true',
-                'preview_x': '0', 'preview_y': '0',
-                'preview_w': str(self._frame_width), 'preview_h': str(self._frame_height),
+            preview_state = {
                 'preview_enabled': 'true' if self._preview_enabled else 'false',
                 'preview_grayscale': 'true' if self._preview_grayscale else 'false',
-                'text_vocab': '', 'text_stats': '', 'text_ocr': self._render_ocr_text(),
-                'text_vocab_scale': str(vocab_scale),
-                'text_stats_scale': str(stats_scale),
-                'box_alpha': str(self._box_alpha),
-                'text_y': str(self._text_y),
-                'text_u': str(self._text_u),
-                'text_v': str(self._text_v)
-            }, timeout=0.5)
+                'text_ocr': self._render_ocr_text(),
+            }
+            if armed:
+                # Background, text, colors and geometry are already in
+                # ustreamer: one call flips the overlay on. The header is
+                # the only part of the text that depends on the source.
+                params = {'enabled': 'true', **preview_state}
+                text = self._format_content(armed['kind'], armed['item'], self._blocking_header(source))
+                if text != armed['text']:
+                    params['text_vocab'] = text
+                if armed['kind'] == 'vocab':
+                    self._current_vocab = armed['item']
+                result = self._blocking_api_call('/blocking/set', params, timeout=0.5)
+            else:
+                vocab_scale, stats_scale = self._text_scales()
+                # Enable blocking immediately (background will upload async)
+                result = self._blocking_api_call('/blocking/set', {
+                    'enabled': 'true',
+                    'preview_x': '0', 'preview_y': '0',
+                    'preview_w': str(self._frame_width), 'preview_h': str(self._frame_height),
+                    **preview_state,
+                    'text_vocab': '', 'text_stats': '',
+                    'text_vocab_scale': str(vocab_scale),
+                    'text_stats_scale': str(stats_scale),
+                    'box_alpha': str(self._box_alpha),
+                    'text_y': str(self._text_y),
+                    'text_u': str(self._text_u),
+                    'text_v': str(self._text_v)
+                }, timeout=0.5)
+            self._record_enable_ack(decided_at, path, result)
+            self._block_text_armed = bool(armed) and armed['kind'] != 'photos'
 
             self.is_visible = True
             self.current_source = source
             self._set_led_state('blocking')
 
-            # Write blocking state to file for zero-overhead checks (avoids HTTP)
-            try:
-                with open('/dev/shm/minus_blocking_state', 'w') as f:
-                    f.write('1')
-            except Exception as e:
-                logger.debug(f"[DRMAdBlocker] Failed to write blocking state file: {e}")
-
             if self.minus:
                 self.minus.blocking_active = True
 
             # Upload background asynchronously (don't block animation start)
-            if self._pixelated_background_enabled:
+            if self._pixelated_background_enabled and not (armed and armed['background']):
                 threading.Thread(target=self._upload_background, daemon=True, name="BackgroundUpload").start()
 
             if self._animation_enabled:
@@ -2034,14 +2275,16 @@ class DRMAdBlocker:
             else:
                 # Skip animation - set final position directly to avoid glitches
                 # Animation causes ~19 rapid API calls which creates stream hiccups
-                corner_x = self._frame_width - self._preview_w - self._preview_padding
-                corner_y = self._frame_height - self._preview_h - self._preview_padding
-                self._blocking_api_call('/blocking/set', {
-                    'preview_x': str(corner_x),
-                    'preview_y': str(corner_y),
-                    'preview_w': str(self._preview_w),
-                    'preview_h': str(self._preview_h)
-                })
+                # (a pre-armed block already starts in the corner)
+                if not armed:
+                    corner_x = self._frame_width - self._preview_w - self._preview_padding
+                    corner_y = self._frame_height - self._preview_h - self._preview_padding
+                    self._blocking_set({
+                        'preview_x': str(corner_x),
+                        'preview_y': str(corner_y),
+                        'preview_w': str(self._preview_w),
+                        'preview_h': str(self._preview_h)
+                    })
                 self._animation_source = source
                 self._on_start_animation_complete()
 
@@ -2070,6 +2313,8 @@ class DRMAdBlocker:
             self._stop_rotation_thread()
             self._stop_debug_thread()
             self._clear_ad_countdown()
+            self._onset_pending = None
+            self._block_text_armed = False
             # Keep the locked content kind valid for the cooldown window so
             # a fresh ad shortly after this one reuses the same style.
             self._content_kind_lock_until = time.time() + self.CONTENT_KIND_COOLDOWN_SECONDS
@@ -2078,18 +2323,15 @@ class DRMAdBlocker:
                 self._total_blocking_time += time.time() - self._current_block_start
                 self._current_block_start = None
 
-            self._blocking_api_call('/blocking/set', {'text_vocab': '', 'text_stats': ''})
+            # hide() runs on every non-blocking decision; leave the
+            # pre-armed text alone when nothing is on screen
+            if was_visible or self._animating or self._prearmed is None:
+                self._blocking_set({'text_vocab': '', 'text_stats': ''})
 
             if not self.pipeline:
                 # Still disable ustreamer blocking even without display pipeline
                 # (blocking overlay works via ustreamer independently)
                 self._blocking_api_call('/blocking/set', {'enabled': 'false'}, timeout=0.5)
-                # Write blocking state to file
-                try:
-                    with open('/dev/shm/minus_blocking_state', 'w') as f:
-                        f.write('0')
-                except Exception:
-                    pass
                 if self.audio:
                     self.audio.unmute()
                 return
@@ -0,0 +1,298 @@
+"""
+Batched command channel to an Android TV device's ADB shell.
+
+FireTVController used to send every key as its own
+`adb_shell("input keyevent X")` under the controller lock. send_keys()
+slept between those calls, and get_current_app() ran androidtv's full
+update() (a dozen dumpsys probes) just to read the foreground package.
+Each shell call opens a new ADB stream and a new `sh` on the device, and
+each `input` starts a JVM on the device. A three-key seek or an
+escape-from-dialog sequence therefore took seconds, with jitter between
+presses, while the ad kept playing.
+
+AdbCommandChannel puts one worker thread in front of the device's shell:
+
+- Callers submit() commands and carry on. Everything queued while a round
+  trip is in flight goes out together in the next one, as a single shell
+  script. Each command is followed by a marker line carrying its index and
+  exit status, so one reply is split back into per-command results.
+- send_keys() packs a sequence into one command: `input keyevent A B C`
+  (one JVM for the whole sequence) or, with a delay, `input keyevent A;
+  sleep 0.3; input keyevent B` timed on the device instead of across the
+  network.
+- query() serves read-only commands such as the foreground app from a
+  short TTL cache. Identical queries in flight share one execution. Any
+  other command clears the cache, since a key press can change the answer.
+- Latency metrics: submit-to-result per command kind, and the device
+  round trip per batch.
+
+The ADB TCP connection itself is already long-lived (androidtv keeps it
+open between calls); the channel amortises the per-stream and per-process
+cost on top of it. The shell is any callable taking a script and
+returning its output, so tests run the channel against a local `sh`.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# How long a foreground-app answer is reused
+APP_QUERY_TTL_S = float(os.environ.get('MINUS_ADB_APP_TTL', '1.0'))
+
+# Commands per round trip; the rest wait for the next one
+MAX_BATCH = 16
+
+COMMAND_TIMEOUT_S = 10.0
+
+_MARKER_RE = re.compile(r'\n__MINUS_ADB_(\d+)_(\d+)_(\d+)__\n')
+_KEYCODE_RE = re.compile(r'^[A-Z0-9_]+$')
+
+COMMAND_LATENCY = histogram(
+    'minus_adb_command_seconds',
+    'ADB command latency, submit to result', ['kind'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+ROUND_TRIP = histogram(
+    'minus_adb_round_trip_seconds',
+    'ADB shell round trip for one batch of commands',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+BATCHED_COMMANDS = counter(
+    'minus_adb_batched_commands_total',
+    'ADB commands that shared a round trip with an earlier command')
+QUERY_CACHE_HITS = counter(
+    'minus_adb_query_cache_hits_total',
+    'ADB queries answered from the TTL cache or an identical query in flight')
+
+
+class AdbChannelError(Exception):
+    """A command could not be run: transport failure, timeout or closed channel."""
+
+
+class _Job:
+    """One queued command and, once the batch returns, its result."""
+
+    __slots__ = ('command', 'kind', 'query', 'submitted', 'done', 'output', 'status', 'error')
+
+    def __init__(self, command: str, kind: str, query: bool):
+        self.command = command
+        self.kind = kind
+        self.query = query
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.output = ''
+        self.status = None
+        self.error: Optional[Exception] = None
+
+    def finish(self, output: str = '', status: int = None, error: Exception = None):
+        self.output = output
+        self.status = status
+        self.error = error
+        COMMAND_LATENCY.labels(kind=self.kind).observe(time.perf_counter() - self.submitted)
+        self.done.set()
+
+    def wait(self, timeout: float = COMMAND_TIMEOUT_S) -> str:
+        """The command's output; raises AdbChannelError if it failed or timed out."""
+        if not self.done.wait(timeout):
+            raise AdbChannelError(f"timed out after {timeout}s: {self.command}")
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+class AdbCommandChannel:
+    """Single-worker, batching front end for a device shell. Thread-safe."""
+
+    def __init__(self, shell: Callable[[str], str], lock=None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 max_batch: int = MAX_BATCH):
+        """
+        Args:
+            shell: Runs a shell script on the device and returns its output
+                (e.g. the androidtv device's adb_shell)
+            lock: Held around each device call, so the batch doesn't overlap
+                other users of the same connection
+            on_error: Called on the worker thread when the shell call raises
+        """
+        self._shell = shell
+        self._device_lock = lock
+        self._on_error = on_error
+        self._max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: List[_Job] = []
+        self._inflight: Dict[str, _Job] = {}   # query command -> job
+        self._cache: Dict[str, tuple] = {}     # query command -> (output, time)
+        self._closed = False
+        self._batch_seq = 0
+        self._worker = threading.Thread(target=self._run, daemon=True, name='AdbChannel')
+        self._worker.start()
+        self.round_trips = 0
+        self.commands = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    def submit(self, command: str, kind: str = 'shell') -> _Job:
+        """Queue `command` without waiting; wait() on the result for its output."""
+        return self._enqueue(_Job(command, kind, query=False))
+
+    def _enqueue(self, job: _Job) -> _Job:
+        with self._cond:
+            if self._closed:
+                job.finish(error=AdbChannelError('channel closed'))
+                return job
+            self._pending.append(job)
+            self._cond.notify()
+        return job
+
+    def run(self, command: str, kind: str = 'shell', timeout: float = COMMAND_TIMEOUT_S) -> str:
+        """Run `command` and return its output."""
+        return self.submit(command, kind).wait(timeout)
+
+    def send_keys(self, keycodes: Iterable[str], delay: float = 0.0,
+                  timeout: float = COMMAND_TIMEOUT_S) -> str:
+        """Press `keycodes` (e.g. KEYCODE_BACK) in order as one command.
+
+        delay is the device-side pause between presses; 0 sends them all
+        through a single `input` process.
+        """
+        keycodes = list(keycodes)
+        if not keycodes:
+            return ''
+        for code in keycodes:
+            if not _KEYCODE_RE.match(code):
+                raise ValueError(f"Invalid keycode: {code!r}")
+        if delay > 0:
+            command = f'; sleep {delay:.3f}; '.join(f'input keyevent {code}' for code in keycodes)
+        else:
+            command = 'input keyevent ' + ' '.join(keycodes)
+        return self.run(command, kind='keys', timeout=timeout)
+
+    def query(self, command: str, ttl: float = APP_QUERY_TTL_S,
+              timeout: float = COMMAND_TIMEOUT_S) -> str:
+        """Output of a read-only `command`, reused for `ttl` seconds."""
+        with self._cond:
+            cached = self._cache.get(command)
+            if cached is not None and time.monotonic() - cached[1] < ttl:
+                self.cache_hits += 1
+                QUERY_CACHE_HITS.inc()
+                return cached[0]
+            job = self._inflight.get(command)
+            if job is not None:
+                self.cache_hits += 1
+                QUERY_CACHE_HITS.inc()
+            else:
+                job = self._inflight[command] = _Job(command, 'query', query=True)
+                self._enqueue(job)
+        return job.wait(timeout)
+
+    def invalidate(self):
+        """Forget cached query results."""
+        with self._cond:
+            self._cache.clear()
+
+    def close(self):
+        """Fail queued commands and stop the worker (doesn't wait for it)."""
+        with self._cond:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._inflight.clear()
+            self._cache.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.finish(error=AdbChannelError('channel closed'))
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                batch = self._pending[:self._max_batch]
+                del self._pending[:self._max_batch]
+                self._batch_seq += 1
+                seq = self._batch_seq
+            self._execute(batch, seq)
+
+    def _execute(self, batch: List[_Job], seq: int):
+        script = '\n'.join(
+            f"{{ {job.command}\n}} 2>&1; printf '\\n__MINUS_ADB_{seq}_{i}_%d__\\n' $?"
+            for i, job in enumerate(batch))
+        start = time.perf_counter()
+        try:
+            if self._device_lock is not None:
+                with self._device_lock:
+                    if self._closed:
+                        raise AdbChannelError('channel closed')
+                    reply = self._shell(script)
+            else:
+                reply = self._shell(script)
+        except Exception as e:
+            self.errors += 1
+            error = e if isinstance(e, AdbChannelError) else AdbChannelError(str(e))
+            # Before waking the callers, so they see the handler's effect
+            if not isinstance(e, AdbChannelError) and self._on_error is not None:
+                try:
+                    self._on_error(e)
+                except Exception as handler_error:
+                    logger.debug(f"[AdbChannel] Error handler failed: {handler_error}")
+            self._complete(batch, {}, error)
+            return
+        ROUND_TRIP.observe(time.perf_counter() - start)
+        self.round_trips += 1
+        self.commands += len(batch)
+        if len(batch) > 1:
+            BATCHED_COMMANDS.inc(len(batch) - 1)
+        self._complete(batch, self._split(reply or '', seq), None)
+
+    @staticmethod
+    def _split(reply: str, seq: int) -> Dict[int, tuple]:
+        """{index: (output, status)} from a batch reply."""
+        results = {}
+        position = 0
+        for match in _MARKER_RE.finditer(reply):
+            if int(match.group(1)) != seq:
+                continue
+            results[int(match.group(2))] = (reply[position:match.start()], int(match.group(3)))
+            position = match.end()
+        return results
+
+    def _complete(self, batch: List[_Job], results: Dict[int, tuple], error: Optional[Exception]):
+        now = time.monotonic()
+        # Cache a query's answer only if nothing after it in the batch could change it
+        last_change = max((i for i, job in enumerate(batch) if not job.query), default=-1)
+        with self._cond:
+            if last_change >= 0:
+                self._cache.clear()
+            for i, job in enumerate(batch):
+                if job.query and self._inflight.get(job.command) is job:
+                    del self._inflight[job.command]
+                    if error is None and i in results and i > last_change:
+                        self._cache[job.command] = (results[i][0], now)
+        for i, job in enumerate(batch):
+            if error is not None:
+                job.finish(error=error)
+            elif i not in results:
+                job.finish(error=AdbChannelError(f"no result for: {job.command}"))
+            else:
+                job.finish(*results[i])
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            'round_trips': self.round_trips,
+            'commands': self.commands,
+            'cache_hits': self.cache_hits,
+            'errors': self.errors,
+            'pending': pending,
+        }
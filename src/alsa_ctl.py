@@ -0,0 +1,196 @@
+"""
+Minimal ALSA control-interface reads (the ioctls behind `amixer cget`).
+
+The health monitor reads the HDMI sink's Jack and ELD controls every
+check interval; doing that through amixer cost three fork/execs per pass.
+This talks to /dev/snd/controlC<N> directly: SNDRV_CTL_IOCTL_ELEM_LIST to
+find controls by name, SNDRV_CTL_IOCTL_ELEM_READ to read their values.
+Structures are declared with ctypes so the layout follows the platform
+ABI (long is 8 bytes on aarch64).
+"""
+
+import ctypes
+import fcntl
+import logging
+import os
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# snd_ctl_elem_iface_t
+IFACE_CARD = 0
+IFACE_MIXER = 2
+IFACE_PCM = 3
+
+_NAME_LEN = 44
+
+
+class _ElemId(ctypes.Structure):
+    _fields_ = [
+        ('numid', ctypes.c_uint),
+        ('iface', ctypes.c_int),
+        ('device', ctypes.c_uint),
+        ('subdevice', ctypes.c_uint),
+        ('name', ctypes.c_char * _NAME_LEN),
+        ('index', ctypes.c_uint),
+    ]
+
+
+class _ElemList(ctypes.Structure):
+    _fields_ = [
+        ('offset', ctypes.c_uint),
+        ('space', ctypes.c_uint),
+        ('used', ctypes.c_uint),
+        ('count', ctypes.c_uint),
+        ('pids', ctypes.POINTER(_ElemId)),
+        ('reserved', ctypes.c_ubyte * 50),
+    ]
+
+
+class _ElemValueUnion(ctypes.Union):
+    _fields_ = [
+        ('integer', ctypes.c_long * 128),
+        ('integer64', ctypes.c_longlong * 64),
+        ('enumerated', ctypes.c_uint * 128),
+        ('data', ctypes.c_ubyte * 512),
+    ]
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+class _ElemValue(ctypes.Structure):
+    _fields_ = [
+        ('id', _ElemId),
+        ('indirect', ctypes.c_uint, 1),
+        ('value', _ElemValueUnion),
+        ('tstamp', _Timespec),
+        ('reserved', ctypes.c_ubyte * (128 - ctypes.sizeof(_Timespec))),
+    ]
+
+
+def _iowr(group: str, number: int, size: int) -> int:
+    return (3 << 30) | (size << 16) | (ord(group) << 8) | number
+
+
+SNDRV_CTL_IOCTL_ELEM_LIST = _iowr('U', 0x10, ctypes.sizeof(_ElemList))
+SNDRV_CTL_IOCTL_ELEM_READ = _iowr('U', 0x12, ctypes.sizeof(_ElemValue))
+
+
+class ControlInfo:
+    """Identity of one control, as listed by `amixer controls`."""
+
+    __slots__ = ('numid', 'iface', 'name', 'index')
+
+    def __init__(self, numid: int, iface: int, name: str, index: int):
+        self.numid = numid
+        self.iface = iface
+        self.name = name
+        self.index = index
+
+    def __repr__(self):
+        return f"ControlInfo(numid={self.numid}, iface={self.iface}, name={self.name!r})"
+
+
+class AlsaControls:
+    """Open control device of one sound card."""
+
+    def __init__(self, card: int):
+        self.card = int(card)
+        self._fd = os.open(f'/dev/snd/controlC{self.card}', os.O_RDONLY | os.O_CLOEXEC)
+        self._controls: Optional[List[ControlInfo]] = None
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def list(self) -> List[ControlInfo]:
+        """All controls on the card (cached; numids don't change while open)."""
+        if self._controls is not None:
+            return self._controls
+        query = _ElemList()
+        fcntl.ioctl(self._fd, SNDRV_CTL_IOCTL_ELEM_LIST, query)
+        ids = (_ElemId * query.count)()
+        listing = _ElemList(space=query.count, pids=ids)
+        fcntl.ioctl(self._fd, SNDRV_CTL_IOCTL_ELEM_LIST, listing)
+        self._controls = [
+            ControlInfo(ids[i].numid, ids[i].iface,
+                        ids[i].name.decode('utf-8', 'replace'), ids[i].index)
+            for i in range(listing.used)
+        ]
+        return self._controls
+
+    def find(self, predicate) -> Optional[ControlInfo]:
+        for control in self.list():
+            if predicate(control):
+                return control
+        return None
+
+    def _read(self, numid: int) -> _ElemValue:
+        value = _ElemValue()
+        value.id.numid = numid
+        fcntl.ioctl(self._fd, SNDRV_CTL_IOCTL_ELEM_READ, value)
+        return value
+
+    def read_integer(self, numid: int) -> int:
+        """First value of a boolean/integer control."""
+        return self._read(numid).value.integer[0]
+
+    def read_bytes(self, numid: int, length: int = 512) -> bytes:
+        """Payload of a bytes control (e.g. the 128-byte ELD)."""
+        return bytes(self._read(numid).value.data[:length])
+
+
+def open_card(card) -> Optional[AlsaControls]:
+    """AlsaControls for `card`, or None if its control device can't be opened."""
+    try:
+        return AlsaControls(int(card))
+    except (OSError, ValueError) as e:
+        logger.debug(f"[alsa_ctl] controlC{card} unavailable: {e}")
+        return None
+
+
+def hdmi_audio_link(card) -> Optional[Dict]:
+    """Jack and ELD readings of an HDMI sink, as the health monitor reports them.
+
+    Returns None when the control device is not available (caller falls
+    back to amixer), otherwise {'ok': bool, 'details': {...}} with the same
+    'jack' ('on'/'off') and 'eld_mfr' ('ok'/'zeroed') keys amixer parsing
+    produced.
+    """
+    ctl = open_card(card)
+    if ctl is None:
+        return None
+    try:
+        with ctl:
+            details = {}
+            jack_ok = True
+            eld_ok = True
+            jack = ctl.find(lambda c: 'Jack' in c.name and c.iface == IFACE_CARD)
+            eld = ctl.find(lambda c: c.name == 'ELD')
+            if jack is not None:
+                on = ctl.read_integer(jack.numid) != 0
+                details['jack'] = 'on' if on else 'off'
+                jack_ok = on
+            if eld is not None:
+                eld_bytes = ctl.read_bytes(eld.numid, 128)
+                # Manufacturer/product ID bytes. All-zero here means the
+                # sink hasn't negotiated audio caps.
+                if not any(eld_bytes[16:20]):
+                    eld_ok = False
+                    details['eld_mfr'] = 'zeroed'
+                else:
+                    details['eld_mfr'] = 'ok'
+            return {'ok': jack_ok and eld_ok, 'details': details}
+    except OSError as e:
+        logger.debug(f"[alsa_ctl] controlC{card} read failed: {e}")
+        return None
@@ -50,19 +50,26 @@ mentions of money. If quality is insufficient with tiny.en, swap the
 model via MINUS_ASR_MODEL=base.en — keyword module needs no change.
 """
 
+import importlib.util
 import logging
 import os
 import re
 import threading
 import time
-from collections import deque
 from typing import Optional
 
 from asr_keywords import count_marker_hits, explain_hits
 from asr_worker import ASRProcess
+from metrics import WORKER_TIMEOUTS, histogram
+from thermal_governor import get_thermal_governor
+import tracing
+from vote_window import VoteWindow
 
 logger = logging.getLogger(__name__)
 
+ASR_INFERENCE_TIME = histogram('minus_asr_inference_seconds',
+                               'ASR transcription time per audio window')
+
 
 # ---------------------------------------------------------------------------
 # Defaults — overridable via env vars matching the existing MINUS_* pattern.
@@ -77,18 +84,18 @@ ASR_MODEL = os.environ.get('MINUS_ASR_MODEL', DEFAULT_ASR_MODEL)
 def is_asr_available() -> bool:
     """Whether the ASR backend is importable. Installs without
     faster-whisper installed will skip the tap branch entirely,
-    keeping the audio pipeline byte-identical to pre-ASR shape."""
-    try:
-        import faster_whisper  # noqa: F401
-        return True
-    except ImportError:
-        return False
+    keeping the audio pipeline byte-identical to pre-ASR shape.
+
+    Only looks the package up: faster-whisper (CTranslate2, tokenizers)
+    is imported by the worker process, never by Minus itself."""
+    return importlib.util.find_spec('faster_whisper') is not None
 
 
 class ASRManager:
     """faster-whisper-driven ad-content confirmation/veto.
 
     Public API used by Minus:
+      preload()            → spawn worker + load model, no inference thread
       start()              → spawn worker + start background inference thread
       stop()               → signal shutdown
       verdict()            → 'confirm' / 'veto' / 'unknown'
@@ -96,9 +103,9 @@ class ASRManager:
       is_enabled           → bool (set externally)
       enabled              → settable; False short-circuits verdict to 'unknown'
 
-    Thread safety: `_history`, `last_*` attributes are guarded by `_lock`.
-    `verdict()` is safe to call from the OCR/VLM decision loop hot path
-    (single lock acquisition, O(window-size) iteration, no I/O).
+    Thread safety: `last_*` attributes are guarded by `_lock`; `_history`
+    is a VoteWindow with its own lock. `verdict()` is safe to call from
+    the OCR/VLM decision loop hot path (O(1) running sums, no I/O).
     """
 
     # Rolling history window. Chosen to match the VLM sliding-window
@@ -146,15 +153,32 @@ class ASRManager:
         self.last_inference_time = 0.0
         self.last_inference_latency = 0.0
 
-        # Rolling history: (timestamp, marker_hits, transcript_alpha_word_count)
-        self._history = deque(maxlen=32)
+        # Rolling history: one vote per inference — positive when markers
+        # were heard, weight = marker_hits, value = transcript alpha word count
+        self._history = VoteWindow(self.HISTORY_WINDOW_S, maxlen=32)
         self._lock = threading.RLock()
 
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        # Serialises start/stop of the inference loop. The worker load is
+        # not under it: ASRProcess.start() serialises spawning and makes a
+        # second caller wait for a load in progress, so stop() and the ASR
+        # toggle never wait out WORKER_LOAD_TIMEOUT behind a boot preload
+        self._start_lock = threading.Lock()
 
     # ----- lifecycle -----
 
+    def preload(self) -> bool:
+        """Spawn the worker and load the model without starting inference.
+
+        Run during boot alongside the OCR/VLM loads so start() (once the
+        audio pipeline is up) finds the worker already warm.
+        """
+        if not is_asr_available():
+            logger.warning("[ASR] faster-whisper not installed — ASR disabled")
+            return False
+        return self._process.start()
+
     def start(self):
         if self.is_running:
             return
@@ -162,30 +186,35 @@ class ASRManager:
             logger.warning("[ASR] faster-whisper not installed — ASR disabled")
             return
 
+        # Waits for a boot-time preload still loading rather than spawning twice
         if not self._process.start():
             logger.warning("[ASR] worker process failed to start — ASR disabled")
             return
 
-        self._stop_event.clear()
-        self.is_running = True
-        self._thread = threading.Thread(target=self._loop, daemon=True, name='ASR')
-        self._thread.start()
+        with self._start_lock:
+            if self.is_running:
+                return
+            self._stop_event.clear()
+            self.is_running = True
+            self._thread = threading.Thread(target=self._loop, daemon=True, name='ASR')
+            self._thread.start()
         logger.info(f"[ASR] started (model={self._model_name}, "
                     f"window={self.WINDOW_SECONDS}s, interval={self.INFERENCE_INTERVAL_S}s, "
                     f"threads={self._cpu_threads})")
 
     def stop(self):
-        if not self.is_running:
-            return
-        self._stop_event.set()
-        if self._thread:
-            self._thread.join(timeout=5)
-        self.is_running = False
-        # Stop the worker process
-        try:
-            self._process.stop()
-        except Exception as e:
-            logger.debug(f"[ASR] worker stop error: {e}")
+        with self._start_lock:
+            if not self.is_running:
+                return
+            self._stop_event.set()
+            if self._thread:
+                self._thread.join(timeout=5)
+            self.is_running = False
+            # Stop the worker process
+            try:
+                self._process.stop()
+            except Exception as e:
+                logger.debug(f"[ASR] worker stop error: {e}")
         logger.info(f"[ASR] stopped after {self.inference_count} inferences "
                     f"(timeouts={self.timeout_count}, killed={self.killed_count}, "
                     f"failures={self.failure_count})")
@@ -205,19 +234,32 @@ class ASRManager:
                     self._stop_event.wait(self.INFERENCE_INTERVAL_S)
                     continue
 
-                if not self._tap.snapshot_to_wav(self.WINDOW_SECONDS):
+                trace_id = tracing.start_trace('asr_window')
+                with tracing.span('asr.snapshot'):
+                    ready = self._tap.snapshot_to_wav(self.WINDOW_SECONDS)
+                if not ready:
                     # Tap not ready (not enough audio yet, or stalled).
+                    tracing.end_trace()
                     self._stop_event.wait(self.INFERENCE_INTERVAL_S)
                     continue
 
-                status, transcript, latency = self._process.transcribe(
-                    self._tap.wav_path)
+                with tracing.span('asr.transcribe'):
+                    status, transcript, latency = self._process.transcribe(
+                        self._tap.wav_path)
+                if status == 'ok' and trace_id is not None:
+                    # Inference time as measured inside the worker process
+                    now = time.time()
+                    tracing.add_span('asr.inference', now - latency, now, trace_id,
+                                     thread='asr worker')
                 self._record_result(status, transcript, latency)
+                tracing.end_trace()
             except Exception as e:
                 logger.error(f"[ASR] loop iteration failed: {e}")
                 self.failure_count += 1
 
-            self._stop_event.wait(self.INFERENCE_INTERVAL_S)
+            # Stretched by the thermal governor when the box runs hot
+            self._stop_event.wait(
+                self.INFERENCE_INTERVAL_S * get_thermal_governor().asr_interval_scale)
 
     def _record_result(self, status: str, transcript: str, latency: float):
         hits = count_marker_hits(transcript) if status == 'ok' else 0
@@ -226,6 +268,7 @@ class ASRManager:
             self.inference_count += 1
             if status == 'timeout':
                 self.timeout_count += 1
+                WORKER_TIMEOUTS.labels(worker='asr').inc()
             elif status == 'killed':
                 self.killed_count += 1
             elif status == 'error':
@@ -233,13 +276,13 @@ class ASRManager:
             self.last_inference_time = now
             self.last_inference_latency = latency
             if status == 'ok':
+                ASR_INFERENCE_TIME.observe(latency)
+                get_thermal_governor().record_latency('asr', latency)
                 self.last_transcript = transcript
                 self.last_marker_hits = hits
                 alpha_word_count = len(re.findall(r'[a-z]{2,}', transcript.lower()))
-                self._history.append((now, hits, alpha_word_count))
-                cutoff = now - self.HISTORY_WINDOW_S
-                while self._history and self._history[0][0] < cutoff:
-                    self._history.popleft()
+                self._history.append(hits > 0, weight=hits,
+                                     value=alpha_word_count, now=now)
 
         if status == 'ok' and (hits > 0 or len(transcript) >= 20):
             preview = transcript[:80].replace('\n', ' ')
@@ -269,17 +312,12 @@ class ASRManager:
         """
         if not self.is_running or not self.enabled:
             return 'unknown'
-        now = time.time()
-        with self._lock:
-            cutoff = now - self.HISTORY_WINDOW_S
-            recent = [h for h in self._history if h[0] >= cutoff]
-        if not recent:
+        stats = self._history.stats()
+        if stats.count == 0:
             return 'unknown'
-        total_hits = sum(h[1] for h in recent)
-        if total_hits > 0:
+        if stats.positive_count > 0:
             return 'confirm'
-        total_words = sum(h[2] for h in recent)
-        if total_words >= 10:
+        if stats.value_sum >= 10:
             return 'veto'
         return 'unknown'
 
@@ -316,9 +354,9 @@ class ASRManager:
     # ----- status surface -----
 
     def get_status(self) -> dict:
-        with self._lock:
-            history_len = len(self._history)
-            recent_hits_sum = sum(h[1] for h in self._history)
+        stats = self._history.stats()
+        history_len = stats.count
+        recent_hits_sum = int(stats.positive_weight)
         latency_stats = self._process.get_latency_stats() if self._process else {}
         return {
             'available': is_asr_available(),
@@ -42,6 +42,9 @@ try:
 except RuntimeError:
     pass  # Already set by another worker import (VLM/OCR)
 
+from metrics import WORKER_RESTARTS
+from placement import apply_placement, apply_to_process
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,26 +89,15 @@ def _asr_worker_main(request_queue, response_queue, ready_event, shutdown_event,
     engine = os.environ.get('MINUS_ASR_ENGINE', 'moonshine').lower()
 
     # Honour "N CPUs max" by pinning the whole worker (and thus the engine's
-    # threads) to a fixed core set. onnxruntime/CTranslate2 otherwise grab
-    # every core. Overridable with MINUS_ASR_CPU_AFFINITY="3,4,5".
-    # Default for the 8-core RK3588 (4×A55 little 0-3, 4×A76 big 4-7): pin to
-    # {3,4,5}. Cores 4,5 (cpufreq policy4) stay the least thermally-throttled
-    # big cores under load; core 6,7 (policy6) get parked at ~408MHz, so we
-    # avoid them. Measured ~1.1s/window there vs slower on {5,6,7}.
-    try:
-        aff_env = os.environ.get('MINUS_ASR_CPU_AFFINITY', '')
-        ncpu = os.cpu_count() or cpu_threads
-        if aff_env.strip():
-            cores = {int(c) for c in aff_env.split(',') if c.strip() != ''}
-        elif ncpu >= 8:
-            cores = set(range(3, 3 + cpu_threads))  # {3,4,5} on RK3588
-        else:
-            cores = set(range(max(0, ncpu - cpu_threads), ncpu))
-        os.environ.setdefault('OMP_NUM_THREADS', str(cpu_threads))
-        os.sched_setaffinity(0, cores)
-        log.info(f"[ASRWorker] CPU affinity pinned to {sorted(cores)} (cpu_threads={cpu_threads})")
-    except Exception as e:
-        log.warning(f"[ASRWorker] could not set CPU affinity: {e}")
+    # threads) to the 'asr_worker' core set in config.PLACEMENT_POLICY.
+    # onnxruntime/CTranslate2 otherwise grab every core. ASR is confirm-only,
+    # so it runs on little cores {1,2,3} and leaves the big cores to capture,
+    # encode and OCR/VLM; {3,4,5} measured ~1.1s/window, the little cores are
+    # slower. MINUS_ASR_CPU_AFFINITY="3,4,5" still overrides the cores.
+    os.environ.setdefault('OMP_NUM_THREADS', str(cpu_threads))
+    apply_placement('asr_worker')
+    log.info(f"[ASRWorker] CPU affinity {sorted(os.sched_getaffinity(0))} "
+             f"(cpu_threads={cpu_threads})")
 
     try:
         load_start = time.time()
@@ -285,34 +277,23 @@ class ASRProcess:
 
     def start(self) -> bool:
         """Spawn the worker process and wait up to WORKER_LOAD_TIMEOUT
-        seconds for the model to load. Returns True on success."""
+        seconds for the model to load. Returns True on success.
+
+        A call while another is still waiting for the load waits for that
+        same worker instead of returning early."""
         with self._call_lock:
             if self.process is not None and self.process.is_alive():
                 if self.ready_event is not None and self.ready_event.is_set():
                     self.is_ready = True
-                return self.is_ready
-
-            self.request_queue = Queue()
-            self.response_queue = Queue()
-            self.ready_event = Event()
-            self.shutdown_event = Event()
-
-            self.process = Process(
-                target=_asr_worker_main,
-                args=(self.request_queue, self.response_queue,
-                      self.ready_event, self.shutdown_event,
-                      self.model_name, self.cpu_threads),
-                daemon=True,
-                name=f'ASRWorker-{self.model_name}'
-            )
-            self.process.start()
+                if self.is_ready or self.ready_event is None:
+                    return self.is_ready
+                process, ready_event = self.process, self.ready_event
+            else:
+                process, ready_event = self._spawn_locked(), self.ready_event
 
         start = time.time()
-        logger.info(f"[ASRProcess] Waiting for worker to load "
-                    f"(PID {self.process.pid}, model={self.model_name})...")
-
-        ok = self.ready_event.wait(timeout=self.WORKER_LOAD_TIMEOUT)
-        if ok and self.process.is_alive():
+        ok = ready_event.wait(timeout=self.WORKER_LOAD_TIMEOUT)
+        if ok and process.is_alive():
             elapsed = time.time() - start
             self.is_ready = True
             logger.info(f"[ASRProcess] Worker ready in {elapsed:.1f}s")
@@ -320,11 +301,35 @@ class ASRProcess:
 
         # Either timeout or worker died during load. Tear it down so
         # the next start() attempt gets a clean slate.
-        logger.error(f"[ASRProcess] Worker failed to become ready "
-                     f"after {self.WORKER_LOAD_TIMEOUT}s — killing")
-        self._kill_process_locked()
+        with self._call_lock:
+            if self.process is process:
+                logger.error(f"[ASRProcess] Worker failed to become ready "
+                             f"after {self.WORKER_LOAD_TIMEOUT}s — killing")
+                self._kill_process_locked()
         return False
 
+    def _spawn_locked(self):
+        """Start a new worker process. Must be called with `_call_lock` held."""
+        self.is_ready = False
+        self.request_queue = Queue()
+        self.response_queue = Queue()
+        self.ready_event = Event()
+        self.shutdown_event = Event()
+
+        self.process = Process(
+            target=_asr_worker_main,
+            args=(self.request_queue, self.response_queue,
+                  self.ready_event, self.shutdown_event,
+                  self.model_name, self.cpu_threads),
+            daemon=True,
+            name=f'ASRWorker-{self.model_name}'
+        )
+        self.process.start()
+        apply_to_process('asr_worker', self.process.pid)
+        logger.info(f"[ASRProcess] Waiting for worker to load "
+                    f"(PID {self.process.pid}, model={self.model_name})...")
+        return self.process
+
     def stop(self):
         """Gracefully shut down the worker. Best-effort — falls through
         to terminate/kill if the worker is unresponsive."""
@@ -359,6 +364,7 @@ class ASRProcess:
         logger.warning(f"[ASRProcess] Restarting worker "
                        f"(restart #{self._restart_count + 1})")
         self._restart_count += 1
+        WORKER_RESTARTS.labels(worker='asr').inc()
         self.stop()
         return self.start()
 
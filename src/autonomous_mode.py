@@ -789,8 +789,15 @@ class AutonomousMode:
             # Launch YouTube via ADB intent
             logger.info(f"[AutonomousMode] Launching YouTube on {self._device_type}...")
 
+            if hasattr(self._device_controller, 'shell'):
+                # Goes through the controller's batched ADB channel
+                for pkg in YOUTUBE_PACKAGES:
+                    if self._device_controller.shell(
+                        f"am start -a android.intent.action.MAIN -c android.intent.category.LEANBACK_LAUNCHER {pkg}"
+                    ) is not None:
+                        break
             # Access internal _device for ADB shell command
-            if hasattr(self._device_controller, '_lock') and hasattr(self._device_controller, '_device'):
+            elif hasattr(self._device_controller, '_lock') and hasattr(self._device_controller, '_device'):
                 with self._device_controller._lock:
                     if self._device_controller._device:
                         # Try multiple package names
@@ -1544,18 +1551,15 @@ class AutonomousMode:
         logger.info("[AutonomousMode] Attempting to escape stuck state with Back + navigation")
         self._log_event("Escaping stuck state - Back + navigate")
 
-        # Press Back multiple times to exit dialogs/keyboards/sign-in flows
-        for _ in range(4):
-            self._device_controller.send_command("back")
-            time.sleep(0.4)
+        # Press Back multiple times to exit dialogs/keyboards/sign-in flows.
+        # send_keys spaces the presses on the device (Fire TV) rather than
+        # with sleeps between separate round trips.
+        self._device_controller.send_keys("back", "back", "back", "back", delay=0.4)
 
         # After escaping, try to navigate to content
-        # Press Down and Right to navigate away from sign-in options
+        # Press Down to navigate away from sign-in options, then select
         time.sleep(0.5)
-        for _ in range(2):
-            self._device_controller.send_command("down")
-            time.sleep(0.3)
-        self._device_controller.send_command("select")
+        self._device_controller.send_keys("down", "down", "select", delay=0.3)
 
         return True
 
@@ -2483,9 +2487,8 @@ class AutonomousMode:
     def get_log_tail(self, lines: int = 50) -> str:
         """Get last N lines of autonomous mode log."""
         try:
-            with open(self._log_file, "r") as f:
-                all_lines = f.readlines()
-                return "".join(all_lines[-lines:])
+            from log_ring import read_tail_lines
+            return "".join(line + "\n" for line in read_tail_lines(self._log_file, lines))
         except FileNotFoundError:
             return "No autonomous mode logs yet."
         except Exception as e:
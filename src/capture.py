@@ -23,8 +23,29 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import tracing
+from metrics import histogram
+from thermal_governor import get_thermal_governor
+from ustreamer_control import get_ustreamer_control
+
 logger = logging.getLogger(__name__)
 
+# Thermal governor capture scale -> JPEG decode flag. Reduced decodes
+# skip most of the IDCT work; a 4K or 1080p snapshot still comes out at
+# or above the 960x540 OCR frame at scale 2.
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+}
+
+CAPTURE_LATENCY = histogram(
+    'minus_capture_latency_seconds',
+    'Snapshot fetch + JPEG decode + resize (excludes rate-limit wait)')
+FRAME_AGE = histogram(
+    'minus_frame_age_seconds',
+    'Age of a captured frame when decoded (ustreamer X-Timestamp to now)')
+
 
 def ensure_localhost_available() -> bool:
     """
@@ -84,8 +105,9 @@ def _is_blocking_active(port=9090):
     Returns True if blocking overlay is currently being rendered,
     which means the MPP encoder is busy and we should slow down captures.
 
-    Uses file-based state in /dev/shm for zero-overhead checks (Hypothesis 3).
-    Falls back to HTTP if file doesn't exist.
+    Uses file-based state in /dev/shm for zero-overhead checks (Hypothesis 3),
+    published by ustreamer_control on every enable/disable. Falls back to
+    HTTP if the file doesn't exist.
     """
     global _blocking_state_cache
 
@@ -104,21 +126,27 @@ def _is_blocking_active(port=9090):
     except Exception:
         pass
 
-    # Fall back to HTTP (slower)
-    try:
-        session = _get_http_session()
-        response = session.get(f'http://localhost:{port}/blocking', timeout=0.5)
-        if response.status_code == 200:
-            data = response.json()
-            enabled = data.get('result', {}).get('enabled', False)
-            _blocking_state_cache = {'enabled': enabled, 'last_check': now}
-            return enabled
-    except Exception:
-        pass
+    # Fall back to HTTP (slower; only before the control client has
+    # published any state)
+    data = get_ustreamer_control(port).call('/blocking', timeout=0.5)
+    if data is not None:
+        enabled = data.get('result', {}).get('enabled', False)
+        _blocking_state_cache = {'enabled': enabled, 'last_check': now}
+        return enabled
 
     return _blocking_state_cache['enabled']
 
 
+def _observe_frame_age(x_timestamp):
+    """Record frame age from ustreamer's X-Timestamp (unix seconds)."""
+    try:
+        age = time.time() - float(x_timestamp)
+    except (TypeError, ValueError):
+        return
+    if 0 <= age < 60:
+        FRAME_AGE.observe(age)
+
+
 class UstreamerCapture:
     """Frame capture using ustreamer's HTTP snapshot endpoint.
 
@@ -150,7 +178,8 @@ class UstreamerCapture:
         - During blocking: 1s minimum (MPP encoder busy with overlays)
 
         Uses persistent HTTP session with connection pooling to avoid
-        subprocess overhead from curl.
+        subprocess overhead from curl. The JPEG is decoded at the thermal
+        governor's capture scale.
         """
         global _last_capture_time
 
@@ -164,7 +193,7 @@ class UstreamerCapture:
             # Rate limit: ensure minimum gap between HTTP requests
             # IMPORTANT: Only hold lock briefly for timing check, NOT during HTTP request
             # Otherwise a slow/stuck HTTP request blocks all workers
-            with _capture_lock:
+            with tracing.span('capture.rate_limit'), _capture_lock:
                 now = time.time()
                 elapsed = now - _last_capture_time
                 if elapsed < min_interval:
@@ -173,19 +202,26 @@ class UstreamerCapture:
                 _last_capture_time = time.time()  # Mark time BEFORE request
 
             # HTTP request OUTSIDE the lock - prevents cascade failure if ustreamer is slow
+            request_start = time.perf_counter()
             session = _get_http_session()
-            response = session.get(self.snapshot_url, timeout=2, allow_redirects=True)
+            with tracing.span('capture.fetch'):
+                response = session.get(self.snapshot_url, timeout=2, allow_redirects=True)
 
             if response.status_code == 200:
+                decode_start = time.time()
                 # Decode JPEG directly from memory (no disk I/O)
                 img_array = np.frombuffer(response.content, dtype=np.uint8)
-                img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+                flag = _DECODE_FLAGS.get(get_thermal_governor().capture_scale, cv2.IMREAD_COLOR)
+                img = cv2.imdecode(img_array, flag)
                 if img is not None:
                     # Scale to 960x540 for OCR - model uses 960x960 anyway
                     # Using INTER_AREA for best quality downscaling, fast on 4K->540p
                     h, w = img.shape[:2]
                     if h > 540 or w > 960:
                         img = cv2.resize(img, (960, 540), interpolation=cv2.INTER_AREA)
+                    tracing.add_span('capture.decode', decode_start, time.time())
+                    CAPTURE_LATENCY.observe(time.perf_counter() - request_start)
+                    _observe_frame_age(response.headers.get('X-Timestamp'))
                     return img
 
             return None
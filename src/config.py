@@ -116,3 +116,31 @@ USTREAMER_PATH = _get_env_path('MINUS_USTREAMER_PATH', '/home/radxa/ustreamer-pa
 # Override with MINUS_VLM_MODEL_DIR.
 VLM_MODEL_DIR = _get_env_path('MINUS_VLM_MODEL_DIR', '/home/radxa/axera_models/LFM2/LFM2-450M-ft-v2-fused-v2')
 OCR_MODEL_DIR = _get_env_path('MINUS_OCR_MODEL_DIR', '/home/radxa/rknn-llm/examples/multimodal_model_demo/deploy/install/demo_Linux_aarch64/models/paddleocr')
+
+# Core placement per process/thread role, applied by src/placement.py.
+# RK3588: cores 0-3 are A55 (little), 4-7 A76 (big). Capture and encode
+# (ustreamer, GStreamer streaming threads) get big cores 4,5 to
+# themselves: cpufreq policy4 stays the least throttled under load, and
+# every other thread in minus.py ('main') is kept off them. OCR/VLM run on
+# big cores 6,7. ASR (confirm-only), screenshot writes, the web UI and the
+# LED animation go to the little cores. `policy` is 'fifo' (with
+# `priority`), 'idle' or 'other'. Cores missing on the host are dropped.
+# Override one role with MINUS_PLACEMENT_<ROLE>="cores:nice[:policy[:priority]]",
+# e.g. MINUS_PLACEMENT_ASR_WORKER="3-5:0"; MINUS_PLACEMENT=off disables all.
+LITTLE_CORES = (0, 1, 2, 3)
+BIG_CORES = (4, 5, 6, 7)
+PLACEMENT_ENABLED = os.environ.get('MINUS_PLACEMENT', 'on').lower() not in ('0', 'off', 'false', 'no')
+PLACEMENT_POLICY = {
+    'main': {'cores': '0-3,6,7'},
+    'capture': {'cores': '4,5', 'nice': -5},
+    'gst_streaming': {'cores': '4,5', 'nice': -5},
+    'ocr_worker': {'cores': '6,7', 'nice': 0},
+    'vlm_worker': {'cores': '6,7', 'nice': 0},
+    'ocr_loop': {'cores': '6,7', 'nice': 10},
+    'vlm_loop': {'cores': '6,7', 'nice': 10},
+    'asr_worker': {'cores': '1-3', 'nice': 5},
+    'screenshots': {'cores': '0-3', 'policy': 'idle'},
+    'webui': {'cores': '0-3', 'nice': 5},
+    'status_leds': {'cores': '0-3', 'nice': 5},
+    'ir_transmit': {'cores': '7', 'nice': -20, 'policy': 'fifo', 'priority': 80},
+}
@@ -10,6 +10,7 @@ Includes adaptive bandwidth management for HDMI signal integrity.
 import logging
 import re
 import subprocess
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -149,14 +150,58 @@ def set_color_format(connector_id: int, color_format: int, max_retries: int = 5)
     return False
 
 
+def _is_hdmi_i2c_error(message: str) -> bool:
+    return 'dwhdmi-rockchip' in message and 'i2c read err' in message
+
+
+def _dmesg_i2c_error_timestamps(window_seconds: float) -> Optional[list]:
+    """Timestamps of recent i2c errors from a full `dmesg` dump (fallback)."""
+    proc = subprocess.run(
+        ['dmesg'],
+        capture_output=True, text=True, timeout=5
+    )
+
+    if proc.returncode != 0:
+        return None
+
+    # Get current uptime to calculate age of messages
+    with open('/proc/uptime', 'r') as f:
+        current_uptime = float(f.read().split()[0])
+
+    error_timestamps = []
+
+    for line in proc.stdout.split('\n'):
+        if _is_hdmi_i2c_error(line):
+            # Extract timestamp from format: "[ 1234.567890] message"
+            try:
+                # Find the timestamp between [ and ]
+                start = line.find('[')
+                end = line.find(']')
+                if start >= 0 and end > start:
+                    timestamp_str = line[start+1:end].strip()
+                    timestamp = float(timestamp_str)
+                    age = current_uptime - timestamp
+
+                    if age <= window_seconds:
+                        error_timestamps.append(timestamp)
+            except (ValueError, IndexError):
+                continue
+
+    return error_timestamps
+
+
 def check_hdmi_i2c_errors(threshold: int = 10, window_seconds: float = 5.0) -> tuple:
     """
-    Check dmesg for recent HDMI i2c errors indicating signal integrity problems.
+    Check the kernel log for recent HDMI i2c errors indicating signal integrity problems.
 
     When HDMI signal fails (e.g., bandwidth too high for cable), the dwhdmi driver
     floods dmesg with "i2c read err!" messages. This is a reliable heuristic for
     detecting signal problems that the kernel doesn't otherwise report.
 
+    Reads only the records added since the last call from /dev/kmsg (see
+    kernel_events.KmsgTail); falls back to parsing `dmesg` when /dev/kmsg
+    is not readable.
+
     Args:
         threshold: Number of errors that indicates a problem (default: 10)
         window_seconds: Time window in seconds to check (default: 5.0)
@@ -165,41 +210,18 @@ def check_hdmi_i2c_errors(threshold: int = 10, window_seconds: float = 5.0) -> t
         Tuple of (has_errors: bool, error_count: int, errors_per_second: float)
     """
     try:
-        import time
-
-        # Read dmesg (standard format with timestamps like "[ 1234.567890]")
-        proc = subprocess.run(
-            ['dmesg'],
-            capture_output=True, text=True, timeout=5
-        )
+        from kernel_events import get_kmsg_tail
 
-        if proc.returncode != 0:
-            return False, 0, 0.0
-
-        # Get current uptime to calculate age of messages
-        with open('/proc/uptime', 'r') as f:
-            current_uptime = float(f.read().split()[0])
-
-        error_count = 0
-        error_timestamps = []
+        tail = get_kmsg_tail()
+        tail.watch('hdmi_i2c_error', _is_hdmi_i2c_error)
+        if tail.available():
+            error_timestamps = tail.recent('hdmi_i2c_error', window_seconds)
+        else:
+            error_timestamps = _dmesg_i2c_error_timestamps(window_seconds)
+            if error_timestamps is None:
+                return False, 0, 0.0
 
-        for line in proc.stdout.split('\n'):
-            if 'dwhdmi-rockchip' in line and 'i2c read err' in line:
-                # Extract timestamp from format: "[ 1234.567890] message"
-                try:
-                    # Find the timestamp between [ and ]
-                    start = line.find('[')
-                    end = line.find(']')
-                    if start >= 0 and end > start:
-                        timestamp_str = line[start+1:end].strip()
-                        timestamp = float(timestamp_str)
-                        age = current_uptime - timestamp
-
-                        if age <= window_seconds:
-                            error_count += 1
-                            error_timestamps.append(timestamp)
-                except (ValueError, IndexError):
-                    continue
+        error_count = len(error_timestamps)
 
         # Calculate errors per second
         if error_timestamps and len(error_timestamps) >= 2:
@@ -10,6 +10,7 @@ Features:
 - ADB key generation and persistent storage for pairing
 - Auto-reconnect on connection drops
 - Full remote control: play, pause, select, back, d-pad, etc.
+- Key sequences and app queries batched over one ADB command channel
 - Async-compatible interface
 - Clear instructions when ADB debugging needs to be enabled
 
@@ -23,13 +24,13 @@ import logging
 import os
 import random
 import re
-import socket
 import subprocess
 import threading
-import time
 from pathlib import Path
 from typing import Optional, Callable
 
+from adb_channel import AdbChannelError, AdbCommandChannel
+
 logger = logging.getLogger(__name__)
 
 # Known Fire TV device identifiers (manufacturer and model patterns)
@@ -95,6 +96,10 @@ KEY_CODES = {
     "wakeup": "KEYCODE_WAKEUP",
 }
 
+# Focused window and app; the package sits before the '/' of the activity
+CURRENT_APP_COMMAND = "dumpsys window windows | grep -E 'mCurrentFocus|mFocusedApp'"
+_FOCUS_PACKAGE_RE = re.compile(r'\s([A-Za-z][\w.]*)/')
+
 
 class FireTVController:
     """
@@ -117,6 +122,8 @@ class FireTVController:
         self._port: int = ADB_PORT
         self._connected = False
         self._lock = threading.Lock()
+        # Batches key presses and queries; exists while connected
+        self._channel: Optional[AdbCommandChannel] = None
 
         # Auto-reconnect state
         self._auto_reconnect = True
@@ -201,91 +208,35 @@ class FireTVController:
         return False
 
     @staticmethod
-    def discover_devices(timeout: float = 5.0, verify_fire_tv: bool = False) -> list[dict]:
+    def discover_devices(timeout: float = 5.0, verify_fire_tv: bool = False,
+                         first_only: bool = False) -> list[dict]:
         """
         Discover devices on the local network with ADB port open.
 
+        Probes previously seen devices and the ARP table first, then sweeps
+        the interface's subnet with a bounded window of non-blocking
+        connects (see src/lan_scan.py).
+
         Args:
             timeout: Scan timeout in seconds
-            verify_fire_tv: If True, attempts to connect and verify each device is a Fire TV
+            verify_fire_tv: If True, only keep hosts that answer the ADB handshake
+            first_only: Stop at the first (verified) device
 
         Returns:
-            List of dicts with 'ip', 'hostname', and optionally 'verified' keys
+            List of dicts with 'ip', 'hostname', 'port' and 'source' keys,
+            plus 'adb' (handshake result) when verify_fire_tv is set
         """
-        devices = []
-
-        # Get local IP to determine network range
-        # Try multiple methods for resilience
-        local_ip = None
-        try:
-            # Method 1: Connect to a LAN address (works without internet)
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.settimeout(1.0)
-            s.connect(("10.255.255.255", 1))
-            local_ip = s.getsockname()[0]
-            s.close()
-        except Exception:
-            pass
-
-        if not local_ip or local_ip.startswith("127."):
-            try:
-                # Method 2: Try Google DNS (requires internet)
-                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                s.settimeout(2.0)
-                s.connect(("8.8.8.8", 80))
-                local_ip = s.getsockname()[0]
-                s.close()
-            except Exception:
-                pass
-
-        if not local_ip or local_ip.startswith("127."):
-            try:
-                # Method 3: Get from hostname
-                local_ip = socket.gethostbyname(socket.gethostname())
-            except Exception:
-                pass
-
-        if not local_ip or local_ip.startswith("127."):
-            logger.warning("[FireTV] No network connectivity - cannot discover devices")
-            return devices
-
-        # Get network prefix (assume /24)
-        network_prefix = ".".join(local_ip.split(".")[:3])
-        logger.info(f"[FireTV] Scanning network {network_prefix}.0/24 for ADB devices...")
-
-        # Scan for open ADB ports
-        def check_host(ip: str, results: list):
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(0.5)
-                result = sock.connect_ex((ip, ADB_PORT))
-                sock.close()
-                if result == 0:
-                    # Try to get hostname
-                    try:
-                        hostname = socket.gethostbyaddr(ip)[0]
-                    except:
-                        hostname = None
-                    results.append({"ip": ip, "hostname": hostname, "port": ADB_PORT})
-                    logger.info(f"[FireTV] Found ADB device: {ip} ({hostname or 'unknown'})")
-            except:
-                pass
-
-        # Scan in parallel
-        threads = []
-        results = []
-        for i in range(1, 255):
-            ip = f"{network_prefix}.{i}"
-            t = threading.Thread(target=check_host, args=(ip, results))
-            t.start()
-            threads.append(t)
-
-        # Wait for all threads with timeout
-        start_time = time.time()
-        for t in threads:
-            remaining = timeout - (time.time() - start_time)
-            if remaining > 0:
-                t.join(timeout=remaining)
+        import lan_scan
+
+        verify = None
+        if verify_fire_tv:
+            verify = lambda ip: lan_scan.adb_handshake(ip, ADB_PORT)
+        results = lan_scan.scan(ADB_PORT, timeout=timeout, verify=verify, first_only=first_only)
+        for device in results:
+            verified = device.pop('verified', None)
+            if verified is not None:
+                device['adb'] = verified
+            logger.info(f"[FireTV] Found ADB device: {device['ip']} ({device['hostname'] or 'unknown'})")
 
         if not results:
             logger.info("[FireTV] No devices with ADB port open found on network")
@@ -293,7 +244,7 @@ class FireTVController:
             logger.info("[FireTV]   1. No Fire TV on this network")
             logger.info("[FireTV]   2. Fire TV has ADB debugging disabled")
             logger.info("[FireTV]   3. Fire TV is asleep or powered off")
-            return devices
+            return results
 
         logger.info(f"[FireTV] Found {len(results)} device(s) with ADB port open")
         return results
@@ -513,6 +464,10 @@ class FireTVController:
                 if success:
                     self._connected = True
                     self._consecutive_failures = 0
+                    if self._channel:
+                        self._channel.close()  # Left over from a dropped connection
+                    self._channel = AdbCommandChannel(self._device.adb_shell, lock=self._lock,
+                                                      on_error=self._on_channel_error)
                     logger.info(f"[FireTV] Connected to {ip_address}")
                     self._notify_connection_change(True)
 
@@ -621,6 +576,9 @@ class FireTVController:
 
     def _disconnect_internal(self):
         """Internal disconnect without lock."""
+        if self._channel:
+            self._channel.close()
+            self._channel = None
         if self._device:
             try:
                 self._device.adb_close()
@@ -803,20 +761,44 @@ class FireTVController:
 
     def _send_key(self, keycode: str) -> bool:
         """Send a key event to Fire TV."""
-        with self._lock:
-            if not self._connected or not self._device:
-                logger.warning(f"[FireTV] Not connected, cannot send {keycode}")
-                return False
+        return self._send_keycodes([keycode])
+
+    def _send_keycodes(self, keycodes: list, delay: float = 0.0) -> bool:
+        """Send key events as one channel command, `delay` apart on the device."""
+        # The channel takes self._lock itself around the device call
+        channel = self._channel if self._connected else None
+        if channel is None:
+            logger.warning(f"[FireTV] Not connected, cannot send {' '.join(keycodes)}")
+            return False
 
-            try:
-                # Use adb_shell to send key event
-                self._device.adb_shell(f"input keyevent {keycode}")
-                logger.debug(f"[FireTV] Sent key: {keycode}")
-                return True
-            except Exception as e:
-                logger.error(f"[FireTV] Failed to send key {keycode}: {e}")
-                self._connected = False
-                return False
+        try:
+            channel.send_keys(keycodes, delay=delay)
+            logger.debug(f"[FireTV] Sent keys: {' '.join(keycodes)}")
+            return True
+        except AdbChannelError as e:
+            logger.error(f"[FireTV] Failed to send keys {' '.join(keycodes)}: {e}")
+            return False
+
+    def _on_channel_error(self, error: Exception):
+        """The device shell raised under the channel: treat as a dropped connection."""
+        logger.warning(f"[FireTV] ADB command failed: {error}")
+        self._connected = False
+
+    def shell(self, command: str, timeout: float = 10.0) -> Optional[str]:
+        """
+        Run a shell command on the device through the command channel.
+
+        Returns:
+            The command's output, or None if not connected or it failed
+        """
+        channel = self._channel if self._connected else None
+        if channel is None:
+            return None
+        try:
+            return channel.run(command, timeout=timeout)
+        except AdbChannelError as e:
+            logger.error(f"[FireTV] Shell command failed: {e}")
+            return None
 
     def _call_device_method(self, method_name: str) -> bool:
         """Call a built-in device method."""
@@ -842,6 +824,9 @@ class FireTVController:
         """
         Send multiple commands in sequence.
 
+        The whole sequence goes to the device as one command and the delay
+        is applied on the device, so presses aren't spaced by network jitter.
+
         Args:
             *commands: Command names to send
             delay: Delay between commands in seconds
@@ -849,13 +834,13 @@ class FireTVController:
         Returns:
             True if all commands sent successfully
         """
-        success = True
-        for i, cmd in enumerate(commands):
-            if i > 0 and delay > 0:
-                time.sleep(delay)
-            if not self.send_command(cmd):
-                success = False
-        return success
+        unknown = [cmd for cmd in commands if cmd not in KEY_CODES]
+        if unknown:
+            logger.error(f"[FireTV] Unknown command: {unknown[0]}. Available: {list(KEY_CODES.keys())}")
+            return False
+        if not commands:
+            return True
+        return self._send_keycodes([KEY_CODES[cmd] for cmd in commands], delay=delay)
 
     def skip_ad(self, method: str = "select") -> bool:
         """
@@ -879,8 +864,8 @@ class FireTVController:
         elif method == "fast_forward":
             return self.send_command("fast_forward")
         elif method == "seek_right":
-            # Send multiple right presses to seek forward
-            return self.send_keys("right", "right", "right", delay=0.05)
+            # Send multiple right presses to seek forward (one input process)
+            return self.send_keys("right", "right", "right", delay=0)
         else:
             logger.warning(f"[FireTV] Unknown skip method: {method}")
             return self.send_command("select")
@@ -889,9 +874,23 @@ class FireTVController:
         """
         Get the currently active app package name.
 
+        Answers come from a short-lived cache in the command channel, so
+        polling this doesn't cost a device round trip each time.
+
         Returns:
             Package name (e.g., "com.netflix.ninja") or None if not connected
         """
+        channel = self._channel if self._connected else None
+        if channel is not None:
+            try:
+                package = self._parse_focus_package(channel.query(CURRENT_APP_COMMAND))
+                if package:
+                    return package
+            except AdbChannelError as e:
+                logger.error(f"[FireTV] Failed to get current app: {e}")
+                return None
+
+        # No focus line on this Android version; ask androidtv
         with self._lock:
             if not self._connected or not self._device:
                 return None
@@ -917,6 +916,16 @@ class FireTVController:
                 logger.error(f"[FireTV] Failed to get current app: {e}")
                 return None
 
+    @staticmethod
+    def _parse_focus_package(output: str) -> Optional[str]:
+        """Package from `dumpsys window` focus lines, mCurrentFocus first."""
+        lines = sorted(output.splitlines(), key=lambda line: 'mCurrentFocus' not in line)
+        for line in lines:
+            match = _FOCUS_PACKAGE_RE.search(line)
+            if match:
+                return match.group(1)
+        return None
+
     def get_device_info(self) -> Optional[dict]:
         """
         Get Fire TV device information.
@@ -372,7 +372,10 @@ class FireTVSetupManager:
         logger.info("[FireTVSetup] Scanning network for Fire TV devices...")
 
         from src.fire_tv import FireTVController
-        devices = FireTVController.discover_devices(timeout=10.0)
+        # Setup only connects to the first hit, so stop at the first host
+        # that actually answers the ADB handshake
+        devices = FireTVController.discover_devices(timeout=10.0, verify_fire_tv=True,
+                                                    first_only=True)
 
         if devices:
             logger.info(f"[FireTVSetup] Found {len(devices)} device(s) with ADB enabled")
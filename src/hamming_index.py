@@ -0,0 +1,166 @@
+"""
+Hamming-space index for 64-bit perceptual hashes (dHash).
+
+ScreenshotManager's dedup used to compare a new frame against the last 200
+hashes of its category one by one, and forgot them on restart, so the same
+ad frame was saved again every session. HammingIndex answers "is any stored
+hash within distance d?" over the whole corpus using multi-index hashing:
+
+- Each 64-bit hash is split into 4 bands of 16 bits; each band value maps
+  to the stored hashes that have it.
+- Pigeonhole: if two hashes differ in <= d bits, at least one band differs
+  in <= d // 4 bits. So a query probes, per band, every 16-bit value within
+  d // 4 bits of the query's band (1 + 16 + 120 = 137 values for d <= 11)
+  and verifies the candidates with a full 64-bit popcount.
+
+At 100k entries a miss (the common case) is ~550 bucket lookups plus
+~800 candidate popcounts, about half a millisecond; a hit returns at the
+first match. Above d // 4 == 3 the probe
+set grows quickly, so larger radii fall back to a linear scan.
+"""
+
+import threading
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Hashable, List, Optional, Tuple
+
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Largest per-band radius probed via the bands (697 masks per band)
+MAX_BAND_RADIUS = 3
+
+
+if hasattr(int, 'bit_count'):  # Python 3.10+
+    _popcount = int.bit_count
+else:
+    def _popcount(x: int) -> int:
+        return bin(x).count('1')
+
+
+def hamming_distance(h1: int, h2: int) -> int:
+    """Count differing bits between two hashes."""
+    return _popcount(h1 ^ h2)
+
+
+@lru_cache(maxsize=None)
+def _band_masks(radius: int) -> Tuple[int, ...]:
+    """All 16-bit XOR masks with popcount <= radius."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), r):
+            mask = 0
+            for b in bits:
+                mask |= 1 << b
+            masks.append(mask)
+    return tuple(masks)
+
+
+def _bands(h: int) -> Tuple[int, ...]:
+    return tuple((h >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS))
+
+
+class HammingIndex:
+    """Key -> 64-bit hash map with fast radius queries. Thread-safe.
+
+    Band tables are flat 65536-slot lists whose buckets hold distinct hash
+    values (not keys), so a probe is list indexing plus an XOR/popcount per
+    candidate; `_keys` maps each hash back to the keys stored under it.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[Hashable, int] = {}
+        self._keys: Dict[int, set] = {}
+        self._tables: List[list] = [[None] * (1 << BAND_BITS) for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, key):
+        return key in self._hashes
+
+    def get(self, key) -> Optional[int]:
+        return self._hashes.get(key)
+
+    def add(self, key, h: int):
+        """Insert or replace the hash stored under `key`."""
+        with self._lock:
+            self._remove_locked(key)
+            self._hashes[key] = h
+            keys = self._keys.get(h)
+            if keys is not None:
+                keys.add(key)
+                return
+            self._keys[h] = {key}
+            for table, band in zip(self._tables, _bands(h)):
+                bucket = table[band]
+                if bucket is None:
+                    table[band] = [h]
+                else:
+                    bucket.append(h)
+
+    def remove(self, key) -> Optional[int]:
+        """Drop `key`; returns its hash (None if it was not indexed)."""
+        with self._lock:
+            return self._remove_locked(key)
+
+    def clear(self):
+        with self._lock:
+            self._hashes.clear()
+            self._keys.clear()
+            self._tables = [[None] * (1 << BAND_BITS) for _ in range(BANDS)]
+
+    def _remove_locked(self, key) -> Optional[int]:
+        h = self._hashes.pop(key, None)
+        if h is None:
+            return None
+        keys = self._keys[h]
+        keys.discard(key)
+        if not keys:
+            del self._keys[h]
+            for table, band in zip(self._tables, _bands(h)):
+                bucket = table[band]
+                bucket.remove(h)
+                if not bucket:
+                    table[band] = None
+        return h
+
+    def find(self, h: int, max_distance: int, first: bool = False) -> List[Tuple[int, Hashable]]:
+        """All (distance, key) with distance <= max_distance, nearest first.
+
+        With first=True, returns as soon as one match is found.
+        """
+        if max_distance < 0:
+            return []
+        with self._lock:
+            radius = max_distance // BANDS
+            if radius > MAX_BAND_RADIUS:
+                found = {c for c in self._keys if _popcount(h ^ c) <= max_distance}
+            else:
+                found = set()
+                masks = _band_masks(radius)
+                for table, band in zip(self._tables, _bands(h)):
+                    for bucket in [table[band ^ m] for m in masks]:
+                        if bucket is None:
+                            continue
+                        for c in bucket:
+                            if _popcount(h ^ c) <= max_distance:
+                                found.add(c)
+                                if first:
+                                    break
+                        if first and found:
+                            break
+                    if first and found:
+                        break
+            matches = [(_popcount(h ^ c), key) for c in found for key in self._keys[c]]
+        matches.sort(key=lambda m: m[0])
+        if first:
+            return matches[:1]
+        return matches
+
+    def nearest_within(self, h: int, max_distance: int) -> Optional[Tuple[int, Hashable]]:
+        """Some (distance, key) within max_distance, or None."""
+        matches = self.find(h, max_distance, first=True)
+        return matches[0] if matches else None
@@ -0,0 +1,335 @@
+"""
+HDMI-RX source-change watcher (V4L2_EVENT_SOURCE_CHANGE).
+
+HealthMonitor finds out about a lost, restored or re-negotiated HDMI
+input by polling ustreamer's /state and the V4L2 format every 5s, then
+debouncing format changes for another 2s, so a Fire TV -> Roku switch
+sat on a stale or NO SIGNAL screen for several seconds before anything
+reacted.
+
+The HDMI-RX driver raises V4L2_EVENT_SOURCE_CHANGE the moment the link
+drops, comes back or changes timings. SourceChangeWatcher subscribes to
+that event on its own file handle, blocks in poll() for it, and after
+each event queries the DV timings (retrying while the receiver reports
+ENOLCK, i.e. the timings are still settling) and the negotiated pixel
+format, then calls on_change(timings, pixel_format) with timings None
+for "no signal". HealthMonitor turns that into the usual on_hdmi_lost /
+on_hdmi_restored / on_format_change callbacks; its polling stays as the
+fallback when the driver has no event support.
+
+QUERY_DV_TIMINGS is only issued after an event. Periodic querying is
+avoided elsewhere because it can disturb an active HDMI-RX stream.
+
+Device access goes through V4L2EventSource, so tests drive the watcher
+with a fake source.
+"""
+
+import ctypes
+import errno
+import fcntl
+import logging
+import os
+import select
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from metrics import counter
+
+logger = logging.getLogger(__name__)
+
+# Retry QUERY_DV_TIMINGS this often/long while the receiver is still locking
+SETTLE_INTERVAL_S = 0.1
+SETTLE_TIMEOUT_S = 1.5
+
+V4L2_EVENT_SOURCE_CHANGE = 5
+V4L2_EVENT_SRC_CH_RESOLUTION = 1 << 0
+
+SOURCE_CHANGES = counter('minus_hdmi_source_changes_total',
+                         'V4L2 source-change events from the HDMI-RX device')
+
+
+class _BTTimings(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [
+        ('width', ctypes.c_uint32),
+        ('height', ctypes.c_uint32),
+        ('interlaced', ctypes.c_uint32),
+        ('polarities', ctypes.c_uint32),
+        ('pixelclock', ctypes.c_uint64),
+        ('hfrontporch', ctypes.c_uint32),
+        ('hsync', ctypes.c_uint32),
+        ('hbackporch', ctypes.c_uint32),
+        ('vfrontporch', ctypes.c_uint32),
+        ('vsync', ctypes.c_uint32),
+        ('vbackporch', ctypes.c_uint32),
+        ('il_vfrontporch', ctypes.c_uint32),
+        ('il_vsync', ctypes.c_uint32),
+        ('il_vbackporch', ctypes.c_uint32),
+        ('standards', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('picture_aspect', ctypes.c_uint32 * 2),
+        ('cea861_vic', ctypes.c_uint8),
+        ('hdmi_vic', ctypes.c_uint8),
+        ('reserved', ctypes.c_uint8 * 46),
+    ]
+
+
+class _DVTimingsUnion(ctypes.Union):
+    _pack_ = 1
+    _fields_ = [('bt', _BTTimings), ('reserved', ctypes.c_uint32 * 32)]
+
+
+class _DVTimings(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [('type', ctypes.c_uint32), ('u', _DVTimingsUnion)]
+
+
+class _EventSubscription(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('id', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 5),
+    ]
+
+
+class _EventUnion(ctypes.Union):
+    _fields_ = [
+        ('changes', ctypes.c_uint32),  # v4l2_event_src_change
+        ('data', ctypes.c_uint8 * 64),
+        ('_align', ctypes.c_int64),
+    ]
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+class _Event(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('u', _EventUnion),
+        ('pending', ctypes.c_uint32),
+        ('sequence', ctypes.c_uint32),
+        ('timestamp', _Timespec),
+        ('id', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 8),
+    ]
+
+
+def _ioc(direction: int, number: int, size: int) -> int:
+    return (direction << 30) | (size << 16) | (ord('V') << 8) | number
+
+
+VIDIOC_QUERY_DV_TIMINGS = _ioc(2, 99, ctypes.sizeof(_DVTimings))
+VIDIOC_SUBSCRIBE_EVENT = _ioc(1, 90, ctypes.sizeof(_EventSubscription))
+VIDIOC_DQEVENT = _ioc(2, 89, ctypes.sizeof(_Event))
+
+
+@dataclass
+class DVTimings:
+    """Active video timings reported by the receiver."""
+    width: int
+    height: int
+    fps: float = 0.0
+    interlaced: bool = False
+
+    def __str__(self):
+        return f"{self.width}x{self.height}@{self.fps:.2f}{'i' if self.interlaced else ''}"
+
+
+class NoSignal(Exception):
+    """QUERY_DV_TIMINGS: no link (ENOLINK) or timings out of range."""
+
+
+class Unstable(Exception):
+    """QUERY_DV_TIMINGS: signal present but not locked yet (ENOLCK)."""
+
+
+def query_dv_timings(fd: int) -> DVTimings:
+    """VIDIOC_QUERY_DV_TIMINGS on an open V4L2 device.
+
+    Raises NoSignal / Unstable for the receiver's "no link" and "not
+    locked" answers, OSError for anything else (e.g. ENOTTY).
+    """
+    raw = _DVTimings()
+    try:
+        fcntl.ioctl(fd, VIDIOC_QUERY_DV_TIMINGS, raw)
+    except OSError as e:
+        if e.errno in (errno.ENOLINK, errno.ERANGE):
+            raise NoSignal() from e
+        if e.errno == errno.ENOLCK:
+            raise Unstable() from e
+        raise
+    bt = raw.u.bt
+    if not bt.width or not bt.height:
+        raise NoSignal()
+    htotal = bt.width + bt.hfrontporch + bt.hsync + bt.hbackporch
+    vtotal = bt.height + bt.vfrontporch + bt.vsync + bt.vbackporch
+    if bt.interlaced:
+        vtotal += bt.il_vfrontporch + bt.il_vsync + bt.il_vbackporch
+    fps = bt.pixelclock / (htotal * vtotal) if htotal and vtotal else 0.0
+    return DVTimings(bt.width, bt.height, round(fps, 2), bool(bt.interlaced))
+
+
+def read_dv_timings(device: str) -> Optional[DVTimings]:
+    """Current DV timings of `device`, or None without a stable signal.
+
+    One-shot replacement for `v4l2-ctl --query-dv-timings`; raises
+    OSError if the device can't be opened or doesn't support the ioctl.
+    """
+    fd = os.open(device, os.O_RDWR | os.O_NONBLOCK)
+    try:
+        return query_dv_timings(fd)
+    except (NoSignal, Unstable):
+        return None
+    finally:
+        os.close(fd)
+
+
+class V4L2EventSource:
+    """Source-change events, timings and format of a V4L2 capture device."""
+
+    def __init__(self, device: str):
+        self.device = device
+        self._fd = None
+        self._poller = None
+
+    def open(self):
+        """Open the device and subscribe; raises OSError if unsupported."""
+        fd = os.open(self.device, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            sub = _EventSubscription(type=V4L2_EVENT_SOURCE_CHANGE, id=0)
+            fcntl.ioctl(fd, VIDIOC_SUBSCRIBE_EVENT, sub)
+        except OSError:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._poller = select.poll()
+        self._poller.register(fd, select.POLLPRI)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._poller = None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until an event is pending (True) or `timeout` passes."""
+        return bool(self._poller.poll(int(timeout * 1000)))
+
+    def dequeue(self) -> List[int]:
+        """Pending source-change events, as their `changes` bitmasks."""
+        changes = []
+        while True:
+            event = _Event()
+            try:
+                fcntl.ioctl(self._fd, VIDIOC_DQEVENT, event)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.EAGAIN):
+                    return changes
+                raise
+            if event.type == V4L2_EVENT_SOURCE_CHANGE:
+                changes.append(event.u.changes)
+
+    def query_timings(self) -> DVTimings:
+        return query_dv_timings(self._fd)
+
+    def read_format(self) -> Optional[str]:
+        from v4l2 import read_v4l2_format
+        info = read_v4l2_format(self.device)
+        return info.get('ustreamer_format') if info else None
+
+
+class SourceChangeWatcher:
+    """Thread turning source-change events into on_change(timings, pixel_format)."""
+
+    def __init__(self, source, on_change: Callable[[Optional[DVTimings], Optional[str]], None],
+                 wait_timeout: float = 1.0):
+        self.source = source
+        self.on_change = on_change
+        self.wait_timeout = wait_timeout
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.events_received = 0
+        self.last_timings: Optional[DVTimings] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Subscribe and start the thread; False if the device has no events."""
+        if self.running:
+            return True
+        try:
+            self.source.open()
+        except OSError as e:
+            logger.info(f"[SourceWatcher] Source-change events unavailable ({e}), polling only")
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="HDMISourceWatcher")
+        self._thread.start()
+        logger.info("[SourceWatcher] Watching HDMI-RX source-change events")
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.source.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if not self.source.wait(self.wait_timeout):
+                    continue
+                changes = self.source.dequeue()
+            except OSError as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning(f"[SourceWatcher] Event read failed, stopping: {e}")
+                break
+            if changes:
+                self.handle_change(changes)
+
+    def handle_change(self, changes: List[int]):
+        """Query the new source state and report it (one call per batch)."""
+        self.events_received += len(changes)
+        SOURCE_CHANGES.inc(len(changes))
+        timings = self._settled_timings()
+        pixel_format = None
+        if timings is not None:
+            try:
+                pixel_format = self.source.read_format()
+            except OSError:
+                pass
+        if self._stop_event.is_set():
+            return  # Settling was cut short by stop(), not a real loss
+        self.last_timings = timings
+        if timings is not None:
+            logger.info(f"[SourceWatcher] Source change: {timings} {pixel_format or 'unknown format'}")
+        else:
+            logger.info("[SourceWatcher] Source change: no signal")
+        try:
+            self.on_change(timings, pixel_format)
+        except Exception as e:
+            logger.error(f"[SourceWatcher] Source change handler failed: {e}")
+
+    def _settled_timings(self) -> Optional[DVTimings]:
+        deadline = time.monotonic() + SETTLE_TIMEOUT_S
+        while True:
+            try:
+                return self.source.query_timings()
+            except NoSignal:
+                return None
+            except Unstable:
+                if time.monotonic() >= deadline or self._stop_event.wait(SETTLE_INTERVAL_S):
+                    return None
+            except OSError as e:
+                logger.debug(f"[SourceWatcher] QUERY_DV_TIMINGS failed: {e}")
+                return None
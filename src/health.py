@@ -9,22 +9,62 @@ Features:
 - VLM/OCR health monitoring
 - Memory/disk usage monitoring
 - Automatic recovery actions
+
+Each monitor pass builds one HealthStatus snapshot; get_status() hands
+out copies of it, so /api/health, /api/metrics and the status page no
+longer re-run the checks (ustreamer HTTP probes, /proc scans) per
+request. Checks read sysfs, /proc and ioctls instead of starting
+v4l2-ctl, amixer, pgrep or dmesg, and kernel uevents for HDMI hotplug
+(kernel_events.UeventListener) wake the monitor right away instead of
+waiting for the next interval. HDMI input loss, restore and format
+changes arrive as V4L2 source-change events (hdmi_source_watcher) and
+fire the callbacks without the poll/debounce delay; polling remains the
+fallback and covers a source that stays connected but stops sending.
+
+Signal-lost, signal-restored and format-change callbacks restart
+ustreamer or the display, which takes seconds. They run in order on one
+recovery thread, never under _transition_lock and never on the event
+watcher's thread.
 """
 
 import logging
+import queue
 import threading
 import time
 import subprocess
 import os
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Callable, Optional
 
 from config import MinusConfig
-from v4l2 import probe_v4l2_device
+from placement import get_placement_manager
+from v4l2 import probe_v4l2_device, read_v4l2_format
 
 logger = logging.getLogger(__name__)
 
+# After a hotplug uevent, wait this long for the rest of the burst (a TV
+# power-cycle produces several drm/extcon/sound events) before checking
+EVENT_SETTLE_S = 0.3
+
+# After a V4L2 source-change event the kernel's view of the input is
+# fresher than ustreamer's /state (which lags while ustreamer restarts),
+# so polling doesn't override it for this long
+SOURCE_EVENT_HOLDOFF_S = 10.0
+
+
+def _format_changed(old: str, new: str) -> bool:
+    """True if `new` ('NV12@1920x1080') is a different input format than `old`.
+
+    An 'unknown' pixel format (the driver or probe couldn't tell) is
+    not a change by itself; a different resolution still is.
+    """
+    old_pixel, _, old_size = old.partition('@')
+    new_pixel, _, new_size = new.partition('@')
+    if old_size != new_size:
+        return True
+    return 'unknown' not in (old_pixel, new_pixel) and old_pixel != new_pixel
+
 
 @dataclass
 class HealthStatus:
@@ -46,6 +86,7 @@ class HealthStatus:
     disk_free_mb: float = 0
     uptime_seconds: float = 0
     output_fps: float = 0.0
+    collected_at: float = 0  # time.time() when the checks ran
 
 
 class HealthMonitor:
@@ -71,6 +112,11 @@ class HealthMonitor:
 
         self._monitor_thread = None
         self._stop_event = threading.Event()
+        self._wake_event = threading.Event()  # Set by hotplug uevents
+        self._uevents = None
+        self._source_watcher = None
+        self._source_event_time = 0  # Last V4L2 source-change event
+        self._transition_lock = threading.Lock()  # Signal/format state vs. watcher thread
         self._start_time = time.time()
         self._last_hdmi_signal = None  # None = first check not done yet (avoids false "signal lost" on startup)
         self._hdmi_lost_time = 0
@@ -93,7 +139,13 @@ class HealthMonitor:
         # V4L2 format cache (to avoid probing on every status call)
         self._v4l2_format_cache = ""
         self._v4l2_format_cache_time = 0
-        self._v4l2_format_cache_ttl = 10.0  # Cache for 10 seconds
+        self._v4l2_format_cache_ttl = 10.0  # Cache for 10 seconds (v4l2-ctl fallback only)
+
+        # Last snapshot built by the monitor loop (or by get_status() while
+        # the loop isn't running), shared by every get_status() caller
+        self._snapshot: Optional[HealthStatus] = None
+        self._snapshot_lock = threading.Lock()
+        self._ustreamer_pid = None
 
         # HDMI-TX audio link state (populated by monitor loop, read by get_status())
         # Values the monitor thread writes; get_status() may be called from any
@@ -110,6 +162,10 @@ class HealthMonitor:
         self._on_vlm_failure: Optional[Callable] = None
         self._on_memory_critical: Optional[Callable] = None
         self._on_format_change: Optional[Callable] = None  # Called when HDMI format/resolution changes
+        # Signal/format callbacks queued for the recovery thread
+        self._recovery_queue: "queue.Queue" = queue.Queue()
+        self._recovery_thread: Optional[threading.Thread] = None
+        self._recovery_start_lock = threading.Lock()
 
         # Thresholds (from config)
         self.frame_stale_threshold = self._config.frame_stale_threshold
@@ -129,19 +185,184 @@ class HealthMonitor:
             name="HealthMonitor"
         )
         self._monitor_thread.start()
+        self._start_uevents()
+        self._start_source_watcher()
         logger.info("[HealthMonitor] Started")
 
     def stop(self):
         """Stop the health monitor thread."""
         self._stop_event.set()
+        self._wake_event.set()
+        if self._uevents:
+            self._uevents.unsubscribe(self._on_uevent)
+            self._uevents = None
+        if self._source_watcher:
+            self._source_watcher.stop()
+            self._source_watcher = None
         if self._monitor_thread:
             self._monitor_thread.join(timeout=2.0)
             self._monitor_thread = None
+        with self._recovery_start_lock:
+            if self._recovery_thread is not None:
+                self._recovery_queue.put(None)
+                self._recovery_thread = None
         logger.info("[HealthMonitor] Stopped")
 
+    def _recover(self, callback: Optional[Callable], *args):
+        """Queue a signal/format callback for the recovery thread."""
+        if callback is None:
+            return
+        with self._recovery_start_lock:
+            self._recovery_queue.put((callback, args))
+            if self._recovery_thread is None or not self._recovery_thread.is_alive():
+                self._recovery_thread = threading.Thread(
+                    target=self._recovery_loop, daemon=True, name="HealthRecovery")
+                self._recovery_thread.start()
+
+    def _recovery_loop(self):
+        while True:
+            item = self._recovery_queue.get()
+            try:
+                if item is None:
+                    return
+                callback, args = item
+                callback(*args)
+            except Exception as e:
+                logger.error(f"[HealthMonitor] Recovery callback failed: {e}")
+            finally:
+                self._recovery_queue.task_done()
+
+    def _recovery_pending(self) -> bool:
+        """A queued or running recovery callback hasn't finished yet."""
+        return self._recovery_queue.unfinished_tasks > 0
+
+    def _start_uevents(self):
+        """Subscribe to HDMI hotplug uevents (polling only if unavailable)."""
+        try:
+            from kernel_events import get_uevent_listener
+            listener = get_uevent_listener()
+            if listener.start():
+                listener.subscribe(self._on_uevent)
+                self._uevents = listener
+        except Exception as e:
+            logger.debug(f"[HealthMonitor] Uevents unavailable: {e}")
+
+    def _on_uevent(self, event: dict):
+        """Wake the monitor loop for HDMI connect/disconnect and mode changes."""
+        subsystem = event.get('SUBSYSTEM')
+        if subsystem == 'drm' and event.get('HOTPLUG') != '1':
+            return
+        if subsystem in ('drm', 'extcon', 'video4linux'):
+            self._v4l2_format_cache_time = 0
+        logger.debug(f"[HealthMonitor] uevent {event.get('ACTION')} {subsystem} "
+                     f"{event.get('DEVPATH', '')}")
+        self._wake_event.set()
+
+    def _start_source_watcher(self, source=None):
+        """Watch the HDMI-RX device for V4L2 source-change events.
+
+        `source` defaults to the capture device; tests pass a fake.
+        """
+        try:
+            from hdmi_source_watcher import SourceChangeWatcher, V4L2EventSource
+            if source is None:
+                device = getattr(self.minus, 'device', '/dev/video0')
+                if not isinstance(device, str):
+                    return
+                source = V4L2EventSource(device)
+            watcher = SourceChangeWatcher(source, self._on_source_change)
+            if watcher.start():
+                self._source_watcher = watcher
+        except Exception as e:
+            logger.debug(f"[HealthMonitor] Source-change watcher unavailable: {e}")
+
+    def _on_source_change(self, timings, pixel_format: Optional[str]):
+        """Apply a V4L2 source-change event (watcher thread).
+
+        Runs the same transitions as the polling path in
+        _check_and_recover, without its 5s interval and format debounce:
+        the driver only reports timings once the receiver has locked.
+        """
+        now = time.time()
+        in_grace = (now - self._start_time) <= self.startup_grace_period
+        lost = restored = False
+        new_format = None
+        with self._transition_lock:
+            self._source_event_time = now
+            self._hdmi_fps_zero_since = 0
+            self._v4l2_format_cache_time = 0
+            if timings is None:
+                if self._last_hdmi_signal is not False:
+                    lost = self._last_hdmi_signal is not None and not in_grace
+                    self._last_hdmi_signal = False
+                    if lost:
+                        self._hdmi_lost_time = now
+                        self._last_no_signal_trigger = now
+            else:
+                restored = self._last_hdmi_signal is False and self._hdmi_lost_time > 0
+                self._last_hdmi_signal = True
+                current = f"{pixel_format or 'unknown'}@{timings.width}x{timings.height}"
+                if self._last_hdmi_format is None:
+                    self._last_hdmi_format = current
+                elif _format_changed(self._last_hdmi_format, current):
+                    if not restored:
+                        new_format = current
+                    self._last_hdmi_format = current
+                elif pixel_format:
+                    self._last_hdmi_format = current
+                self._format_stable_since = 0
+
+        if in_grace:
+            logger.debug(f"[HealthMonitor] Source change during startup: {timings}")
+        elif lost:
+            logger.warning("[HealthMonitor] HDMI signal LOST (source-change event)")
+            self._recover(self._on_hdmi_lost)
+        elif restored:
+            lost_duration = now - self._hdmi_lost_time
+            logger.info(f"[HealthMonitor] HDMI signal RESTORED at {timings} "
+                        f"(was lost {lost_duration:.1f}s, source-change event)")
+            self._recover(self._on_hdmi_restored)
+        elif new_format:
+            logger.warning(f"[HealthMonitor] HDMI format changed: -> {new_format} (source-change event)")
+            self._recover(self._on_format_change, new_format)
+        # Refresh the shared snapshot
+        self._wake_event.set()
+
+    def _source_event_recent(self) -> bool:
+        return time.time() - self._source_event_time < SOURCE_EVENT_HOLDOFF_S
+
     def get_status(self) -> HealthStatus:
-        """Get current health status."""
+        """Get current health status.
+
+        Returns a copy of the monitor loop's latest snapshot (refreshed
+        every check_interval and on hotplug events), so callers never run
+        the checks themselves. Before start() or after stop(), a snapshot
+        is built on demand and reused for check_interval.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or not self._is_running():
+            with self._snapshot_lock:
+                snapshot = self._snapshot
+                if snapshot is None or time.time() - snapshot.collected_at >= self.check_interval:
+                    snapshot = self._refresh_snapshot()
+        return replace(snapshot,
+                       uptime_seconds=time.time() - self._start_time,
+                       hdmi_tx_audio_link_details=dict(snapshot.hdmi_tx_audio_link_details))
+
+    def _is_running(self) -> bool:
+        return (self._monitor_thread is not None and self._monitor_thread.is_alive()
+                and not self._stop_event.is_set())
+
+    def _refresh_snapshot(self) -> HealthStatus:
+        """Run all checks and publish the result as the shared snapshot."""
+        status = self._collect_status()
+        self._snapshot = status
+        return status
+
+    def _collect_status(self) -> HealthStatus:
+        """Run every check (monitor thread, or get_status() fallback)."""
         status = HealthStatus()
+        status.collected_at = time.time()
         status.uptime_seconds = time.time() - self._start_time
 
         # HDMI signal
@@ -170,7 +391,8 @@ class HealthMonitor:
                 self.minus.vlm, 'consecutive_timeouts', 0
             )
         if self.minus.ocr:
-            status.ocr_ready = True  # OCR doesn't have ready state
+            # False while the 'ocr_model' boot phase is still warming up
+            status.ocr_ready = bool(getattr(self.minus.ocr, 'is_ready', True))
 
         # Resources
         status.memory_percent = self._get_memory_percent()
@@ -187,52 +409,66 @@ class HealthMonitor:
                 self._check_and_recover()
             except Exception as e:
                 logger.error(f"[HealthMonitor] Error in check loop: {e}")
+            try:
+                # Re-pin tasks that drifted, claim new GStreamer threads
+                get_placement_manager().verify_if_due()
+            except Exception as e:
+                logger.error(f"[HealthMonitor] Placement check failed: {e}")
 
-            self._stop_event.wait(self.check_interval)
+            # Next pass after check_interval, or right after a hotplug event
+            if self._wake_event.wait(self.check_interval):
+                self._wake_event.clear()
+                self._stop_event.wait(EVENT_SETTLE_S)
 
         logger.debug("[HealthMonitor] Monitor loop stopped")
 
     def _check_and_recover(self):
         """Check health and trigger recovery if needed."""
         # Refresh cached HDMI-TX audio link state before building status.
-        # Runs amixer subprocesses; only done here (5s loop), never in get_status().
+        # Reads ALSA controls; only done here, never in get_status().
         self._update_hdmi_tx_audio_link_cache()
 
-        status = self.get_status()
-
-        # HDMI signal monitoring
-        # Skip transition callbacks until we've completed startup grace period
-        # This prevents false "signal lost/restored" during startup before ustreamer is ready
-        uptime = time.time() - self._start_time
-        if self._last_hdmi_signal is not None and uptime > self.startup_grace_period:
-            if not status.hdmi_signal and self._last_hdmi_signal:
-                # Signal just lost
-                self._hdmi_lost_time = time.time()
-                self._last_no_signal_trigger = time.time()  # Track when we triggered
-                logger.warning("[HealthMonitor] HDMI signal LOST")
-                if self._on_hdmi_lost:
-                    self._on_hdmi_lost()
-
-            elif status.hdmi_signal and not self._last_hdmi_signal:
-                # Signal just restored (only if it was actually lost, not just starting up)
-                if self._hdmi_lost_time > 0:
-                    lost_duration = time.time() - self._hdmi_lost_time
-                    logger.info(f"[HealthMonitor] HDMI signal RESTORED (was lost {lost_duration:.1f}s)")
-                    if self._on_hdmi_restored:
-                        self._on_hdmi_restored()
-                else:
-                    logger.debug(f"[HealthMonitor] HDMI signal present (initial detection)")
-        else:
-            # Still in startup grace period - just track state changes without callbacks
-            if self._last_hdmi_signal is None:
-                logger.debug(f"[HealthMonitor] Initial HDMI signal state: {status.hdmi_signal}")
+        status = self._refresh_snapshot()
+
+        with self._transition_lock:
+            # A recent source-change event already applied the transition
+            # (and is fresher than ustreamer's /state while it restarts)
+            if self._source_event_recent() and self._last_hdmi_signal is not None:
+                status.hdmi_signal = self._last_hdmi_signal
+
+            # HDMI signal monitoring
+            # Skip transition callbacks until we've completed startup grace period
+            # This prevents false "signal lost/restored" during startup before ustreamer is ready
+            uptime = time.time() - self._start_time
+            if self._last_hdmi_signal is not None and uptime > self.startup_grace_period:
+                if not status.hdmi_signal and self._last_hdmi_signal:
+                    # Signal just lost
+                    self._hdmi_lost_time = time.time()
+                    self._last_no_signal_trigger = time.time()  # Track when we triggered
+                    logger.warning("[HealthMonitor] HDMI signal LOST")
+                    self._recover(self._on_hdmi_lost)
+
+                elif status.hdmi_signal and not self._last_hdmi_signal:
+                    # Signal just restored (only if it was actually lost, not just starting up)
+                    if self._hdmi_lost_time > 0:
+                        lost_duration = time.time() - self._hdmi_lost_time
+                        logger.info(f"[HealthMonitor] HDMI signal RESTORED (was lost {lost_duration:.1f}s)")
+                        self._recover(self._on_hdmi_restored)
+                    else:
+                        logger.debug(f"[HealthMonitor] HDMI signal present (initial detection)")
+            else:
+                # Still in startup grace period - just track state changes without callbacks
+                if self._last_hdmi_signal is None:
+                    logger.debug(f"[HealthMonitor] Initial HDMI signal state: {status.hdmi_signal}")
 
-        self._last_hdmi_signal = status.hdmi_signal
+            self._last_hdmi_signal = status.hdmi_signal
 
         # Continuous NO SIGNAL mode enforcement
         # Even if we already triggered _on_hdmi_lost, the display might have failed or crashed
         # Check if signal is lost but NO SIGNAL mode isn't active, and re-trigger if needed
-        if not status.hdmi_signal and uptime > self.startup_grace_period:
+        # (not while an earlier lost/restored callback is still working)
+        if (not status.hdmi_signal and uptime > self.startup_grace_period
+                and not self._recovery_pending()):
             now = time.time()
             no_signal_active = self._is_no_signal_mode_active()
 
@@ -250,8 +486,7 @@ class HealthMonitor:
                     # set on consumers (e.g. detect loops) forever.
                     if self._hdmi_lost_time == 0:
                         self._hdmi_lost_time = now
-                    if self._on_hdmi_lost:
-                        self._on_hdmi_lost()
+                    self._recover(self._on_hdmi_lost)
 
         # HDMI-TX output monitoring (detect TV disconnect/reconnect)
         # When TV restarts, the kmssink pipeline loses its DRM connection but keeps "running"
@@ -283,8 +518,7 @@ class HealthMonitor:
                         # For no-signal mode, DPMS cycle is done in start_no_signal_mode()
                         self._force_hdmi_reinit()
                         self._last_no_signal_trigger = time.time()
-                        if self._on_hdmi_lost:
-                            self._on_hdmi_lost()
+                        self._recover(self._on_hdmi_lost)
                     else:
                         # We have HDMI input but output reconnected - restart display pipeline
                         # with hdmi_reconnect=True to trigger DPMS cycle and DRM re-probe
@@ -302,33 +536,37 @@ class HealthMonitor:
 
             self._last_hdmi_output_connected = output_connected
 
-        # Format/resolution change detection (for adaptive device switching)
-        # This allows seamless switching between FireTV, Roku, AppleTV, etc.
-        if status.hdmi_signal and status.hdmi_format and uptime > self.startup_grace_period:
-            current_format = status.hdmi_format
-            if self._last_hdmi_format is None:
-                # First detection - just record it
-                self._last_hdmi_format = current_format
-                self._format_stable_since = time.time()
-                logger.info(f"[HealthMonitor] Initial format detected: {current_format}")
-            elif current_format != self._last_hdmi_format:
-                # Format changed - debounce to avoid rapid restarts during negotiation
-                now = time.time()
-                if self._format_stable_since == 0:
-                    # Start debounce timer
-                    self._format_stable_since = now
-                    logger.info(f"[HealthMonitor] Format change detected: {self._last_hdmi_format} -> {current_format} (waiting {self._format_change_debounce}s to stabilize)")
-                elif (now - self._format_stable_since) >= self._format_change_debounce:
-                    # Format has been stable for debounce period - trigger restart
-                    old_format = self._last_hdmi_format
+        with self._transition_lock:
+            # Format/resolution change detection (for adaptive device switching)
+            # This allows seamless switching between FireTV, Roku, AppleTV, etc.
+            # (skipped right after a source-change event, which applied it already)
+            if (status.hdmi_signal and status.hdmi_format and uptime > self.startup_grace_period
+                    and not self._source_event_recent()):
+                current_format = status.hdmi_format
+                if self._last_hdmi_format is None:
+                    # First detection - just record it
                     self._last_hdmi_format = current_format
+                    self._format_stable_since = time.time()
+                    logger.info(f"[HealthMonitor] Initial format detected: {current_format}")
+                elif _format_changed(self._last_hdmi_format, current_format):
+                    # Format changed - debounce to avoid rapid restarts during negotiation
+                    now = time.time()
+                    if self._format_stable_since == 0:
+                        # Start debounce timer
+                        self._format_stable_since = now
+                        logger.info(f"[HealthMonitor] Format change detected: {self._last_hdmi_format} -> {current_format} (waiting {self._format_change_debounce}s to stabilize)")
+                    elif (now - self._format_stable_since) >= self._format_change_debounce:
+                        # Format has been stable for debounce period - trigger restart
+                        old_format = self._last_hdmi_format
+                        self._last_hdmi_format = current_format
+                        self._format_stable_since = 0
+                        logger.warning(f"[HealthMonitor] HDMI format changed: {old_format} -> {current_format}")
+                        self._recover(self._on_format_change, current_format)
+                else:
+                    # Format matches (or its pixel format is unknown) - reset debounce
                     self._format_stable_since = 0
-                    logger.warning(f"[HealthMonitor] HDMI format changed: {old_format} -> {current_format}")
-                    if self._on_format_change:
-                        self._on_format_change(current_format)
-            else:
-                # Format matches - reset debounce
-                self._format_stable_since = 0
+                    if not current_format.startswith('unknown@'):
+                        self._last_hdmi_format = current_format
 
         # ustreamer health (skip during startup grace period)
         uptime = time.time() - self._start_time
@@ -483,15 +721,26 @@ class HealthMonitor:
         """Get current V4L2 device format and resolution.
 
         Returns format string like 'NV24@1280x720' for change detection.
-        Uses caching to avoid excessive v4l2-ctl calls from frequent API polls.
+        Reads the format with VIDIOC_G_FMT; when the device can't be
+        queried that way, falls back to v4l2-ctl with a TTL cache.
         """
-        # Return cached value if still valid
+        device = getattr(self.minus, 'device', '/dev/video0')
+        if not isinstance(device, str):
+            device = '/dev/video0'
         now = time.time()
+        info = read_v4l2_format(device)
+        if info is not None:
+            fmt = info.get('ustreamer_format') or info.get('format') or 'unknown'
+            result = f"{fmt}@{info.get('width', 0)}x{info.get('height', 0)}"
+            self._v4l2_format_cache = result
+            self._v4l2_format_cache_time = now
+            return result
+
+        # Return cached value if still valid
         if self._v4l2_format_cache and (now - self._v4l2_format_cache_time) < self._v4l2_format_cache_ttl:
             return self._v4l2_format_cache
 
         try:
-            device = getattr(self.minus, 'device', '/dev/video0')
             info = probe_v4l2_device(device)
             fmt = info.get('ustreamer_format') or info.get('format') or 'unknown'
             width = info.get('width', 0)
@@ -563,14 +812,34 @@ class HealthMonitor:
             return False, ""
 
     def _check_ustreamer_alive(self) -> bool:
-        """Check if ustreamer process is running."""
+        """Check if ustreamer process is running.
+
+        Scans /proc cmdlines (what `pgrep -f ustreamer` does, without the
+        fork). The last PID found is checked first.
+        """
+        pid = self._ustreamer_pid
+        if pid and self._cmdline_has(pid, b'ustreamer'):
+            return True
+        self._ustreamer_pid = None
+        own_pid = os.getpid()
         try:
-            result = subprocess.run(
-                ['pgrep', '-f', 'ustreamer'],
-                capture_output=True, timeout=1
-            )
-            return result.returncode == 0
-        except Exception:
+            for entry in os.scandir('/proc'):
+                if not entry.name.isdigit():
+                    continue
+                pid = int(entry.name)
+                if pid != own_pid and self._cmdline_has(pid, b'ustreamer'):
+                    self._ustreamer_pid = pid
+                    return True
+        except OSError:
+            pass
+        return False
+
+    @staticmethod
+    def _cmdline_has(pid: int, needle: bytes) -> bool:
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                return needle in f.read()
+        except OSError:
             return False
 
     def _check_ustreamer_responding(self) -> tuple[bool, float]:
@@ -731,6 +1000,9 @@ class HealthMonitor:
         this state; recovery requires the sink to be power-cycled. We log
         so the user knows which way to go.
 
+        Controls are read with ioctls on /dev/snd/controlC<N> (alsa_ctl);
+        amixer is only used if that device can't be opened.
+
         Returns:
             (ok, details) — ok False if desync detected. details has 'jack'
             and 'eld_mfr' keys when readable.
@@ -741,6 +1013,18 @@ class HealthMonitor:
                 return (True, {})
             card_num = playback_device[3:].split(',')[0]
 
+            from alsa_ctl import hdmi_audio_link
+            link = hdmi_audio_link(card_num)
+            if link is not None:
+                return (link['ok'], link['details'])
+            return self._check_hdmi_tx_audio_link_amixer(card_num)
+        except Exception as e:
+            logger.debug(f"[HealthMonitor] HDMI-TX audio link probe error: {e}")
+            return (True, {})
+
+    def _check_hdmi_tx_audio_link_amixer(self, card_num: str) -> tuple:
+        """_check_hdmi_tx_audio_link() through amixer (no control device access)."""
+        try:
             # Enumerate controls once so we don't hard-code numids that can
             # shift across kernel versions or card types.
             try:
@@ -211,16 +211,9 @@ class IRTransmitter:
 
 
 def boost_priority():
-    """Best-effort: pin to last CPU + SCHED_FIFO. Reduces busy-wait jitter."""
-    try:
-        os.sched_setaffinity(0, {os.cpu_count() - 1})
-    except (AttributeError, OSError):
-        pass
-    try:
-        os.nice(-20)
-    except OSError:
-        pass
-    try:
-        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(80))
-    except (AttributeError, OSError, PermissionError):
-        pass
+    """Best-effort: pin to core 7 + SCHED_FIFO (the 'ir_transmit' placement).
+
+    Reduces busy-wait jitter.
+    """
+    from placement import apply_placement
+    apply_placement('ir_transmit')
@@ -0,0 +1,295 @@
+"""
+Kernel event sources for the health monitor: /dev/kmsg and uevents.
+
+Two things used to be found out by polling subprocesses:
+
+- HDMI i2c errors: check_hdmi_i2c_errors() ran `dmesg` and parsed the
+  whole kernel ring on every call. KmsgTail keeps /dev/kmsg open and
+  reads only the records added since the last call (one record per
+  read(), non-blocking), keeping the timestamps of matching lines.
+- HDMI connect/disconnect: HealthMonitor noticed a TV power-cycle or an
+  unplugged source on its next 5s pass. UeventListener listens on the
+  kernel's NETLINK_KOBJECT_UEVENT socket (the same broadcast udev
+  consumes) and calls subscribers as soon as a drm/extcon/video4linux
+  device changes.
+
+Both degrade to "not available" (no permission, no netlink in a
+container); callers keep their polling fallback for that case.
+"""
+
+import errno
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from metrics import counter
+
+logger = logging.getLogger(__name__)
+
+KMSG_PATH = '/dev/kmsg'
+
+# Timestamps kept per watched pattern (an i2c error flood is ~100/s)
+KMSG_WATCH_DEPTH = 4096
+
+# NETLINK_KOBJECT_UEVENT and its kernel multicast group
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+
+# Subsystems whose events can mean an HDMI cable/sink/source change
+HOTPLUG_SUBSYSTEMS = ('drm', 'extcon', 'video4linux', 'sound')
+
+UEVENTS = counter('minus_uevents_total', 'Kernel uevents received', ['subsystem'])
+
+
+def _monotonic() -> float:
+    # kmsg timestamps are CLOCK_MONOTONIC microseconds (same as dmesg)
+    return time.clock_gettime(time.CLOCK_MONOTONIC)
+
+
+def parse_kmsg_record(record: bytes) -> Optional[tuple]:
+    """(timestamp_seconds, message) from one /dev/kmsg record.
+
+    Records look like "6,1234,5678901,-;message\\n KEY=value\\n"; the
+    continuation lines carry device metadata and are dropped.
+    """
+    try:
+        text = record.decode('utf-8', errors='replace')
+        header, _, body = text.partition(';')
+        fields = header.split(',')
+        if len(fields) < 3:
+            return None
+        return int(fields[2]) / 1e6, body.split('\n', 1)[0]
+    except ValueError:
+        return None
+
+
+class KmsgTail:
+    """Incremental reader of the kernel log with per-pattern timestamps."""
+
+    def __init__(self, path: str = KMSG_PATH):
+        self.path = path
+        self._fd = None
+        self._failed = False
+        self._lock = threading.Lock()
+        # key -> (predicate(message) -> bool, deque of timestamps)
+        self._watches: Dict[str, tuple] = {}
+        self.records_read = 0
+
+    def watch(self, key: str, predicate: Callable[[str], bool]):
+        """Start keeping timestamps of messages matching `predicate`.
+
+        Messages already in the ring when the log is first opened count
+        too, so a watch added before the first poll sees recent history.
+        """
+        with self._lock:
+            if key not in self._watches:
+                self._watches[key] = (predicate, deque(maxlen=KMSG_WATCH_DEPTH))
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._open()
+
+    def _open(self) -> bool:
+        if self._fd is not None:
+            return True
+        if self._failed:
+            return False
+        try:
+            self._fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+            return True
+        except OSError as e:
+            # EPERM with kernel.dmesg_restrict=1 and no CAP_SYSLOG
+            logger.info(f"[KmsgTail] {self.path} unavailable ({e}), using dmesg")
+            self._failed = True
+            return False
+
+    def poll(self) -> int:
+        """Read the records added since the last poll; returns how many."""
+        with self._lock:
+            return self._poll_locked()
+
+    def _poll_locked(self) -> int:
+        if not self._open():
+            return 0
+        count = 0
+        while True:
+            try:
+                record = os.read(self._fd, 8192)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EPIPE:
+                    continue  # Overwritten before we read it; next read resyncs
+                if e.errno == errno.EINVAL:
+                    continue  # Record larger than the buffer
+                logger.debug(f"[KmsgTail] read failed: {e}")
+                break
+            if not record:
+                break
+            for line in record.split(b'\n'):
+                # /dev/kmsg returns one record per read; other sources (a
+                # pipe in tests) may hand over several. Continuation lines
+                # start with a space.
+                if not line or line.startswith(b' '):
+                    continue
+                count += 1
+                parsed = parse_kmsg_record(line)
+                if parsed is None:
+                    continue
+                timestamp, message = parsed
+                for predicate, stamps in self._watches.values():
+                    if predicate(message):
+                        stamps.append(timestamp)
+        self.records_read += count
+        return count
+
+    def recent(self, key: str, window_seconds: float) -> List[float]:
+        """Timestamps of `key` matches in the last `window_seconds`."""
+        with self._lock:
+            self._poll_locked()
+            watch = self._watches.get(key)
+            if watch is None:
+                return []
+            cutoff = _monotonic() - window_seconds
+            return [t for t in watch[1] if t >= cutoff]
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def parse_uevent(data: bytes) -> Optional[dict]:
+    """Kernel uevent datagram ("ACTION@DEVPATH\\0KEY=VALUE\\0...") as a dict.
+
+    None for udevd's re-broadcasts ("libudev" header), which only arrive
+    on the udev group anyway.
+    """
+    if data.startswith(b'libudev'):
+        return None
+    parts = data.split(b'\0')
+    if not parts or b'@' not in parts[0]:
+        return None
+    event = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b'=')
+        if sep:
+            event[key.decode('ascii', 'replace')] = value.decode('utf-8', 'replace')
+    if 'ACTION' not in event:
+        event['ACTION'] = parts[0].split(b'@', 1)[0].decode('ascii', 'replace')
+    return event
+
+
+class UeventListener:
+    """Background thread delivering kernel uevents to subscribers."""
+
+    def __init__(self, subsystems=HOTPLUG_SUBSYSTEMS):
+        self.subsystems = tuple(subsystems)
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.events_received = 0
+        self.last_event: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[dict], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self) -> bool:
+        """Open the netlink socket and start the thread; False if unsupported."""
+        if self.running:
+            return True
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                 NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+            sock.settimeout(1.0)  # Lets stop() be noticed
+        except (OSError, AttributeError) as e:
+            logger.info(f"[UeventListener] Netlink uevents unavailable ({e}), polling only")
+            return False
+        self._sock = sock
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="UeventListener")
+        self._thread.start()
+        logger.info(f"[UeventListener] Listening for {', '.join(self.subsystems)} uevents")
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self._stop_event.is_set():
+                    break
+                if e.errno == errno.ENOBUFS:
+                    continue  # Burst overflowed the socket buffer
+                logger.warning(f"[UeventListener] recv failed: {e}")
+                break
+            event = parse_uevent(data)
+            if event is not None:
+                self.dispatch(event)
+
+    def dispatch(self, event: dict):
+        subsystem = event.get('SUBSYSTEM', '')
+        if subsystem not in self.subsystems:
+            return
+        self.events_received += 1
+        self.last_event = event
+        UEVENTS.labels(subsystem=subsystem).inc()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"[UeventListener] Subscriber failed: {e}")
+
+
+_kmsg_tail = None
+_uevent_listener = None
+_singleton_lock = threading.Lock()
+
+
+def get_kmsg_tail() -> KmsgTail:
+    global _kmsg_tail
+    with _singleton_lock:
+        if _kmsg_tail is None:
+            _kmsg_tail = KmsgTail()
+        return _kmsg_tail
+
+
+def get_uevent_listener() -> UeventListener:
+    global _uevent_listener
+    with _singleton_lock:
+        if _uevent_listener is None:
+            _uevent_listener = UeventListener()
+        return _uevent_listener
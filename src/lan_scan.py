@@ -0,0 +1,407 @@
+"""
+Bounded LAN port scanner for streaming-device discovery (ADB on 5555).
+
+FireTVController.discover_devices used to start 254 threads at once. Each
+thread did a blocking connect_ex to port 5555, then a reverse-DNS lookup.
+It assumed a /24 around an address learned by "connecting" a UDP socket
+to 8.8.8.8. At boot, while the models are loading, that was a 254-thread
+spike on the SBC.
+
+scan() runs in the calling thread and keeps at most SCAN_WINDOW
+non-blocking connects in flight through one selector. Candidates are
+probed in this order:
+
+1. Devices that answered before, persisted in KNOWN_DEVICES_FILE.
+2. The kernel's ARP/neighbor table (/proc/net/arp). A TV that talks on
+   the LAN is almost always in it.
+3. The subnet sweep. The subnet comes from the connected routes in
+   /proc/net/route (interface address and netmask), capped at
+   MAX_SWEEP_HOSTS around our own address.
+
+An open port can be checked with `verify` (adb_handshake() for ADB). A
+scan with first_only=True returns at the first verified hit, so a known
+TV is usually found after one or two connects. Time spent in `verify`
+does not count against the connects still in flight. Hostnames are
+resolved only for hits, RESOLVE_WORKERS at a time, each waited on for
+at most RESOLVE_TIMEOUT_S and never past the scan's time budget.
+"""
+
+import errno
+import fcntl
+import ipaddress
+import json
+import logging
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Connects in flight at once
+SCAN_WINDOW = int(os.environ.get('MINUS_SCAN_WINDOW', '64'))
+# Per-host connect timeout (LAN hosts answer in a few ms; silence means nobody)
+CONNECT_TIMEOUT_S = 0.5
+# Concurrent reverse-DNS lookups for hits, and how long to wait for them
+RESOLVE_WORKERS = 8
+RESOLVE_TIMEOUT_S = 1.0
+# Largest sweep; a bigger subnet is cut to the /22 around our address
+MAX_SWEEP_HOSTS = 1022
+
+KNOWN_DEVICES_FILE = Path(os.environ.get(
+    'MINUS_KNOWN_DEVICES_FILE', str(Path.home() / ".minus_lan_devices.json")))
+KNOWN_DEVICES_PER_PORT = 8
+
+ROUTE_TABLE = '/proc/net/route'
+ARP_TABLE = '/proc/net/arp'
+
+_RTF_UP = 0x1
+_ATF_COM = 0x2  # ARP entry resolved
+_SIOCGIFADDR = 0x8915
+
+# ADB wire protocol (system/core/adb/protocol.txt)
+_ADB_CNXN = 0x4e584e43
+_ADB_AUTH = 0x48545541
+_ADB_VERSION = 0x01000000
+_ADB_MAXDATA = 4096
+
+
+def _hex_ip(value: str) -> ipaddress.IPv4Address:
+    # /proc/net/route prints addresses as host-order (little-endian) hex
+    return ipaddress.IPv4Address(struct.pack('<I', int(value, 16)))
+
+
+def _interface_address(name: str) -> Optional[ipaddress.IPv4Address]:
+    """IPv4 address of interface `name` (SIOCGIFADDR), or None."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        ifreq = struct.pack('256s', name.encode()[:15])
+        return ipaddress.IPv4Address(fcntl.ioctl(sock.fileno(), _SIOCGIFADDR, ifreq)[20:24])
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def _route_source_ip() -> Optional[ipaddress.IPv4Address]:
+    """Address the kernel would send LAN traffic from (no packet is sent)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("10.255.255.255", 1))
+        return ipaddress.IPv4Address(sock.getsockname()[0])
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def local_networks(route_table: str = ROUTE_TABLE,
+                   address_of: Callable[[str], Optional[ipaddress.IPv4Address]] = _interface_address
+                   ) -> List[ipaddress.IPv4Interface]:
+    """Our address/netmask on each directly connected IPv4 subnet.
+
+    Interfaces that carry a default route come first. Other connected
+    subnets (a docker bridge, a USB gadget link) are only used when no
+    interface has a default route.
+    """
+    connected: Dict[str, List[ipaddress.IPv4Network]] = {}
+    default_ifaces = set()
+    try:
+        with open(route_table) as f:
+            rows = f.read().splitlines()[1:]
+    except OSError:
+        rows = []
+    for row in rows:
+        fields = row.split()
+        if len(fields) < 8 or fields[0] == 'lo':
+            continue
+        try:
+            iface, dest, gateway = fields[0], _hex_ip(fields[1]), _hex_ip(fields[2])
+            flags, mask = int(fields[3], 16), _hex_ip(fields[7])
+        except ValueError:
+            continue
+        if not flags & _RTF_UP:
+            continue
+        if int(dest) == 0 and int(mask) == 0:
+            default_ifaces.add(iface)
+        elif int(gateway) == 0:
+            connected.setdefault(iface, []).append(
+                ipaddress.IPv4Network(f"{dest}/{mask}", strict=False))
+
+    preferred = [i for i in connected if i in default_ifaces] or list(connected)
+    interfaces = []
+    for iface in preferred:
+        address = address_of(iface)
+        if address is None:
+            continue
+        for network in connected[iface]:
+            if address in network and network.prefixlen < 31:
+                interfaces.append(ipaddress.IPv4Interface(f"{address}/{network.prefixlen}"))
+    if not interfaces:
+        # No usable route table (non-Linux host); fall back to the old /24 guess
+        address = _route_source_ip()
+        if address is not None and not address.is_loopback:
+            interfaces.append(ipaddress.IPv4Interface(f"{address}/24"))
+    return interfaces
+
+
+def neighbor_ips(arp_table: str = ARP_TABLE) -> List[str]:
+    """Resolved IPv4 neighbors from the kernel ARP table."""
+    ips = []
+    try:
+        with open(arp_table) as f:
+            rows = f.read().splitlines()[1:]
+    except OSError:
+        return ips
+    for row in rows:
+        fields = row.split()
+        if len(fields) < 4:
+            continue
+        try:
+            flags = int(fields[2], 16)
+        except ValueError:
+            continue
+        if flags & _ATF_COM and fields[3] != '00:00:00:00:00:00':
+            ips.append(fields[0])
+    return ips
+
+
+def sweep_hosts(interface: ipaddress.IPv4Interface) -> List[str]:
+    """Host addresses of `interface`'s subnet, minus our own (capped)."""
+    network = interface.network
+    if network.num_addresses - 2 > MAX_SWEEP_HOSTS:
+        network = ipaddress.IPv4Interface(f"{interface.ip}/22").network
+    return [str(ip) for ip in network.hosts() if ip != interface.ip]
+
+
+def adb_handshake(ip: str, port: int = 5555, timeout: float = 1.0) -> bool:
+    """True if `ip:port` speaks ADB (answers CNXN with CNXN or AUTH).
+
+    Only the host banner is sent, never a key, so this doesn't raise the
+    "Allow USB debugging?" prompt on the TV.
+    """
+    payload = b"host::\0"
+    header = struct.pack('<6I', _ADB_CNXN, _ADB_VERSION, _ADB_MAXDATA, len(payload),
+                         sum(payload) & 0xffffffff, _ADB_CNXN ^ 0xffffffff)
+    try:
+        with socket.create_connection((ip, port), timeout=timeout) as sock:
+            sock.sendall(header + payload)
+            reply = b''
+            while len(reply) < 24:
+                chunk = sock.recv(24 - len(reply))
+                if not chunk:
+                    return False
+                reply += chunk
+    except OSError:
+        return False
+    command, _, _, _, _, magic = struct.unpack('<6I', reply)
+    return command in (_ADB_CNXN, _ADB_AUTH) and magic == command ^ 0xffffffff
+
+
+def probe_hosts(hosts: Iterable[str], port: int, timeout: float = CONNECT_TIMEOUT_S,
+                window: int = SCAN_WINDOW, deadline: Optional[float] = None,
+                on_open: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """Hosts in `hosts` with `port` open, at most `window` connects at a time.
+
+    Runs in the calling thread on one selector. on_open(ip) is called for
+    each open port as it is found; returning True ends the probe early.
+    on_open may block (a handshake): in-flight connects get that time
+    back on their timeout. Stops at `deadline` (time.monotonic()) with
+    whatever was found.
+    """
+    pending = iter(hosts)
+    selector = selectors.DefaultSelector()
+    inflight: Dict[socket.socket, tuple] = {}  # sock -> (ip, expires)
+    found = []
+    exhausted = False
+
+    def opened(ip):
+        found.append(ip)
+        if not on_open:
+            return False
+        start = time.monotonic()
+        stop = on_open(ip)
+        # Don't expire connects that were waiting on us, not the host
+        spent = time.monotonic() - start
+        for sock, (other, expires) in inflight.items():
+            inflight[sock] = (other, expires + spent)
+        return bool(stop)
+
+    try:
+        while True:
+            while not exhausted and len(inflight) < window:
+                ip = next(pending, None)
+                if ip is None:
+                    exhausted = True
+                    break
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                err = sock.connect_ex((ip, port))
+                if err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    inflight[sock] = (ip, time.monotonic() + timeout)
+                    continue
+                sock.close()
+                if err == 0 and opened(ip):
+                    return found
+            if not inflight:
+                return found
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return found
+            wait = min(expires for _, expires in inflight.values()) - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            for key, _ in selector.select(max(0.0, wait)):
+                sock = key.fileobj
+                ip, _ = inflight.pop(sock)
+                selector.unregister(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sock.close()
+                if err == 0 and opened(ip):
+                    return found
+            now = time.monotonic()
+            for sock, (ip, expires) in list(inflight.items()):
+                if expires <= now:
+                    del inflight[sock]
+                    selector.unregister(sock)
+                    sock.close()
+    finally:
+        for sock in inflight:
+            sock.close()
+        selector.close()
+
+
+class KnownDevices:
+    """Small JSON file of addresses that answered on each port, newest first."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else KNOWN_DEVICES_FILE
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, port: int) -> List[str]:
+        with self._lock:
+            return [ip for ip in self._load().get(str(port), []) if isinstance(ip, str)]
+
+    def remember(self, port: int, ips: List[str]):
+        if not ips:
+            return
+        with self._lock:
+            data = self._load()
+            merged = list(dict.fromkeys(list(ips) + data.get(str(port), [])))
+            data[str(port)] = merged[:KNOWN_DEVICES_PER_PORT]
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            try:
+                tmp.write_text(json.dumps(data))
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.debug(f"[LanScan] Failed to save {self.path}: {e}")
+
+
+def _resolve(ip: str) -> Optional[str]:
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return None
+
+
+def _resolve_all(ips: List[str], resolve: Callable[[str], Optional[str]],
+                 deadline: float) -> Dict[str, Optional[str]]:
+    """{ip: hostname} for the lookups of `ips` that finish by `deadline`."""
+    names: Dict[str, Optional[str]] = {}
+    pending = iter(ips)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                ip = next(pending, None)
+            if ip is None or time.monotonic() >= deadline:
+                return
+            name = resolve(ip)
+            with lock:
+                names[ip] = name
+
+    # Daemon threads: a stuck lookup is abandoned, not waited for
+    threads = [threading.Thread(target=worker, daemon=True, name='LanResolve')
+               for _ in range(min(RESOLVE_WORKERS, len(ips)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    with lock:
+        return dict(names)
+
+
+def scan(port: int, timeout: float = 5.0, verify: Optional[Callable[[str], bool]] = None,
+         first_only: bool = False, known: Optional[KnownDevices] = None,
+         networks: Optional[List[ipaddress.IPv4Interface]] = None,
+         neighbors: Optional[List[str]] = None, window: int = SCAN_WINDOW,
+         resolve: Callable[[str], Optional[str]] = _resolve) -> List[dict]:
+    """Find LAN hosts with `port` open within `timeout` seconds.
+
+    Returns dicts with 'ip', 'hostname', 'port', 'source' ('known',
+    'neighbor' or 'sweep') and 'verified' (None without `verify`).
+    Hits that fail `verify` are dropped. `networks` and `neighbors`
+    default to the kernel's view (local_networks(), neighbor_ips()).
+    """
+    deadline = time.monotonic() + timeout
+    known = known if known is not None else KnownDevices()
+    networks = local_networks() if networks is None else networks
+    if not networks:
+        logger.warning("[LanScan] No IPv4 network to scan")
+        return []
+    own = {str(n.ip) for n in networks}
+
+    def on_lan(ip):
+        try:
+            address = ipaddress.IPv4Address(ip)
+        except ValueError:
+            return False
+        return str(address) not in own and any(address in n.network for n in networks)
+
+    neighbors = neighbor_ips() if neighbors is None else neighbors
+    sources: Dict[str, str] = {}
+    for source, ips in (('known', known.get(port)), ('neighbor', neighbors)):
+        for ip in ips:
+            if on_lan(ip):
+                sources.setdefault(ip, source)
+    for interface in networks:
+        for ip in sweep_hosts(interface):
+            sources.setdefault(ip, 'sweep')
+
+    hits: List[dict] = []
+
+    def on_open(ip):
+        verified = verify(ip) if verify else None
+        if verified is False:
+            logger.debug(f"[LanScan] {ip}:{port} open but failed verification")
+            return False
+        hits.append({'ip': ip, 'hostname': None, 'port': port,
+                     'source': sources[ip], 'verified': verified})
+        logger.info(f"[LanScan] Found {ip}:{port} ({sources[ip]})")
+        return first_only
+
+    logger.info(f"[LanScan] Probing port {port}: {len(sources)} hosts on "
+                f"{', '.join(str(n.network) for n in networks)}, window {window}")
+    start = time.monotonic()
+    probe_hosts(list(sources), port, window=window, deadline=deadline, on_open=on_open)
+    names = _resolve_all([hit['ip'] for hit in hits], resolve,
+                         min(deadline, time.monotonic() + RESOLVE_TIMEOUT_S))
+    for hit in hits:
+        hit['hostname'] = names.get(hit['ip'])
+    known.remember(port, [hit['ip'] for hit in hits])
+    logger.info(f"[LanScan] Port {port}: {len(hits)} hit(s) in {time.monotonic() - start:.2f}s")
+    return hits
@@ -0,0 +1,144 @@
+"""
+Non-blocking logging for the detection hot paths.
+
+Every logger call used to run the RotatingFileHandler (including the
+rename dance when /tmp/minus.log crossed 5MB) and the stdout handler
+(piped to journald) on the calling thread, so a slow SD card or a stalled
+journald could add latency to an OCR cycle or a blocking decision.
+
+start_queued_logging() moves a logger's handlers behind a
+QueueHandler/QueueListener pair: callers only format the message and
+enqueue the record; the listener thread does the formatting, file I/O
+and rotation. The queue is bounded (MINUS_LOG_QUEUE_SIZE); if the sink
+falls that far behind, new records are dropped and counted rather than
+blocking the caller.
+
+LogThrottle rate-limits high-frequency per-frame messages ("SKIPPED -
+scene unchanged", "no text"): at most one line per interval per key, and
+the line that does get through reports how many were suppressed.
+
+Only the main process queues: the OCR/VLM/ASR workers are started with
+'spawn' and minus.py skips its logging setup when a worker re-runs it.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+LOG_QUEUE_SIZE = int(os.environ.get('MINUS_LOG_QUEUE_SIZE', '10000'))
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: drops (and counts) when full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener_handlers = ()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room instead of raising Full."""
+
+    def enqueue_sentinel(self):
+        # The stock put_nowait() raises queue.Full when the queue is
+        # saturated (e.g. a log burst right before shutdown). The listener
+        # thread is still draining, so a blocking put always completes.
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_target: Optional[logging.Logger] = None
+_lock = threading.Lock()
+
+
+def start_queued_logging(logger: logging.Logger = None,
+                         queue_size: int = None) -> DroppingQueueHandler:
+    """Move `logger`'s (default: root) handlers behind a background listener.
+
+    Handler levels are still honoured. Idempotent: a second call returns
+    the existing queue handler.
+    """
+    global _listener, _queue_handler, _target
+    target = logger or logging.getLogger()
+    with _lock:
+        if _queue_handler is not None:
+            return _queue_handler
+        handlers = [h for h in target.handlers]
+        for h in handlers:
+            target.removeHandler(h)
+        log_queue = queue.Queue(maxsize=queue_size or LOG_QUEUE_SIZE)
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _queue_handler.listener_handlers = tuple(handlers)
+        _listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        target.addHandler(_queue_handler)
+        _target = target
+        atexit.register(stop_queued_logging)
+        return _queue_handler
+
+
+def stop_queued_logging():
+    """Flush pending records and stop the listener (handlers stay behind
+    the queue handler, so later records are just queued)."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def get_log_queue_stats() -> dict:
+    handler = _queue_handler
+    if handler is None:
+        return {'queued': 0, 'dropped': 0, 'running': False}
+    return {
+        'queued': handler.queue.qsize(),
+        'dropped': handler.dropped,
+        'running': _listener is not None,
+    }
+
+
+class LogThrottle:
+    """Per-key rate limiter for repetitive log lines.
+
+        throttle = LogThrottle(5.0)
+        ...
+        suppressed = throttle.ready('ocr_skip')
+        if suppressed is not None:
+            logger.info(f"... SKIPPED (+{suppressed} suppressed)")
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def ready(self, key: str = '') -> Optional[int]:
+        """Number of calls suppressed since the last emitted line if this
+        one should be logged now, else None (and this call is counted)."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return None
+            self._last[key] = now
+            return self._suppressed.pop(key, 0)
+
+    def suppressed(self, key: str = '') -> int:
+        with self._lock:
+            return self._suppressed.get(key, 0)
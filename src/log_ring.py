@@ -0,0 +1,176 @@
+"""
+In-memory ring of recent log records with sequence-number cursors.
+
+/api/logs used to readlines() the whole /tmp/minus.log (up to 5MB) to
+return its last 100 lines, on every refresh of the Settings tab. LogRing
+is a logging.Handler that keeps the last MINUS_LOG_RING_SIZE records as
+small dicts, each stamped with a monotonically increasing `seq`:
+
+- query(since=seq) returns only records newer than a cursor, so a client
+  that polls or streams pays for new lines only
+- level / component / text filters run over memory, not a file
+- wait(since, timeout) blocks until something newer arrives (SSE tail)
+
+The component is the "[Prefix]" convention used throughout the codebase
+("[Screenshot] Saved ...") or, failing that, the last part of the logger
+name. read_tail_lines() is the fallback for files the ring never saw
+(before startup, other processes, the autonomous-mode journal): it reads
+backwards from the end instead of loading the whole file.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+LOG_RING_SIZE = int(os.environ.get('MINUS_LOG_RING_SIZE', '5000'))
+
+_COMPONENT_RE = re.compile(r'^\[([A-Za-z][\w .:/-]{0,31})\]')
+
+
+def read_tail_lines(path, lines: int = 100, block_size: int = 8192) -> List[str]:
+    """Last `lines` lines of a text file without reading all of it."""
+    if lines <= 0:
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    text = data.decode('utf-8', errors='replace')
+    return text.splitlines()[-lines:]
+
+
+class LogRing(logging.Handler):
+    """Logging handler keeping recent records in a bounded ring."""
+
+    def __init__(self, capacity: int = None, level: int = logging.NOTSET):
+        super().__init__(level)
+        self._records = deque(maxlen=capacity or LOG_RING_SIZE)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+            match = _COMPONENT_RE.match(message)
+            entry = {
+                'seq': 0,
+                'ts': record.created,
+                'level': record.levelname,
+                'levelno': record.levelno,
+                'logger': record.name,
+                'component': match.group(1) if match else record.name.rsplit('.', 1)[-1],
+                'message': message,
+                'line': self.format(record),
+            }
+        except Exception:
+            self.handleError(record)
+            return
+        with self._cond:
+            self._seq += 1
+            entry['seq'] = self._seq
+            self._records.append(entry)
+            self._cond.notify_all()
+
+    def query(self, since: int = 0, limit: int = 100, level: str = None,
+              component: str = None, text: str = None) -> Tuple[List[dict], int]:
+        """Records newer than `since` matching the filters (oldest first,
+        at most the newest `limit`), and the cursor to pass next time.
+
+        `level` is a minimum ('WARNING' includes ERROR), `component` matches
+        case-insensitively, `text` is a case-insensitive substring.
+        """
+        min_level = logging.getLevelName(level.upper()) if level else 0
+        if not isinstance(min_level, int):
+            raise ValueError(f"unknown log level: {level}")
+        component = component.lower() if component else None
+        text = text.lower() if text else None
+        with self._cond:
+            last = self._seq
+            # Records are seq-ordered; skip the old ones without scanning
+            first_seq = self._records[0]['seq'] if self._records else last + 1
+            start = max(0, since + 1 - first_seq)
+            if start >= len(self._records):
+                return [], last
+            candidates = [self._records[i] for i in range(start, len(self._records))]
+        out = []
+        for rec in candidates:
+            if rec['levelno'] < min_level:
+                continue
+            if component and rec['component'].lower() != component:
+                continue
+            if text and text not in rec['line'].lower():
+                continue
+            out.append(rec)
+        return out[-limit:] if limit else out, last
+
+    def wait(self, since: int, timeout: float) -> bool:
+        """Block until a record newer than `since` exists (False on timeout)."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._seq <= since:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def clear(self):
+        with self._cond:
+            self._records.clear()
+
+
+_singleton: Optional[LogRing] = None
+_singleton_lock = threading.Lock()
+
+
+def get_log_ring() -> LogRing:
+    """Module-level singleton."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = LogRing()
+        return _singleton
+
+
+def install_log_ring(logger: logging.Logger = None, formatter: logging.Formatter = None,
+                     level: int = logging.INFO) -> LogRing:
+    """Attach the singleton ring to `logger` (default: root). Idempotent.
+
+    For the root logger this includes a ring already fed through the
+    QueueListener (see log_queue.py), which would otherwise see every
+    record twice.
+    """
+    ring = get_log_ring()
+    ring.setLevel(level)
+    if formatter is not None:
+        ring.setFormatter(formatter)
+    if logger is None and is_installed():
+        return ring
+    target = logger or logging.getLogger()
+    if ring not in target.handlers:
+        target.addHandler(ring)
+    return ring
+
+
+def is_installed() -> bool:
+    """True if the ring is receiving records from the root logger."""
+    if _singleton is None:
+        return False
+    handlers = logging.getLogger().handlers
+    if _singleton in handlers:
+        return True
+    # Behind a QueueListener (see log_queue.py)
+    return any(_singleton in getattr(h, 'listener_handlers', ()) for h in handlers)
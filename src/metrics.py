@@ -0,0 +1,344 @@
+"""
+In-process metrics registry (counters, gauges, fixed-bucket histograms).
+
+/api/metrics used to be a handful of gauges assembled by hand from
+attributes of live objects, with no latency distributions anywhere, so
+diagnosing a latency regression meant grepping logs. Hot paths now record
+into module-level metrics instead:
+
+    CAPTURE_LATENCY = histogram('minus_capture_latency_seconds', 'Snapshot fetch + decode')
+    ...
+    CAPTURE_LATENCY.observe(elapsed)
+    WORKER_RESTARTS.labels(worker='ocr').inc()
+
+and the registry renders everything in Prometheus text format (histograms
+with cumulative `_bucket{le=...}`, `_sum` and `_count`).
+
+Updates are a dict lookup plus a short lock, cheap enough for per-frame
+use. Buckets are fixed at creation (no allocation per observation).
+Gauges and counters can also be backed by a function evaluated at
+scrape time (queue depths, counters owned by other objects).
+
+Defining the same metric twice returns the existing one, so modules can
+declare what they record at import time without coordinating.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds. Covers ~5ms snapshot fetches up to multi-second worker stalls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()
+                                  and abs(value) < 1e15):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def format_metric(name: str, value, help_text: str, metric_type: str = 'gauge',
+                  labels: dict = None) -> List[str]:
+    """Prometheus text lines for one ad-hoc sample."""
+    return [
+        f'# HELP {name} {help_text}',
+        f'# TYPE {name} {metric_type}',
+        f'{name}{_label_str(sorted((labels or {}).items()))} {_format_value(value)}',
+    ]
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """The child for one label combination (created on first use)."""
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self._children[()]
+
+    def _samples(self) -> List[Tuple[str, tuple, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, labels, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_label_str(labels)} {_format_value(value)}')
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', 'fn', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+        self.lock = threading.Lock()
+
+    def get(self) -> Optional[float]:
+        if self.fn is None:
+            return self.value
+        try:
+            value = self.fn()
+        except Exception:
+            return None
+        return value if isinstance(value, (int, float)) else None
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("counters only go up")
+        with self.lock:
+            self.value += amount
+
+    def set_function(self, fn: Callable[[], float]):
+        """Report fn() at scrape time (a total owned by another object)."""
+        self.fn = fn
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self.lock:
+            self.value -= amount
+
+    def set_function(self, fn: Callable[[], float]):
+        """Report fn() at scrape time (queue depths and the like)."""
+        self.fn = fn
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._default().set_function(fn)
+
+    def get(self, **labels) -> float:
+        return (self.labels(**labels) if labels else self._default()).get()
+
+    def _samples(self):
+        out = []
+        for key, child in list(self._children.items()):
+            value = child.get()
+            if value is not None:
+                out.append(('', tuple(zip(self.labelnames, key)), value))
+        return out
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('upper', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, upper: Tuple[float, ...]):
+        self.upper = upper
+        self.counts = [0] * (len(upper) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.upper, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate (bucket upper bound containing the q-th observation)."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        target = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= target:
+                return self.upper[i] if i < len(self.upper) else math.inf
+        return math.inf
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        """Context manager observing the elapsed wall time in seconds."""
+        return self._default().time()
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        return (self.labels(**labels) if labels else self._default()).quantile(q)
+
+    def _samples(self):
+        out = []
+        for key, child in list(self._children.items()):
+            labels = tuple(zip(self.labelnames, key))
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for upper, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                out.append(('_bucket', labels + (('le', _format_value(upper)),), cumulative))
+            out.append(('_sum', labels, total))
+            out.append(('_count', labels, count))
+        return out
+
+
+class Registry:
+    """Named metrics, rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered differently")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, tuple(labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, tuple(labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, tuple(labelnames),
+                                   buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.counter(name, help_text, labelnames)
+
+
+def gauge(name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.gauge(name, help_text, labelnames)
+
+
+def histogram(name: str, help_text: str, labelnames: Iterable[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help_text, labelnames, buckets)
+
+
+# Shared across the OCR / VLM / ASR worker managers
+WORKER_RESTARTS = counter('minus_worker_restarts_total',
+                          'Inference worker process restarts', ['worker'])
+WORKER_TIMEOUTS = counter('minus_worker_timeouts_total',
+                          'Inference requests that timed out', ['worker'])
@@ -0,0 +1,323 @@
+"""
+Single-upstream MJPEG fan-out for the web UI preview.
+
+The /stream proxy used to open its own ustreamer connection per viewer
+and copy it through in 8KB chunks, so every extra phone or laptop
+multiplied ustreamer's per-client MJPEG work and our proxy CPU, and every
+page refresh churned a socket. MJPEGBroadcaster instead:
+
+- holds ONE upstream connection to ustreamer's /stream and parses the
+  multipart frame boundaries once
+- hands each frame (the same bytes object, no copies) to every viewer
+  through a per-client bounded queue; a slow client drops its oldest
+  frames instead of stalling everybody else
+- keeps the upstream open for IDLE_TIMEOUT_S after the last viewer leaves
+  (page refreshes reuse it) and then closes it
+- keeps the latest frame, which /snapshot serves while the upstream is
+  open; a snapshot never opens the stream itself
+- offers a reduced tier ('low': capped FPS, downscaled) for phones; one
+  shared worker re-encodes for all low-tier viewers, only while any exist
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Keep the upstream open this long after the last viewer disconnects
+IDLE_TIMEOUT_S = 5.0
+
+# Frames buffered per viewer before the oldest is dropped
+CLIENT_QUEUE_SIZE = 2
+
+# Reconnect delay after an upstream error
+RECONNECT_DELAY_S = 1.0
+
+# Multipart boundary used for our own output stream
+OUTPUT_BOUNDARY = 'minusframe'
+
+# Reduced tiers: name -> (max fps, max width in px)
+TIERS = {
+    'low': (5.0, 640),
+}
+LOW_TIER_JPEG_QUALITY = 70
+
+
+class MultipartJPEGParser:
+    """Incremental parser for a multipart/x-mixed-replace JPEG stream.
+
+    Uses each part's Content-Length when present (ustreamer sends it) and
+    falls back to scanning for the next boundary otherwise.
+    """
+
+    def __init__(self, boundary: str):
+        boundary = boundary.strip('"')
+        if boundary.startswith('--'):
+            boundary = boundary[2:]
+        self._delim = b'--' + boundary.encode()
+        self._buf = bytearray()
+        self._length = None     # Content-Length of the part being read
+        self._in_body = False
+
+    def feed(self, data: bytes) -> list:
+        """Add bytes; return the list of complete JPEG frames."""
+        self._buf += data
+        frames = []
+        while True:
+            if not self._in_body:
+                start = self._buf.find(self._delim)
+                if start < 0:
+                    # Keep a tail in case the delimiter straddles chunks
+                    del self._buf[:max(0, len(self._buf) - len(self._delim))]
+                    return frames
+                header_end = self._buf.find(b'\r\n\r\n', start)
+                if header_end < 0:
+                    del self._buf[:start]
+                    return frames
+                headers = bytes(self._buf[start + len(self._delim):header_end])
+                self._length = None
+                for line in headers.split(b'\r\n'):
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        try:
+                            self._length = int(value.strip())
+                        except ValueError:
+                            pass
+                del self._buf[:header_end + 4]
+                self._in_body = True
+
+            if self._length is not None:
+                if len(self._buf) < self._length:
+                    return frames
+                frames.append(bytes(self._buf[:self._length]))
+                del self._buf[:self._length]
+            else:
+                end = self._buf.find(self._delim)
+                if end < 0:
+                    return frames
+                frames.append(bytes(self._buf[:end]).rstrip(b'\r\n'))
+                del self._buf[:end]
+            self._in_body = False
+
+
+def _boundary_from_content_type(content_type: str) -> str:
+    for param in content_type.split(';'):
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary':
+            return value
+    return 'boundarydonotcross'  # ustreamer's default
+
+
+class _Client:
+    __slots__ = ('tier', 'frames', 'event')
+
+    def __init__(self, tier: str):
+        self.tier = tier
+        self.frames = deque(maxlen=CLIENT_QUEUE_SIZE)
+        self.event = threading.Event()
+
+
+class MJPEGBroadcaster:
+    """One upstream MJPEG connection shared by any number of viewers."""
+
+    def __init__(self, upstream_url: str):
+        self.upstream_url = upstream_url
+        self._lock = threading.Lock()
+        self._frame_cond = threading.Condition(self._lock)
+        self._clients = set()
+        self._latest: Optional[Tuple[int, bytes, float]] = None  # (seq, jpeg, ts)
+        self._seq = 0
+        self._last_demand = 0.0
+        self._upstream_thread = None
+        self._tier_threads = {}
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.upstream_connects = 0
+
+    # ----- viewers -----
+
+    def stream(self, tier: str = 'full') -> Iterator[bytes]:
+        """multipart/x-mixed-replace body for one viewer."""
+        client = self._subscribe(tier if tier in TIERS else 'full')
+        try:
+            while True:
+                if not client.event.wait(10.0):
+                    if not self._upstream_alive():
+                        return  # Upstream gone for good; let the browser reconnect
+                    continue
+                with self._lock:
+                    client.event.clear()
+                    frames = list(client.frames)
+                    client.frames.clear()
+                for jpeg in frames[-1:]:  # Only the newest is worth sending
+                    yield (f"--{OUTPUT_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                           f"Content-Length: {len(jpeg)}\r\n\r\n").encode() + jpeg + b"\r\n"
+        finally:
+            self._unsubscribe(client)
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/x-mixed-replace;boundary={OUTPUT_BOUNDARY}'
+
+    def _subscribe(self, tier: str) -> _Client:
+        client = _Client(tier)
+        with self._lock:
+            self._clients.add(client)
+            self._last_demand = time.time()
+            if self._latest is not None and tier == 'full':
+                client.frames.append(self._latest[1])
+                client.event.set()
+        self._ensure_upstream()
+        if tier != 'full':
+            self._ensure_tier_worker(tier)
+        return client
+
+    def _unsubscribe(self, client: _Client):
+        with self._lock:
+            self._clients.discard(client)
+            self._last_demand = time.time()
+
+    def viewer_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def latest_frame(self, max_age: float = 1.0) -> Optional[bytes]:
+        """Newest JPEG no older than `max_age`, or None.
+
+        Never waits and never starts the upstream: with nobody watching
+        there is no fresh frame, and one still image is cheaper to ask
+        ustreamer for directly than a whole stream.
+        """
+        with self._lock:
+            if self._latest is not None and time.time() - self._latest[2] <= max_age:
+                return self._latest[1]
+        return None
+
+    # ----- upstream -----
+
+    def _upstream_alive(self) -> bool:
+        return self._upstream_thread is not None and self._upstream_thread.is_alive()
+
+    def _ensure_upstream(self):
+        with self._lock:
+            if self._upstream_alive():
+                return
+            self._upstream_thread = threading.Thread(
+                target=self._upstream_loop, daemon=True, name='MJPEGUpstream')
+            self._upstream_thread.start()
+
+    def _wanted(self) -> bool:
+        with self._lock:
+            return bool(self._clients) or time.time() - self._last_demand < IDLE_TIMEOUT_S
+
+    def _upstream_loop(self):
+        while self._wanted():
+            try:
+                self._pump_upstream()
+            except Exception as e:
+                logger.debug(f"[MJPEG] Upstream error: {e}")
+            if self._wanted():
+                time.sleep(RECONNECT_DELAY_S)
+        logger.debug("[MJPEG] No viewers - upstream closed")
+
+    def _pump_upstream(self):
+        resp = requests.get(self.upstream_url, stream=True, timeout=(5, 10))
+        self.upstream_connects += 1
+        try:
+            parser = MultipartJPEGParser(_boundary_from_content_type(
+                resp.headers.get('Content-Type', '')))
+            for chunk in resp.iter_content(chunk_size=65536):
+                if not chunk:
+                    continue
+                for jpeg in parser.feed(chunk):
+                    self._publish(jpeg)
+                if not self._wanted():
+                    return
+        finally:
+            resp.close()
+
+    def _publish(self, jpeg: bytes):
+        """Fan a frame out to every full-tier viewer (drop-oldest queues)."""
+        with self._frame_cond:
+            self._seq += 1
+            self._latest = (self._seq, jpeg, time.time())
+            self.frames_received += 1
+            for client in self._clients:
+                if client.tier != 'full':
+                    continue
+                if len(client.frames) == client.frames.maxlen:
+                    self.frames_dropped += 1
+                client.frames.append(jpeg)
+                client.event.set()
+            self._frame_cond.notify_all()
+
+    # ----- reduced tiers -----
+
+    def _ensure_tier_worker(self, tier: str):
+        with self._lock:
+            thread = self._tier_threads.get(tier)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._tier_loop, args=(tier,),
+                                      daemon=True, name=f'MJPEGTier-{tier}')
+            self._tier_threads[tier] = thread
+            thread.start()
+
+    def _tier_loop(self, tier: str):
+        """Re-encode the latest frame at the tier's FPS/size for its viewers."""
+        import cv2
+        import numpy as np
+
+        max_fps, max_width = TIERS[tier]
+        interval = 1.0 / max_fps
+        last_seq = 0
+        while True:
+            with self._frame_cond:
+                viewers = [c for c in self._clients if c.tier == tier]
+                if not viewers:
+                    return
+                while self._latest is None or self._latest[0] == last_seq:
+                    if not self._frame_cond.wait(2.0) and not self._upstream_alive():
+                        break
+                if self._latest is None or self._latest[0] == last_seq:
+                    continue
+                last_seq, jpeg, _ = self._latest
+            started = time.time()
+            try:
+                img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if img is not None and img.shape[1] > max_width:
+                    scale = max_width / img.shape[1]
+                    img = cv2.resize(img, (max_width, int(img.shape[0] * scale)),
+                                     interpolation=cv2.INTER_AREA)
+                if img is not None:
+                    ok, buf = cv2.imencode('.jpg', img,
+                                           [cv2.IMWRITE_JPEG_QUALITY, LOW_TIER_JPEG_QUALITY])
+                    if ok:
+                        small = buf.tobytes()
+                        with self._lock:
+                            for client in self._clients:
+                                if client.tier == tier:
+                                    client.frames.append(small)
+                                    client.event.set()
+            except Exception as e:
+                logger.debug(f"[MJPEG] {tier} tier encode failed: {e}")
+            time.sleep(max(0.0, interval - (time.time() - started)))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            tiers = {}
+            for client in self._clients:
+                tiers[client.tier] = tiers.get(client.tier, 0) + 1
+            return {
+                'viewers': len(self._clients),
+                'viewers_by_tier': tiers,
+                'upstream_connected': self._upstream_alive(),
+                'upstream_connects': self.upstream_connects,
+                'frames_received': self.frames_received,
+                'frames_dropped': self.frames_dropped,
+            }
@@ -262,6 +262,7 @@ class PaddleOCR:
         self.db_postprocess = DBPostProcessor() if HAS_POSTPROCESS else None
         self.ctc_decode = None
         self.initialized = False
+        self.last_timings = {}
 
     def load_models(self):
         """Load all RKNN models. Returns True on success, False on failure."""
@@ -429,6 +430,7 @@ class PaddleOCR:
 
         # Detection
         boxes, det_scores, det_time = self.detect(img)
+        rec_total = 0.0
 
         # Recognition for each box
         for box in boxes:
@@ -437,6 +439,7 @@ class PaddleOCR:
                 continue
 
             text, confidence, rec_time = self.recognize(cropped)
+            rec_total += rec_time
 
             if text.strip():
                 results.append({
@@ -445,6 +448,8 @@ class PaddleOCR:
                     'box': box.tolist()
                 })
 
+        # Seconds; sent back to the parent by ocr_worker for /api/metrics
+        self.last_timings = {'detect': det_time / 1000, 'recognize': rec_total / 1000}
         return results
 
     # Patterns that indicate terminal/development content
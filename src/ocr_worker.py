@@ -4,6 +4,7 @@ OCR Worker Process - runs OCR in separate process for hard timeout capability.
 This allows us to actually KILL stuck OCR inference instead of just timing out.
 """
 
+import importlib.util
 import os
 import re
 import sys
@@ -18,6 +19,25 @@ try:
 except RuntimeError:
     pass  # Already set
 
+import tracing
+from metrics import WORKER_RESTARTS, WORKER_TIMEOUTS, histogram
+from placement import apply_placement, apply_to_process
+
+OCR_DETECT_TIME = histogram('minus_ocr_detect_seconds', 'OCR text detection inference time')
+OCR_RECOGNIZE_TIME = histogram('minus_ocr_recognize_seconds',
+                               'OCR recognition time per frame (all text boxes)')
+OCR_REQUEST_TIME = histogram('minus_ocr_request_seconds',
+                             'OCR round trip through the worker process')
+
+
+def is_ocr_available() -> bool:
+    """Whether the RKNN runtime the worker needs is installed.
+
+    Only looks the package up: rknnlite and the OCR model code (ocr.py)
+    are imported by the worker process, never by Minus itself.
+    """
+    return importlib.util.find_spec('rknnlite') is not None
+
 
 def _ocr_worker_main(request_queue, response_queue, ready_event, shutdown_event):
     """
@@ -35,6 +55,7 @@ def _ocr_worker_main(request_queue, response_queue, ready_event, shutdown_event)
     import logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
     logger = logging.getLogger('OCRWorker')
+    apply_placement('ocr_worker')
 
     try:
         # Import OCR
@@ -126,7 +147,9 @@ def _ocr_worker_main(request_queue, response_queue, ready_event, shutdown_event)
                 if request is None:  # Shutdown signal
                     break
 
-                frame_data, request_type = request
+                # (frame, type[, trace_id]) - the trace ID is echoed back
+                frame_data, request_type, *meta = request
+                trace_id = meta[0] if meta else None
 
                 # Convert frame back to numpy array if needed (Queue may serialize as list)
                 if isinstance(frame_data, list):
@@ -134,16 +157,21 @@ def _ocr_worker_main(request_queue, response_queue, ready_event, shutdown_event)
                 else:
                     frame_rgb = frame_data
 
+                started = time.time()
                 if request_type == 'ocr':
                     result = ocr.ocr(frame_rgb)
-                    response_queue.put(('ok', result))
                     last_inference_time = time.time()
+                    response_queue.put(('ok', result, dict(
+                        ocr.last_timings, start=started, end=last_inference_time,
+                        trace_id=trace_id)))
                 elif request_type == 'check_ad':
                     # OCR + keyword check
                     ocr_results = ocr.ocr(frame_rgb)
                     is_ad, keywords = ocr.check_ad_keywords(ocr_results)
-                    response_queue.put(('ok', (is_ad, keywords, ocr_results)))
                     last_inference_time = time.time()
+                    response_queue.put(('ok', (is_ad, keywords, ocr_results), dict(
+                        ocr.last_timings, start=started, end=last_inference_time,
+                        trace_id=trace_id)))
                 else:
                     response_queue.put(('error', 'Unknown request type'))
 
@@ -200,6 +228,7 @@ class OCRProcess:
             daemon=True
         )
         self.process.start()
+        apply_to_process('ocr_worker', self.process.pid)
 
         # Wait for models to load (up to 30s)
         if self.ready_event.wait(timeout=30.0):
@@ -233,6 +262,7 @@ class OCRProcess:
 
         self._restart_count += 1
         self._consecutive_timeouts += 1
+        WORKER_RESTARTS.labels(worker='ocr').inc()
 
         # Calculate backoff based on consecutive timeouts
         # 1st timeout: 1s, 2nd: 2s, 3rd+: 4s max
@@ -270,17 +300,28 @@ class OCRProcess:
                 return []
 
         start_time = time.time()
+        trace_id = tracing.current_trace()
 
         # Send request
-        self.request_queue.put((frame_rgb, 'ocr'))
+        self.request_queue.put((frame_rgb, 'ocr', trace_id))
 
         # Wait for response with hard timeout
         try:
-            status, result = self.response_queue.get(timeout=self.HARD_TIMEOUT)
+            status, result, *extra = self.response_queue.get(timeout=self.HARD_TIMEOUT)
 
             if status == 'ok':
                 # Reset consecutive timeout counter on success
                 self._consecutive_timeouts = 0
+                OCR_REQUEST_TIME.observe(time.time() - start_time)
+                timings = extra[0] if extra and extra[0] else {}
+                if 'detect' in timings:
+                    OCR_DETECT_TIME.observe(timings['detect'])
+                if 'recognize' in timings:
+                    OCR_RECOGNIZE_TIME.observe(timings['recognize'])
+                if trace_id is not None:
+                    tracing.add_span('ocr.request', start_time, time.time(), trace_id)
+                    tracing.get_tracer().add_worker_spans(
+                        'ocr', trace_id, timings, ('detect', 'recognize'))
                 return result
             else:
                 return []
@@ -288,6 +329,8 @@ class OCRProcess:
         except:
             # TIMEOUT - kill the process
             elapsed = time.time() - start_time
+            WORKER_TIMEOUTS.labels(worker='ocr').inc()
+            tracing.add_span('ocr.timeout', start_time, time.time(), trace_id)
             import logging
             logging.getLogger('Minus.OCR').warning(
                 f"[OCRProcess] HARD KILL after {elapsed:.1f}s (timeout #{self._consecutive_timeouts + 1}) - restarting worker"
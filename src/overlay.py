@@ -6,7 +6,8 @@ without blocking the main video content.
 
 Uses ustreamer's overlay API to render text directly on the
 video stream via the MPP hardware encoder - no GStreamer
-pipeline modifications needed.
+pipeline modifications needed. Calls go through the shared
+keep-alive client in ustreamer_control.
 
 Overlay Priority System:
 - Long-duration overlays (setup instructions) are "persistent"
@@ -18,10 +19,10 @@ Overlay Priority System:
 import logging
 import threading
 import time
-import urllib.request
-import urllib.parse
 from typing import Optional, Callable, Dict, Any
 
+from ustreamer_control import get_ustreamer_control
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,7 +38,7 @@ class OverlayManager:
 
 # Module-level state for true singleton behavior
 _overlay_state = {
-    'persistent_overlay': None,  # Dict with text, params, api_base
+    'persistent_overlay': None,  # Dict with text, params, control
     'persistent_expiry': 0.0,    # Unix timestamp
     'restore_timer': None,       # threading.Timer
     'lock': threading.Lock(),
@@ -56,7 +57,7 @@ def _init_overlay_manager():
 # Initialize at module load time
 _init_overlay_manager()
 
-def _set_persistent(text: str, params: dict, duration: float, api_base: str):
+def _set_persistent(text: str, params: dict, duration: float, control):
     """Register a persistent overlay that should be restored if interrupted."""
     global _overlay_state
     _init_overlay_manager()
@@ -68,7 +69,7 @@ def _set_persistent(text: str, params: dict, duration: float, api_base: str):
         _overlay_state['persistent_overlay'] = {
             'text': text,
             'params': params.copy(),
-            'api_base': api_base,
+            'control': control,
         }
         _overlay_state['persistent_expiry'] = time.time() + duration
         _overlay_state['stop_monitor'] = False
@@ -96,29 +97,23 @@ def _set_persistent(text: str, params: dict, duration: float, api_base: str):
                 # Check if overlay is still showing our text
                 try:
                     params = _overlay_state['persistent_overlay']['params']
-                    api_base = _overlay_state['persistent_overlay']['api_base']
+                    control = _overlay_state['persistent_overlay']['control']
 
                     # Query current overlay state
-                    base_url = api_base.replace('/overlay/set', '/overlay')
-                    req = urllib.request.Request(base_url)
-                    with urllib.request.urlopen(req, timeout=2.0) as response:
-                        import json
-                        data = json.loads(response.read().decode())
-                        result = data.get('result', {})
-                        current_text = result.get('text', '')
-                        enabled = result.get('enabled', False)
-
-                        # Check if our overlay is still showing
-                        expected_text = params.get('text', '')
-                        if not enabled or current_text != expected_text:
-                            # Our overlay was overwritten, restore it
-                            remaining = int(_overlay_state['persistent_expiry'] - time.time())
-                            logger.info(f"[OverlayManager] Restoring overwritten overlay ({remaining}s remaining)")
-                            query = urllib.parse.urlencode(params)
-                            url = f"{api_base}?{query}"
-                            req2 = urllib.request.Request(url)
-                            with urllib.request.urlopen(req2, timeout=2.0):
-                                pass
+                    data = control.call('/overlay', timeout=2.0)
+                    if data is None:
+                        continue
+                    result = data.get('result', {})
+                    current_text = result.get('text', '')
+                    enabled = result.get('enabled', False)
+
+                    # Check if our overlay is still showing
+                    expected_text = params.get('text', '')
+                    if not enabled or current_text != expected_text:
+                        # Our overlay was overwritten, restore it
+                        remaining = int(_overlay_state['persistent_expiry'] - time.time())
+                        logger.info(f"[OverlayManager] Restoring overwritten overlay ({remaining}s remaining)")
+                        control.call('/overlay/set', params, timeout=2.0)
 
                 except Exception as e:
                     logger.debug(f"[OverlayManager] Monitor check error: {e}")
@@ -211,8 +206,8 @@ class NotificationOverlay:
         self._scale = 4  # Text scale factor
         self._bg_alpha = 200  # Background transparency
 
-        # API endpoint
-        self._api_base = f"http://localhost:{ustreamer_port}/overlay/set"
+        # API client (shared keep-alive connections to ustreamer)
+        self._control = get_ustreamer_control(ustreamer_port)
 
         logger.info(f"[Overlay] Initialized with ustreamer API at port {ustreamer_port}, position={position}")
 
@@ -224,28 +219,10 @@ class NotificationOverlay:
             params: Query parameters for the API
 
         Returns:
-            True if successful, False otherwise
+            True if successful, False otherwise (failures are counted and
+            logged by the control client)
         """
-        try:
-            # Build query string
-            query = urllib.parse.urlencode(params)
-            url = f"{self._api_base}?{query}"
-
-            # Make request with short timeout
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=2.0) as response:
-                if response.status == 200:
-                    return True
-                else:
-                    logger.warning(f"[Overlay] API returned status {response.status}")
-                    return False
-
-        except urllib.error.URLError as e:
-            logger.error(f"[Overlay] API connection error: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"[Overlay] API error: {e}")
-            return False
+        return self._control.call('/overlay/set', params, timeout=2.0) is not None
 
     def show(self, text: str, duration: float = None, background: bool = True, persistent: bool = None):
         """
@@ -291,7 +268,7 @@ class NotificationOverlay:
 
             # Register as persistent if it's a long-duration overlay
             if is_persistent and duration is not None:
-                _set_persistent(text, params, duration, self._api_base)
+                _set_persistent(text, params, duration, self._control)
 
             # Set auto-hide timer if duration specified
             if duration is not None and duration > 0:
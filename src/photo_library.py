@@ -25,14 +25,26 @@ Public API:
   - add_photo(bytes, original_name) -> dict
   - remove_photo(photo_id) -> bool
   - get_photo_bytes(photo_id) -> bytes | None
+  - get_photo_path(photo_id) -> Path | None
   - random_photo_id() -> str | None
+  - photo_ids() -> tuple of str
   - total_bytes() -> int
 
 Zero network access. All helpers are pure-file operations.
+
+Reads are served from an in-memory index (id -> name/uploaded/bytes)
+instead of globbing and parsing every .meta file per call: the blocking
+path asks for a random photo on each ad block and on every photo swap.
+The index is updated in place by our own writes and rebuilt when an
+inotify watch on PHOTO_DIR reports an outside change (files copied in by
+hand, a cleanup script). Without inotify the directory mtime is checked
+instead. `version` increments whenever the set of photos changes, so
+derived caches (replacement_cache.py) know when to resync.
 """
 
 from __future__ import annotations
 
+import ctypes
 import hashlib
 import io
 import json
@@ -41,8 +53,9 @@ import os
 import random
 import threading
 import time
+import weakref
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 logger = logging.getLogger("Minus.PhotoLibrary")
 
@@ -53,59 +66,100 @@ PHOTO_MAX_COUNT = 200          # hard cap — oldest evicted on add beyond this
 PHOTO_MAX_BYTES = 200 * 1024 * 1024  # 200 MB total cap (24h-safe)
 ALLOWED_MIME_PREFIXES = ("image/",)
 
+# inotify(7) events that can change the directory listing or a .meta body
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+class _DirWatch:
+    """Tells whether a directory changed since the last `changed()` call.
+
+    Uses a non-blocking inotify descriptor (one read() per check, no
+    thread). Falls back to comparing the directory's mtime when inotify
+    isn't available; that misses in-place rewrites of an existing file,
+    which the library itself never does.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._fd = None
+        self._mtime = None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            if libc.inotify_add_watch(fd, os.fsencode(str(path)), _IN_WATCH_MASK) < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, "inotify_add_watch failed")
+            self._fd = fd
+            weakref.finalize(self, os.close, fd)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"[PhotoLibrary] inotify unavailable ({e}), checking dir mtime")
+            self._mtime = self._dir_mtime()
+
+    def _dir_mtime(self) -> Optional[int]:
+        try:
+            return self._path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        if self._fd is None:
+            mtime = self._dir_mtime()
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            return True
+        changed = False
+        while True:
+            try:
+                if not os.read(self._fd, 4096):
+                    break
+            except OSError:
+                break  # EAGAIN: queue drained
+            changed = True
+        return changed
+
 
 class PhotoLibrary:
     """Singleton-ish filesystem-backed photo store.
 
     Concurrency: all write paths lock a single module-level mutex so two web
-    requests uploading simultaneously can't corrupt the index. Reads are
-    lock-free (filesystem is the source of truth).
+    requests uploading simultaneously can't corrupt the index. Reads take
+    the same lock only to check the directory watch and, after an outside
+    change, rebuild the in-memory index.
     """
 
     def __init__(self, base_dir: Optional[Path] = None):
         self._dir = Path(base_dir) if base_dir else PHOTO_DIR
         self._dir.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
-
-    # ---------------- read helpers (cheap, no lock) -------------------
+        self._watch = _DirWatch(self._dir)
+        # id -> entry; every .jpg has one, 'listed' when its .meta exists too
+        self._index: Optional[Dict[str, dict]] = None
+        self._listing: Optional[List[dict]] = None  # newest-first, listed only
+        self._ids: tuple = ()
+        self.version = 0
+
+    # ---------------- read helpers (cheap, in-memory) ------------------
     def list_photos(self) -> List[dict]:
         """Return all photos ordered newest-first. No PIL access here."""
-        items: List[dict] = []
-        for meta_path in self._dir.glob("*.meta"):
-            photo_id = meta_path.stem
-            jpeg_path = self._dir / f"{photo_id}.jpg"
-            if not jpeg_path.exists():
-                # Orphaned meta — clean up on next write path
-                continue
-            try:
-                with meta_path.open("r") as f:
-                    meta = json.load(f)
-            except Exception:
-                meta = {}
-            try:
-                size = jpeg_path.stat().st_size
-            except OSError:
-                continue
-            items.append({
-                "id": photo_id,
-                "name": meta.get("name", photo_id[:8]),
-                "uploaded": meta.get("uploaded", 0),
-                "bytes": size,
-            })
-        items.sort(key=lambda x: x["uploaded"], reverse=True)
-        return items
+        with self._lock:
+            return [dict(item) for item in self._listing_locked()]
 
     def count(self) -> int:
-        return len(list(self._dir.glob("*.jpg")))
+        with self._lock:
+            return len(self._index_locked())
 
     def total_bytes(self) -> int:
-        total = 0
-        for p in self._dir.glob("*.jpg"):
-            try:
-                total += p.stat().st_size
-            except OSError:
-                pass
-        return total
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._index_locked().values())
 
     def get_photo_bytes(self, photo_id: str) -> Optional[bytes]:
         jpeg_path = self._dir / f"{self._sanitize(photo_id)}.jpg"
@@ -116,12 +170,25 @@ class PhotoLibrary:
         except OSError:
             return None
 
+    def get_photo_path(self, photo_id: str) -> Optional[Path]:
+        """On-disk JPEG for a photo (thumbnail cache source), or None."""
+        jpeg_path = self._dir / f"{self._sanitize(photo_id)}.jpg"
+        return jpeg_path if jpeg_path.exists() else None
+
     def random_photo_id(self) -> Optional[str]:
-        ids = [p.stem for p in self._dir.glob("*.jpg")]
+        with self._lock:
+            self._index_locked()
+            ids = self._ids
         if not ids:
             return None
         return random.choice(ids)
 
+    def photo_ids(self) -> tuple:
+        """Ids of every stored photo (listed or not), in no particular order."""
+        with self._lock:
+            self._index_locked()
+            return self._ids
+
     # ---------------- write helpers -----------------------------------
     def add_photo(self, data: bytes, original_name: str = "photo") -> dict:
         """Normalize + persist `data`. Returns the stored photo's metadata.
@@ -211,6 +278,8 @@ class PhotoLibrary:
                 "dim": list(img.size),
             }
             meta_path.write_text(json.dumps(meta))
+            self._watch.changed()  # Our own events; the index is updated below
+            self._put_entry(photo_id, meta["name"], meta["uploaded"], len(payload))
             logger.info(
                 f"[PhotoLibrary] Added {photo_id} ({meta['name']}, "
                 f"{len(payload)} bytes, {img.size[0]}x{img.size[1]})"
@@ -225,20 +294,94 @@ class PhotoLibrary:
         meta_path = self._dir / f"{photo_id}.meta"
         removed = False
         with self._lock:
+            self._index_locked()
             if jpeg_path.exists():
                 jpeg_path.unlink()
                 removed = True
             if meta_path.exists():
                 meta_path.unlink()
+            self._watch.changed()
+            self._drop_entry(photo_id)
         return removed
 
     # ---------------- internals ---------------------------------------
+    def _index_locked(self) -> Dict[str, dict]:
+        """The in-memory index, rebuilt first if the directory changed.
+
+        Caller holds self._lock.
+        """
+        if self._watch.changed() or self._index is None:
+            self._index = self._scan()
+            self._changed_locked()
+        return self._index
+
+    def _listing_locked(self) -> List[dict]:
+        index = self._index_locked()
+        if self._listing is None:
+            listing = [
+                {k: entry[k] for k in ("id", "name", "uploaded", "bytes")}
+                for entry in index.values() if entry["listed"]
+            ]
+            listing.sort(key=lambda x: x["uploaded"], reverse=True)
+            self._listing = listing
+        return self._listing
+
+    def _scan(self) -> Dict[str, dict]:
+        """One directory pass: every .jpg, named/dated from its .meta."""
+        sizes: Dict[str, int] = {}
+        metas = set()
+        try:
+            with os.scandir(self._dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == ".jpg":
+                        try:
+                            sizes[stem] = entry.stat().st_size
+                        except OSError:
+                            continue
+                    elif ext == ".meta":
+                        metas.add(stem)
+        except OSError as e:
+            logger.warning(f"[PhotoLibrary] scan of {self._dir} failed: {e}")
+        index: Dict[str, dict] = {}
+        for photo_id, size in sizes.items():
+            meta = {}
+            if photo_id in metas:
+                try:
+                    with (self._dir / f"{photo_id}.meta").open("r") as f:
+                        meta = json.load(f)
+                except Exception:
+                    meta = {}
+            index[photo_id] = {
+                "id": photo_id,
+                "name": meta.get("name", photo_id[:8]),
+                "uploaded": meta.get("uploaded", 0),
+                "bytes": size,
+                # Orphaned jpgs (no .meta) count but aren't listed, as before
+                "listed": photo_id in metas,
+            }
+        return index
+
+    def _put_entry(self, photo_id: str, name: str, uploaded: int, size: int):
+        self._index[photo_id] = {"id": photo_id, "name": name, "uploaded": uploaded,
+                                 "bytes": size, "listed": True}
+        self._changed_locked()
+
+    def _drop_entry(self, photo_id: str):
+        if self._index.pop(photo_id, None) is not None:
+            self._changed_locked()
+
+    def _changed_locked(self):
+        self._listing = None
+        self._ids = tuple(self._index)
+        self.version += 1
+
     def _enforce_caps(self, new_bytes: int = 0):
         """Evict oldest photos until both count and total-bytes caps are safe.
 
         Caller holds self._lock.
         """
-        photos = self.list_photos()
+        photos = list(self._listing_locked())
         # Count cap
         while len(photos) >= PHOTO_MAX_COUNT:
             oldest = photos.pop()
@@ -256,6 +399,8 @@ class PhotoLibrary:
                 jpeg_path.unlink()
             if meta_path.exists():
                 meta_path.unlink()
+            self._watch.changed()
+            self._drop_entry(photo_id)
             logger.info(f"[PhotoLibrary] Evicted {photo_id} (cap)")
         except OSError as e:
             logger.warning(f"[PhotoLibrary] evict failed for {photo_id}: {e}")
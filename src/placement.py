@@ -0,0 +1,416 @@
+"""
+Core placement and scheduling policy for Minus processes and threads.
+
+Placement used to be ad hoc: the ASR worker pinned itself to {3,4,5},
+ml_worker/vlm_worker called os.nice(10), the IR transmitter pinned itself
+to the last core, and everything else (OCR/VLM worker processes,
+ustreamer, GStreamer streaming threads, the web server, the LED
+animation) floated across all eight cores. A burst of ASR or screenshot
+work could land on the cores ustreamer was encoding on.
+
+config.PLACEMENT_POLICY now gives every role a core set, a nice level
+and an optional scheduling class, and this module applies it:
+
+- apply_placement(role) at the start of a thread or spawned worker
+  process (Linux affinity, nice and scheduler class are per thread, and
+  threads inherit them from the thread that creates them).
+- apply_to_process(role, pid) for child processes started elsewhere
+  (ustreamer, the OCR/VLM/ASR workers from the parent's side): every
+  task of the process, plus tracking so later threads are covered.
+- verify() re-reads the actual placement of every tracked task,
+  re-applies anything that drifted (counted in
+  minus_placement_drift_total), and claims the display pipeline's
+  GStreamer streaming threads by name ('element:pad', for the elements
+  in GST_VIDEO_ELEMENTS). The health loop runs it via verify_if_due().
+- report() is what /api/placement returns: the policy, the actual
+  placement per task, and per-core utilization from /proc/stat. It only
+  reads; drift is left for the health loop to correct.
+
+Cores the host doesn't have are dropped, so the same policy runs on a
+dev machine. Failures (no CAP_SYS_NICE for negative nice or SCHED_FIFO)
+are logged once per role and counted, never raised.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import BIG_CORES, LITTLE_CORES, PLACEMENT_ENABLED, PLACEMENT_POLICY
+from metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+# verify_if_due() runs verify() at most this often
+VERIFY_INTERVAL_S = 10.0
+
+# GStreamer names its streaming threads after the pad they drive
+GST_THREAD_ROLE = 'gst_streaming'
+
+# Elements of ad_blocker's display pipeline that run a streaming thread.
+# Other pipelines (the audio passthrough's alsasrc:src, ...) keep their
+# own thread placement.
+GST_VIDEO_ELEMENTS = frozenset({'videosrc', 'videodec', 'videoqueue'})
+
+_POLICIES = {
+    'other': getattr(os, 'SCHED_OTHER', 0),
+    'fifo': getattr(os, 'SCHED_FIFO', 1),
+    'idle': getattr(os, 'SCHED_IDLE', 5),
+}
+_POLICY_NAMES = {value: name for name, value in _POLICIES.items()}
+
+PLACEMENT_DRIFT = counter('minus_placement_drift_total',
+                          'Tasks found off their placement and re-applied', ['role'])
+PLACEMENT_ERRORS = counter('minus_placement_errors_total',
+                           'Placement settings the kernel refused', ['role'])
+CORE_UTILIZATION = gauge('minus_cpu_core_utilization',
+                         'CPU core busy fraction since the previous report', ['core'])
+
+
+@dataclass(frozen=True)
+class Placement:
+    """Where and how a role runs. None leaves that setting alone."""
+    cores: Optional[FrozenSet[int]] = None
+    nice: Optional[int] = None
+    policy: Optional[str] = None
+    priority: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'cores': sorted(self.cores) if self.cores is not None else None,
+            'nice': self.nice,
+            'policy': self.policy,
+            'priority': self.priority if self.policy == 'fifo' else None,
+        }
+
+
+def parse_cores(spec: str) -> FrozenSet[int]:
+    """'0-3,6,7' -> {0, 1, 2, 3, 6, 7}."""
+    cores = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            cores.update(range(int(lo), int(hi) + 1))
+        else:
+            cores.add(int(part))
+    return frozenset(cores)
+
+
+def _available_cores() -> FrozenSet[int]:
+    try:
+        return frozenset(range(os.cpu_count() or 1))
+    except Exception:
+        return frozenset({0})
+
+
+def _override(role: str) -> Optional[dict]:
+    """MINUS_PLACEMENT_<ROLE>="cores:nice[:policy[:priority]]" as a policy entry."""
+    value = os.environ.get(f'MINUS_PLACEMENT_{role.upper()}', '').strip()
+    if not value:
+        if role == 'asr_worker' and os.environ.get('MINUS_ASR_CPU_AFFINITY', '').strip():
+            return {**PLACEMENT_POLICY.get(role, {}),
+                    'cores': os.environ['MINUS_ASR_CPU_AFFINITY']}
+        return None
+    fields = value.split(':')
+    entry = {'cores': fields[0]}
+    if len(fields) > 1 and fields[1]:
+        entry['nice'] = int(fields[1])
+    if len(fields) > 2 and fields[2]:
+        entry['policy'] = fields[2]
+    if len(fields) > 3 and fields[3]:
+        entry['priority'] = int(fields[3])
+    return entry
+
+
+def resolve(role: str, available: Optional[FrozenSet[int]] = None) -> Optional[Placement]:
+    """The Placement for `role` on this host, or None if it has none."""
+    try:
+        entry = _override(role) or PLACEMENT_POLICY.get(role)
+    except ValueError as e:
+        logger.warning(f"[Placement] Bad MINUS_PLACEMENT_{role.upper()}: {e}")
+        entry = PLACEMENT_POLICY.get(role)
+    if entry is None:
+        return None
+    cores = None
+    if entry.get('cores'):
+        cores = parse_cores(entry['cores']) & (available or _available_cores())
+        cores = cores or None  # None of them on this host: leave affinity alone
+    policy = entry.get('policy')
+    if policy is not None and policy not in _POLICIES:
+        logger.warning(f"[Placement] Unknown scheduling policy {policy!r} for {role}")
+        policy = None
+    return Placement(cores=cores, nice=entry.get('nice'), policy=policy,
+                     priority=int(entry.get('priority', 0)))
+
+
+def policy() -> Dict[str, Placement]:
+    """Every configured role resolved for this host."""
+    return {role: resolve(role) for role in PLACEMENT_POLICY}
+
+
+def read_task(tid: int) -> Optional[dict]:
+    """Actual cores, nice and scheduling class of task `tid`, or None if gone."""
+    try:
+        return {
+            'cores': sorted(os.sched_getaffinity(tid)),
+            'nice': os.getpriority(os.PRIO_PROCESS, tid),
+            'policy': _POLICY_NAMES.get(os.sched_getscheduler(tid) & 0xff, 'other'),
+        }
+    except (ProcessLookupError, PermissionError, OSError):
+        return None
+
+
+def _matches(placement: Placement, actual: dict) -> bool:
+    if placement.cores is not None and set(actual['cores']) != placement.cores:
+        return False
+    if placement.nice is not None and placement.policy != 'fifo' and actual['nice'] != placement.nice:
+        return False
+    if placement.policy is not None and actual['policy'] != placement.policy:
+        return False
+    return True
+
+
+class PlacementManager:
+    """Applies placements and keeps track of what they were applied to."""
+
+    def __init__(self, enabled: bool = PLACEMENT_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._threads: Dict[int, str] = {}      # tid -> role
+        self._processes: Dict[int, str] = {}    # pid -> role
+        self._warned = set()
+        self._last_verify = 0.0
+        self._last_cpu: Optional[Dict[int, Tuple[int, int]]] = None
+
+    # ----- applying -----
+
+    def _apply_task(self, role: str, placement: Placement, tid: int) -> bool:
+        ok = True
+        if placement.cores is not None:
+            ok &= self._attempt(role, 'affinity', os.sched_setaffinity, tid, placement.cores)
+        if placement.policy is not None:
+            priority = placement.priority if placement.policy == 'fifo' else 0
+            ok &= self._attempt(role, placement.policy, os.sched_setscheduler, tid,
+                                _POLICIES[placement.policy], os.sched_param(priority))
+        if placement.nice is not None and placement.policy != 'fifo':
+            ok &= self._attempt(role, 'nice', os.setpriority, os.PRIO_PROCESS, tid,
+                                placement.nice)
+        return ok
+
+    def _attempt(self, role: str, what: str, func, *args) -> bool:
+        try:
+            func(*args)
+            return True
+        except ProcessLookupError:
+            return False
+        except (OSError, AttributeError) as e:
+            PLACEMENT_ERRORS.labels(role=role).inc()
+            if (role, what) not in self._warned:
+                self._warned.add((role, what))
+                logger.warning(f"[Placement] {role}: could not set {what}: {e}")
+            return False
+
+    def apply(self, role: str) -> bool:
+        """Apply `role` to the calling thread and track it. True if fully applied."""
+        placement = resolve(role) if self.enabled else None
+        if placement is None:
+            return False
+        tid = threading.get_native_id()
+        with self._lock:
+            self._threads[tid] = role
+        ok = self._apply_task(role, placement, tid)
+        logger.debug(f"[Placement] {role} (tid {tid}): {placement.as_dict()}")
+        return ok
+
+    def apply_to_process(self, role: str, pid: int) -> bool:
+        """Apply `role` to every thread of process `pid` and track it."""
+        placement = resolve(role) if self.enabled else None
+        if placement is None or not pid:
+            return False
+        with self._lock:
+            self._processes[pid] = role
+        ok = True
+        for tid in _tasks(pid) or [pid]:
+            ok &= self._apply_task(role, placement, tid)
+        logger.info(f"[Placement] {role} (pid {pid}): {placement.as_dict()}")
+        return ok
+
+    # ----- verifying -----
+
+    def _tracked(self) -> List[Tuple[str, int, Optional[int]]]:
+        """(role, tid, pid) for every tracked task that still exists."""
+        with self._lock:
+            threads = dict(self._threads)
+            processes = dict(self._processes)
+        tasks = []
+        own = os.getpid()
+        live = set(_tasks(own))
+        for tid, role in threads.items():
+            if tid in live:
+                tasks.append((role, tid, None))
+            else:
+                with self._lock:
+                    self._threads.pop(tid, None)
+        for tid in live - set(threads):
+            if _is_video_streaming_thread(_comm(own, tid)):
+                with self._lock:
+                    self._threads[tid] = GST_THREAD_ROLE
+                tasks.append((GST_THREAD_ROLE, tid, None))
+        for pid, role in processes.items():
+            tids = _tasks(pid)
+            if not tids:
+                with self._lock:
+                    self._processes.pop(pid, None)
+                continue
+            tasks.extend((role, tid, pid) for tid in tids)
+        return tasks
+
+    def verify(self, repair: bool = True) -> List[dict]:
+        """Check every tracked task against its placement; re-apply drift.
+
+        Returns one entry per task: role, tid, pid, name, actual
+        placement and whether it matched before any re-apply. With
+        repair=False nothing is re-applied or counted.
+        """
+        if repair:
+            self._last_verify = time.monotonic()
+        if not self.enabled:
+            return []
+        placements: Dict[str, Optional[Placement]] = {}
+        results = []
+        for role, tid, pid in self._tracked():
+            if role not in placements:
+                placements[role] = resolve(role)
+            placement = placements[role]
+            actual = read_task(tid)
+            if placement is None or actual is None:
+                continue
+            ok = _matches(placement, actual)
+            if not ok and repair:
+                PLACEMENT_DRIFT.labels(role=role).inc()
+                self._apply_task(role, placement, tid)
+            results.append({
+                'role': role,
+                'tid': tid,
+                'pid': pid or os.getpid(),
+                'name': _comm(pid or os.getpid(), tid),
+                **actual,
+                'ok': ok,
+            })
+        return results
+
+    def verify_if_due(self):
+        """verify() if VERIFY_INTERVAL_S has passed since the last one."""
+        if time.monotonic() - self._last_verify >= VERIFY_INTERVAL_S:
+            self.verify()
+
+    # ----- reporting -----
+
+    def core_utilization(self, stat_text: Optional[str] = None) -> Dict[int, float]:
+        """Busy fraction per core since the previous call (since boot on the first)."""
+        if stat_text is None:
+            try:
+                with open('/proc/stat') as f:
+                    stat_text = f.read()
+            except OSError:
+                return {}
+        current = _parse_proc_stat(stat_text)
+        previous = self._last_cpu or {}
+        self._last_cpu = current
+        utilization = {}
+        for core, (busy, total) in current.items():
+            prev_busy, prev_total = previous.get(core, (0, 0))
+            elapsed = total - prev_total
+            utilization[core] = round((busy - prev_busy) / elapsed, 3) if elapsed > 0 else 0.0
+            CORE_UTILIZATION.labels(core=str(core)).set(utilization[core])
+        return utilization
+
+    def report(self) -> dict:
+        """Policy, actual placement per task and per-core utilization."""
+        tasks = self.verify(repair=False)
+        roles: Dict[str, dict] = {}
+        for role, placement in policy().items():
+            roles[role] = {
+                'wanted': placement.as_dict() if placement else None,
+                'tasks': [],
+            }
+        for task in tasks:
+            roles.setdefault(task['role'], {'wanted': None, 'tasks': []})['tasks'].append(task)
+        cores = {}
+        for core, busy in self.core_utilization().items():
+            kind = 'big' if core in BIG_CORES else 'little' if core in LITTLE_CORES else 'other'
+            cores[str(core)] = {'type': kind, 'utilization': busy}
+        return {
+            'enabled': self.enabled,
+            'roles': roles,
+            'cores': cores,
+            'misplaced': sum(1 for task in tasks if not task['ok']),
+        }
+
+
+def _tasks(pid: int) -> List[int]:
+    try:
+        return [int(tid) for tid in os.listdir(f'/proc/{pid}/task')]
+    except (OSError, ValueError):
+        return []
+
+
+def _is_video_streaming_thread(name: str) -> bool:
+    """'videoqueue:src' and the like (the kernel cuts names at 15 chars)."""
+    element, sep, _pad = name.partition(':')
+    return bool(sep) and element in GST_VIDEO_ELEMENTS
+
+
+def _comm(pid: int, tid: int) -> str:
+    try:
+        with open(f'/proc/{pid}/task/{tid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def _parse_proc_stat(text: str) -> Dict[int, Tuple[int, int]]:
+    """core -> (busy jiffies, total jiffies) from /proc/stat 'cpuN' lines."""
+    cores = {}
+    for line in text.splitlines():
+        if not line.startswith('cpu') or line.startswith('cpu '):
+            continue
+        fields = line.split()
+        try:
+            core = int(fields[0][3:])
+            values = [int(v) for v in fields[1:]]
+        except ValueError:
+            continue
+        # user nice system idle iowait irq softirq steal (guest is in user)
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        total = sum(values[:8])
+        cores[core] = (total - idle, total)
+    return cores
+
+
+_manager: Optional[PlacementManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_placement_manager() -> PlacementManager:
+    """Process-wide PlacementManager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = PlacementManager()
+        return _manager
+
+
+def apply_placement(role: str) -> bool:
+    """Apply `role` to the calling thread (see PlacementManager.apply)."""
+    return get_placement_manager().apply(role)
+
+
+def apply_to_process(role: str, pid: int) -> bool:
+    """Apply `role` to process `pid` (see PlacementManager.apply_to_process)."""
+    return get_placement_manager().apply_to_process(role, pid)
@@ -0,0 +1,252 @@
+"""
+Display-ready photo frames for the 'photos' replacement mode.
+
+During a photo-mode block the rotation thread used to take a library
+photo, decode it, letterbox it to the output resolution and re-encode it
+every ~5s. That was full-size image processing on the CPU while the ad
+was on screen and ustreamer was encoding 4K60.
+
+PhotoFrameCache renders each library photo ahead of time into a JPEG
+letterboxed to the current output resolution:
+
+    ~/.minus_media/frames/<W>x<H>/<photo_id>.jpg
+
+During a block the blocking path only reads one of those files and POSTs
+it. Rendering runs on a low-priority background thread. It starts when:
+
+- the output resolution changes (set_resolution), or
+- the library's version moves (an upload or delete, or an outside change
+  seen by its directory watch).
+
+refresh() checks for both. The ad blocker calls set_resolution() only
+from its idle pre-arm tick, so a sync never starts while an ad is on
+screen (one started just before a block finishes at low priority). A
+block that finds no frame ready shows text instead of rendering one. A
+sync removes the frames of deleted photos. A resolution change drops the frames for
+every other resolution. Photo ids are content hashes, so a frame never
+goes stale.
+"""
+
+import logging
+import os
+import random
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FRAME_CACHE_DIR = Path(os.environ.get(
+    'MINUS_FRAME_CACHE_DIR', str(Path.home() / ".minus_media" / "frames")))
+FRAME_JPEG_QUALITY = 85
+
+
+def letterbox_jpeg(data: bytes, width: int, height: int,
+                   quality: int = FRAME_JPEG_QUALITY) -> Optional[bytes]:
+    """Fit the image in `data` inside width x height with black bars.
+
+    Returns the result as a JPEG, or None if `data` can't be decoded.
+
+    ustreamer scales whatever it is sent to fill the composite frame, so
+    a photo with a different aspect ratio would otherwise be stretched.
+    """
+    import cv2
+    import numpy as np
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None or width <= 0 or height <= 0:
+        return None
+    ih, iw = img.shape[:2]
+    scale = min(width / iw, height / ih)
+    nw, nh = max(1, int(round(iw * scale))), max(1, int(round(ih * scale)))
+    resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    x, y = (width - nw) // 2, (height - nh) // 2
+    canvas[y:y + nh, x:x + nw] = resized
+    ok, enc = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return enc.tobytes() if ok else None
+
+
+class PhotoFrameCache:
+    """Letterboxed photo frames for one output resolution. Thread-safe."""
+
+    def __init__(self, library=None, cache_dir: Path = None):
+        self._library = library
+        self.cache_dir = Path(cache_dir) if cache_dir else FRAME_CACHE_DIR
+        self._lock = threading.Lock()
+        self._size: Optional[Tuple[int, int]] = None
+        self._ready = set()              # photo ids with a frame at _size
+        self._synced_version = None      # library.version of the last full sync
+        self._thread = None
+        self.rendered = 0
+        self.misses = 0
+
+    @property
+    def library(self):
+        if self._library is None:
+            from photo_library import get_photo_library
+            self._library = get_photo_library()
+        return self._library
+
+    def _dir_for(self, size: Tuple[int, int]) -> Path:
+        return self.cache_dir / f"{size[0]}x{size[1]}"
+
+    def set_resolution(self, width: int, height: int):
+        """Target a new output resolution (no-op when unchanged), then refresh()."""
+        size = (int(width), int(height))
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        with self._lock:
+            changed = size != self._size
+            if changed:
+                self._size = size
+                self._synced_version = None
+                self._ready = self._load(size)
+        if changed:
+            self._drop_other_sizes(size)
+            logger.info(f"[PhotoFrames] Output {size[0]}x{size[1]}, "
+                        f"{len(self._ready)} frames on disk")
+        self.refresh()
+
+    def _load(self, size: Tuple[int, int]) -> set:
+        directory = self._dir_for(size)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            return {p.stem for p in directory.glob('*.jpg')}
+        except OSError as e:
+            logger.warning(f"[PhotoFrames] Can't use {directory}: {e}")
+            return set()
+
+    def _drop_other_sizes(self, size: Tuple[int, int]):
+        keep = self._dir_for(size).name
+        try:
+            others = [p for p in self.cache_dir.iterdir() if p.is_dir() and p.name != keep]
+        except OSError:
+            return
+        for other in others:
+            shutil.rmtree(other, ignore_errors=True)
+
+    def refresh(self):
+        """Start a background sync if the library or resolution moved since the last one."""
+        self.library.photo_ids()  # Lets the library notice outside changes
+        with self._lock:
+            if self._size is None or self._synced_version == self.library.version:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                return  # The running sync re-checks the version before it exits
+            self._thread = threading.Thread(target=self._sync_loop, daemon=True,
+                                            name='PhotoFrameSync')
+            self._thread.start()
+
+    def _sync_loop(self):
+        # Linux schedules threads individually, so this only lowers the
+        # renderer's priority
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            with self._lock:
+                size = self._size
+            # Version before ids: a change in between only causes one more pass
+            version = self.library.version
+            ids = set(self.library.photo_ids())
+            with self._lock:
+                stale = self._ready - ids
+                self._ready -= stale
+                missing = ids - self._ready
+            for photo_id in stale:
+                try:
+                    (self._dir_for(size) / f"{photo_id}.jpg").unlink()
+                except OSError:
+                    pass
+            for photo_id in missing:
+                if self._size != size:
+                    break
+                try:
+                    self.render(photo_id, size)
+                except Exception as e:
+                    logger.debug(f"[PhotoFrames] Render failed for {photo_id}: {e}")
+            with self._lock:
+                if self._size == size and self.library.version == version:
+                    self._synced_version = version
+                    logger.debug(f"[PhotoFrames] Synced {len(self._ready)} frames "
+                                 f"at {size[0]}x{size[1]}")
+                    return
+
+    def render(self, photo_id: str, size: Tuple[int, int] = None) -> Optional[bytes]:
+        """Render and store the frame for `photo_id` now; its JPEG bytes, or None."""
+        size = size or self._size
+        if size is None:
+            return None
+        data = self.library.get_photo_bytes(photo_id)
+        if not data:
+            return None
+        frame = letterbox_jpeg(data, size[0], size[1])
+        if frame is None:
+            return None
+        path = self._dir_for(size) / f"{photo_id}.jpg"
+        tmp = path.with_name(f".{path.name}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(frame)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"[PhotoFrames] Failed to store {path}: {e}")
+            return frame
+        with self._lock:
+            if self._size == size:
+                self._ready.add(photo_id)
+            self.rendered += 1
+        return frame
+
+    def frame(self, photo_id: str) -> Optional[bytes]:
+        """Stored frame of `photo_id` at the current resolution, or None."""
+        with self._lock:
+            size = self._size
+            if size is None or photo_id not in self._ready:
+                self.misses += 1
+                return None
+        try:
+            return (self._dir_for(size) / f"{photo_id}.jpg").read_bytes()
+        except OSError:
+            with self._lock:
+                self._ready.discard(photo_id)
+                self.misses += 1
+            return None
+
+    def random_frame(self) -> Optional[Tuple[str, bytes]]:
+        """(photo_id, jpeg) of a random photo that already has a frame, or None."""
+        ids = set(self.library.photo_ids())
+        with self._lock:
+            candidates = list(self._ready & ids)
+        random.shuffle(candidates)
+        for photo_id in candidates[:3]:
+            data = self.frame(photo_id)
+            if data is not None:
+                return photo_id, data
+        return None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'resolution': f"{self._size[0]}x{self._size[1]}" if self._size else None,
+                'frames': len(self._ready),
+                'synced': self._synced_version is not None
+                and self._synced_version == self.library.version,
+                'rendered': self.rendered,
+                'misses': self.misses,
+            }
+
+
+_singleton: Optional[PhotoFrameCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_photo_frame_cache() -> PhotoFrameCache:
+    """Module-level singleton."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = PhotoFrameCache()
+        return _singleton
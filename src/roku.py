@@ -8,26 +8,38 @@ Features:
 - Full remote control: navigation, media, volume
 - App launching
 - Device info retrieval
+- One keep-alive ECP client per Roku with pipelined key sequences and
+  cached active-app / device-info answers (roku_ecp.py)
 
 Requirements:
 - Roku must have Device Connect enabled (Settings > System > Advanced > Control by mobile apps)
 """
 
+import http.client
 import logging
+import re
 import socket
 import threading
 import time
-from typing import Optional, Callable, Dict, Any
-import requests
+from typing import Optional, Callable, Dict, Any, List
 
-logger = logging.getLogger(__name__)
+from roku_ecp import (ACTIVE_APP, ACTIVE_APP_TTL_S, DEVICE_INFO, ROKU_PORT,
+                      EcpClient, get_ecp_client)
 
-# Roku ECP port
-ROKU_PORT = 8060
+logger = logging.getLogger(__name__)
 
 # Discovery timeout
 DISCOVERY_TIMEOUT = 5.0
 
+# device-info fetch per discovered Roku (these run concurrently)
+DISCOVERY_INFO_TIMEOUT = 2.0
+
+# connect() accepts a device-info answer this fresh (e.g. from discovery)
+CONNECT_INFO_MAX_AGE = 2.0
+
+# Roku answers ECP writes with 200/204, or 202 when the key is queued
+ECP_OK = (200, 202, 204)
+
 # Connection check interval
 CHECK_INTERVAL = 10.0
 
@@ -152,6 +164,10 @@ class RokuController:
 
             start_time = time.time()
             seen_ips = set()
+            # device-info is fetched on its own thread per responder, so a
+            # slow Roku doesn't hold up the receive loop or the others
+            fetchers = []
+            devices_lock = threading.Lock()
 
             while time.time() - start_time < timeout:
                 try:
@@ -166,30 +182,12 @@ class RokuController:
 
                     # Check if it's a Roku response
                     if 'roku' in response.lower() or 'LOCATION' in response:
-                        # Try to get device info
-                        try:
-                            info_url = f'http://{ip}:{ROKU_PORT}/query/device-info'
-                            r = requests.get(info_url, timeout=2)
-                            if r.status_code == 200:
-                                # Parse basic info from XML
-                                content = r.text
-                                name = _extract_xml_value(content, 'user-device-name') or \
-                                       _extract_xml_value(content, 'friendly-device-name') or \
-                                       'Roku'
-                                model = _extract_xml_value(content, 'model-name') or 'Unknown'
-                                serial = _extract_xml_value(content, 'serial-number') or ''
-
-                                device = {
-                                    'ip': ip,
-                                    'name': name,
-                                    'model': model,
-                                    'serial': serial,
-                                }
-                                devices.append(device)
-                                logger.info(f"[Roku] Found: {name} ({model}) at {ip}")
-                        except Exception as e:
-                            logger.debug(f"[Roku] Could not get device info for {ip}: {e}")
-                            devices.append({'ip': ip, 'name': 'Roku', 'model': 'Unknown'})
+                        fetcher = threading.Thread(
+                            target=RokuController._describe_device,
+                            args=(ip, devices, devices_lock),
+                            daemon=True, name=f"Roku-Discover-{ip}")
+                        fetcher.start()
+                        fetchers.append(fetcher)
 
                 except socket.timeout:
                     break
@@ -198,6 +196,12 @@ class RokuController:
 
             sock.close()
 
+            deadline = time.monotonic() + DISCOVERY_INFO_TIMEOUT + 0.5
+            for fetcher in fetchers:
+                fetcher.join(timeout=max(0.0, deadline - time.monotonic()))
+            with devices_lock:
+                devices = list(devices)
+
         except Exception as e:
             logger.error(f"[Roku] Discovery error: {e}")
 
@@ -208,6 +212,39 @@ class RokuController:
 
         return devices
 
+    @staticmethod
+    def _describe_device(ip: str, devices: List[dict], devices_lock: threading.Lock):
+        """Append the discovery entry for the Roku at `ip` to `devices`."""
+        try:
+            status, content = get_ecp_client(ip).query(DEVICE_INFO, ttl=DISCOVERY_INFO_TIMEOUT,
+                                                        timeout=DISCOVERY_INFO_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"[Roku] Could not get device info for {ip}: {e}")
+            with devices_lock:
+                devices.append({'ip': ip, 'name': 'Roku', 'model': 'Unknown'})
+            return
+        if status != 200:
+            return
+        # Parse basic info from XML
+        name = _extract_xml_value(content, 'user-device-name') or \
+               _extract_xml_value(content, 'friendly-device-name') or \
+               'Roku'
+        model = _extract_xml_value(content, 'model-name') or 'Unknown'
+        serial = _extract_xml_value(content, 'serial-number') or ''
+        with devices_lock:
+            devices.append({
+                'ip': ip,
+                'name': name,
+                'model': model,
+                'serial': serial,
+            })
+        logger.info(f"[Roku] Found: {name} ({model}) at {ip}")
+
+    @property
+    def _client(self) -> EcpClient:
+        """Shared ECP client for the current address."""
+        return get_ecp_client(self._ip_address)
+
     def connect(self, ip_address: str, timeout: float = 5.0) -> bool:
         """
         Connect to a Roku device.
@@ -227,12 +264,12 @@ class RokuController:
             logger.info(f"[Roku] Connecting to {ip_address}...")
 
             try:
-                # Try to get device info to verify connection
-                url = f'http://{ip_address}:{ROKU_PORT}/query/device-info'
-                response = requests.get(url, timeout=timeout)
+                # Try to get device info to verify connection; an answer
+                # discovery got moments ago proves the same thing
+                status, content = get_ecp_client(ip_address).query(
+                    DEVICE_INFO, ttl=CONNECT_INFO_MAX_AGE, timeout=timeout)
 
-                if response.status_code == 200:
-                    content = response.text
+                if status == 200:
                     self._device_info = {
                         'ip': ip_address,
                         'name': _extract_xml_value(content, 'user-device-name') or
@@ -249,13 +286,13 @@ class RokuController:
                     self._start_reconnect_thread()
                     return True
                 else:
-                    logger.error(f"[Roku] Connection failed: HTTP {response.status_code}")
+                    logger.error(f"[Roku] Connection failed: HTTP {status}")
                     return False
 
-            except requests.exceptions.Timeout:
+            except TimeoutError:
                 logger.error(f"[Roku] Connection timeout to {ip_address}")
                 return False
-            except requests.exceptions.ConnectionError as e:
+            except (OSError, http.client.HTTPException) as e:
                 logger.error(f"[Roku] Connection error: {e}")
                 logger.info("[Roku] Make sure Device Connect is enabled on your Roku")
                 return False
@@ -407,10 +444,9 @@ class RokuController:
             return False
 
         try:
-            url = f'http://{self._ip_address}:{ROKU_PORT}/'
-            response = requests.get(url, timeout=2)
-            return response.status_code == 200
-        except:
+            status, _ = self._client.request('GET', '/', timeout=2)
+            return status == 200
+        except Exception:
             return False
 
     def is_connected(self) -> bool:
@@ -436,30 +472,38 @@ class RokuController:
 
     def _send_keypress(self, key: str) -> bool:
         """Send a keypress via ECP."""
+        return self._send_keypresses([key])
+
+    def _send_keypresses(self, keys: List[str], delay: float = 0.0) -> bool:
+        """Send keypresses in order; with no delay they are pipelined."""
         if not self._connected or not self._ip_address:
             logger.warning("[Roku] Not connected")
             return False
 
-        url = f'http://{self._ip_address}:{ROKU_PORT}/keypress/{key}'
-
-        # Retry up to 2 times on timeout
-        for attempt in range(2):
+        # Retry a lone key once on timeout; a timed-out sequence may have
+        # been partly applied, so it isn't resent
+        attempts = 2 if len(keys) == 1 else 1
+        for attempt in range(attempts):
             try:
-                response = requests.post(url, timeout=5)
+                statuses = self._client.keypresses(keys, delay=delay, timeout=3.0)
                 # Roku returns 200/204 for successful key presses; under
                 # load it returns 202 Accepted (key queued) — also success
                 # (observed live 2026-07-02 during a Back sequence).
-                if response.status_code in (200, 202, 204):
-                    logger.debug(f"[Roku] Sent key: {key}")
+                failed = [status for status in statuses if status not in ECP_OK]
+                if not failed:
+                    logger.debug(f"[Roku] Sent keys: {' '.join(keys)}")
                     return True
+                if failed[0] is None:
+                    logger.error(f"[Roku] Key press failed: connection dropped before "
+                                 f"{len(failed)} key(s) were answered")
                 else:
-                    logger.error(f"[Roku] Key press failed: HTTP {response.status_code}")
-                    return False
-            except requests.exceptions.Timeout:
-                if attempt == 0:
+                    logger.error(f"[Roku] Key press failed: HTTP {failed[0]}")
+                return False
+            except TimeoutError:
+                if attempt + 1 < attempts:
                     logger.warning(f"[Roku] Key press timeout, retrying...")
                     continue
-                logger.error(f"[Roku] Key press timeout after retry")
+                logger.error(f"[Roku] Key press timeout")
                 return False
             except Exception as e:
                 logger.error(f"[Roku] Key press error: {e}")
@@ -468,14 +512,14 @@ class RokuController:
         return False
 
     def send_keys(self, *commands: str, delay: float = 0.1) -> bool:
-        """Send multiple commands in sequence."""
-        success = True
-        for i, cmd in enumerate(commands):
-            if i > 0 and delay > 0:
-                time.sleep(delay)
-            if not self.send_command(cmd):
-                success = False
-        return success
+        """Send multiple commands in sequence (pipelined when delay is 0)."""
+        unknown = [cmd for cmd in commands if cmd not in ECP_KEYS]
+        if unknown:
+            logger.error(f"[Roku] Unknown command: {unknown[0]}")
+            return False
+        if not commands:
+            return True
+        return self._send_keypresses([ECP_KEYS[cmd] for cmd in commands], delay=delay)
 
     def launch_app(self, app_name: str) -> bool:
         """
@@ -497,19 +541,23 @@ class RokuController:
             return False
 
         try:
-            url = f'http://{self._ip_address}:{ROKU_PORT}/launch/{app_id}'
-            response = requests.post(url, timeout=5)
+            status, _ = self._client.request('POST', f'/launch/{app_id}', timeout=5)
             # Roku returns 200/204 for successful launches; 202 = queued
-            if response.status_code in (200, 202, 204):
+            if status in ECP_OK:
                 logger.info(f"[Roku] Launched app: {app_name}")
                 return True
             else:
-                logger.error(f"[Roku] App launch failed: HTTP {response.status_code}")
+                logger.error(f"[Roku] App launch failed: HTTP {status}")
                 return False
         except Exception as e:
             logger.error(f"[Roku] App launch error: {e}")
             return False
 
+    def _active_app_xml(self) -> Optional[str]:
+        """/query/active-app body, shared for ACTIVE_APP_TTL_S across callers."""
+        status, content = self._client.query(ACTIVE_APP, ttl=ACTIVE_APP_TTL_S, timeout=3)
+        return content if status == 200 else None
+
     def get_active_app(self) -> Optional[str]:
         """Get the currently active app on Roku via ECP.
 
@@ -519,12 +567,10 @@ class RokuController:
             return None
 
         try:
-            url = f'http://{self._ip_address}:{ROKU_PORT}/query/active-app'
-            response = requests.get(url, timeout=3)
-            if response.status_code == 200:
-                import re
+            content = self._active_app_xml()
+            if content is not None:
                 # Extract app name from XML: <app ...>AppName</app>
-                match = re.search(r'<app[^>]*>([^<]+)</app>', response.text)
+                match = re.search(r'<app[^>]*>([^<]+)</app>', content)
                 if match:
                     return match.group(1)
             return None
@@ -541,15 +587,13 @@ class RokuController:
             return None
 
         try:
-            url = f'http://{self._ip_address}:{ROKU_PORT}/query/active-app'
-            response = requests.get(url, timeout=3)
-            if response.status_code == 200:
-                import re
+            content = self._active_app_xml()
+            if content is not None:
                 # Accept non-numeric ids too: Roku OS 15.x reports the home screen
                 # as <app id="native-ui">; a digits-only match returned None which
                 # callers treat as "query failed, don't interfere" (observed live
                 # 2026-07-12: 50-minute stuck-on-home loop).
-                match = re.search(r'<app\s+id="([^"]+)"', response.text)
+                match = re.search(r'<app\s+id="([^"]+)"', content)
                 if match:
                     return match.group(1)
             return None
@@ -568,10 +612,9 @@ class RokuController:
             return False
 
         try:
-            url = f'http://{self._ip_address}:{ROKU_PORT}/query/active-app'
-            response = requests.get(url, timeout=3)
-            if response.status_code == 200:
-                return '<screensaver' in response.text.lower()
+            content = self._active_app_xml()
+            if content is not None:
+                return '<screensaver' in content.lower()
             return False
         except Exception as e:
             logger.debug(f"[Roku] Screensaver check error: {e}")
@@ -607,23 +650,21 @@ class RokuController:
 
         try:
             # Try to query apps list - this is restricted in Limited mode
-            url = f'http://{self._ip_address}:{ROKU_PORT}/query/apps'
-            response = requests.get(url, timeout=3)
+            status, content = self._client.request('GET', '/query/apps', timeout=3)
 
-            if response.status_code == 200:
+            if status == 200:
                 # Check if we got actual app data
-                content = response.text
                 if '<app' in content.lower():
                     logger.info("[Roku] Control mode: FULL (apps accessible)")
                     return 'full'
                 else:
                     logger.warning("[Roku] Control mode: LIMITED (apps query returned empty)")
                     return 'limited'
-            elif response.status_code == 403:
+            elif status == 403:
                 logger.warning("[Roku] Control mode: LIMITED (403 Forbidden)")
                 return 'limited'
             else:
-                logger.warning(f"[Roku] Control mode check returned HTTP {response.status_code}")
+                logger.warning(f"[Roku] Control mode check returned HTTP {status}")
                 return 'limited'
 
         except Exception as e:
@@ -641,7 +682,6 @@ class RokuController:
 
 def _extract_xml_value(xml_content: str, tag: str) -> Optional[str]:
     """Extract a value from simple XML content."""
-    import re
     match = re.search(f'<{tag}>([^<]*)</{tag}>', xml_content)
     return match.group(1) if match else None
 
@@ -0,0 +1,312 @@
+"""
+Keep-alive ECP client shared by everything that talks to one Roku.
+
+RokuController used bare requests.get/post calls. Every keypress opened a
+new TCP connection, with a 5s timeout and one retry. get_active_app,
+get_active_app_id and is_screensaver_active each fetched
+/query/active-app themselves, even though autonomous mode calls them back
+to back on every tick. Discovery fetched /query/device-info for each SSDP
+responder one after another inside the receive loop.
+
+EcpClient is the single client per Roku address (get_ecp_client):
+
+- A small pool of keep-alive http.client connections, as in
+  ustreamer_control.py. A kept-alive connection the Roku already closed
+  is retried once on a fresh one.
+- keypresses() with no delay pipelines the sequence. Every request is
+  written to one connection before any response is read, so a three-key
+  seek costs one round trip instead of three. If the Roku answers a key
+  with Connection: close, it has not read the rest, and those keys go one
+  at a time. If the connection drops with keys written but unanswered,
+  they may already have been applied: they are reported as failed (None)
+  and left to the caller.
+- query() serves GETs from a TTL cache shared by all callers, with at
+  most one request in flight per path. Any POST (keypress, launch) drops
+  cached state; device-info is kept.
+- Latency per endpoint and cache hits go to the metrics registry.
+"""
+
+import http.client
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# Roku ECP port
+ROKU_PORT = 8060
+
+ACTIVE_APP = '/query/active-app'
+DEVICE_INFO = '/query/device-info'
+
+# How long an active-app / device-info answer is reused
+ACTIVE_APP_TTL_S = float(os.environ.get('MINUS_ROKU_APP_TTL', '1.0'))
+DEVICE_INFO_TTL_S = 300.0
+
+# Idle keep-alive connections kept per Roku
+POOL_SIZE = 2
+
+REQUEST_LATENCY = histogram(
+    'minus_roku_request_seconds',
+    'Roku ECP round trip', ['endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+CACHE_HITS = counter(
+    'minus_roku_query_cache_hits_total',
+    'Roku ECP queries answered from the cache or a request in flight', ['endpoint'])
+
+_CLOSED_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+def _endpoint(path: str) -> str:
+    """Metric label for `path`: /keypress/Back -> /keypress."""
+    parts = path.split('/')
+    if len(parts) > 2 and parts[1] in ('keypress', 'launch'):
+        return '/' + parts[1]
+    return path
+
+
+class _SharedReader:
+    """One read buffer for several responses on the same socket.
+
+    HTTPResponse makes its own buffered file and closes it when the body
+    is read. With pipelined responses that buffer would swallow the ones
+    after it.
+    """
+
+    def __init__(self, sock):
+        self._fp = sock.makefile('rb')
+
+    def makefile(self, *args, **kwargs):
+        return self
+
+    def close(self):
+        pass  # Each response closes its file; the buffer outlives them
+
+    def release(self):
+        self._fp.close()
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+
+class _Fetch:
+    """A query in flight and the callers waiting on it."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Tuple[int, str]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EcpClient:
+    """Keep-alive, caching ECP client for one Roku. Thread-safe."""
+
+    def __init__(self, ip: str, port: int = ROKU_PORT):
+        self.ip = ip
+        self.port = port
+        self._idle = []  # Idle keep-alive connections, most recent last
+        self._pool_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._cache: Dict[str, Tuple[int, str, float]] = {}  # path -> (status, body, time)
+        self._inflight: Dict[str, _Fetch] = {}
+        self._generation = 0  # Bumped by every POST
+        self.requests_sent = 0
+        self.cache_hits = 0
+
+    def _acquire(self, timeout: float) -> http.client.HTTPConnection:
+        with self._pool_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return http.client.HTTPConnection(self.ip, self.port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, conn: http.client.HTTPConnection, will_close: bool = False):
+        if not will_close:
+            with self._pool_lock:
+                if len(self._idle) < POOL_SIZE:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    def request(self, method: str, path: str, timeout: float = 3.0) -> Tuple[int, str]:
+        """(status, body) of one uncached request.
+
+        Raises TimeoutError, OSError or http.client.HTTPException when the
+        Roku can't be reached.
+        """
+        if method == 'POST':
+            self.invalidate()
+        start = time.perf_counter()
+        try:
+            for attempt in range(2):
+                conn = self._acquire(timeout)
+                reused = conn.sock is not None
+                try:
+                    conn.request(method, path)
+                    response = conn.getresponse()
+                    body = response.read()
+                except _CLOSED_ERRORS:
+                    conn.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                self._release(conn, response.will_close)
+                return response.status, body.decode('utf-8', errors='replace')
+        finally:
+            self.requests_sent += 1
+            REQUEST_LATENCY.labels(endpoint=_endpoint(path)).observe(time.perf_counter() - start)
+
+    def query(self, path: str, ttl: float, timeout: float = 3.0) -> Tuple[int, str]:
+        """(status, body) of GET `path`, reusing a 200 answer for `ttl` seconds."""
+        with self._cond:
+            cached = self._cache.get(path)
+            if cached is not None and time.monotonic() - cached[2] < ttl:
+                self._note_hit(path)
+                return cached[0], cached[1]
+            fetch = self._inflight.get(path)
+            owner = fetch is None
+            if owner:
+                fetch = self._inflight[path] = _Fetch()
+                generation = self._generation
+            else:
+                self._note_hit(path)
+        if not owner:
+            if not fetch.done.wait(timeout):
+                raise TimeoutError(f"{path} still in flight after {timeout}s")
+            if fetch.error is not None:
+                raise fetch.error
+            return fetch.result
+        try:
+            fetch.result = self.request('GET', path, timeout)
+            return fetch.result
+        except BaseException as e:
+            fetch.error = e
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(path, None)
+                # A POST during the fetch may have changed the answer
+                if fetch.result is not None and fetch.result[0] == 200 \
+                        and generation == self._generation:
+                    self._cache[path] = (*fetch.result, time.monotonic())
+            fetch.done.set()
+
+    def _note_hit(self, path: str):
+        self.cache_hits += 1
+        CACHE_HITS.labels(endpoint=_endpoint(path)).inc()
+
+    def invalidate(self):
+        """Forget cached answers that a keypress or launch can change."""
+        with self._cond:
+            self._generation += 1
+            device_info = self._cache.get(DEVICE_INFO)
+            self._cache.clear()
+            if device_info is not None:
+                self._cache[DEVICE_INFO] = device_info
+
+    def keypresses(self, keys: List[str], delay: float = 0.0,
+                   timeout: float = 3.0) -> List[int]:
+        """Press `keys` in order; the HTTP status of each press.
+
+        With no delay the presses are pipelined on one connection. A key
+        whose fate is unknown because the connection dropped before its
+        response has status None; it is not resent.
+        """
+        if delay > 0 or len(keys) < 2:
+            statuses = []
+            for i, key in enumerate(keys):
+                if i > 0 and delay > 0:
+                    time.sleep(delay)
+                statuses.append(self.request('POST', f'/keypress/{key}', timeout)[0])
+            return statuses
+        statuses = self._pipeline(keys, timeout)
+        for key in keys[len(statuses):]:
+            statuses.append(self.request('POST', f'/keypress/{key}', timeout)[0])
+        return statuses
+
+    def _pipeline(self, keys: List[str], timeout: float) -> List[Optional[int]]:
+        """Statuses of the leading keys the Roku answered on one connection.
+
+        Padded with None for keys written but unanswered when the
+        connection dropped; shorter when the Roku closed it cleanly.
+        """
+        self.invalidate()
+        host = f'{self.ip}:{self.port}'
+        burst = b''.join(
+            f'POST /keypress/{key} HTTP/1.1\r\nHost: {host}\r\nContent-Length: 0\r\n\r\n'.encode()
+            for key in keys)
+        statuses = []
+        will_close = False
+        start = time.perf_counter()
+        conn = self._acquire(timeout)
+        reused = conn.sock is not None
+        try:
+            if not reused:
+                conn.connect()
+            conn.sock.sendall(burst)
+            reader = _SharedReader(conn.sock)
+            try:
+                for _ in keys:
+                    response = http.client.HTTPResponse(reader, method='POST')
+                    response.begin()
+                    response.read()
+                    statuses.append(response.status)
+                    self.requests_sent += 1
+                    REQUEST_LATENCY.labels(endpoint='/keypress').observe(
+                        time.perf_counter() - start)
+                    if response.will_close:
+                        will_close = True
+                        break
+            finally:
+                reader.release()
+        except _CLOSED_ERRORS + (http.client.BadStatusLine,):
+            conn.close()
+            if reused and not statuses:
+                return statuses  # Stale keep-alive connection, as in request()
+            # The Roku may have acted on keys it never answered
+            logger.warning(f"[Roku] Connection dropped after {len(statuses)} of "
+                           f"{len(keys)} pipelined keys; not resending the rest")
+            return statuses + [None] * (len(keys) - len(statuses))
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn, will_close)
+        return statuses
+
+    def close(self):
+        """Close idle connections."""
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        return {
+            'requests_sent': self.requests_sent,
+            'cache_hits': self.cache_hits,
+        }
+
+
+_clients: Dict[Tuple[str, int], EcpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_ecp_client(ip: str, port: int = ROKU_PORT) -> EcpClient:
+    """Shared EcpClient for the Roku at ip:port."""
+    with _clients_lock:
+        client = _clients.get((ip, port))
+        if client is None:
+            client = _clients[(ip, port)] = EcpClient(ip, port)
+        return client
@@ -0,0 +1,422 @@
+"""
+Indexed catalog of saved training screenshots.
+
+The review UI used to glob + stat a whole category directory on every page
+request and kept review state in a separate JSON file. With tens of
+thousands of training screenshots that made paging slow and hammered the
+SD card. This module keeps one row per screenshot in a small embedded
+SQLite database (WAL mode, so the web UI can read while the screenshot
+writer thread inserts):
+
+    screenshots(id, category, name, ts, size, dhash, source,
+                keywords, ocr_texts, reviewed)
+    screenshot_keywords(keyword, screenshot_id)   -- keyword filter index
+
+Rows are written by ScreenshotManager as it saves / evicts files and by the
+review endpoints as they classify / approve / undo. The directories stay
+the source of truth: `sync_category()` reconciles a category against a
+directory scan, and `ensure_backfilled()` runs that once for every
+category (plus the legacy reviewed-JSON import) the first time a tree is
+opened.
+
+Database file: <screenshots>/.catalog.sqlite3 (hidden, so image globs
+never pick it up).
+
+The stored dHashes are also loaded into one in-memory HammingIndex per
+category at open and kept in step with every add / remove / move, so
+`find_near()` answers whole-corpus near-duplicate queries across restarts.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from hamming_index import HammingIndex
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = '.catalog.sqlite3'
+
+# Screenshot categories (one directory each under the screenshots root)
+CATEGORIES = ('ads', 'non_ads', 'vlm_spastic', 'static')
+
+# Legacy review-state file (pre-catalog); imported once by ensure_backfilled()
+LEGACY_REVIEWED_FILE = Path("/home/radxa/.minus_reviewed_screenshots.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    id        INTEGER PRIMARY KEY,
+    category  TEXT    NOT NULL,
+    name      TEXT    NOT NULL,
+    ts        REAL    NOT NULL,
+    size      INTEGER NOT NULL DEFAULT 0,
+    dhash     INTEGER,
+    source    TEXT,
+    keywords  TEXT,
+    ocr_texts TEXT,
+    reviewed  INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (category, name)
+);
+CREATE INDEX IF NOT EXISTS idx_screenshots_cat_ts
+    ON screenshots (category, ts, id);
+CREATE INDEX IF NOT EXISTS idx_screenshots_review
+    ON screenshots (category, reviewed, ts, id);
+CREATE INDEX IF NOT EXISTS idx_screenshots_source
+    ON screenshots (category, source, ts, id);
+CREATE TABLE IF NOT EXISTS screenshot_keywords (
+    keyword       TEXT    NOT NULL,
+    screenshot_id INTEGER NOT NULL REFERENCES screenshots (id) ON DELETE CASCADE,
+    PRIMARY KEY (keyword, screenshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_keywords_screenshot
+    ON screenshot_keywords (screenshot_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_signed64(value: Optional[int]) -> Optional[int]:
+    """SQLite INTEGER is signed 64-bit; dHashes are unsigned 64-bit."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned64(value: Optional[int]) -> Optional[int]:
+    if value is None:
+        return None
+    return value + (1 << 64) if value < 0 else value
+
+
+def encode_cursor(ts: float, row_id: int) -> str:
+    """Opaque keyset-pagination cursor for (ts, id)."""
+    return f"{ts!r}:{row_id}"
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[float, int]]:
+    try:
+        ts, row_id = cursor.rsplit(':', 1)
+        return float(ts), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+class ScreenshotCatalog:
+    """SQLite-backed screenshot index. Thread-safe (one connection + lock)."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self.db_path = self.base_dir / CATALOG_FILENAME
+        self._lock = threading.Lock()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False,
+                                     isolation_level=None, timeout=5.0)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            # One index per category, filled from the table at open (each is ~2MB of tables)
+            self._hash_index: Dict[str, HammingIndex] = {}
+            for category, name, dhash in self._conn.execute(
+                    "SELECT category, name, dhash FROM screenshots WHERE dhash IS NOT NULL"):
+                self._index_for(category).add(name, _to_unsigned64(dhash))
+
+    def _index_for(self, category: str) -> HammingIndex:
+        index = self._hash_index.get(category)
+        if index is None:
+            index = self._hash_index[category] = HammingIndex()
+        return index
+
+    def _unindex(self, category: str, name: str) -> Optional[int]:
+        index = self._hash_index.get(category)
+        return index.remove(name) if index is not None else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----- writes -----
+
+    def add(self, category: str, name: str, ts: float, size: int,
+            dhash: Optional[int] = None, source: Optional[str] = None,
+            keywords: Iterable[str] = (), ocr_texts: Iterable[str] = ()):
+        """Insert (or replace) one screenshot row."""
+        keywords = sorted({str(k).lower() for k in keywords if k})
+        ocr_texts = list(ocr_texts or [])
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM screenshots WHERE category = ? AND name = ?",
+                    (category, name))
+                cur = self._conn.execute(
+                    "INSERT INTO screenshots (category, name, ts, size, dhash, source, "
+                    "keywords, ocr_texts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (category, name, ts, size, _to_signed64(dhash), source,
+                     json.dumps(keywords) if keywords else None,
+                     json.dumps(ocr_texts) if ocr_texts else None))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO screenshot_keywords (keyword, screenshot_id) "
+                    "VALUES (?, ?)", [(kw, cur.lastrowid) for kw in keywords])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if dhash is not None:
+                self._index_for(category).add(name, dhash)
+            else:
+                self._unindex(category, name)
+
+    def remove(self, category: str, name: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM screenshots WHERE category = ? AND name = ?",
+                (category, name))
+            self._unindex(category, name)
+
+    def move(self, category: str, name: str, new_category: str, new_name: str,
+             reviewed: Optional[bool] = None, ts: Optional[float] = None,
+             size: int = 0) -> bool:
+        """Re-home a row after its file was moved (review classify / undo).
+
+        Inserts a bare row when the source was never cataloged. Returns
+        True if an existing row was moved.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM screenshots WHERE category = ? AND name = ?",
+                    (new_category, new_name))
+                cur = self._conn.execute(
+                    "UPDATE screenshots SET category = ?, name = ? "
+                    "WHERE category = ? AND name = ?",
+                    (new_category, new_name, category, name))
+                moved = cur.rowcount > 0
+                if not moved:
+                    self._conn.execute(
+                        "INSERT INTO screenshots (category, name, ts, size) VALUES (?, ?, ?, ?)",
+                        (new_category, new_name, ts or 0.0, size))
+                if reviewed is not None:
+                    self._conn.execute(
+                        "UPDATE screenshots SET reviewed = ? WHERE category = ? AND name = ?",
+                        (int(reviewed), new_category, new_name))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._unindex(new_category, new_name)
+            dhash = self._unindex(category, name)
+            if moved and dhash is not None:
+                self._index_for(new_category).add(new_name, dhash)
+        return moved
+
+    def set_reviewed(self, category: str, name: str, reviewed: bool = True) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE screenshots SET reviewed = ? WHERE category = ? AND name = ?",
+                (int(reviewed), category, name))
+        return cur.rowcount > 0
+
+    def set_dhash(self, category: str, name: str, dhash: Optional[int]):
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE screenshots SET dhash = ? WHERE category = ? AND name = ?",
+                (_to_signed64(dhash), category, name))
+            if cur.rowcount and dhash is not None:
+                self._index_for(category).add(name, dhash)
+            else:
+                self._unindex(category, name)
+
+    def sync_category(self, category: str, files: Dict[str, Tuple[float, int]]) -> Tuple[int, int]:
+        """Reconcile one category with a directory scan ({name: (mtime, size)}).
+
+        Adds bare rows for files the catalog has never seen and drops rows
+        whose file is gone. Returns (added, removed).
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute(
+                "SELECT name FROM screenshots WHERE category = ?", (category,))}
+            missing = [(category, name, mtime, size)
+                       for name, (mtime, size) in files.items() if name not in known]
+            stale = [(category, name) for name in known if name not in files]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO screenshots (category, name, ts, size) VALUES (?, ?, ?, ?)",
+                    missing)
+                self._conn.executemany(
+                    "DELETE FROM screenshots WHERE category = ? AND name = ?", stale)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for _, name in stale:
+                self._unindex(category, name)
+        return len(missing), len(stale)
+
+    # ----- one-time backfill -----
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def ensure_backfilled(self, reviewed_file: Optional[Path] = None) -> bool:
+        """Import the existing directories (and legacy review JSON) once.
+
+        Returns True if a backfill ran. Safe to call from several places;
+        the meta flag makes every call after the first a single lookup.
+        """
+        from screenshots import list_screenshot_files
+
+        with self._lock:
+            if self._get_meta('backfilled'):
+                return False
+        added = 0
+        for category in CATEGORIES:
+            files = {}
+            for p in list_screenshot_files(self.base_dir / category):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                files[p.name] = (st.st_mtime, st.st_size)
+            added += self.sync_category(category, files)[0]
+
+        reviewed_file = LEGACY_REVIEWED_FILE if reviewed_file is None else reviewed_file
+        reviewed = []
+        try:
+            if reviewed_file.exists():
+                with open(reviewed_file) as f:
+                    reviewed = list(json.load(f))
+        except Exception as e:
+            logger.warning(f"[Catalog] Could not import reviewed screenshots: {e}")
+        with self._lock:
+            if reviewed:
+                self._conn.executemany(
+                    "UPDATE screenshots SET reviewed = 1 WHERE name = ?",
+                    [(name,) for name in reviewed])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+        logger.info(f"[Catalog] Backfilled {added} screenshots "
+                    f"({len(reviewed)} previously reviewed)")
+        return True
+
+    # ----- queries -----
+
+    @staticmethod
+    def _filters(category: str, keyword: Optional[str], source: Optional[str],
+                 reviewed: Optional[bool]) -> Tuple[str, list]:
+        clauses = ["category = ?"]
+        params: list = [category]
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if reviewed is not None:
+            clauses.append("reviewed = ?")
+            params.append(int(reviewed))
+        if keyword:
+            clauses.append(
+                "id IN (SELECT screenshot_id FROM screenshot_keywords WHERE keyword = ?)")
+            params.append(keyword.lower())
+        return " AND ".join(clauses), params
+
+    def count(self, category: str, keyword: Optional[str] = None,
+              source: Optional[str] = None, reviewed: Optional[bool] = None) -> int:
+        where, params = self._filters(category, keyword, source, reviewed)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM screenshots WHERE {where}", params).fetchone()[0]
+
+    def page(self, category: str, limit: int = 20, cursor: Optional[str] = None,
+             offset: int = 0, newest_first: bool = True, keyword: Optional[str] = None,
+             source: Optional[str] = None, reviewed: Optional[bool] = None
+             ) -> Tuple[List[dict], Optional[str]]:
+        """One page of rows plus the cursor for the next page (None at end).
+
+        Keyset pagination on (ts, id): pass the returned cursor back to get
+        the next page without an OFFSET scan. `offset` is only used when no
+        cursor is given (legacy page-number clients).
+        """
+        where, params = self._filters(category, keyword, source, reviewed)
+        order = "DESC" if newest_first else "ASC"
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            op = "<" if newest_first else ">"
+            where += f" AND (ts {op} ? OR (ts = ? AND id {op} ?))"
+            params += [after[0], after[0], after[1]]
+            offset = 0
+        sql = (f"SELECT * FROM screenshots WHERE {where} "
+               f"ORDER BY ts {order}, id {order} LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit + 1, max(0, offset)]).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [self._row_to_dict(r) for r in rows]
+        next_cursor = encode_cursor(rows[-1]['ts'], rows[-1]['id']) if has_more and rows else None
+        return items, next_cursor
+
+    def get(self, category: str, name: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM screenshots WHERE category = ? AND name = ?",
+                (category, name)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def rows(self, category: str) -> List[dict]:
+        """Every row in a category, oldest first (offline passes)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM screenshots WHERE category = ? ORDER BY ts, id",
+                (category,)).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    def find_near(self, category: str, dhash: int, max_distance: int) -> Optional[Tuple[int, str]]:
+        """(distance, name) of some saved screenshot in `category` whose
+        dHash is within `max_distance` bits, or None."""
+        index = self._hash_index.get(category)
+        return index.nearest_within(dhash, max_distance) if index is not None else None
+
+    def hash_count(self, category: Optional[str] = None) -> int:
+        """Number of indexed dHashes (one category, or all)."""
+        if category is not None:
+            return len(self._hash_index.get(category, ()))
+        return sum(len(index) for index in self._hash_index.values())
+
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        return {
+            'id': row['id'],
+            'category': row['category'],
+            'name': row['name'],
+            'ts': row['ts'],
+            'size': row['size'],
+            'dhash': _to_unsigned64(row['dhash']),
+            'source': row['source'],
+            'keywords': json.loads(row['keywords']) if row['keywords'] else [],
+            'ocr_texts': json.loads(row['ocr_texts']) if row['ocr_texts'] else [],
+            'reviewed': bool(row['reviewed']),
+        }
+
+
+_catalogs: Dict[Path, ScreenshotCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_screenshot_catalog(base_dir: Path) -> ScreenshotCatalog:
+    """Shared catalog per screenshots root (Minus' writer and the web UI
+    open the same tree)."""
+    key = Path(base_dir).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = ScreenshotCatalog(key)
+            _catalogs[key] = catalog
+        return catalog
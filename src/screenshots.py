@@ -7,19 +7,39 @@ Organizes screenshots into separate folders by type for easy training data prepa
 Deduplication uses perceptual difference hashing (dHash):
 - Resize to 9x8 grayscale, compare adjacent pixels → 64-bit hash
 - Hamming distance < 10 bits = ~85% similar → skip as duplicate
+- Checked against every saved screenshot in the category (persistent
+  Hamming index in the catalog), not just this session's recent saves
 - Also rejects blank/black frames (mean brightness < 15)
+
+Disk I/O runs off the detection threads:
+- Encoding + writing happens on a background writer thread fed by a
+  bounded in-memory queue (oldest job dropped on overflow), so
+  ml_worker / vlm_worker never stall on a 100+ms PNG encode to the SD card
+- The byte budget is tracked incrementally in an in-memory index of the
+  saved files (oldest-first per category), so enforcement is O(1)
+  bookkeeping plus evictions instead of a directory rescan
+
+Every saved file also gets a row in the screenshot catalog
+(screenshot_catalog.py) with its dHash, matched keywords, OCR texts and
+source, which is what the review UI pages through instead of globbing.
 """
 
 import logging
 import os
 import shutil
+import threading
 import time
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
 
 import cv2
 import numpy as np
 
+from hamming_index import HammingIndex, hamming_distance
+from placement import apply_placement
+from screenshot_catalog import CATEGORIES, get_screenshot_catalog
+
 logger = logging.getLogger(__name__)
 
 # Dedup: max hamming distance to consider frames as duplicates (out of 64 bits)
@@ -39,11 +59,72 @@ SOLID_FRAME_THRESHOLD = 10
 # keeps collection unbounded in TIME but bounded in BYTES: when the
 # screenshots tree exceeds SCREENSHOTS_MAX_GB or root free space drops
 # below SCREENSHOTS_MIN_FREE_GB, the OLDEST files across all categories
-# are evicted until 10% under budget. Checked at most once per
-# DISK_ENFORCE_INTERVAL seconds so the 20k-file scan stays off the hot path.
+# are evicted until 10% under budget. The tree size is a running total kept
+# in memory (checked after every write); root free space is a statvfs call
+# made at most once per FREE_SPACE_CHECK_INTERVAL. The in-memory index is
+# reconciled against the directories once per DISK_RESCAN_INTERVAL to pick
+# up files moved or deleted behind our back (review UI, manual cleanup).
 SCREENSHOTS_MAX_GB = float(os.environ.get('MINUS_SCREENSHOTS_MAX_GB', '10'))
 SCREENSHOTS_MIN_FREE_GB = float(os.environ.get('MINUS_SCREENSHOTS_MIN_FREE_GB', '4'))
-DISK_ENFORCE_INTERVAL = 300.0
+FREE_SPACE_CHECK_INTERVAL = 30.0
+DISK_RESCAN_INTERVAL = 3600.0
+
+# Encoding (env-overridable). PNG level 1 is ~3x faster than OpenCV's old
+# default of 3 for a few % more bytes; 'webp' is lossless WebP (smaller,
+# slower). Non-ad samples (periodic sampler + user-pause false positives)
+# are the bulk of the tree and can be stored as JPEG instead.
+SCREENSHOT_FORMAT = os.environ.get('MINUS_SCREENSHOT_FORMAT', 'png').lower()
+NON_AD_SCREENSHOT_FORMAT = os.environ.get(
+    'MINUS_NON_AD_SCREENSHOT_FORMAT', SCREENSHOT_FORMAT).lower()
+SCREENSHOT_PNG_LEVEL = int(os.environ.get('MINUS_SCREENSHOT_PNG_LEVEL', '1'))
+SCREENSHOT_JPEG_QUALITY = int(os.environ.get('MINUS_SCREENSHOT_JPEG_QUALITY', '92'))
+
+# Max pending writes. A 4K BGR frame is ~25MB, so keep this small; when
+# full, the OLDEST pending frame is dropped (newest evidence wins).
+SCREENSHOT_QUEUE_SIZE = int(os.environ.get('MINUS_SCREENSHOT_QUEUE_SIZE', '4'))
+
+# Every extension a saved screenshot can have (review UI lists all of them)
+SCREENSHOT_EXTENSIONS = ('.png', '.webp', '.jpg')
+
+_FORMAT_EXTENSIONS = {'png': '.png', 'webp': '.webp', 'jpg': '.jpg', 'jpeg': '.jpg'}
+
+
+def _encode_params(fmt: str) -> tuple:
+    """(extension, cv2.imencode params) for a configured format name."""
+    ext = _FORMAT_EXTENSIONS.get(fmt, '.png')
+    if ext == '.webp':
+        # Quality > 100 selects lossless WebP in OpenCV
+        return ext, [cv2.IMWRITE_WEBP_QUALITY, 101]
+    if ext == '.jpg':
+        return ext, [cv2.IMWRITE_JPEG_QUALITY, SCREENSHOT_JPEG_QUALITY]
+    return ext, [cv2.IMWRITE_PNG_COMPRESSION, SCREENSHOT_PNG_LEVEL]
+
+
+def compute_dhash(frame):
+    """Compute a perceptual difference hash (dHash) for near-duplicate detection.
+
+    Resizes to 9x8, compares adjacent pixels horizontally → 64-bit hash.
+    Similar images have low hamming distance even with minor variations
+    (compression artifacts, slight timing differences, UI changes).
+    """
+    try:
+        small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+        if len(small.shape) == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # Compare adjacent pixels: 1 if left > right, else 0
+        diff = small[:, 1:] > small[:, :-1]
+        # Pack into integer
+        return int(np.packbits(diff.flatten()).tobytes().hex(), 16)
+    except Exception:
+        return None
+
+
+def list_screenshot_files(directory: Path) -> list:
+    """All saved screenshot images in a directory (any supported format)."""
+    files = []
+    for ext in SCREENSHOT_EXTENSIONS:
+        files.extend(Path(directory).glob(f"*{ext}"))
+    return files
 
 
 class ScreenshotManager:
@@ -54,25 +135,49 @@ class ScreenshotManager:
     - non_ads/     User paused = false positives (for training non-ad detection)
     - vlm_spastic/ VLM uncertainty cases (for analyzing VLM behavior)
     - static/      Static screen suppression (still frames with ad text)
+
+    With async_writes=True (what Minus uses) the save_* methods only run
+    the cheap gates (rate limit, blank reject, dHash dedup) on the calling
+    thread and hand the frame to the background writer. Frames are not
+    copied, so callers must not mutate a frame after passing it in (every
+    capture returns a fresh array). With the default async_writes=False
+    the write happens inline, which keeps tools and tests deterministic.
     """
 
-    def __init__(self, base_dir: Path, max_screenshots: int = 0):
+    CATEGORIES = CATEGORIES
+
+    def __init__(self, base_dir: Path, max_screenshots: int = 0,
+                 async_writes: bool = False):
         """
         Initialize the screenshot manager.
 
         Args:
             base_dir: Base directory for all screenshots (e.g., screenshots/)
             max_screenshots: Maximum screenshots to keep per folder (0 = unlimited)
+            async_writes: Encode and write on a background thread
         """
         self.base_dir = Path(base_dir)
         self.max_screenshots = max_screenshots
-        self._last_budget_check = 0.0
+        self.async_writes = async_writes
 
         # Organized subdirectories
         self.ads_dir = self.base_dir / "ads"
         self.non_ads_dir = self.base_dir / "non_ads"
         self.vlm_spastic_dir = self.base_dir / "vlm_spastic"
         self.static_dir = self.base_dir / "static"
+        self._category_dirs = {
+            'ads': self.ads_dir,
+            'non_ads': self.non_ads_dir,
+            'vlm_spastic': self.vlm_spastic_dir,
+            'static': self.static_dir,
+        }
+
+        # Per-category encoding: (extension, cv2.imencode params)
+        self._encoding = {
+            category: _encode_params(
+                NON_AD_SCREENSHOT_FORMAT if category == 'non_ads' else SCREENSHOT_FORMAT)
+            for category in self.CATEGORIES
+        }
 
         # Counters (per type)
         self.ads_count = 0
@@ -99,42 +204,66 @@ class ScreenshotManager:
         }
         self._min_screenshot_interval = 5.0  # seconds between saves
 
+        # In-memory index of saved files for O(1) budget bookkeeping:
+        # category -> OrderedDict(path -> (mtime, size)), oldest first.
+        # Built lazily (first write) so construction never scans the tree.
+        self._index_lock = threading.Lock()
+        self._index = {category: OrderedDict() for category in self.CATEGORIES}
+        self._total_bytes = 0
+        self._index_built_at = 0.0
+        self._last_free_check = 0.0
+        self._disk_free = None
+
+        # Background writer (bounded, drop-oldest)
+        self._write_queue = deque()
+        self._write_cond = threading.Condition()
+        self._writer_thread = None
+        self._writer_stop = False
+        self._pending_writes = 0
+        self.writes_completed = 0
+        self.writes_dropped = 0
+        self.writes_failed = 0
+
         # Ensure directories exist
         self.ads_dir.mkdir(parents=True, exist_ok=True)
         self.non_ads_dir.mkdir(parents=True, exist_ok=True)
         self.vlm_spastic_dir.mkdir(parents=True, exist_ok=True)
         self.static_dir.mkdir(parents=True, exist_ok=True)
 
-    def compute_dhash(self, frame):
-        """Compute a perceptual difference hash (dHash) for near-duplicate detection.
-
-        Resizes to 9x8, compares adjacent pixels horizontally → 64-bit hash.
-        Similar images have low hamming distance even with minor variations
-        (compression artifacts, slight timing differences, UI changes).
-        """
+        # Catalog rows for the review UI (optional: saving never depends on it)
         try:
-            small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
-            if len(small.shape) == 3:
-                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
-            # Compare adjacent pixels: 1 if left > right, else 0
-            diff = small[:, 1:] > small[:, :-1]
-            # Pack into integer
-            return int(np.packbits(diff.flatten()).tobytes().hex(), 16)
-        except Exception:
-            return None
+            self.catalog = get_screenshot_catalog(self.base_dir)
+        except Exception as e:
+            logger.warning(f"[Screenshot] Catalog unavailable: {e}")
+            self.catalog = None
+
+    def compute_dhash(self, frame):
+        """Perceptual difference hash of a frame (see module-level compute_dhash)."""
+        return compute_dhash(frame)
 
     @staticmethod
     def _hamming_distance(h1, h2):
         """Count differing bits between two hashes."""
-        return bin(h1 ^ h2).count('1')
+        return hamming_distance(h1, h2)
 
     def _is_near_duplicate(self, frame_hash, category):
-        """Check if a frame hash is a near-duplicate of any recent hash in this category."""
+        """Check if a frame hash is a near-duplicate of anything saved in this category.
+
+        Recent hashes cover frames admitted but not yet written (async
+        writer); the catalog's Hamming index covers everything on disk,
+        including previous sessions.
+        """
         if frame_hash is None:
             return False
         for existing_hash in self._recent_hashes[category]:
             if self._hamming_distance(frame_hash, existing_hash) < DHASH_THRESHOLD:
                 return True
+        if self.catalog is not None:
+            try:
+                if self.catalog.find_near(category, frame_hash, DHASH_THRESHOLD - 1):
+                    return True
+            except Exception as e:
+                logger.debug(f"[Screenshot] Hash index lookup failed: {e}")
         return False
 
     def _record_hash(self, frame_hash, category):
@@ -171,80 +300,84 @@ class ScreenshotManager:
 
         Returns True if the frame should be saved.
 
-        Also piggybacks the (rate-limited) disk-budget enforcement so every
-        save path keeps the screenshots tree within its byte budget.
+        Runs on the caller's (detection) thread, so it only does in-memory
+        work; disk budget enforcement happens on the write path.
+        """
+        return self._admit(frame, category)[0]
+
+    def _admit(self, frame, category):
+        """_should_save() that also returns the frame's dHash for the catalog.
+
+        Returns:
+            (should_save, frame_hash)
         """
-        self._enforce_disk_budget()
         if frame is None:
             logger.warning(f"[Screenshot] Cannot save {category} screenshot: no frame")
-            return False
+            return False, None
 
         # Rate limiting
         now = time.time()
         elapsed = now - self._last_screenshot_time[category]
         if elapsed < self._min_screenshot_interval:
             logger.debug(f"[Screenshot] Rate limited {category} (only {elapsed:.1f}s since last)")
-            return False
+            return False, None
 
         # Reject blank/black frames
         if self._is_blank_frame(frame):
             logger.info(f"[Screenshot] Rejected blank/black frame for {category}")
-            return False
+            return False, None
 
         # Near-duplicate check
         frame_hash = self.compute_dhash(frame)
         if self._is_near_duplicate(frame_hash, category):
             logger.info(f"[Screenshot] Rejected near-duplicate for {category} (dHash match)")
-            return False
+            return False, frame_hash
 
         # All checks passed — record state
         self._last_screenshot_time[category] = now
         self._record_hash(frame_hash, category)
-        return True
+        return True, frame_hash
+
+    def _new_filepath(self, category: str, stem: str) -> Path:
+        """Destination path for a new screenshot in the category's format."""
+        ext, _ = self._encoding[category]
+        return self._category_dirs[category] / f"{stem}{ext}"
 
     def save_ad_screenshot(self, frame, matched_keywords, all_texts):
         """Save screenshot when ad detected (with dedup, rate limiting, blank rejection)."""
-        if not self._should_save(frame, 'ads'):
+        ok, frame_hash = self._admit(frame, 'ads')
+        if not ok:
             return
 
         self.ads_count += 1
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-        filename = f"ad_{timestamp}_{self.ads_count:04d}.png"
-        filepath = self.ads_dir / filename
-
-        cv2.imwrite(str(filepath), frame)
+        filepath = self._new_filepath('ads', f"ad_{timestamp}_{self.ads_count:04d}")
 
         keywords_str = ', '.join([f"'{kw}' in '{txt}'" for kw, txt in matched_keywords])
-        logger.info(f"  Screenshot saved: {filename}")
+        self._submit_write('ads', filepath, frame, f"  Screenshot saved: {filepath.name}",
+                           meta={'dhash': frame_hash, 'source': 'ocr',
+                                 'keywords': [kw for kw, _ in matched_keywords],
+                                 'ocr_texts': list(all_texts or [])})
         logger.info(f"  Keywords: {keywords_str}")
         logger.info(f"  All texts: {all_texts}")
 
-        if self.max_screenshots > 0:
-            self._truncate_dir(self.ads_dir)
-
-    def save_non_ad_screenshot(self, frame):
+    def save_non_ad_screenshot(self, frame, source: str = 'user'):
         """
         Save screenshot for VLM training (content that should NOT be classified as ads).
 
-        Called when user pauses blocking, indicating a false positive.
+        Called when user pauses blocking, indicating a false positive
+        (source='user'), and by the periodic sampler (source='sampler').
         """
-        if not self._should_save(frame, 'non_ads'):
+        ok, frame_hash = self._admit(frame, 'non_ads')
+        if not ok:
             return
 
-        try:
-            self.non_ads_count += 1
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"non_ad_{timestamp}_{self.non_ads_count:04d}.png"
-            filepath = self.non_ads_dir / filename
-
-            cv2.imwrite(str(filepath), frame)
-            logger.info(f"[Screenshot] Non-ad screenshot saved: non_ads/{filename}")
-
-            if self.max_screenshots > 0:
-                self._truncate_dir(self.non_ads_dir)
-
-        except Exception as e:
-            logger.error(f"[Screenshot] Failed to save non-ad screenshot: {e}")
+        self.non_ads_count += 1
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        filepath = self._new_filepath('non_ads', f"non_ad_{timestamp}_{self.non_ads_count:04d}")
+        self._submit_write('non_ads', filepath, frame,
+                           f"[Screenshot] Non-ad screenshot saved: non_ads/{filepath.name}",
+                           meta={'dhash': frame_hash, 'source': source})
 
     def save_static_ad_screenshot(self, frame):
         """
@@ -253,23 +386,16 @@ class ScreenshotManager:
         These screenshots represent still/static ads that should NOT trigger blocking
         (e.g., paused video with ad overlay, YouTube landing page with sponsored content).
         """
-        if not self._should_save(frame, 'static'):
+        ok, frame_hash = self._admit(frame, 'static')
+        if not ok:
             return
 
-        try:
-            self.static_count += 1
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"static_{timestamp}_{self.static_count:04d}.png"
-            filepath = self.static_dir / filename
-
-            cv2.imwrite(str(filepath), frame)
-            logger.info(f"[Screenshot] Saved static screenshot: static/{filename}")
-
-            if self.max_screenshots > 0:
-                self._truncate_dir(self.static_dir)
-
-        except Exception as e:
-            logger.error(f"[Screenshot] Failed to save static screenshot: {e}")
+        self.static_count += 1
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        filepath = self._new_filepath('static', f"static_{timestamp}_{self.static_count:04d}")
+        self._submit_write('static', filepath, frame,
+                           f"[Screenshot] Saved static screenshot: static/{filepath.name}",
+                           meta={'dhash': frame_hash, 'source': 'static'})
 
     def save_vlm_spastic_screenshot(self, frame, consecutive_count):
         """
@@ -277,92 +403,282 @@ class ScreenshotManager:
 
         This captures potential false positive cases where VLM was uncertain.
         """
-        if not self._should_save(frame, 'vlm_spastic'):
+        ok, frame_hash = self._admit(frame, 'vlm_spastic')
+        if not ok:
+            return
+
+        self.vlm_spastic_count += 1
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        filepath = self._new_filepath(
+            'vlm_spastic',
+            f"vlm_spastic_{consecutive_count}x_{timestamp}_{self.vlm_spastic_count:04d}")
+        self._submit_write(
+            'vlm_spastic', filepath, frame,
+            f"[Screenshot] Saved spastic screenshot ({consecutive_count}x ad then no-ad): "
+            f"vlm_spastic/{filepath.name}",
+            meta={'dhash': frame_hash, 'source': 'vlm'})
+
+    # =========================================================================
+    # Background writer
+    # =========================================================================
+
+    def _submit_write(self, category: str, filepath: Path, frame, log_message: str,
+                      meta: dict = None):
+        """Queue a frame for encoding + writing (or write inline when sync).
+
+        `meta` holds the catalog fields (dhash, source, keywords, ocr_texts).
+        """
+        job = (category, filepath, frame, log_message, meta or {})
+        if not self.async_writes:
+            self._write_job(job)
             return
 
+        with self._write_cond:
+            if self._writer_thread is None or not self._writer_thread.is_alive():
+                self._writer_stop = False
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, daemon=True, name='ScreenshotWriter')
+                self._writer_thread.start()
+            if len(self._write_queue) >= SCREENSHOT_QUEUE_SIZE:
+                dropped = self._write_queue.popleft()
+                self._pending_writes -= 1
+                self.writes_dropped += 1
+                logger.warning(f"[Screenshot] Write queue full - dropped pending {dropped[1].name}")
+            self._write_queue.append(job)
+            self._pending_writes += 1
+            self._write_cond.notify()
+
+    def _writer_loop(self):
+        """Drain the write queue until stop() is called."""
+        apply_placement('screenshots')  # Little cores, SCHED_IDLE
+        while True:
+            with self._write_cond:
+                while not self._write_queue and not self._writer_stop:
+                    self._write_cond.wait()
+                if not self._write_queue:
+                    return  # Stopped and drained
+                job = self._write_queue.popleft()
+            try:
+                self._write_job(job)
+            finally:
+                with self._write_cond:
+                    self._pending_writes -= 1
+                    self._write_cond.notify_all()
+
+    def _write_job(self, job):
+        """Encode, write atomically (temp file + rename), then do budget bookkeeping."""
+        category, filepath, frame, log_message, meta = job
+        _, params = self._encoding[category]
+        tmp_path = filepath.with_name(f".{filepath.name}.part")
         try:
-            self.vlm_spastic_count += 1
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"vlm_spastic_{consecutive_count}x_{timestamp}_{self.vlm_spastic_count:04d}.png"
-            filepath = self.vlm_spastic_dir / filename
+            ok, buf = cv2.imencode(filepath.suffix, frame, params)
+            if not ok:
+                raise ValueError(f"encode to {filepath.suffix} failed")
+            with open(tmp_path, 'wb') as f:
+                f.write(buf.tobytes())
+            os.replace(tmp_path, filepath)
+        except Exception as e:
+            self.writes_failed += 1
+            logger.error(f"[Screenshot] Failed to save {category} screenshot: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
 
-            cv2.imwrite(str(filepath), frame)
-            logger.info(f"[Screenshot] Saved spastic screenshot ({consecutive_count}x ad then no-ad): vlm_spastic/{filename}")
+        self.writes_completed += 1
+        self._index_add(category, filepath, len(buf))
+        self._catalog_call('add', category, filepath.name, time.time(), len(buf), **meta)
+        logger.info(log_message)
 
-            if self.max_screenshots > 0:
-                self._truncate_dir(self.vlm_spastic_dir)
+        if self.max_screenshots > 0:
+            self._truncate_dir(self._category_dirs[category])
+        self._enforce_disk_budget()
 
-        except Exception as e:
-            logger.error(f"[Screenshot] Failed to save spastic screenshot: {e}")
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until all queued writes are on disk. Returns False on timeout."""
+        deadline = time.time() + timeout
+        with self._write_cond:
+            while self._pending_writes > 0:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._write_cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Finish pending writes and stop the writer thread."""
+        with self._write_cond:
+            self._writer_stop = True
+            self._write_cond.notify_all()
+            thread = self._writer_thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        self._writer_thread = None
+
+    def get_writer_stats(self) -> dict:
+        """Writer queue + disk budget counters (for status/metrics)."""
+        with self._index_lock:
+            files = sum(len(entries) for entries in self._index.values())
+            total_bytes = self._total_bytes
+        return {
+            'queued': len(self._write_queue),
+            'written': self.writes_completed,
+            'dropped': self.writes_dropped,
+            'failed': self.writes_failed,
+            'files': files,
+            'total_bytes': total_bytes,
+        }
+
+    # =========================================================================
+    # Disk budget (in-memory index)
+    # =========================================================================
+
+    def _rebuild_index(self):
+        """Rescan the category directories into the in-memory index.
+
+        Runs once before the first enforcement and then every
+        DISK_RESCAN_INTERVAL to reconcile external moves/deletes.
+        """
+        index = {}
+        total = 0
+        for category, directory in self._category_dirs.items():
+            entries = []
+            for p in list_screenshot_files(directory):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+            entries.sort(key=lambda e: e[0])
+            index[category] = OrderedDict((p, (mtime, size)) for mtime, size, p in entries)
+        with self._index_lock:
+            self._index = index
+            self._total_bytes = total
+            self._index_built_at = time.time()
+
+        # The catalog reconciles against the same scan (files moved or
+        # deleted behind our back; first-run import of the existing tree)
+        if self.catalog is not None:
+            try:
+                self.catalog.ensure_backfilled()
+                for category, entries in index.items():
+                    self.catalog.sync_category(
+                        category, {p.name: v for p, v in entries.items()})
+            except Exception as e:
+                logger.warning(f"[Screenshot] Catalog sync failed: {e}")
+
+    def _ensure_index(self):
+        if time.time() - self._index_built_at >= DISK_RESCAN_INTERVAL:
+            self._rebuild_index()
+
+    def _index_add(self, category: str, path: Path, size: int):
+        self._ensure_index()
+        with self._index_lock:
+            entries = self._index[category]
+            old = entries.pop(path, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            entries[path] = (time.time(), size)
+            self._total_bytes += size
+
+    def _evict_oldest(self, category: str = None):
+        """Delete the oldest indexed file (in one category, or across all).
+
+        Returns the bytes freed (0 if the file was already gone), or None
+        when there is nothing left to evict.
+        """
+        with self._index_lock:
+            if category is None:
+                heads = [(next(iter(entries.values()))[0], cat)
+                         for cat, entries in self._index.items() if entries]
+                if not heads:
+                    return None
+                category = min(heads)[1]
+            entries = self._index[category]
+            if not entries:
+                return None
+            path, (_mtime, size) = entries.popitem(last=False)
+            self._total_bytes -= size
+        self._catalog_call('remove', category, path.name)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return 0  # Moved/deleted externally; index is now honest again
+        except OSError as e:
+            logger.debug(f"[Screenshot] Evict failed for {path}: {e}")
+            return 0
+        return size
+
+    def _get_disk_free(self) -> int:
+        """Root free bytes, refreshed at most every FREE_SPACE_CHECK_INTERVAL."""
+        now = time.time()
+        if self._disk_free is None or now - self._last_free_check >= FREE_SPACE_CHECK_INTERVAL:
+            self._disk_free = shutil.disk_usage(self.base_dir).free
+            self._last_free_check = now
+        return self._disk_free
 
     def _enforce_disk_budget(self):
         """Evict oldest screenshots across all categories when the tree
         exceeds its byte budget or root free space runs low.
 
         Preserves the unlimited-count training-data intent while making
-        disk exhaustion impossible. Rate-limited internally.
+        disk exhaustion impossible. Called after every write; the common
+        case is two integer comparisons against the running totals.
         """
-        now = time.time()
-        if now - self._last_budget_check < DISK_ENFORCE_INTERVAL:
-            return
-        self._last_budget_check = now
         try:
-            files = []
-            total = 0
-            for d in (self.ads_dir, self.non_ads_dir, self.static_dir, self.vlm_spastic_dir):
-                for p in d.glob("*.png"):
-                    try:
-                        st = p.stat()
-                    except OSError:
-                        continue
-                    files.append((st.st_mtime, st.st_size, p))
-                    total += st.st_size
-
-            free = shutil.disk_usage(self.base_dir).free
+            self._ensure_index()
             max_bytes = int(SCREENSHOTS_MAX_GB * 1024 ** 3)
             min_free = int(SCREENSHOTS_MIN_FREE_GB * 1024 ** 3)
-            if total <= max_bytes and free >= min_free:
+            free = self._get_disk_free()
+            if self._total_bytes <= max_bytes and free >= min_free:
                 return
 
             # Hysteresis: evict to 10% under budget / 0.5GB over min-free so
-            # we don't re-trigger on every check.
+            # we don't re-trigger on every write.
             target_total = int(max_bytes * 0.9)
             target_free = min_free + (512 * 1024 ** 2)
 
-            files.sort()  # oldest first
             removed = 0
             freed = 0
-            for _mtime, size, p in files:
-                if total <= target_total and free >= target_free:
+            while self._total_bytes > target_total or free < target_free:
+                size = self._evict_oldest()
+                if size is None:
                     break
-                try:
-                    p.unlink()
-                except OSError:
-                    continue
-                total -= size
                 free += size
                 freed += size
                 removed += 1
+            self._disk_free = free
 
             if removed:
                 logger.warning(
                     f"[Screenshot] Disk budget enforced: evicted {removed} oldest "
                     f"screenshots ({freed / 1024 ** 3:.2f}GB); tree now "
-                    f"{total / 1024 ** 3:.2f}GB, disk free {free / 1024 ** 3:.2f}GB")
+                    f"{self._total_bytes / 1024 ** 3:.2f}GB, disk free {free / 1024 ** 3:.2f}GB")
         except Exception as e:
             logger.warning(f"[Screenshot] Disk budget check failed: {e}")
 
     def _truncate_dir(self, directory: Path):
         """Remove oldest screenshots in a directory if we exceed the max limit."""
         try:
-            screenshots = sorted(directory.glob("*.png"), key=lambda p: p.stat().st_mtime)
-            excess = len(screenshots) - self.max_screenshots
-            if excess > 0:
-                for old_file in screenshots[:excess]:
-                    old_file.unlink()
+            category = next(cat for cat, d in self._category_dirs.items() if d == directory)
+            self._ensure_index()
+            while len(self._index[category]) > self.max_screenshots:
+                if self._evict_oldest(category) is None:
+                    break
         except Exception as e:
             logger.warning(f"[Screenshot] Failed to truncate {directory}: {e}")
 
+    def _catalog_call(self, method: str, *args, **kwargs):
+        """Best-effort catalog update (a catalog error never fails a save)."""
+        if self.catalog is None:
+            return
+        try:
+            getattr(self.catalog, method)(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"[Screenshot] Catalog {method} failed: {e}")
+
     # Legacy property for backward compatibility
     @property
     def screenshot_dir(self):
@@ -373,3 +689,59 @@ class ScreenshotManager:
     def non_ad_dir(self):
         """Backward compatibility: returns non_ads directory."""
         return self.non_ads_dir
+
+
+def dedup_screenshot_tree(base_dir: Path, max_distance: int = DHASH_THRESHOLD - 1,
+                          apply: bool = False) -> dict:
+    """Offline near-duplicate pass over an existing screenshots tree.
+
+    Hashes any cataloged file without a stored dHash (trees saved before
+    the catalog existed), then walks each category oldest-first keeping
+    the first screenshot of every near-duplicate cluster. With apply=True
+    the later duplicates are deleted and dropped from the catalog;
+    otherwise this only reports what would go.
+
+    Returns:
+        dict with hashed / unreadable / duplicates / removed / bytes and a
+        per-category 'duplicate_files' list
+    """
+    base_dir = Path(base_dir)
+    catalog = get_screenshot_catalog(base_dir)
+    catalog.ensure_backfilled()
+    stats = {'hashed': 0, 'unreadable': 0, 'duplicates': 0, 'removed': 0,
+             'bytes': 0, 'duplicate_files': {}}
+    for category in CATEGORIES:
+        kept = HammingIndex()
+        duplicates = []
+        for row in catalog.rows(category):
+            path = base_dir / category / row['name']
+            dhash = row['dhash']
+            if dhash is None:
+                frame = cv2.imread(str(path))
+                dhash = compute_dhash(frame) if frame is not None else None
+                if dhash is None:
+                    stats['unreadable'] += 1
+                    continue
+                catalog.set_dhash(category, row['name'], dhash)
+                stats['hashed'] += 1
+            if kept.nearest_within(dhash, max_distance) is None:
+                kept.add(row['name'], dhash)
+                continue
+            duplicates.append(row['name'])
+            stats['duplicates'] += 1
+            stats['bytes'] += row['size']
+            if apply:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"[Screenshot] Dedup could not remove {path}: {e}")
+                    continue
+                catalog.remove(category, row['name'])
+                stats['removed'] += 1
+        stats['duplicate_files'][category] = duplicates
+    logger.info(f"[Screenshot] Dedup pass: {stats['duplicates']} duplicates "
+                f"({stats['bytes'] / 1024 ** 2:.1f}MB), {stats['removed']} removed, "
+                f"{stats['hashed']} newly hashed")
+    return stats
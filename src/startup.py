@@ -0,0 +1,295 @@
+"""
+Dependency-ordered startup with readiness tracking and a boot timeline.
+
+Minus.__init__ and run() used to bring subsystems up one after another:
+the OCR worker loaded and warmed up inside __init__ before the web UI
+existed, the VLM preload was joined before the VLM loop started, ASR
+loaded its model inside start_display_pipeline, and the OCR/VLM loops
+slept a fixed 2s/3s before their first frame. Nothing recorded where the
+boot time went.
+
+StartupGraph runs boot as named phases:
+
+- start(name, func, after=...) runs func in its own thread once every
+  phase in `after` has finished, so independent phases (OCR, VLM and ASR
+  model loads in their worker processes, the Wi-Fi manager) overlap with
+  ustreamer and display bring-up.
+- phase(name, after=...) records a block that runs inline (the display
+  path stays on the main thread).
+- wait(name) is the readiness gate: loops block on their model phase
+  instead of sleeping. skip(name) releases waiters for phases that won't
+  run (--no-ocr, ASR disabled). A start() phase whose dependency failed
+  or was skipped is skipped as well, and so on down the graph: the VLM
+  load doesn't start without an HDMI signal, autonomous mode doesn't
+  start without the VLM.
+- mark(milestone, after=...) records one-off moments. FIRST_PROTECTED_FRAME
+  is the first OCR pass over live video, i.e. the point from which ads
+  get blocked.
+
+timeline() is what /api/boot returns: every phase's start, end, duration
+and outcome in seconds since the process started, the milestones, and
+the critical path (following, from the target back, whichever dependency
+finished last). Durations and milestones also go to the metrics
+registry.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from metrics import gauge
+
+logger = logging.getLogger(__name__)
+
+# Ads are blocked from here on: display live and OCR has seen a frame
+FIRST_PROTECTED_FRAME = 'first_protected_frame'
+
+PHASE_SECONDS = gauge('minus_boot_phase_seconds', 'Duration of a startup phase', ['phase'])
+MILESTONE_SECONDS = gauge('minus_boot_milestone_seconds',
+                          'Seconds from process start to a boot milestone', ['milestone'])
+
+
+def process_age() -> float:
+    """Seconds since this process started (0.0 if /proc can't tell)."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 (starttime, clock ticks since boot), after the ')' of comm
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class _Phase:
+    __slots__ = ('name', 'after', 'start', 'end', 'ok', 'error', 'skipped', 'done')
+
+    def __init__(self, name: str, after: Iterable[str] = ()):
+        self.name = name
+        self.after = tuple(after)
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.skipped = False
+        self.done = threading.Event()
+
+
+class StartupGraph:
+    """Named boot phases, their dependencies, readiness events and timings.
+
+    Times are seconds since the process started, so the interpreter and
+    import time before the graph existed are included.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 started_ago: Optional[float] = None):
+        self._clock = clock
+        self._origin = clock() - (process_age() if started_ago is None else started_ago)
+        self._lock = threading.Lock()
+        self._phases: Dict[str, _Phase] = {}
+        self._order: List[str] = []
+        self._milestones: Dict[str, dict] = {}
+
+    def now(self) -> float:
+        """Seconds since the process started."""
+        return self._clock() - self._origin
+
+    def _get(self, name: str, after: Iterable[str] = ()) -> _Phase:
+        with self._lock:
+            phase = self._phases.get(name)
+            if phase is None:
+                phase = self._phases[name] = _Phase(name, after)
+            elif after:
+                phase.after = tuple(after)
+            return phase
+
+    def _begin(self, name: str, after: Iterable[str]) -> _Phase:
+        phase = self._get(name, after)
+        for dep in phase.after:
+            self._get(dep).done.wait()
+        with self._lock:
+            if name not in self._order:
+                self._order.append(name)
+        phase.start = self.now()
+        return phase
+
+    def _unmet(self, phase: _Phase) -> Optional[str]:
+        """Why `phase` can't run: its first dependency that failed or was skipped."""
+        for name in phase.after:
+            dep = self._get(name)
+            if not dep.ok:
+                return f"{name} {'skipped' if dep.skipped else 'failed'}"
+        return None
+
+    def _finish(self, phase: _Phase, ok: bool, error: Optional[str] = None):
+        phase.end = self.now()
+        phase.ok = ok
+        phase.error = error
+        PHASE_SECONDS.labels(phase=phase.name).set(round(phase.end - phase.start, 3))
+        logger.info(f"[Boot] {phase.name} {'ready' if ok else 'failed'} "
+                    f"in {phase.end - phase.start:.2f}s (t={phase.end:.2f}s)")
+        phase.done.set()
+
+    # ----- running phases -----
+
+    def start(self, name: str, func: Callable[[], object],
+              after: Iterable[str] = ()) -> threading.Thread:
+        """Run func in a thread once `after` are done. A False return or an
+        exception marks the phase failed; waiters are released either way.
+        If a dependency failed or was skipped, func doesn't run and the
+        phase is skipped."""
+        self._get(name, after)
+
+        def run():
+            phase = self._begin(name, after)
+            unmet = self._unmet(phase)
+            if unmet:
+                logger.info(f"[Boot] {name} skipped: {unmet}")
+                self.skip(name, unmet)
+                return
+            try:
+                result = func()
+            except Exception as e:
+                logger.exception(f"[Boot] {name} raised: {e}")
+                self._finish(phase, False, str(e))
+                return
+            self._finish(phase, result is not False)
+
+        thread = threading.Thread(target=run, daemon=True, name=f'Boot-{name}')
+        thread.start()
+        return thread
+
+    @contextmanager
+    def phase(self, name: str, after: Iterable[str] = ()):
+        """Record the enclosed block as phase `name`.
+
+        An exception fails it, as does setting `.ok = False` on the
+        yielded phase. The block runs even if a dependency failed: the
+        caller owns that control flow.
+        """
+        phase = self._begin(name, after)
+        try:
+            yield phase
+        except BaseException as e:
+            self._finish(phase, False, str(e) or type(e).__name__)
+            raise
+        self._finish(phase, phase.ok is not False)
+
+    def record(self, name: str, start: float, after: Iterable[str] = (), ok: bool = True):
+        """Record an already-finished block that began at `start` (see now())."""
+        phase = self._begin(name, after)
+        phase.start = start
+        self._finish(phase, ok)
+
+    def skip(self, name: str, reason: str = ''):
+        """Mark `name` as not running and release its waiters."""
+        phase = self._get(name)
+        with self._lock:
+            if name not in self._order:
+                self._order.append(name)
+        phase.start = phase.end = self.now()
+        phase.ok = False
+        phase.skipped = True
+        phase.error = reason or None
+        phase.done.set()
+
+    # ----- readiness -----
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until `name` has finished; True if it succeeded.
+
+        False on failure, skip, or timeout (see is_done()).
+        """
+        phase = self._get(name)
+        return phase.done.wait(timeout) and bool(phase.ok)
+
+    def is_done(self, name: str) -> bool:
+        return self._get(name).done.is_set()
+
+    def mark(self, milestone: str, after: Iterable[str] = ()) -> bool:
+        """Record the first occurrence of `milestone`; False if already marked."""
+        with self._lock:
+            if milestone in self._milestones:
+                return False
+            at = self.now()
+            self._milestones[milestone] = {'t': round(at, 3), 'after': list(after)}
+        MILESTONE_SECONDS.labels(milestone=milestone).set(round(at, 3))
+        logger.info(f"[Boot] {milestone} at t={at:.2f}s")
+        return True
+
+    # ----- reporting -----
+
+    def critical_path(self, target: Optional[str] = None) -> List[str]:
+        """Phases leading to `target`, each the latest-finishing dependency
+        of the next. Defaults to FIRST_PROTECTED_FRAME once marked, else the
+        phase that finished last."""
+        with self._lock:
+            phases = {name: p for name, p in self._phases.items() if p.end is not None}
+            milestones = dict(self._milestones)
+        if target is None:
+            if FIRST_PROTECTED_FRAME in milestones:
+                target = FIRST_PROTECTED_FRAME
+            elif phases:
+                target = max(phases, key=lambda name: phases[name].end)
+            else:
+                return []
+        if target in milestones:
+            deps = milestones[target]['after']
+            path = [target]
+        elif target in phases:
+            deps = phases[target].after
+            path = [target]
+        else:
+            return []
+        seen = set(path)
+        while True:
+            finished = [d for d in deps if d in phases and d not in seen]
+            if not finished:
+                break
+            last = max(finished, key=lambda name: phases[name].end)
+            path.append(last)
+            seen.add(last)
+            deps = phases[last].after
+        return list(reversed(path))
+
+    def timeline(self) -> dict:
+        """Phases, milestones and critical path for /api/boot."""
+        with self._lock:
+            phases = dict(self._phases)
+            order = list(self._order) + [name for name in phases if name not in self._order]
+            milestones = {k: dict(v) for k, v in self._milestones.items()}
+        rows = []
+        for name in order:
+            phase = phases[name]
+            rows.append({
+                'name': name,
+                'after': list(phase.after),
+                'start_s': round(phase.start, 3) if phase.start is not None else None,
+                'end_s': round(phase.end, 3) if phase.end is not None else None,
+                'duration_s': round(phase.end - phase.start, 3)
+                if phase.end is not None and phase.start is not None else None,
+                'state': ('skipped' if phase.skipped else 'waiting' if phase.start is None
+                          else 'running' if phase.end is None
+                          else 'ready' if phase.ok else 'failed'),
+                'error': phase.error,
+            })
+        path = self.critical_path()
+        target = path[-1] if path else None
+        end = None
+        if target in milestones:
+            end = milestones[target]['t']
+        elif target in phases and phases[target].end is not None:
+            end = round(phases[target].end, 3)
+        return {
+            'uptime_s': round(self.now(), 3),
+            'phases': rows,
+            'milestones': milestones,
+            'critical_path': path,
+            'critical_path_s': end,
+            'time_to_protected_s': milestones.get(FIRST_PROTECTED_FRAME, {}).get('t'),
+        }
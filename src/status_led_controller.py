@@ -44,6 +44,8 @@ import threading
 import time
 from pathlib import Path
 
+from placement import apply_placement
+
 logger = logging.getLogger(__name__)
 
 # Tick interval. Renderers self-pace through `_to_ticks(seconds)` below
@@ -328,6 +330,7 @@ class StatusLEDController:
     # ----------------------------------------------------------------- internal
 
     def _run(self):
+        apply_placement('status_leds')
         # Local copy so the lock isn't grabbed every tick; state changes are
         # picked up via the next-iteration re-read.
         while not self._stop_event.is_set():
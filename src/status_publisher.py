@@ -0,0 +1,248 @@
+"""
+Versioned status snapshot with push deltas for the web UI.
+
+Every open web UI tab used to poll /api/status (1s), /api/stats,
+/api/audio/status (2s) and /api/vlm/status (3s), and every poll rebuilt
+the answer from scratch: health monitor status, a ustreamer HTTP round
+trip for capture FPS, sysfs temperature reads, much of it contending on
+Minus._state_lock with the detection threads. Cost scaled with the number
+of phones/laptops watching.
+
+StatusPublisher builds each topic once per interval on its own thread,
+keeps the latest value of every topic in one versioned snapshot, and
+records a delta (changed / removed top-level keys) whenever a rebuild
+differs from the previous value:
+
+- REST endpoints return the cached topic: O(1) per request
+- /api/events streams the snapshot, then deltas, over Server-Sent Events
+- poke() makes the next rebuild happen immediately (state changes such
+  as blocking start/stop), so pushes are not held back by the tick
+- refresh() rebuilds inline, for request handlers that change state and
+  whose caller reads /api/status straight after
+
+The refresh thread only works while someone is watching (a stream is
+open or a REST read happened within IDLE_AFTER_S); an idle device does no
+status work at all. Before start() (tools, tests) get() builds inline.
+
+A failing builder is logged at warning once per run of failures (and
+again when it recovers); meanwhile the last good value is served. A
+topic that has never built raises its builder's error from get(), so
+the REST handler answers 500 instead of null.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stop refreshing this long after the last reader went away
+IDLE_AFTER_S = 10.0
+
+# Deltas kept for catching up slow stream readers (older -> full resync)
+DELTA_LOG_SIZE = 256
+
+
+class _Topic:
+    __slots__ = ('name', 'builder', 'interval', 'value', 'built_at', 'lock',
+                 'error', 'failures')
+
+    def __init__(self, name: str, builder: Callable[[], dict], interval: float):
+        self.name = name
+        self.builder = builder
+        self.interval = interval
+        self.value = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()  # single-flight rebuilds
+        self.error: Optional[Exception] = None  # Last build's exception, if it failed
+        self.failures = 0  # Consecutive failed builds
+
+
+class StatusPublisher:
+    """Caches status topics, versions them, and fans out deltas."""
+
+    def __init__(self):
+        self._topics: Dict[str, _Topic] = {}
+        self._cond = threading.Condition()
+        self._version = 0
+        self._deltas = deque(maxlen=DELTA_LOG_SIZE)
+        self._subscribers = 0
+        self._last_demand = 0.0
+        self._poked = set()
+        self._running = False
+        self._thread = None
+        self.builds = 0
+        self.build_errors = 0
+
+    def add_topic(self, name: str, builder: Callable[[], dict], interval: float):
+        """Register a topic rebuilt by `builder()` at most every `interval` s."""
+        self._topics[name] = _Topic(name, builder, interval)
+
+    # ----- lifecycle -----
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name='StatusPublisher')
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def poke(self, topic: Optional[str] = None):
+        """Rebuild `topic` (or every topic) on the next loop iteration."""
+        with self._cond:
+            self._poked.update([topic] if topic else self._topics)
+            self._cond.notify_all()
+
+    def refresh(self, topic: Optional[str] = None):
+        """Rebuild `topic` (or every topic) now, in the calling thread."""
+        if not self._running:
+            return  # get() builds inline anyway
+        for name in ([topic] if topic else list(self._topics)):
+            self._refresh(self._topics[name])
+
+    # ----- reads -----
+
+    def get(self, name: str) -> dict:
+        """Latest value of a topic (builds it if never built / not started).
+
+        Raises the builder's exception if the topic has no value yet.
+        """
+        topic = self._topics[name]
+        if not self._running:
+            return topic.builder()
+        self._last_demand = time.time()
+        if topic.value is None or time.time() - topic.built_at > topic.interval * 3:
+            # Idle publisher just woke up (or the builder is wedged): serve
+            # something fresh rather than a stale value
+            self._refresh(topic)
+        if topic.value is None and topic.error is not None:
+            raise topic.error
+        return topic.value
+
+    def snapshot(self) -> Tuple[int, dict]:
+        """(version, {topic: value}) for every topic built so far."""
+        with self._cond:
+            return self._version, {
+                name: t.value for name, t in self._topics.items() if t.value is not None}
+
+    def wait_for_deltas(self, after_version: int, timeout: float) -> Optional[List[dict]]:
+        """Deltas newer than `after_version`, blocking up to `timeout`.
+
+        Returns [] on timeout, or None if the reader fell behind the delta
+        log and must resync from snapshot().
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._version <= after_version and self._running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            if self._version <= after_version:
+                return []
+            if not self._deltas or self._deltas[0]['version'] > after_version + 1:
+                return None
+            return [d for d in self._deltas if d['version'] > after_version]
+
+    def subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            self._cond.notify_all()
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                'version': self._version,
+                'subscribers': self._subscribers,
+                'topics': sorted(self._topics),
+                'builds': self.builds,
+                'build_errors': self.build_errors,
+            }
+
+    # ----- refresh -----
+
+    def _active(self) -> bool:
+        return self._subscribers > 0 or time.time() - self._last_demand < IDLE_AFTER_S
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.time()
+                if self._active():
+                    due = [t for t in self._topics.values()
+                           if t.name in self._poked or now - t.built_at >= t.interval]
+                    self._poked.clear()
+                else:
+                    due = []
+            for topic in due:
+                self._refresh(topic)
+            with self._cond:
+                if not self._running:
+                    return
+                if self._poked:
+                    continue
+                if self._active() and self._topics:
+                    now = time.time()
+                    wait = min(max(0.0, t.built_at + t.interval - now)
+                               for t in self._topics.values())
+                else:
+                    wait = 1.0
+                self._cond.wait(max(0.05, wait))
+
+    def _refresh(self, topic: _Topic):
+        """Rebuild one topic and publish a delta if it changed."""
+        with topic.lock:
+            try:
+                value = topic.builder()
+            except Exception as e:
+                self.build_errors += 1
+                topic.error = e
+                topic.failures += 1
+                if topic.failures == 1:
+                    stale = ' (serving the last good value)' if topic.value is not None else ''
+                    logger.warning(f"[StatusPublisher] {topic.name} build failed{stale}: {e}")
+                topic.built_at = time.time()
+                return
+            if topic.failures:
+                logger.info(f"[StatusPublisher] {topic.name} recovered after "
+                            f"{topic.failures} failed builds")
+            topic.error = None
+            topic.failures = 0
+            self.builds += 1
+            old = topic.value or {}
+            changes = {k: v for k, v in value.items() if k not in old or old[k] != v}
+            removed = [k for k in old if k not in value]
+            with self._cond:
+                topic.value = value
+                topic.built_at = time.time()
+                if changes or removed or not old:
+                    self._version += 1
+                    self._deltas.append({
+                        'version': self._version,
+                        'topic': topic.name,
+                        'changes': changes,
+                        'removed': removed,
+                    })
+                    self._cond.notify_all()
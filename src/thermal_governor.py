@@ -0,0 +1,379 @@
+"""
+Thermal- and degradation-aware inference governor.
+
+SoC and Axera temperatures were only displayed (status badge,
+/api/metrics), and the only reaction to a slowing worker was
+VLMProcess._maybe_auto_recover restarting the VLM once P95 had already
+passed 2s. Over a long session the box heats up, the RK3588 throttles
+near 85°C, and OCR/VLM latency climbs until something gives.
+
+The governor backs off before that point and restores as things cool:
+
+- Every SAMPLE_INTERVAL_S it samples the thermal zones (SoC/CPU/GPU and
+  the RK3588 NPU), the Axera card (one `axcl-smi info --temp`), and the per-worker
+  latencies the OCR, VLM and ASR loops report via record_latency().
+- Each signal becomes a pressure in 0..1. Temperatures ramp from a soft
+  limit to the trip point, using the temperature projected LOOKAHEAD_S
+  ahead from its recent slope, so a fast climb backs off before the
+  zone gets hot. Latencies ramp on the ratio of the recent median to
+  the worker's best median this session, which is how the Axera
+  degradation shows up (docs/VLM_NPU_DEGRADATION.md).
+- The highest pressure picks a TIERS entry. Rising takes effect at
+  once. Falling needs the pressure to stay HYSTERESIS below the entry
+  point for COOLDOWN_S, and steps down one level at a time, so the
+  policy doesn't flap around a threshold.
+- A tier sets the pause after each OCR and VLM cycle, the ASR interval
+  scale, and the capture decode scale (JPEG DCT-scaled decode, which
+  costs far less CPU on a 4K snapshot).
+
+step() is the pure policy: it takes one sample and a timestamp, so
+tests drive it with synthetic sensor traces. Every level change is
+kept in decisions(), logged, counted in minus_thermal_decisions_total,
+and the current state is in status() for /api/status.
+"""
+
+import glob
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+# How often the sampler thread reads sensors and re-evaluates
+SAMPLE_INTERVAL_S = float(os.environ.get('MINUS_THERMAL_INTERVAL', '5.0'))
+
+# (soft limit, trip) per sensor in °C: pressure ramps 0 -> 1 between them.
+# The RK3588 throttles at ~85°C; the Axera card runs hotter by design.
+SENSOR_LIMITS = {
+    'soc': (float(os.environ.get('MINUS_THERMAL_SOFT_C', '70')),
+            float(os.environ.get('MINUS_THERMAL_TRIP_C', '85'))),
+    'npu': (float(os.environ.get('MINUS_THERMAL_SOFT_C', '70')),
+            float(os.environ.get('MINUS_THERMAL_TRIP_C', '85'))),
+    'axera': (75.0, 90.0),
+}
+
+# Temperatures are judged at where they'll be this far ahead
+LOOKAHEAD_S = 120.0
+# Samples used for the temperature slope; the slope is ignored until
+# they span TREND_MIN_SPAN_S, so two noisy readings can't project a spike
+TREND_WINDOW_S = 300.0
+TREND_MIN_SPAN_S = 60.0
+
+# Latency pressure ramps 0 -> 1 as recent median / best median goes
+# from LATENCY_SOFT_RATIO to LATENCY_TRIP_RATIO
+LATENCY_SOFT_RATIO = 1.3
+LATENCY_TRIP_RATIO = 2.0
+# Latency samples per worker in the recent median
+LATENCY_WINDOW = 20
+
+# Leaving a level needs pressure HYSTERESIS below its entry point for
+# COOLDOWN_S; levels are left one at a time
+HYSTERESIS = 0.15
+COOLDOWN_S = float(os.environ.get('MINUS_THERMAL_COOLDOWN', '60'))
+
+# Level changes kept for status()
+DECISION_HISTORY = 20
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Settings for one governor level."""
+    name: str
+    enter: float             # Pressure at which this level is entered
+    ocr_pause_s: float       # Sleep after each OCR cycle
+    vlm_pause_s: float       # Sleep after each VLM cycle
+    asr_interval_scale: float  # Multiplies ASRManager.INFERENCE_INTERVAL_S
+    capture_scale: int       # JPEG decode scale for snapshots (1, 2 or 4)
+
+
+# The policy curve, coolest first. Level 0 is the pre-governor cadence.
+TIERS = (
+    Tier('normal', 0.0, ocr_pause_s=0.1, vlm_pause_s=0.5, asr_interval_scale=1.0, capture_scale=1),
+    Tier('warm', 0.2, ocr_pause_s=0.3, vlm_pause_s=1.5, asr_interval_scale=1.5, capture_scale=2),
+    Tier('hot', 0.55, ocr_pause_s=0.8, vlm_pause_s=3.0, asr_interval_scale=2.0, capture_scale=2),
+    Tier('critical', 0.85, ocr_pause_s=1.5, vlm_pause_s=6.0, asr_interval_scale=3.0, capture_scale=4),
+)
+
+LEVEL = gauge('minus_thermal_level', 'Thermal governor level (0 = normal cadence)')
+PRESSURE = gauge('minus_thermal_pressure', 'Thermal governor pressure per signal (0-1)', ['signal'])
+SENSOR_TEMP = gauge('minus_thermal_sensor_celsius', 'Temperature seen by the thermal governor',
+                    ['sensor'])
+DECISIONS = counter('minus_thermal_decisions_total', 'Thermal governor level changes',
+                    ['direction'])
+
+
+def read_thermal_zones() -> Dict[str, float]:
+    """Hottest reading per sysfs thermal zone kind, in °C.
+
+    Zones are grouped by type: 'npu' for npu-thermal, 'soc' for the rest
+    (soc/bigcore/littlecore/center/gpu). Unreadable zones are skipped.
+    """
+    temps: Dict[str, float] = {}
+    for zone in glob.glob('/sys/class/thermal/thermal_zone*'):
+        try:
+            with open(os.path.join(zone, 'temp')) as f:
+                temp = int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            continue
+        try:
+            with open(os.path.join(zone, 'type')) as f:
+                kind = 'npu' if f.read().startswith('npu') else 'soc'
+        except OSError:
+            kind = 'soc'
+        temps[kind] = max(temp, temps.get(kind, temp))
+    return temps
+
+
+# Axera card CLI; the governor runs only its cheap --temp query
+AXCL_SMI_PATH = '/usr/bin/axcl/axcl-smi'
+
+
+def read_axera_temperature() -> Optional[float]:
+    """Axera card temperature in °C from `axcl-smi info --temp`, or None."""
+    if not os.path.exists(AXCL_SMI_PATH):
+        return None
+    try:
+        r = subprocess.run([AXCL_SMI_PATH, 'info', '--temp'],
+                           capture_output=True, text=True, timeout=1.0)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    m = re.search(r'temperature\s*:\s*(\d+)', r.stdout)
+    # axcl-smi reports milli-degrees Celsius
+    return int(m.group(1)) / 1000.0 if m else None
+
+
+def _ramp(value: float, soft: float, trip: float) -> float:
+    if trip <= soft:
+        return 1.0 if value >= trip else 0.0
+    return min(1.0, max(0.0, (value - soft) / (trip - soft)))
+
+
+def _median(values) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def _slope(points) -> float:
+    """Least-squares slope (units per second) of (t, value) points."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    var = sum((t - mean_t) ** 2 for t, _ in points)
+    if var == 0:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in points) / var
+
+
+class ThermalGovernor:
+    """Picks the inference cadence tier from temperatures and latency trends.
+
+    Workers read the current settings (ocr_pause_s, vlm_pause_s,
+    asr_interval_scale, capture_scale) on every cycle; those are plain
+    attribute reads.
+    """
+
+    def __init__(self, sensors: Optional[Callable[[], Dict[str, float]]] = None):
+        self._sensors = sensors or read_thermal_zones
+        self._lock = threading.Lock()
+        self._history: Dict[str, deque] = {}    # sensor -> (t, °C)
+        self._latencies: Dict[str, deque] = {}  # worker -> recent seconds
+        self._best_median: Dict[str, float] = {}
+        self._pressures: Dict[str, float] = {}
+        self._temps: Dict[str, float] = {}
+        self._below_since: Optional[float] = None
+        self._decisions = deque(maxlen=DECISION_HISTORY)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.level = 0
+        self.tier = TIERS[0]
+        LEVEL.set(0)
+
+    # ----- settings read by the workers -----
+
+    @property
+    def ocr_pause_s(self) -> float:
+        return self.tier.ocr_pause_s
+
+    @property
+    def vlm_pause_s(self) -> float:
+        return self.tier.vlm_pause_s
+
+    @property
+    def asr_interval_scale(self) -> float:
+        return self.tier.asr_interval_scale
+
+    @property
+    def capture_scale(self) -> int:
+        return self.tier.capture_scale
+
+    # ----- inputs -----
+
+    def record_latency(self, worker: str, seconds: float):
+        """Note one inference latency for `worker` ('ocr', 'vlm', 'asr')."""
+        with self._lock:
+            window = self._latencies.get(worker)
+            if window is None:
+                window = self._latencies[worker] = deque(maxlen=LATENCY_WINDOW)
+            window.append(float(seconds))
+            if len(window) == LATENCY_WINDOW:
+                median = _median(window)
+                if median < self._best_median.get(worker, float('inf')):
+                    self._best_median[worker] = median
+
+    def sample(self, now: Optional[float] = None) -> int:
+        """Read the sensors and re-evaluate; the resulting level."""
+        try:
+            temps = self._sensors()
+        except Exception as e:
+            logger.debug(f"[Thermal] Sensor read failed: {e}")
+            temps = {}
+        return self.step(temps, time.monotonic() if now is None else now)
+
+    def step(self, temps: Dict[str, Optional[float]], now: float) -> int:
+        """Apply one sample of `temps` (sensor -> °C) at time `now`.
+
+        Latencies come from record_latency(). Returns the new level.
+        """
+        with self._lock:
+            pressures = {}
+            for sensor, temp in temps.items():
+                if temp is None:
+                    continue
+                history = self._history.get(sensor)
+                if history is None:
+                    history = self._history[sensor] = deque()
+                history.append((now, temp))
+                while history and now - history[0][0] > TREND_WINDOW_S:
+                    history.popleft()
+                self._temps[sensor] = temp
+                SENSOR_TEMP.labels(sensor=sensor).set(temp)
+                projected = temp
+                if now - history[0][0] >= TREND_MIN_SPAN_S:
+                    projected += max(0.0, _slope(history)) * LOOKAHEAD_S
+                soft, trip = SENSOR_LIMITS.get(sensor, SENSOR_LIMITS['soc'])
+                pressures[sensor] = _ramp(projected, soft, trip)
+            for worker, window in self._latencies.items():
+                best = self._best_median.get(worker)
+                if best and len(window) == LATENCY_WINDOW:
+                    ratio = _median(window) / best
+                    pressures[f'{worker}_latency'] = _ramp(
+                        ratio, LATENCY_SOFT_RATIO, LATENCY_TRIP_RATIO)
+            for signal, value in pressures.items():
+                PRESSURE.labels(signal=signal).set(value)
+            self._pressures = pressures
+
+            pressure = max(pressures.values(), default=0.0)
+            driver = max(pressures, key=pressures.get) if pressures else None
+            target = max(i for i, tier in enumerate(TIERS) if pressure >= tier.enter)
+
+            if target > self.level:
+                self._below_since = None
+                self._set_level(target, now, pressure, driver)
+            elif pressure < self.tier.enter - HYSTERESIS:
+                if self._below_since is None:
+                    self._below_since = now
+                elif now - self._below_since >= COOLDOWN_S:
+                    self._below_since = now
+                    self._set_level(self.level - 1, now, pressure, driver)
+            else:
+                self._below_since = None
+            return self.level
+
+    def _set_level(self, level: int, now: float, pressure: float, driver: Optional[str]):
+        previous = self.level
+        self.level = level
+        self.tier = TIERS[level]
+        direction = 'up' if level > previous else 'down'
+        decision = {
+            'time': time.time(),
+            'monotonic': now,
+            'from': TIERS[previous].name,
+            'to': self.tier.name,
+            'pressure': round(pressure, 3),
+            'driver': driver,
+        }
+        self._decisions.append(decision)
+        LEVEL.set(level)
+        DECISIONS.labels(direction=direction).inc()
+        logger.info(f"[Thermal] {TIERS[previous].name} -> {self.tier.name} "
+                    f"(pressure={pressure:.2f}, driver={driver})")
+
+    # ----- outputs -----
+
+    def decisions(self) -> List[dict]:
+        with self._lock:
+            return list(self._decisions)
+
+    def status(self) -> dict:
+        """Current tier, inputs and recent decisions for /api/status."""
+        with self._lock:
+            latency = {}
+            for worker, window in self._latencies.items():
+                if window:
+                    latency[worker] = {
+                        'median_s': round(_median(window), 3),
+                        'best_median_s': round(self._best_median[worker], 3)
+                        if worker in self._best_median else None,
+                    }
+            return {
+                'level': self.level,
+                'tier': self.tier.name,
+                'ocr_pause_s': self.tier.ocr_pause_s,
+                'vlm_pause_s': self.tier.vlm_pause_s,
+                'asr_interval_scale': self.tier.asr_interval_scale,
+                'capture_scale': self.tier.capture_scale,
+                'temperatures_c': dict(self._temps),
+                'pressures': {k: round(v, 3) for k, v in self._pressures.items()},
+                'latency': latency,
+                'decisions': list(self._decisions),
+            }
+
+    # ----- sampler thread -----
+
+    def start(self, sensors: Optional[Callable[[], Dict[str, float]]] = None):
+        """Sample every SAMPLE_INTERVAL_S in a daemon thread."""
+        if sensors is not None:
+            self._sensors = sensors
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='ThermalGovernor')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"[Thermal] Evaluation failed: {e}")
+            self._stop.wait(SAMPLE_INTERVAL_S)
+
+
+_governor: Optional[ThermalGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_thermal_governor() -> ThermalGovernor:
+    """Process-wide governor. Before start() it stays at level 0."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ThermalGovernor()
+        return _governor
@@ -0,0 +1,269 @@
+"""
+Derivative (thumbnail / preview) cache for the web UI image endpoints.
+
+The screenshot gallery and review cards used to load full-resolution PNGs
+(several MB each at 4K) and the photo grid loaded full photos, so paging
+through 20 screenshots moved tens of MB over the device's Wi-Fi and read
+whole files off the SD card. This cache serves small derivatives instead:
+
+    thumb    longest edge 320px   (gallery grid, photo grid)
+    preview  longest edge 960px   (review cards)
+
+Derivatives live under ~/.minus_media/thumbs/<key[:2]>/<key>.<ext>, where
+the key is a SHA-1 of the source identity (resolved path, size, mtime) and
+the variant. Screenshots and photos are written once via atomic rename and
+never modified in place, so that identity is a content identity: a
+replaced source gets a new key and the stale derivative simply ages out.
+The key doubles as the HTTP ETag.
+
+Generation is lazy (first request) with single-flight per key, plus an
+optional low-priority background prefetch for items the UI is about to
+show. The cache has its own byte budget (MINUS_THUMB_CACHE_MB, separate
+from the screenshots training-data budget) enforced by LRU eviction;
+recency is tracked in memory and seeded from file mtimes at startup.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+THUMB_CACHE_DIR = Path(os.environ.get(
+    'MINUS_THUMB_CACHE_DIR', str(Path.home() / ".minus_media" / "thumbs")))
+THUMB_CACHE_MAX_MB = float(os.environ.get('MINUS_THUMB_CACHE_MB', '256'))
+
+# 'webp' (smaller) or 'jpg'
+THUMB_FORMAT = os.environ.get('MINUS_THUMB_FORMAT', 'webp').lower()
+THUMB_QUALITY = int(os.environ.get('MINUS_THUMB_QUALITY', '80'))
+
+# Variant name -> longest edge in pixels
+VARIANTS = {
+    'thumb': 320,
+    'preview': 960,
+}
+
+_MIMETYPES = {'.webp': 'image/webp', '.jpg': 'image/jpeg'}
+
+# Max queued background prefetch jobs (older requests are dropped first)
+PREFETCH_QUEUE_SIZE = 64
+
+
+class ThumbnailCache:
+    """On-disk LRU cache of resized image derivatives. Thread-safe."""
+
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else THUMB_CACHE_DIR
+        self.max_bytes = int(THUMB_CACHE_MAX_MB * 1024 ** 2) if max_bytes is None else max_bytes
+        self.ext = '.jpg' if THUMB_FORMAT in ('jpg', 'jpeg') else '.webp'
+        self.mimetype = _MIMETYPES[self.ext]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()   # key -> size, least recently used first
+        self._total_bytes = 0
+        self._inflight = {}         # key -> Event (single-flight generation)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._prefetch_queue = deque()
+        self._prefetch_cond = threading.Condition()
+        self._prefetch_thread = None
+
+        self._load()
+
+    def _load(self):
+        """Seed the LRU from what is already on disk (oldest mtime first)."""
+        entries = []
+        for p in self.cache_dir.glob(f"*/*{self.ext}"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, p.stem, st.st_size))
+        entries.sort()
+        with self._lock:
+            for _mtime, key, size in entries:
+                self._lru[key] = size
+                self._total_bytes += size
+
+    # ----- keys / paths -----
+
+    @staticmethod
+    def make_key(source: Path, variant: str) -> Optional[str]:
+        """Cache key (and ETag) for a source file + variant, or None if the
+        source does not exist."""
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        ident = f"{Path(source).resolve()}|{st.st_size}|{st.st_mtime_ns}|{variant}"
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.ext}"
+
+    # ----- lookup / generation -----
+
+    def get(self, source: Path, variant: str) -> Optional[Tuple[Path, str]]:
+        """Path of the derivative for `source` (generated on a miss) and its
+        ETag, or None if the source is missing/undecodable or the variant is
+        unknown."""
+        if variant not in VARIANTS:
+            return None
+        key = self.make_key(source, variant)
+        if key is None:
+            return None
+        path = self._path_for(key)
+
+        while True:
+            with self._lock:
+                if key in self._lru and path.exists():
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    return path, key
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    self.misses += 1
+                    break
+            # Another request is generating this key; wait and re-check
+            event.wait(10.0)
+
+        try:
+            size = self._generate(Path(source), VARIANTS[variant], path)
+            if size is None:
+                return None
+            with self._lock:
+                old = self._lru.pop(key, None)
+                if old is not None:
+                    self._total_bytes -= old
+                self._lru[key] = size
+                self._total_bytes += size
+            self._enforce_budget()
+            return path, key
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _generate(self, source: Path, max_edge: int, dest: Path) -> Optional[int]:
+        """Decode, downscale (never upscale) and atomically write a derivative."""
+        import cv2
+
+        try:
+            img = cv2.imread(str(source), cv2.IMREAD_COLOR)
+            if img is None:
+                logger.debug(f"[Thumbs] Could not decode {source}")
+                return None
+            h, w = img.shape[:2]
+            scale = max_edge / max(h, w)
+            if scale < 1.0:
+                img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))),
+                                 interpolation=cv2.INTER_AREA)
+            if self.ext == '.webp':
+                params = [cv2.IMWRITE_WEBP_QUALITY, THUMB_QUALITY]
+            else:
+                params = [cv2.IMWRITE_JPEG_QUALITY, THUMB_QUALITY]
+            ok, buf = cv2.imencode(self.ext, img, params)
+            if not ok:
+                return None
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.part")
+            with open(tmp, 'wb') as f:
+                f.write(buf.tobytes())
+            os.replace(tmp, dest)
+            return len(buf)
+        except Exception as e:
+            logger.warning(f"[Thumbs] Failed to build derivative of {source}: {e}")
+            return None
+
+    # ----- eviction -----
+
+    def _enforce_budget(self):
+        """Evict least-recently-used derivatives until under the byte budget."""
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._lru:
+                    return
+                key, size = self._lru.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+            try:
+                self._path_for(key).unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drop every cached derivative."""
+        with self._lock:
+            keys = list(self._lru)
+            self._lru.clear()
+            self._total_bytes = 0
+        for key in keys:
+            try:
+                self._path_for(key).unlink()
+            except OSError:
+                pass
+
+    # ----- background prefetch -----
+
+    def prefetch(self, source: Path, variant: str):
+        """Queue a derivative for generation on the low-priority worker."""
+        with self._prefetch_cond:
+            if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+                self._prefetch_thread = threading.Thread(
+                    target=self._prefetch_loop, daemon=True, name='ThumbPrefetch')
+                self._prefetch_thread.start()
+            if len(self._prefetch_queue) >= PREFETCH_QUEUE_SIZE:
+                self._prefetch_queue.popleft()
+            self._prefetch_queue.append((Path(source), variant))
+            self._prefetch_cond.notify()
+
+    def _prefetch_loop(self):
+        # Linux schedules threads individually, so this only lowers the
+        # worker's priority, not the web server's
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            with self._prefetch_cond:
+                while not self._prefetch_queue:
+                    self._prefetch_cond.wait()
+                source, variant = self._prefetch_queue.popleft()
+            try:
+                self.get(source, variant)
+            except Exception as e:
+                logger.debug(f"[Thumbs] Prefetch failed for {source}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'files': len(self._lru),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'prefetch_queued': len(self._prefetch_queue),
+            }
+
+
+_singleton: Optional[ThumbnailCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Module-level singleton."""
+    global _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = ThumbnailCache()
+        return _singleton
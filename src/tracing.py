@@ -0,0 +1,246 @@
+"""
+Per-frame tracing with Chrome trace-event export.
+
+When a block starts late the logs only say *that* it was late, not whether
+the time went to the capture rate limiter, the snapshot fetch, the OCR
+worker queue, NPU inference, keyword matching, Minus._state_lock or the
+ustreamer /blocking/set call. With tracing enabled every sampled frame gets
+a trace ID and each stage records a span into a fixed-size ring:
+
+    trace_id = tracing.start_trace('ocr_frame')   # per loop iteration
+    ...
+    with tracing.span('ocr.keywords'):
+        ...
+
+Spans pick up the calling thread's current trace, so code below the loop
+(UstreamerCapture, OCRProcess, DRMAdBlocker) needs no extra arguments.
+Worker processes get the trace ID with the request and report their stage
+timings (wall clock) back with the response; those become spans on a
+pseudo-thread named after the worker.
+
+export() renders the last N seconds as Chrome trace-event JSON, which
+opens directly in ui.perfetto.dev or chrome://tracing.
+
+Disabled (the default, MINUS_TRACE=0) every call returns after one
+attribute check. MINUS_TRACE_SAMPLE_RATE traces a fraction of frames.
+"""
+
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+TRACE_ENABLED = os.environ.get('MINUS_TRACE', '0') == '1'
+TRACE_SAMPLE_RATE = float(os.environ.get('MINUS_TRACE_SAMPLE_RATE', '1.0'))
+TRACE_RING_SIZE = int(os.environ.get('MINUS_TRACE_RING_SIZE', '20000'))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'trace_id', 'args', 'start')
+
+    def __init__(self, tracer, name, trace_id, args):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._append(self.name, self.start, time.time(), self.trace_id,
+                            threading.current_thread().name, self.args)
+        return False
+
+
+class Tracer:
+    """Trace IDs, a ring of finished spans, and Chrome trace export."""
+
+    def __init__(self, capacity: int = None, enabled: bool = False,
+                 sample_rate: float = 1.0):
+        # (name, start, end, trace_id, thread_name, args); deque.append is
+        # atomic, so recording takes no lock
+        self._spans = deque(maxlen=capacity or TRACE_RING_SIZE)
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.traces_started = 0
+
+    def configure(self, enabled: bool = None, sample_rate: float = None):
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    # ----- trace lifecycle -----
+
+    def start_trace(self, name: str = 'frame') -> Optional[int]:
+        """Begin a new trace on this thread (or None if disabled/sampled out).
+
+        The previous trace on the same thread is closed first, as a `name`
+        span covering the whole iteration.
+        """
+        self.end_trace()
+        if not self.enabled:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        trace_id = next(self._ids)
+        self.traces_started += 1
+        self._local.trace = (trace_id, name, time.time())
+        return trace_id
+
+    def end_trace(self):
+        """Close this thread's current trace, if any."""
+        prev = getattr(self._local, 'trace', None)
+        if prev is not None:
+            self._local.trace = None
+            self._append(prev[1], prev[2], time.time(), prev[0],
+                         threading.current_thread().name, None)
+
+    def current(self) -> Optional[int]:
+        trace = getattr(self._local, 'trace', None)
+        return trace[0] if trace is not None else None
+
+    # ----- recording -----
+
+    def span(self, name: str, **args):
+        """Context manager timing a stage of the current trace."""
+        if not self.enabled:
+            return _NOOP
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return _NOOP
+        return _Span(self, name, trace[0], args or None)
+
+    def add_span(self, name: str, start: float, end: float, trace_id: int = None,
+                 thread: str = None, **args):
+        """Record a span timed elsewhere (wall-clock seconds)."""
+        if not self.enabled:
+            return
+        if trace_id is None:
+            trace_id = self.current()
+            if trace_id is None:
+                return
+        self._append(name, start, end, trace_id,
+                     thread or threading.current_thread().name, args or None)
+
+    def add_worker_spans(self, worker: str, trace_id: Optional[int], timings: dict,
+                         stages=()):
+        """Spans for a request served by a worker process.
+
+        `timings` is the dict the worker sent back: 'start'/'end' (wall
+        clock), the echoed 'trace_id', and a duration per stage name. The
+        stages are laid out back to back from 'start'.
+        """
+        if not self.enabled or trace_id is None or not timings:
+            return
+        if timings.get('trace_id') != trace_id or 'start' not in timings:
+            return  # Stale response or untraced worker
+        thread = f'{worker} worker'
+        start = timings['start']
+        self._append(worker, start, timings.get('end', start), trace_id, thread, None)
+        for stage in stages:
+            duration = timings.get(stage)
+            if duration is None:
+                continue
+            self._append(f'{worker}.{stage}', start, start + duration, trace_id, thread, None)
+            start += duration
+
+    def _append(self, name, start, end, trace_id, thread, args):
+        self._spans.append((name, start, end, trace_id, thread, args))
+
+    # ----- export -----
+
+    def export(self, seconds: float = None) -> dict:
+        """Chrome trace-event JSON (as a dict) for spans ending in the last
+        `seconds` (all buffered spans if None)."""
+        cutoff = time.time() - seconds if seconds else 0.0
+        spans = [s for s in list(self._spans) if s[2] >= cutoff]
+        spans.sort(key=lambda s: s[1])
+        pid = os.getpid()
+        tids = {}
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                   'args': {'name': 'minus'}}]
+        for name, start, end, trace_id, thread, args in spans:
+            tid = tids.get(thread)
+            if tid is None:
+                tid = tids[thread] = len(tids) + 1
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                               'args': {'name': thread}})
+            event_args = {'trace_id': trace_id}
+            if args:
+                event_args.update(args)
+            events.append({
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                # Nearest microsecond: int() truncates a whole-microsecond
+                # time that float arithmetic left a hair below to one less
+                'ts': round(start * 1e6),
+                'dur': max(0, round((end - start) * 1e6)),
+                'pid': pid,
+                'tid': tid,
+                'args': event_args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def clear(self):
+        self._spans.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'spans_buffered': len(self._spans),
+            'capacity': self._spans.maxlen,
+            'traces_started': self.traces_started,
+        }
+
+
+_tracer = Tracer(enabled=TRACE_ENABLED, sample_rate=TRACE_SAMPLE_RATE)
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def start_trace(name: str = 'frame') -> Optional[int]:
+    return _tracer.start_trace(name)
+
+
+def end_trace():
+    _tracer.end_trace()
+
+
+def current_trace() -> Optional[int]:
+    return _tracer.current()
+
+
+def span(name: str, **args):
+    return _tracer.span(name, **args)
+
+
+def add_span(name: str, start: float, end: float, trace_id: int = None,
+             thread: str = None, **args):
+    _tracer.add_span(name, start, end, trace_id, thread, **args)
@@ -0,0 +1,329 @@
+"""
+Control channel to ustreamer's blocking and overlay API.
+
+Every control call used to be a fresh urllib request, so each one paid a
+new TCP connection to the process that is encoding 4K60. Failures were
+logged at debug and nothing else. The blocking overlay alone fires several
+calls per second: animation steps, vocab rotation, the debug stats loop
+and word colors. During a fade that is dozens of connections per second,
+which is the contention behind several glitches in docs/DEBUG_GLITCHES.md.
+
+UstreamerControl is the single client for those calls:
+
+- A small pool of keep-alive http.client connections. Plain http.client
+  rather than the requests.Session capture.py uses: a /blocking/set
+  round trip costs ~0.2ms of Python on a kept-alive connection versus
+  ~1.4ms through requests (and ~0.6ms for urllib with a new connection).
+- /blocking/set updates are coalesced. Fields are merged into one pending
+  request, last writer wins per field. A caller that waits for the result
+  sends the pending batch immediately. Callers arriving while a request is
+  in flight join the next one. Fire-and-forget updates are flushed within
+  one tick (COALESCE_TICK_S, about one 60fps frame). Every field is still
+  applied in call order.
+- Latency and error metrics per endpoint. A run of failures is logged
+  once at warning, and again when the endpoint recovers.
+- Blocking enable/disable (and any /blocking state read) is published to
+  /dev/shm/minus_blocking_state with an atomic rename, so readers such as
+  capture.py never need HTTP to learn whether the overlay is up.
+"""
+
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+import tracing
+from metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# Fire-and-forget /blocking/set updates are sent at most this long after the call
+COALESCE_TICK_S = float(os.environ.get('MINUS_CONTROL_TICK', '0.016'))
+
+BLOCKING_STATE_PATH = '/dev/shm/minus_blocking_state'
+
+# Idle keep-alive connections kept per ustreamer
+POOL_SIZE = 4
+
+REQUEST_LATENCY = histogram(
+    'minus_ustreamer_request_seconds',
+    'ustreamer control API round trip', ['endpoint'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+REQUEST_ERRORS = counter(
+    'minus_ustreamer_request_errors_total',
+    'ustreamer control API calls that failed', ['endpoint', 'kind'])
+COALESCED_UPDATES = counter(
+    'minus_ustreamer_coalesced_updates_total',
+    '/blocking/set updates merged into another call')
+
+
+class _Batch:
+    """Fields for one /blocking/set request and the callers waiting on it."""
+
+    __slots__ = ('params', 'timeout', 'updates', 'deadline', 'done', 'result')
+
+    def __init__(self, deadline: float):
+        self.params: Dict[str, str] = {}
+        self.timeout = 0.0
+        self.updates = 0
+        self.deadline = deadline
+        self.done = False
+        self.result = None
+
+
+class UstreamerControl:
+    """Keep-alive, coalescing client for one ustreamer instance."""
+
+    def __init__(self, port: int = 9090, state_path: str = BLOCKING_STATE_PATH,
+                 tick: float = COALESCE_TICK_S):
+        self.port = port
+        self.base_url = f"http://localhost:{port}"
+        self.state_path = state_path
+        self.tick = tick
+        self._idle = []  # Idle keep-alive connections, most recent last
+        self._pool_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._open: Optional[_Batch] = None  # Accepting fields, not yet sent
+        self._sending = False
+        self._flusher = None
+        self._failing: Dict[str, int] = {}  # endpoint -> consecutive failures
+        self.requests_sent = 0
+        self.updates_received = 0
+
+    def _acquire(self, timeout: float) -> http.client.HTTPConnection:
+        with self._pool_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return http.client.HTTPConnection('localhost', self.port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, conn: http.client.HTTPConnection):
+        with self._pool_lock:
+            if len(self._idle) < POOL_SIZE:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _request(self, method: str, path: str, body: Optional[bytes], headers: dict,
+                 timeout: float) -> Tuple[int, bytes]:
+        """(status, payload) over a pooled connection.
+
+        A kept-alive socket the server already closed fails on first use;
+        that request is retried once on a fresh connection.
+        """
+        for attempt in range(2):
+            conn = self._acquire(timeout)
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return response.status, payload
+
+    def call(self, endpoint: str, params: Optional[dict] = None, data: Optional[bytes] = None,
+             method: str = 'GET', timeout: float = 0.1,
+             content_type: str = 'image/jpeg') -> Optional[dict]:
+        """One request to `endpoint`; the decoded JSON reply, or None on failure."""
+        path = endpoint + ('?' + urllib.parse.urlencode(params) if params else '')
+        headers = {'Content-Type': content_type} if method == 'POST' else {}
+        kind = None
+        start = time.perf_counter()
+        try:
+            with tracing.span('ustreamer.api', endpoint=endpoint):
+                status, payload = self._request(method, path, data if method == 'POST' else None,
+                                                headers, timeout)
+            if status != 200:
+                kind = 'http'
+                return None
+            try:
+                reply = json.loads(payload)
+            except ValueError:
+                kind = 'parse'
+                return None
+            if endpoint == '/blocking' and isinstance(reply, dict):
+                # A state read also seeds the file for later readers
+                self._publish_state(bool(reply.get('result', {}).get('enabled', False)))
+            return reply
+        except TimeoutError:
+            kind = 'timeout'
+            return None
+        except (OSError, http.client.HTTPException):
+            kind = 'connection'
+            return None
+        except Exception as e:
+            logger.debug(f"[UstreamerControl] {endpoint} failed: {e}")
+            kind = 'other'
+            return None
+        finally:
+            self.requests_sent += 1
+            REQUEST_LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            self._note_outcome(endpoint, kind)
+
+    def _note_outcome(self, endpoint: str, kind: Optional[str]):
+        if kind is None:
+            failures = self._failing.pop(endpoint, 0)
+            if failures:
+                logger.info(f"[UstreamerControl] {endpoint} recovered after {failures} failed calls")
+            return
+        REQUEST_ERRORS.labels(endpoint=endpoint, kind=kind).inc()
+        failures = self._failing.get(endpoint, 0) + 1
+        self._failing[endpoint] = failures
+        if failures == 1:
+            logger.warning(f"[UstreamerControl] {endpoint} call failed ({kind})")
+
+    def set_blocking(self, params: dict, wait: bool = True, timeout: float = 0.1) -> Optional[dict]:
+        """Apply /blocking/set fields, coalesced with other pending updates.
+
+        wait=True sends now, together with anything pending, and returns
+        ustreamer's reply (None on failure). wait=False returns at once
+        and the fields go out within one tick.
+        """
+        if not wait:
+            self.queue_blocking(params, timeout)
+            return None
+        return self.result(self._merge(params, timeout))
+
+    def queue_blocking(self, params: dict, timeout: float = 0.1) -> _Batch:
+        """set_blocking(wait=False) that hands back the pending request.
+
+        The fields take their place in call order right away; result()
+        waits for ustreamer's reply later, so a caller can queue under
+        its own lock and wait outside it.
+        """
+        batch = self._merge(params, timeout)
+        with self._cond:
+            self._ensure_flusher()
+            self._cond.notify_all()
+        return batch
+
+    def _merge(self, params: dict, timeout: float) -> _Batch:
+        fields = {k: str(v) for k, v in params.items()}
+        with self._cond:
+            self.updates_received += 1
+            batch = self._open
+            if batch is None or 'clear' in fields:
+                # A clear resets everything, so pending fields are moot
+                if batch is not None:
+                    batch.params.clear()
+                else:
+                    batch = self._open = _Batch(time.monotonic() + self.tick)
+            else:
+                COALESCED_UPDATES.inc()
+            batch.params.update(fields)
+            batch.timeout = max(batch.timeout, timeout)
+            batch.updates += 1
+            return batch
+
+    def result(self, batch: _Batch) -> Optional[dict]:
+        """ustreamer's reply to the request carrying `batch` (None on failure).
+
+        A batch still pending is sent now, with whatever joined it.
+        """
+        with self._cond:
+            # Send it ourselves once nothing else is in flight, unless
+            # another caller picks the batch up first
+            while self._sending and self._open is batch:
+                self._cond.wait()
+            if self._open is not batch:
+                while not batch.done:
+                    self._cond.wait()
+                return batch.result
+            self._open = None
+            self._sending = True
+        return self._send(batch)
+
+    def _send(self, batch: _Batch) -> Optional[dict]:
+        result = None
+        try:
+            result = self.call('/blocking/set', batch.params, timeout=batch.timeout)
+            if 'enabled' in batch.params:
+                self._publish_state(batch.params['enabled'] == 'true')
+        finally:
+            with self._cond:
+                batch.result = result
+                batch.done = True
+                self._sending = False
+                self._cond.notify_all()
+        return result
+
+    def flush(self, timeout: float = 0.1) -> Optional[dict]:
+        """Send pending fire-and-forget fields now (no-op when none)."""
+        with self._cond:
+            if self._open is None:
+                return None
+        return self.set_blocking({}, wait=True, timeout=timeout)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True,
+                                             name="UstreamerControlFlush")
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    batch = self._open
+                    if batch is None:
+                        self._cond.wait()
+                        continue
+                    remaining = batch.deadline - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                    if self._sending:
+                        self._cond.wait()
+                        continue
+                    break
+                self._open = None
+                self._sending = True
+            self._send(batch)
+
+    def _publish_state(self, enabled: bool):
+        """Write '1'/'0' to the shared state file via rename (no torn reads)."""
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                f.write('1' if enabled else '0')
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.debug(f"[UstreamerControl] Failed to write blocking state file: {e}")
+
+    def stats(self) -> dict:
+        return {
+            'requests_sent': self.requests_sent,
+            'updates_received': self.updates_received,
+            'failing_endpoints': dict(self._failing),
+        }
+
+
+_controls: Dict[int, UstreamerControl] = {}
+_controls_lock = threading.Lock()
+
+
+def get_ustreamer_control(port: int = 9090) -> UstreamerControl:
+    """Shared UstreamerControl for the ustreamer on `port`."""
+    with _controls_lock:
+        control = _controls.get(port)
+        if control is None:
+            control = _controls[port] = UstreamerControl(port)
+        return control
@@ -2,14 +2,62 @@
 V4L2 (Video4Linux2) probing utilities for Minus.
 
 Auto-detects video capture device format and resolution.
+
+read_v4l2_format() asks the driver directly (VIDIOC_G_FMT) for the
+health monitor's periodic format check; probe_v4l2_device() runs
+v4l2-ctl and is kept for startup and as the fallback.
 """
 
+import ctypes
+import fcntl
 import logging
+import os
 import re
 import subprocess
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Map V4L2 format codes to ustreamer format names
+USTREAMER_FORMATS = {
+    'NV12': 'NV12',
+    'NV16': 'NV16',
+    'NV24': 'NV24',
+    'BGR3': 'BGR24',
+    'RGB3': 'RGB24',
+    'YUYV': 'YUYV',
+    'UYVY': 'UYVY',
+    'MJPG': 'MJPEG',
+    'JPEG': 'MJPEG',
+}
+
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_BUF_TYPE_VIDEO_CAPTURE_MPLANE = 9  # rk3588 HDMI-RX
+
+
+class _V4L2FormatUnion(ctypes.Union):
+    # Only the leading width/height/pixelformat of v4l2_pix_format(_mplane)
+    # are read; the pointer member gives the union its kernel alignment.
+    _fields_ = [
+        ('pix', ctypes.c_uint32 * 3),
+        ('raw_data', ctypes.c_uint8 * 200),
+        ('_align', ctypes.c_void_p),
+    ]
+
+
+class _V4L2Format(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('fmt', _V4L2FormatUnion),
+    ]
+
+
+def _iowr(group: str, number: int, size: int) -> int:
+    return (3 << 30) | (size << 16) | (ord(group) << 8) | number
+
+
+VIDIOC_G_FMT = _iowr('V', 4, ctypes.sizeof(_V4L2Format))
+
 
 def probe_v4l2_device(device: str) -> dict:
     """
@@ -55,19 +103,7 @@ def probe_v4l2_device(device: str) -> dict:
             v4l2_format = fmt_match.group(1)
             result['format'] = v4l2_format
 
-            # Map V4L2 format codes to ustreamer format names
-            format_map = {
-                'NV12': 'NV12',
-                'NV16': 'NV16',
-                'NV24': 'NV24',
-                'BGR3': 'BGR24',
-                'RGB3': 'RGB24',
-                'YUYV': 'YUYV',
-                'UYVY': 'UYVY',
-                'MJPG': 'MJPEG',
-                'JPEG': 'MJPEG',
-            }
-            result['ustreamer_format'] = format_map.get(v4l2_format, v4l2_format)
+            result['ustreamer_format'] = USTREAMER_FORMATS.get(v4l2_format, v4l2_format)
 
         logger.debug(f"Probed {device}: {result['width']}x{result['height']} format={result['format']} -> {result['ustreamer_format']}")
 
@@ -77,3 +113,39 @@ def probe_v4l2_device(device: str) -> dict:
         logger.warning(f"Error probing {device}: {e}")
 
     return result
+
+
+def read_v4l2_format(device: str) -> Optional[dict]:
+    """
+    Current format of a V4L2 device via the VIDIOC_G_FMT ioctl.
+
+    Same dict as probe_v4l2_device() without starting v4l2-ctl. G_FMT only
+    reads the negotiated format, so it is safe while ustreamer streams
+    (unlike VIDIOC_QUERY_DV_TIMINGS, which re-probes the HDMI-RX link).
+
+    Returns None if the device can't be opened or queried.
+    """
+    try:
+        fd = os.open(device, os.O_RDWR | os.O_NONBLOCK)
+    except OSError as e:
+        logger.debug(f"Can't open {device}: {e}")
+        return None
+    try:
+        for buf_type in (V4L2_BUF_TYPE_VIDEO_CAPTURE_MPLANE, V4L2_BUF_TYPE_VIDEO_CAPTURE):
+            fmt = _V4L2Format()
+            fmt.type = buf_type
+            try:
+                fcntl.ioctl(fd, VIDIOC_G_FMT, fmt)
+            except OSError:
+                continue  # EINVAL: device doesn't support this buffer type
+            width, height, fourcc = fmt.fmt.pix
+            v4l2_format = fourcc.to_bytes(4, 'little').decode('ascii', 'replace').strip()
+            return {
+                'format': v4l2_format,
+                'width': width,
+                'height': height,
+                'ustreamer_format': USTREAMER_FORMATS.get(v4l2_format, v4l2_format),
+            }
+        return None
+    finally:
+        os.close(fd)
@@ -152,6 +152,9 @@ class VLMManager:
         """Initialize VLM manager."""
         self.is_ready = False
         self._lock = threading.Lock()
+        # Seconds spent in the last call's stages; vlm_worker sends them
+        # back to the parent for /api/metrics
+        self.last_timings = {}
 
         # Model components (populated by load_model)
         self.tokenizer = None
@@ -434,8 +437,10 @@ class VLMManager:
                 t0 = time.time()
 
                 vision_out = self._encode_image(image_path)
+                t1 = time.time()
                 logits, _ = self._prefill_last_logits(
                     vision_out, self._ad_prompt_ids)
+                self.last_timings = {'encode': t1 - t0, 'prefill': time.time() - t1}
 
                 # Argmax-of-spelling decision (matches reference script)
                 p_yes_logit = float(max(logits[t] for t in self.YES_TOKEN_IDS))
@@ -515,7 +520,9 @@ class VLMManager:
                         )
                         return "PROMPT_TOO_LONG", time.time() - t0
 
+                t1 = time.time()
                 logits, _ = self._prefill_last_logits(vision_out, prompt_ids)
+                self.last_timings = {'encode': t1 - t0, 'prefill': time.time() - t1}
 
                 # Pick the class with the highest first-token logit (max
                 # over no-leading-space and leading-space spellings).
@@ -23,6 +23,15 @@ os.environ['PYTORCH_MATCHER_LOGLEVEL'] = 'WARNING'
 os.environ['TORCH_LOGS'] = '-all'
 os.environ['TRANSFORMERS_VERBOSITY'] = 'error'
 
+import tracing
+from metrics import WORKER_RESTARTS, WORKER_TIMEOUTS, histogram
+from placement import apply_placement, apply_to_process
+
+VLM_ENCODE_TIME = histogram('minus_vlm_encode_seconds', 'VLM vision encoder time')
+VLM_PREFILL_TIME = histogram('minus_vlm_prefill_seconds', 'VLM prefill (logits) time')
+VLM_INFERENCE_TIME = histogram('minus_vlm_inference_seconds',
+                               'VLM request end to end, through the worker process')
+
 
 def _vlm_worker_main(request_queue, response_queue, ready_event, shutdown_event):
     """
@@ -33,6 +42,7 @@ def _vlm_worker_main(request_queue, response_queue, ready_event, shutdown_event)
     import logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
     logger = logging.getLogger('VLMWorker')
+    apply_placement('vlm_worker')
 
     try:
         load_start = time.time()
@@ -115,19 +125,23 @@ def _vlm_worker_main(request_queue, response_queue, ready_event, shutdown_event)
                 if request is None:  # Shutdown signal
                     break
 
-                # detect_ad: (image_path, 'detect_ad')
+                # detect_ad: (image_path, trace_id, 'detect_ad')
                 # query:     (image_path, prompt, max_new_tokens, 'query')
                 request_type = request[-1]
 
                 if request_type == 'detect_ad':
                     image_path = request[0]
+                    trace_id = request[1] if len(request) > 2 else None
+                    started = time.time()
                     result = vlm.detect_ad(image_path)
-                    response_queue.put(('ok', result))
                     last_inference_time = time.time()
+                    response_queue.put(('ok', result, dict(
+                        vlm.last_timings, start=started, end=last_inference_time,
+                        trace_id=trace_id)))
                 elif request_type == 'query':
                     image_path, prompt, mnt, _ = request
                     result = vlm.query_image(image_path, prompt, max_new_tokens=mnt)
-                    response_queue.put(('ok', result))
+                    response_queue.put(('ok', result, vlm.last_timings))
                     last_inference_time = time.time()
                 else:
                     response_queue.put(('error', 'Unknown request type'))
@@ -231,6 +245,7 @@ class VLMProcess:
             daemon=True
         )
         self.process.start()
+        apply_to_process('vlm_worker', self.process.pid)
 
         import logging
         logger = logging.getLogger('Minus.VLM')
@@ -274,6 +289,7 @@ class VLMProcess:
         logger = logging.getLogger('Minus.VLM')
 
         self._restart_count += 1
+        WORKER_RESTARTS.labels(worker='vlm').inc()
 
         # Fixed 2 second delay for NPU recovery
         backoff = 2.0
@@ -297,6 +313,25 @@ class VLMProcess:
         self._last_restart_time = time.time()
         return self.start()
 
+    @staticmethod
+    def _observe_timings(elapsed_s, extra):
+        """Record a successful request's stage timings for /api/metrics."""
+        VLM_INFERENCE_TIME.observe(elapsed_s)
+        timings = extra[0] if extra and extra[0] else {}
+        if 'encode' in timings:
+            VLM_ENCODE_TIME.observe(timings['encode'])
+        if 'prefill' in timings:
+            VLM_PREFILL_TIME.observe(timings['prefill'])
+
+    @staticmethod
+    def _trace_response(trace_id, start_time, extra):
+        """Record request + worker-side spans for a traced detect_ad."""
+        if trace_id is None:
+            return
+        tracing.add_span('vlm.request', start_time, time.time(), trace_id)
+        tracing.get_tracer().add_worker_spans(
+            'vlm', trace_id, extra[0] if extra and extra[0] else {}, ('encode', 'prefill'))
+
     def _record_latency(self, elapsed_s):
         """Record a successful inference latency for trend analysis."""
         try:
@@ -345,6 +380,7 @@ class VLMProcess:
             self._consecutive_timeouts = 0
             time.sleep(self.DEEP_RESTART_BACKOFF)
             self._restart_count += 1
+            WORKER_RESTARTS.labels(worker='vlm').inc()
             self._last_restart_time = time.time()
             self.start()
         else:
@@ -431,16 +467,19 @@ class VLMProcess:
             return False, "PENDING", 0, 0.0
 
         start_time = time.time()
+        trace_id = tracing.current_trace()
 
         # Send request
-        self.request_queue.put((image_path, 'detect_ad'))
+        self.request_queue.put((image_path, trace_id, 'detect_ad'))
 
         # Wait for response with soft timeout first
         try:
-            status, result = self.response_queue.get(timeout=self.SOFT_TIMEOUT)
+            status, result, *extra = self.response_queue.get(timeout=self.SOFT_TIMEOUT)
             elapsed = time.time() - start_time
 
             if status == 'ok':
+                self._observe_timings(elapsed, extra)
+                self._trace_response(trace_id, start_time, extra)
                 # Reset consecutive timeout counter on success
                 self._consecutive_timeouts = 0
                 self._pending_response = False
@@ -469,6 +508,8 @@ class VLMProcess:
             elapsed = time.time() - start_time
             self._consecutive_timeouts += 1
             self._pending_response = True
+            WORKER_TIMEOUTS.labels(worker='vlm').inc()
+            tracing.add_span('vlm.timeout', start_time, time.time(), trace_id)
 
             # Check if we should do hard kill (only after many consecutive timeouts)
             if self._consecutive_timeouts >= self.RESTART_THRESHOLD:
@@ -476,12 +517,14 @@ class VLMProcess:
                 try:
                     remaining = self.HARD_TIMEOUT - elapsed
                     if remaining > 0:
-                        status, result = self.response_queue.get(timeout=remaining)
+                        status, result, *extra = self.response_queue.get(timeout=remaining)
                         # Got a response, reset counters
                         self._consecutive_timeouts = 0
                         self._pending_response = False
                         if status == 'ok':
                             elapsed = time.time() - start_time
+                            self._observe_timings(elapsed, extra)
+                            self._trace_response(trace_id, start_time, extra)
                             logger.info(f"[VLMProcess] Slow response arrived after {elapsed:.1f}s")
                             return result
                 except:
@@ -555,10 +598,11 @@ class VLMProcess:
         self.request_queue.put((image_path, prompt, max_new_tokens, 'query'))
 
         try:
-            status, result = self.response_queue.get(timeout=self.SOFT_TIMEOUT)
+            status, result, *extra = self.response_queue.get(timeout=self.SOFT_TIMEOUT)
             elapsed = time.time() - start_time
 
             if status == 'ok':
+                self._observe_timings(elapsed, extra)
                 self._consecutive_timeouts = 0
                 self._pending_response = False
                 latency = elapsed
@@ -582,16 +626,18 @@ class VLMProcess:
             elapsed = time.time() - start_time
             self._consecutive_timeouts += 1
             self._pending_response = True
+            WORKER_TIMEOUTS.labels(worker='vlm').inc()
 
             if self._consecutive_timeouts >= self.RESTART_THRESHOLD:
                 try:
                     remaining = self.HARD_TIMEOUT - elapsed
                     if remaining > 0:
-                        status, result = self.response_queue.get(timeout=remaining)
+                        status, result, *extra = self.response_queue.get(timeout=remaining)
                         self._consecutive_timeouts = 0
                         self._pending_response = False
                         if status == 'ok':
                             elapsed = time.time() - start_time
+                            self._observe_timings(elapsed, extra)
                             logger.info(f"[VLMProcess] Slow query response arrived after {elapsed:.1f}s")
                             return result
                 except:
@@ -0,0 +1,215 @@
+"""
+Time-windowed streaming vote aggregation for Minus.
+
+The detection loops keep short rolling windows of per-frame verdicts and
+query them every cycle:
+- VLM AD/NO-AD votes with confidence (start/stop hysteresis in minus.py)
+- ASR marker hits and transcribed word counts (confirm/veto in asr.py)
+- "N in a row" style checks (OCR/VLM consecutive counters)
+
+Rebuilding a list to prune the window and re-summing it on every query is
+O(window) per call, and those calls happen under `Minus._state_lock`,
+which the web UI status polling also contends on. VoteWindow keeps the
+entries in a deque and maintains running counts and weighted sums that
+are updated incrementally on append and on expiry, so every query is
+O(1) amortized (each entry is added and expired exactly once).
+
+Entries are (timestamp, positive, weight, value):
+- positive: the vote (True = ad / marker heard)
+- weight:   confidence for VLM votes, hit count for ASR
+- value:    free-form additive quantity (ASR transcribed word count)
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Optional
+
+# Snapshot of the running aggregates for the live window
+WindowStats = namedtuple('WindowStats', [
+    'count',            # Entries in the window
+    'positive_count',   # Entries with positive=True
+    'positive_weight',  # Sum of weights over positive entries
+    'negative_weight',  # Sum of weights over negative entries
+    'value_sum',        # Sum of values over all entries
+])
+
+
+class VoteWindow:
+    """Deque-backed sliding window with O(1) agreement statistics.
+
+    Thread-safe: appends come from the worker threads while queries come
+    from the decision engine and the status API. The internal lock is only
+    held for constant-time bookkeeping (plus popping expired entries).
+
+    Also supports `clear()`, `len()`, iteration and equality against a
+    plain list, so call sites that treated the old history list as a
+    sequence keep working.
+    """
+
+    def __init__(self, window_s: float, maxlen: Optional[int] = None):
+        """
+        Args:
+            window_s: Entries older than this many seconds are expired
+            maxlen: Optional hard cap on entries (oldest evicted first)
+        """
+        self.window_s = window_s
+        self.maxlen = maxlen
+        self._entries = deque()
+        self._lock = threading.Lock()
+        self._reset_aggregates()
+
+    def _reset_aggregates(self):
+        self._positive_count = 0
+        self._positive_weight = 0.0
+        self._negative_weight = 0.0
+        self._value_sum = 0.0
+        # Trailing run of identical votes (for "last N consecutive" queries)
+        self._streak_vote = None
+        self._streak_len = 0
+
+    # ----- mutation -----
+
+    def append(self, positive: bool, weight: float = 1.0, value: float = 0.0,
+               now: Optional[float] = None):
+        """Add a vote and expire anything that fell out of the window."""
+        if now is None:
+            now = time.time()
+        positive = bool(positive)
+        with self._lock:
+            if self.maxlen is not None and len(self._entries) >= self.maxlen:
+                self._pop_oldest()
+            self._entries.append((now, positive, weight, value))
+            if positive:
+                self._positive_count += 1
+                self._positive_weight += weight
+            else:
+                self._negative_weight += weight
+            self._value_sum += value
+            if positive == self._streak_vote:
+                self._streak_len += 1
+            else:
+                self._streak_vote = positive
+                self._streak_len = 1
+            self._expire_locked(now)
+
+    def expire(self, now: Optional[float] = None):
+        """Drop entries older than the window."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._expire_locked(now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._reset_aggregates()
+
+    def _expire_locked(self, now: float):
+        cutoff = now - self.window_s
+        entries = self._entries
+        while entries and entries[0][0] < cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        _, positive, weight, value = self._entries.popleft()
+        if not self._entries:
+            # Start from exact zeros again instead of accumulating float drift
+            self._reset_aggregates()
+            return
+        if positive:
+            self._positive_count -= 1
+            self._positive_weight -= weight
+        else:
+            self._negative_weight -= weight
+        self._value_sum -= value
+        if self._streak_len > len(self._entries):
+            self._streak_len = len(self._entries)
+
+    # ----- queries -----
+
+    def stats(self, now: Optional[float] = None) -> WindowStats:
+        """Running aggregates for the live window."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._expire_locked(now)
+            return WindowStats(
+                len(self._entries),
+                self._positive_count,
+                max(self._positive_weight, 0.0),
+                max(self._negative_weight, 0.0),
+                self._value_sum,
+            )
+
+    def agreement(self, now: Optional[float] = None) -> tuple:
+        """Confidence-weighted vote split.
+
+        Returns:
+            (positive_ratio, negative_ratio, total_entries)
+        """
+        count, _, pos_w, neg_w, _ = self.stats(now)
+        total_w = pos_w + neg_w
+        if count == 0 or total_w <= 0:
+            return 0.0, 0.0, count
+        return pos_w / total_w, neg_w / total_w, count
+
+    def passes(self, positive: bool, threshold: float, *, min_count: int = 1,
+               boost: float = 0.0, cap: Optional[float] = None,
+               now: Optional[float] = None) -> bool:
+        """Hysteresis check: does the `positive` (or negative) share of the
+        weighted vote reach `threshold + boost` (capped at `cap`) with at
+        least `min_count` entries in the window?
+
+        Callers pass `boost` only when the decision would flip the current
+        state, so changing state needs stronger evidence than keeping it.
+        """
+        pos_ratio, neg_ratio, count = self.agreement(now)
+        if count < min_count:
+            return False
+        ratio = pos_ratio if positive else neg_ratio
+        required = threshold + boost
+        if cap is not None:
+            required = min(required, cap)
+        return ratio >= required
+
+    def streak(self, positive: bool, now: Optional[float] = None) -> int:
+        """Number of most-recent consecutive entries equal to `positive`."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._expire_locked(now)
+            if self._streak_vote is bool(positive):
+                return self._streak_len
+            return 0
+
+    def last_n_consecutive(self, n: int, positive: bool,
+                           now: Optional[float] = None) -> bool:
+        """Whether the last `n` entries in the window all voted `positive`."""
+        return n > 0 and self.streak(positive, now) >= n
+
+    # ----- sequence compatibility -----
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            snapshot = list(self._entries)
+        return iter(snapshot)
+
+    def __eq__(self, other):
+        if isinstance(other, VoteWindow):
+            return list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"VoteWindow(window_s={self.window_s}, entries={len(self._entries)}, "
+                f"positive={self._positive_count})")
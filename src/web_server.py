@@ -0,0 +1,453 @@
+"""
+Embedded HTTP server for the web UI: bounded worker pools and gzip.
+
+WebUI.start() used to run Flask's development server with threaded=True,
+which starts a new thread for every connection with no upper bound. Long
+streaming responses (/stream MJPEG, /api/events and /api/logs/stream SSE)
+pin their thread for as long as the tab stays open, so a burst of
+requests, a captive-portal probe storm in AP mode or a forgotten browser
+tab could put dozens of threads next to the real-time detection workers.
+
+PooledWSGIServer keeps werkzeug's request handling (same WSGI environ,
+chunked HTTP/1.1 responses) but serves connections from fixed pools:
+
+- a request pool (MINUS_WEB_WORKERS threads, MINUS_WEB_QUEUE_SIZE
+  connections waiting) for ordinary requests; a connection that sends
+  nothing is dropped after MINUS_WEB_IDLE_TIMEOUT_S (sooner if others are
+  waiting) so browser pre-connects do not hold a worker
+- a stream pool (MINUS_WEB_STREAM_SLOTS threads) for STREAM_PATHS. The
+  request line is peeked before it is read, and a stream request is
+  handed to the stream pool, so open previews and event streams can never
+  starve API requests (or each other beyond the slot count). Streams do
+  not queue: with every slot taken the viewer gets an immediate 503
+  saying so (EventSource and the preview <img> retry on their own)
+- when the request pool and its queue are full the connection gets an
+  immediate 503 with Retry-After instead of another thread
+
+install_compression() gzips JSON, HTML, CSS and JS responses (static
+files are compressed once per ETag and cached) and install_request_timing()
+records time-to-response in minus_http_request_seconds. Pool size, busy
+workers, queue depth and rejections are exported through metrics.py.
+
+Requests without a body (the polling GETs) keep their connection alive,
+so a tab polling /api/status every second reuses one socket instead of a
+handshake per request. werkzeug itself always answers "Connection: close"
+because it drains the socket after each response, which would swallow the
+next request; for keep-alive requests the handler hides the (empty) body
+stream from that drain, reads request lines without read-ahead so the
+next request stays in the socket, and waits for it with the same idle
+rules as a new connection. Requests with a body still close.
+
+MINUS_WEBUI_SERVER=dev switches back to Flask's development server.
+"""
+
+import gzip
+import io
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+WEB_WORKERS = int(os.environ.get('MINUS_WEB_WORKERS', '8'))
+WEB_QUEUE_SIZE = int(os.environ.get('MINUS_WEB_QUEUE_SIZE', '32'))
+WEB_STREAM_SLOTS = int(os.environ.get('MINUS_WEB_STREAM_SLOTS', '8'))
+IDLE_TIMEOUT_S = float(os.environ.get('MINUS_WEB_IDLE_TIMEOUT_S', '5'))
+
+# How often an idle connection checks whether others are queued
+IDLE_POLL_S = 0.25
+
+# Socket timeout once a request is being read/written (slow uploads, a
+# viewer whose receive window stays full)
+IO_TIMEOUT_S = 30.0
+
+# How much of a request line peek() returns to readline()
+PEEK_BYTES = 8192
+
+# Endpoints whose responses stay open indefinitely
+STREAM_PATHS = ('/stream', '/api/events', '/api/logs/stream')
+
+# gzip settings
+GZIP_MIN_SIZE = 1024
+GZIP_MAX_SIZE = 4 * 1024 * 1024
+GZIP_LEVEL = 5
+GZIP_CACHE_ENTRIES = 64
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json', 'application/javascript', 'text/javascript',
+    'text/html', 'text/css', 'text/plain', 'image/svg+xml',
+})
+
+
+def _reject_response(reason: str) -> bytes:
+    body = reason.encode() + b'\n'
+    return (b'HTTP/1.1 503 Service Unavailable\r\n'
+            b'Content-Type: text/plain\r\nContent-Length: %d\r\n'
+            b'Retry-After: 1\r\nConnection: close\r\n\r\n' % len(body)) + body
+
+
+def _is_stream_path(path: str) -> bool:
+    return path in STREAM_PATHS
+
+
+class _WorkerPool:
+    """Fixed threads serving connections from a bounded queue.
+
+    At most `queue_size` connections wait for a worker; with 0 a
+    connection is only accepted when a worker is free.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, serve):
+        self.name = name
+        self.size = workers
+        self._queue = queue.Queue()
+        self._capacity = threading.Semaphore(workers + queue_size)
+        self._serve = serve
+        self._threads = []
+        self.busy = 0
+        self.rejected = 0
+        self.served = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.size):
+            thread = threading.Thread(target=self._run, daemon=True,
+                                      name=f'WebUI-{self.name}-{i}')
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put_nowait(None)
+        self._threads = []
+
+    def submit(self, sock, address) -> bool:
+        """Queue a connection; False if the pool is saturated."""
+        if not self._capacity.acquire(blocking=False):
+            self.rejected += 1
+            return False
+        self._queue.put_nowait((sock, address))
+        return True
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            with self._lock:
+                self.busy += 1
+            try:
+                self._serve(*item, self)
+            finally:
+                self._capacity.release()
+                with self._lock:
+                    self.busy -= 1
+                    self.served += 1
+
+
+class _SocketReader(io.RawIOBase):
+    """Unbuffered request reader that never reads past the current line.
+
+    A buffered rfile can pull the start of the next request off the socket
+    together with this one. readline() peeks for the newline and reads
+    exactly that line, so whatever follows the current request stays in
+    the socket, where _peek_path (or the stream worker the connection is
+    handed to) can see it.
+    """
+
+    def __init__(self, sock):
+        super().__init__()
+        self._sock = sock
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        return self._sock.recv_into(buf)
+
+    def peek(self, size=1):
+        # IOBase.readline() reads up to the first newline in what peek() returns
+        return self._sock.recv(max(size, PEEK_BYTES), socket.MSG_PEEK)
+
+    def read(self, size=-1):
+        # Like a buffered file: `size` bytes, fewer only at EOF
+        if size is None or size < 0:
+            return self.readall()
+        chunks = []
+        while size > 0:
+            chunk = self._sock.recv(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+
+class _PooledRequestHandler(WSGIRequestHandler):
+    """werkzeug handler with an idle timeout and stream hand-off."""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = IO_TIMEOUT_S
+
+    def setup(self):
+        super().setup()
+        self.rfile.close()
+        self.rfile = _SocketReader(self.connection)
+        self.handed_off = False
+        self.keep_alive = False
+
+    def run_wsgi(self):
+        self.keep_alive = self._can_keep_alive()
+        if not self.keep_alive:
+            return super().run_wsgi()
+        # No body to read. After the response werkzeug drains self.rfile,
+        # which would swallow the next request on this connection
+        reader, self.rfile = self.rfile, io.BytesIO()
+        try:
+            super().run_wsgi()
+        finally:
+            self.rfile = reader
+
+    def _can_keep_alive(self) -> bool:
+        # close_connection comes from parse_request: HTTP/1.1 without
+        # "Connection: close" (or HTTP/1.0 asking for keep-alive)
+        return (not self.close_connection
+                and self.server._current_pool() is not self.server.stream_pool
+                and self.headers.get('Content-Length', '0').strip() == '0'
+                and 'Transfer-Encoding' not in self.headers)
+
+    def send_header(self, keyword, value):
+        # werkzeug always sends "Connection: close"
+        if self.keep_alive and keyword.lower() == 'connection':
+            super().send_header('Connection', 'keep-alive')
+            super().send_header('Keep-Alive', f'timeout={int(IDLE_TIMEOUT_S)}')
+            return
+        super().send_header(keyword, value)
+
+    def handle_one_request(self):
+        path = self._peek_path()
+        if path is None:
+            self.close_connection = True
+            return
+        pool = self.server._current_pool()
+        if _is_stream_path(path) and pool is not self.server.stream_pool:
+            # Long-lived response: move the socket to a stream slot
+            self.close_connection = True
+            self.handed_off = True
+            if not self.server.stream_pool.submit(self.connection, self.client_address):
+                self.handed_off = False
+                _reject(self.connection, self.server.stream_full_reason)
+            return
+        super().handle_one_request()
+
+    def _peek_path(self) -> Optional[str]:
+        """Path of the request without consuming it.
+
+        None if the client closed the connection or sent nothing for
+        IDLE_TIMEOUT_S. Browsers open speculative connections they may
+        never use and keep finished ones alive; an idle one gives up its
+        worker early when other connections are waiting for one.
+        """
+        conn = self.connection
+        pool = self.server._current_pool()
+        deadline = time.monotonic() + IDLE_TIMEOUT_S
+        data = None
+        try:
+            conn.settimeout(IDLE_POLL_S)
+            while data is None:
+                try:
+                    data = conn.recv(2048, socket.MSG_PEEK)
+                except socket.timeout:
+                    if time.monotonic() >= deadline:
+                        return None
+                    if pool is not None and pool.queue_depth() > 0:
+                        return None
+        except OSError:
+            return None
+        finally:
+            try:
+                conn.settimeout(self.timeout)
+            except OSError:
+                pass
+        if not data:
+            return None
+        parts = data.split(b'\r\n', 1)[0].split(b' ')
+        if len(parts) < 2:
+            return ''  # Let the normal parser answer the malformed request
+        return parts[1].split(b'?', 1)[0].decode('latin-1')
+
+
+def _reject(sock, reason: str = 'busy'):
+    try:
+        sock.sendall(_reject_response(reason))
+    except OSError:
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """werkzeug WSGI server with bounded request and stream pools."""
+
+    multithread = True
+    request_queue_size = 64  # listen() backlog
+
+    def __init__(self, host: str, port: int, app, workers: int = None,
+                 queue_size: int = None, stream_slots: int = None):
+        super().__init__(host, port, app, handler=_PooledRequestHandler)
+        self._local = threading.local()
+        self.request_pool = _WorkerPool('req', workers or WEB_WORKERS,
+                                        WEB_QUEUE_SIZE if queue_size is None else queue_size,
+                                        self._serve_connection)
+        # Streams never wait for a slot: an open stream can last for hours,
+        # so a queued viewer would hang until someone closes a tab
+        self.stream_pool = _WorkerPool('stream', stream_slots or WEB_STREAM_SLOTS, 0,
+                                       self._serve_connection)
+        self.stream_full_reason = (f'all {self.stream_pool.size} stream slots in use '
+                                   f'(MINUS_WEB_STREAM_SLOTS)')
+        self.request_pool.start()
+        self.stream_pool.start()
+
+    def _current_pool(self) -> Optional[_WorkerPool]:
+        return getattr(self._local, 'pool', None)
+
+    def process_request(self, request, client_address):
+        # Runs on the accept loop: never block here
+        if not self.request_pool.submit(request, client_address):
+            _reject(request)
+            self.shutdown_request(request)
+
+    def _serve_connection(self, sock, address, pool: _WorkerPool):
+        self._local.pool = pool
+        handed_off = False
+        try:
+            handler = self.RequestHandlerClass(sock, address, self)
+            handed_off = handler.handed_off
+        except Exception:
+            self.handle_error(sock, address)
+        finally:
+            if not handed_off:
+                self.shutdown_request(sock)
+
+    def server_close(self):
+        super().server_close()
+        if hasattr(self, 'request_pool'):
+            self.request_pool.stop()
+            self.stream_pool.stop()
+
+    def get_stats(self) -> dict:
+        return {
+            name: {
+                'size': pool.size,
+                'busy': pool.busy,
+                'queued': pool.queue_depth(),
+                'served': pool.served,
+                'rejected': pool.rejected,
+            }
+            for name, pool in (('request', self.request_pool), ('stream', self.stream_pool))
+        }
+
+    def register_metrics(self):
+        from metrics import counter, gauge
+        size = gauge('minus_web_pool_size', 'Web server worker threads', ['pool'])
+        busy = gauge('minus_web_pool_busy', 'Web server workers handling a connection', ['pool'])
+        depth = gauge('minus_web_queue_depth', 'Connections waiting for a web worker', ['pool'])
+        rejected = counter('minus_web_rejected_total',
+                           'Connections refused with 503 because the pool was full', ['pool'])
+        for name, pool in (('request', self.request_pool), ('stream', self.stream_pool)):
+            size.labels(pool=name).set_function(lambda p=pool: p.size)
+            busy.labels(pool=name).set_function(lambda p=pool: p.busy)
+            depth.labels(pool=name).set_function(pool.queue_depth)
+            rejected.labels(pool=name).set_function(lambda p=pool: p.rejected)
+
+
+# ----- Flask hooks -----
+
+
+class _GzipCache:
+    """Compressed bodies of static responses, keyed by (path, ETag)."""
+
+    def __init__(self, max_entries: int = GZIP_CACHE_ENTRIES):
+        self._entries = OrderedDict()
+        self._max = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+
+def install_compression(app):
+    """gzip compressible responses for clients that accept it."""
+    from flask import request
+
+    cache = _GzipCache()
+
+    @app.after_request
+    def _gzip(response):
+        if (response.status_code != 200
+                or response.mimetype not in COMPRESSIBLE_TYPES
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+            return response
+        length = response.content_length
+        if length is not None and not GZIP_MIN_SIZE <= length <= GZIP_MAX_SIZE:
+            return response
+        if response.is_streamed and not response.direct_passthrough:
+            return response  # Generator: size unknown, possibly endless
+
+        etag = response.headers.get('ETag')
+        key = (request.path, etag) if etag else None
+        body = cache.get(key) if key else None
+        if body is None:
+            response.direct_passthrough = False
+            data = response.get_data()
+            if len(data) < GZIP_MIN_SIZE:
+                return response
+            body = gzip.compress(data, compresslevel=GZIP_LEVEL)
+            if key:
+                cache.put(key, body)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        if etag and not etag.startswith('W/'):
+            # Same resource, different bytes: only weakly equal
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+
+def install_request_timing(app):
+    """Observe request handling time (to response headers) per request."""
+    from flask import g
+    from metrics import histogram
+
+    request_time = histogram('minus_http_request_seconds',
+                             'Web UI request handling time (to response headers)')
+
+    @app.before_request
+    def _start_timer():
+        g._minus_request_start = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        start = g.pop('_minus_request_start', None)
+        if start is not None:
+            request_time.observe(time.perf_counter() - start)
+        return response
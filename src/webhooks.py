@@ -2,18 +2,240 @@
 Webhook notifications for Minus.
 
 Sends HTTP notifications to configured endpoints when events occur.
+
+Delivery used to start a new thread per event that POSTed to each URL in
+turn with urllib (5s timeout, new connection every time). A slow
+home-automation endpoint therefore piled up threads on the device. A
+global 1/s rate limit silently dropped events of any type: an
+ad_detected just before a blocking_stopped lost the blocking_stopped.
+
+Now:
+
+- notify() only queues the event. One dispatcher thread batches events
+  that arrive within BATCH_WINDOW_S of the first one into one payload.
+- The rate limit is per event type, and it coalesces instead of dropping.
+  A second event of a type that is still pending, or that was sent less
+  than a second ago, replaces the pending one (latest data wins, the
+  `coalesced` count says how many were merged). It goes out once the
+  interval has passed. blocking_started and blocking_stopped never
+  overtake each other: an event waits for a pending event of the
+  opposite type queued ahead of it, so receivers always end in the
+  latest state.
+- Each endpoint has its own sender thread and keep-alive connection, so
+  a slow endpoint only delays itself. Its queue is bounded
+  (MAX_QUEUED_PAYLOADS) and the oldest payload is dropped when full.
+- Connection errors, timeouts, 429 and 5xx are retried with exponential
+  backoff and jitter, up to MAX_ATTEMPTS. Any other status drops the
+  payload.
+- Delivered, retried, coalesced and dropped counts are in /api/metrics.
+
+A single event keeps the original payload shape:
+{"event", "timestamp", "data"}. A batch is {"event": "batch",
+"timestamp", "events": [...]} with one such object per event.
 """
 
+import http.client
 import logging
+import os
+import random
 import threading
 import time
 import json
-from typing import Optional, List
-import urllib.request
-import urllib.error
+from collections import OrderedDict, deque
+from typing import Dict, Optional, List
+import urllib.parse
+
+from metrics import counter
 
 logger = logging.getLogger(__name__)
 
+# Events arriving this close together share one payload
+BATCH_WINDOW_S = float(os.environ.get('MINUS_WEBHOOK_BATCH_WINDOW', '0.25'))
+
+# Events waiting for the dispatcher; the oldest is dropped beyond this
+MAX_PENDING_EVENTS = 64
+
+# Payloads waiting per endpoint; the oldest is dropped beyond this
+MAX_QUEUED_PAYLOADS = 32
+
+REQUEST_TIMEOUT_S = 5.0
+
+# Retry schedule: RETRY_BASE_S * 2^n with jitter, capped at RETRY_MAX_S
+MAX_ATTEMPTS = 5
+RETRY_BASE_S = 1.0
+RETRY_MAX_S = 60.0
+
+EVENTS_DELIVERED = counter(
+    'minus_webhook_events_delivered_total',
+    'Webhook events accepted by an endpoint')
+DELIVERY_RETRIES = counter(
+    'minus_webhook_retries_total',
+    'Webhook deliveries retried after a failure')
+EVENTS_COALESCED = counter(
+    'minus_webhook_events_coalesced_total',
+    'Webhook events merged into a newer event of the same type')
+EVENTS_DROPPED = counter(
+    'minus_webhook_events_dropped_total',
+    'Webhook events given up on', ['reason'])
+
+# Pairs whose relative order matters (state transitions)
+_OPPOSITE = {
+    'blocking_started': 'blocking_stopped',
+    'blocking_stopped': 'blocking_started',
+}
+
+_CLOSED_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class _PendingEvent:
+    """An event waiting for the dispatcher."""
+
+    __slots__ = ('event', 'data', 'timestamp', 'queued', 'coalesced')
+
+    def __init__(self, event: str, data: dict, queued: float):
+        self.event = event
+        self.data = data
+        self.timestamp = time.time()
+        self.queued = queued  # When its batch window opened
+        self.coalesced = 0
+
+    def to_dict(self) -> dict:
+        entry = {'event': self.event, 'timestamp': self.timestamp, 'data': self.data}
+        if self.coalesced:
+            entry['coalesced'] = self.coalesced
+        return entry
+
+
+class _Payload:
+    __slots__ = ('body', 'events')
+
+    def __init__(self, body: bytes, events: int):
+        self.body = body
+        self.events = events
+
+
+class _Endpoint:
+    """Sender thread and keep-alive connection for one webhook URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+        parts = urllib.parse.urlsplit(url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname or ''
+        self._port = parts.port
+        self._path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self._headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'Minus/1.0',
+        }
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._failing = 0
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"Webhook-{self._host}")
+        self._thread.start()
+
+    def put(self, payload: _Payload):
+        with self._cond:
+            if self._stopped:
+                return
+            if len(self._queue) >= MAX_QUEUED_PAYLOADS:
+                dropped = self._queue.popleft()
+                EVENTS_DROPPED.labels(reason='queue_full').inc(dropped.events)
+                logger.warning(f"[Webhook] {self.url} is behind, dropped its oldest payload")
+            self._queue.append(payload)
+            self._cond.notify()
+
+    @property
+    def queued(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            dropped = sum(payload.events for payload in self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        if dropped:
+            EVENTS_DROPPED.labels(reason='removed').inc(dropped)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    break
+                payload = self._queue.popleft()
+            self._deliver(payload)
+        self._close()
+
+    def _deliver(self, payload: _Payload):
+        for attempt in range(MAX_ATTEMPTS):
+            outcome = self._post(payload.body)
+            if outcome == 'ok':
+                EVENTS_DELIVERED.inc(payload.events)
+                if self._failing:
+                    logger.info(f"[Webhook] {self.url} recovered after {self._failing} failed attempts")
+                    self._failing = 0
+                return
+            self._failing += 1
+            if self._failing == 1:
+                logger.warning(f"[Webhook] Delivery to {self.url} failed ({outcome})")
+            if outcome == 'rejected':
+                EVENTS_DROPPED.labels(reason='rejected').inc(payload.events)
+                return
+            if attempt + 1 == MAX_ATTEMPTS:
+                break
+            DELIVERY_RETRIES.inc()
+            delay = min(RETRY_MAX_S, RETRY_BASE_S * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            with self._cond:
+                if self._cond.wait_for(lambda: self._stopped, timeout=delay):
+                    EVENTS_DROPPED.labels(reason='removed').inc(payload.events)
+                    return
+        EVENTS_DROPPED.labels(reason='retries').inc(payload.events)
+        logger.warning(f"[Webhook] Gave up on {self.url} after {MAX_ATTEMPTS} attempts")
+
+    def _post(self, body: bytes) -> str:
+        """'ok', 'rejected' (don't retry) or the retryable failure kind."""
+        for attempt in range(2):
+            reused = self._conn is not None
+            if self._conn is None:
+                cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+                self._conn = cls(self._host, self._port, timeout=REQUEST_TIMEOUT_S)
+            try:
+                self._conn.request('POST', self._path, body=body, headers=self._headers)
+                response = self._conn.getresponse()
+                response.read()
+            except _CLOSED_ERRORS:
+                # A kept-alive connection the server already closed
+                self._close()
+                if reused and attempt == 0:
+                    continue
+                return 'connection'
+            except TimeoutError:
+                self._close()
+                return 'timeout'
+            except (OSError, http.client.HTTPException):
+                self._close()
+                return 'connection'
+            if response.will_close:
+                self._close()
+            if response.status < 300:
+                return 'ok'
+            if response.status == 429 or response.status >= 500:
+                return f'HTTP {response.status}'
+            return 'rejected'
+        return 'connection'
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
 
 class WebhookManager:
     """
@@ -36,8 +258,15 @@ class WebhookManager:
         self.urls = urls or []
         self.enabled = enabled
         self._lock = threading.Lock()
-        self._last_notification_time = 0
-        self._min_notification_interval = 1.0  # Rate limit to 1 per second
+        self._min_notification_interval = 1.0  # Per event type; later ones coalesce
+        self.batch_window = BATCH_WINDOW_S
+        self._cond = threading.Condition(self._lock)
+        self._pending: "OrderedDict[str, _PendingEvent]" = OrderedDict()
+        self._last_sent: Dict[str, float] = {}  # event type -> monotonic time
+        self._window_opened: Optional[float] = None
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
 
     def add_url(self, url: str):
         """Add a webhook URL."""
@@ -65,7 +294,7 @@ class WebhookManager:
 
     def notify(self, event: str, data: dict = None):
         """
-        Send notification to all webhook URLs.
+        Queue a notification for all webhook URLs (returns immediately).
 
         Args:
             event: Event type (blocking_started, blocking_stopped, ad_detected)
@@ -75,54 +304,110 @@ class WebhookManager:
             return
 
         with self._lock:
-            if not self.urls:
+            if not self.urls or self._closed:
                 return
 
-            # Rate limiting
-            now = time.time()
-            if now - self._last_notification_time < self._min_notification_interval:
-                return
-            self._last_notification_time = now
-
-            urls = list(self.urls)
-
-        # Send notifications in background thread to avoid blocking
-        threading.Thread(
-            target=self._send_notifications,
-            args=(event, data or {}, urls),
-            daemon=True
-        ).start()
-
-    def _send_notifications(self, event: str, data: dict, urls: List[str]):
-        """Send notifications to all URLs (runs in background thread)."""
-        payload = {
-            'event': event,
-            'timestamp': time.time(),
-            'data': data
-        }
+            pending = self._pending.pop(event, None)
+            if pending is not None:
+                # Same type still waiting: keep its place in the window,
+                # move it behind newer events, take the latest data
+                pending.data = data or {}
+                pending.timestamp = time.time()
+                pending.coalesced += 1
+                EVENTS_COALESCED.inc()
+            else:
+                # Events in one window share its start, so they are ready together
+                now = time.monotonic()
+                if self._window_opened is None or now - self._window_opened >= self.batch_window:
+                    self._window_opened = now
+                pending = _PendingEvent(event, data or {}, self._window_opened)
+                if len(self._pending) >= MAX_PENDING_EVENTS:
+                    self._pending.popitem(last=False)
+                    EVENTS_DROPPED.labels(reason='queue_full').inc()
+            self._pending[event] = pending
 
-        json_data = json.dumps(payload).encode('utf-8')
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True,
+                                                    name="WebhookDispatch")
+                self._dispatcher.start()
+            self._cond.notify()
 
-        for url in urls:
-            try:
-                req = urllib.request.Request(
-                    url,
-                    data=json_data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'Minus/1.0'
-                    },
-                    method='POST'
-                )
-                with urllib.request.urlopen(req, timeout=5.0) as response:
-                    if response.status < 300:
-                        logger.debug(f"[Webhook] Sent {event} to {url}")
-                    else:
-                        logger.warning(f"[Webhook] Failed to send to {url}: HTTP {response.status}")
-            except urllib.error.URLError as e:
-                logger.debug(f"[Webhook] Network error sending to {url}: {e}")
-            except Exception as e:
-                logger.debug(f"[Webhook] Error sending to {url}: {e}")
+    def _ready_at(self, pending: _PendingEvent) -> float:
+        last = self._last_sent.get(pending.event)
+        earliest = pending.queued + self.batch_window
+        if last is not None:
+            earliest = max(earliest, last + self._min_notification_interval)
+        opposite = _OPPOSITE.get(pending.event)
+        if opposite is not None:
+            # Not before an opposite event queued ahead of us (lock held)
+            for other in self._pending.values():
+                if other is pending:
+                    break
+                if other.event == opposite:
+                    earliest = max(earliest, self._ready_at(other))
+        return earliest
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    ready_at = min((self._ready_at(p) for p in self._pending.values()),
+                                   default=None)
+                    if ready_at is not None and ready_at <= now:
+                        break
+                    self._cond.wait(None if ready_at is None else ready_at - now)
+                batch = [p for p in self._pending.values() if self._ready_at(p) <= now]
+                for pending in batch:
+                    del self._pending[pending.event]
+                    self._last_sent[pending.event] = now
+                endpoints = self._sync_endpoints()
+            self._dispatch(batch, endpoints)
+
+    def _sync_endpoints(self) -> List[_Endpoint]:
+        """Endpoints for the current URLs; stops those whose URL is gone (lock held)."""
+        for url in list(self._endpoints):
+            if url not in self.urls:
+                self._endpoints.pop(url).stop()
+        for url in self.urls:
+            if url not in self._endpoints:
+                self._endpoints[url] = _Endpoint(url)
+        return list(self._endpoints.values())
+
+    def _dispatch(self, batch: List[_PendingEvent], endpoints: List[_Endpoint]):
+        if len(batch) == 1:
+            payload = batch[0].to_dict()
+        else:
+            payload = {
+                'event': 'batch',
+                'timestamp': time.time(),
+                'events': [pending.to_dict() for pending in batch],
+            }
+        body = _Payload(json.dumps(payload).encode('utf-8'), len(batch))
+        for endpoint in endpoints:
+            endpoint.put(body)
+
+    def stats(self) -> dict:
+        """Events waiting for dispatch and payloads waiting per endpoint."""
+        with self._lock:
+            endpoints = dict(self._endpoints)
+            pending = len(self._pending)
+        return {
+            'pending_events': pending,
+            'queued_payloads': {url: endpoint.queued for url, endpoint in endpoints.items()},
+        }
+
+    def close(self):
+        """Stop the dispatcher and every endpoint's sender."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            endpoints, self._endpoints = list(self._endpoints.values()), {}
+            self._cond.notify_all()
+        for endpoint in endpoints:
+            endpoint.stop()
 
 
 # Global instance for easy access
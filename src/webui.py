@@ -27,11 +27,11 @@ import threading
 import time
 from pathlib import Path
 
-from flask import Flask, jsonify, request, Response, send_from_directory, redirect
+from flask import Flask, jsonify, request, Response, send_file, send_from_directory, redirect
 import requests
 
+from thermal_governor import AXCL_SMI_PATH, read_axera_temperature
 
-AXCL_SMI_PATH = '/usr/bin/axcl/axcl-smi'
 _axera_metrics_cache = {'ts': 0.0, 'data': None}
 _AXERA_METRICS_TTL = 5.0
 
@@ -52,13 +52,10 @@ def get_axera_metrics():
     if not os.path.exists(AXCL_SMI_PATH):
         return None
     metrics = {}
+    temperature = read_axera_temperature()
+    if temperature is not None:
+        metrics['temperature_c'] = temperature
     try:
-        r = subprocess.run([AXCL_SMI_PATH, 'info', '--temp'],
-                           capture_output=True, text=True, timeout=1.0)
-        m = re.search(r'temperature\s*:\s*(\d+)', r.stdout)
-        if m:
-            # axcl-smi returns temperature in milli-degrees Celsius
-            metrics['temperature_c'] = int(m.group(1)) / 1000.0
         r = subprocess.run([AXCL_SMI_PATH, 'info', '--npu'],
                            capture_output=True, text=True, timeout=1.0)
         m = re.search(r':\s*(\d+)%', r.stdout)
@@ -82,8 +79,21 @@ def get_axera_metrics():
 
 from src.wifi_manager import get_wifi_manager
 
-# Reviewed screenshots tracking
-REVIEWED_FILE = Path("/home/radxa/.minus_reviewed_screenshots.json")
+# Screenshot tree served by the gallery / review endpoints. Listing and
+# review state come from the screenshot catalog (screenshot_catalog.py),
+# which also imports the legacy reviewed-JSON file on first open.
+SCREENSHOTS_BASE = Path(__file__).parent.parent / 'screenshots'
+
+# Image responses (originals and ?size= derivatives) are cacheable for 30
+# days; ETag / Last-Modified let the browser revalidate cheaply after that.
+THUMB_MAX_AGE = 30 * 24 * 3600
+
+# Review cards whose previews are generated ahead of the first swipe
+REVIEW_PREFETCH = 10
+
+# Idle /api/events streams send a comment this often (keeps proxies and
+# the browser's EventSource from timing the connection out)
+EVENTS_KEEPALIVE_S = 15.0
 
 logger = logging.getLogger('Minus.WebUI')
 
@@ -106,11 +116,24 @@ class WebUI:
         self.server_thread = None
         self.running = False
 
-        # Screenshot review state
-        self._reviewed = set()
-        self._reviewed_lock = threading.Lock()
+        # Screenshot review state (reviewed flags live in the catalog)
         self._undo_stack = []  # [{action, filename, source, target}]
-        self._load_reviewed()
+
+        # Cached, versioned status topics shared by the REST endpoints and
+        # the /api/events stream (see status_publisher.py)
+        from status_publisher import StatusPublisher
+        self.status_publisher = StatusPublisher()
+        self.status_publisher.add_topic('status', lambda: self.minus.get_status_dict(), 1.0)
+        self.status_publisher.add_topic('stats', self._build_stats, 2.0)
+        self.status_publisher.add_topic('audio', self._build_audio_status, 2.0)
+        self.status_publisher.add_topic('vlm', self._build_vlm_status, 3.0)
+
+        # One shared ustreamer connection for every preview viewer and
+        # /snapshot (see mjpeg_broadcaster.py); no thread until first use
+        from mjpeg_broadcaster import MJPEGBroadcaster
+        self.broadcaster = MJPEGBroadcaster(f'http://localhost:{ustreamer_port}/stream')
+
+        self._register_metrics()
 
         # Create Flask app
         self.app = Flask(
@@ -123,6 +146,12 @@ class WebUI:
         log = logging.getLogger('werkzeug')
         log.setLevel(logging.WARNING)
 
+        # Request timing + gzip (see web_server.py)
+        from web_server import install_compression, install_request_timing
+        install_request_timing(self.app)
+        install_compression(self.app)
+        self.server = None
+
         # Register routes
         self._register_routes()
 
@@ -139,14 +168,59 @@ class WebUI:
 
         @self.app.route('/api/status')
         def api_status():
-            """Get current status."""
+            """Get current status (cached snapshot, see status_publisher.py)."""
             try:
-                status = self.minus.get_status_dict()
+                status = self.status_publisher.get('status')
                 return jsonify(status)
             except Exception as e:
                 logger.error(f"Error getting status: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
 
+        @self.app.route('/api/events')
+        def api_events():
+            """Live status stream (Server-Sent Events).
+
+            Sends `snapshot` ({version, topics: {status, stats, audio, vlm}})
+            on connect and after falling behind, then one `delta` event
+            ({version, topic, changes, removed}) per topic change, with a
+            keepalive comment every EVENTS_KEEPALIVE_S.
+            """
+            publisher = self.status_publisher
+            publisher.start()
+
+            def sse(event, payload):
+                return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+            def stream():
+                publisher.subscribe()
+                try:
+                    # Build anything not cached yet so the first frame is complete
+                    for topic in ('status', 'stats', 'audio', 'vlm'):
+                        try:
+                            publisher.get(topic)
+                        except Exception:
+                            pass  # Logged by the publisher; left out of the snapshot
+                    version, topics = publisher.snapshot()
+                    yield sse('snapshot', {'version': version, 'topics': topics})
+                    while publisher.running:
+                        deltas = publisher.wait_for_deltas(version, EVENTS_KEEPALIVE_S)
+                        if deltas is None:
+                            version, topics = publisher.snapshot()
+                            yield sse('snapshot', {'version': version, 'topics': topics})
+                        elif not deltas:
+                            yield ': keepalive\n\n'
+                        else:
+                            for delta in deltas:
+                                yield sse('delta', delta)
+                            version = deltas[-1]['version']
+                finally:
+                    publisher.unsubscribe()
+
+            return Response(stream(), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            })
+
         @self.app.route('/api/pause/<int:minutes>', methods=['POST'])
         def api_pause(minutes):
             """Pause blocking for specified minutes (1-600)."""
@@ -155,6 +229,7 @@ class WebUI:
 
             try:
                 self.minus.pause_blocking(minutes * 60)
+                self._publish_change('status')
                 return jsonify({
                     'success': True,
                     'paused_until': self.minus.blocking_paused_until,
@@ -169,6 +244,7 @@ class WebUI:
             """Resume blocking immediately."""
             try:
                 self.minus.resume_blocking()
+                self._publish_change('status')
                 return jsonify({'success': True})
             except Exception as e:
                 logger.error(f"Error resuming: {e}")
@@ -187,19 +263,120 @@ class WebUI:
 
         @self.app.route('/api/logs')
         def api_logs():
-            """Get recent log lines."""
+            """Get recent log lines.
+
+            Served from the in-memory log ring (see log_ring.py). Query
+            params: since (seq cursor from a previous response's last_seq),
+            limit (or lines; default 100), level (minimum), component ("Screenshot"
+            for "[Screenshot] ..." lines), q (substring).
+            """
             try:
-                log_file = Path('/tmp/minus.log')
-                if log_file.exists():
-                    # Read last 100 lines
-                    with open(log_file, 'r') as f:
-                        lines = f.readlines()[-100:]
-                    return jsonify({'lines': [line.rstrip() for line in lines]})
-                return jsonify({'lines': []})
+                import log_ring
+                limit = int(request.args.get('limit', request.args.get('lines', 100)))
+                limit = max(1, min(limit, 1000))
+                if not log_ring.is_installed():
+                    # Not running under minus.py: tail the file instead
+                    log_file = Path('/tmp/minus.log')
+                    lines = log_ring.read_tail_lines(log_file, limit) if log_file.exists() else []
+                    return jsonify({'lines': lines, 'records': [], 'last_seq': 0})
+                records, last_seq = log_ring.get_log_ring().query(
+                    since=int(request.args.get('since', 0)),
+                    limit=limit,
+                    level=request.args.get('level'),
+                    component=request.args.get('component'),
+                    text=request.args.get('q'),
+                )
+                return jsonify({
+                    'lines': [r['line'] for r in records],
+                    'records': records,
+                    'last_seq': last_seq,
+                })
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
             except Exception as e:
                 logger.error(f"Error reading logs: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
 
+        @self.app.route('/api/logs/stream')
+        def api_logs_stream():
+            """Live log tail (Server-Sent Events).
+
+            One `log` event per record (id = seq, so EventSource resumes via
+            Last-Event-ID), with the same filters as /api/logs. Starts with
+            the last `limit` matching records unless `since` is given.
+            """
+            import log_ring
+            if not log_ring.is_installed():
+                return jsonify({'success': False, 'error': 'Log ring not active'}), 503
+            ring = log_ring.get_log_ring()
+            filters = {
+                'level': request.args.get('level'),
+                'component': request.args.get('component'),
+                'text': request.args.get('q'),
+            }
+            try:
+                since = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+                limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+                records, cursor = ring.query(since=since, limit=limit, **filters)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+            def stream(records, cursor):
+                while True:
+                    for rec in records:
+                        yield f"id: {rec['seq']}\nevent: log\ndata: {json.dumps(rec)}\n\n"
+                    if not ring.wait(cursor, EVENTS_KEEPALIVE_S):
+                        yield ': keepalive\n\n'
+                    records, cursor = ring.query(since=cursor, limit=0, **filters)
+
+            return Response(stream(records, cursor), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            })
+
+        @self.app.route('/api/trace')
+        def api_trace_status():
+            """Frame tracing status (see tracing.py)."""
+            import tracing
+            return jsonify(tracing.get_tracer().get_stats())
+
+        @self.app.route('/api/trace/enable', methods=['POST'])
+        def api_trace_enable():
+            """Start tracing frames. Optional JSON body: {"sample_rate": 0.25}."""
+            import tracing
+            try:
+                data = request.get_json(silent=True) or {}
+                sample_rate = data.get('sample_rate')
+                tracing.get_tracer().configure(
+                    enabled=True,
+                    sample_rate=float(sample_rate) if sample_rate is not None else None)
+                return jsonify({'success': True, **tracing.get_tracer().get_stats()})
+            except (TypeError, ValueError) as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+        @self.app.route('/api/trace/disable', methods=['POST'])
+        def api_trace_disable():
+            """Stop tracing (buffered spans stay exportable)."""
+            import tracing
+            tracing.get_tracer().configure(enabled=False)
+            return jsonify({'success': True, **tracing.get_tracer().get_stats()})
+
+        @self.app.route('/api/trace/export')
+        def api_trace_export():
+            """Last `seconds` (default 30) of spans as Chrome trace-event JSON.
+
+            Open the file in ui.perfetto.dev or chrome://tracing.
+            """
+            import tracing
+            try:
+                seconds = float(request.args.get('seconds', 30))
+            except ValueError:
+                return jsonify({'success': False, 'error': 'seconds must be a number'}), 400
+            filename = f"minus-trace-{time.strftime('%Y%m%d-%H%M%S')}.json"
+            return Response(json.dumps(tracing.get_tracer().export(seconds)),
+                            mimetype='application/json',
+                            headers={'Content-Disposition': f'attachment; filename={filename}'})
+
         @self.app.route('/api/preview')
         def api_preview_status():
             """Get preview window status."""
@@ -571,47 +748,31 @@ class WebUI:
 
         @self.app.route('/stream')
         def stream_proxy():
-            """Proxy the MJPEG stream from ustreamer (for CORS bypass)."""
-            try:
-                # Stream from ustreamer
-                url = f'http://localhost:{self.ustreamer_port}/stream'
-                req = requests.get(url, stream=True, timeout=10)
-
-                def generate():
-                    try:
-                        for chunk in req.iter_content(chunk_size=8192):
-                            if chunk:
-                                yield chunk
-                    finally:
-                        # Ensure the upstream socket is closed when the client
-                        # disconnects; otherwise we leak sockets on every page
-                        # refresh / stream reconnect.
-                        req.close()
-
-                # Pass through the Content-Type from ustreamer (includes correct boundary)
-                content_type = req.headers.get('Content-Type', 'multipart/x-mixed-replace;boundary=boundarydonotcross')
+            """MJPEG preview, fanned out from one shared ustreamer connection.
 
-                return Response(
-                    generate(),
-                    mimetype=content_type,
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0',
-                    }
-                )
-            except Exception as e:
-                logger.error(f"Stream proxy error: {e}")
-                return Response(status=503)
+            ?tier=low serves a reduced stream (~5fps, 640px wide) for phones.
+            """
+            tier = request.args.get('tier', 'full')
+            return Response(
+                self.broadcaster.stream(tier),
+                mimetype=self.broadcaster.content_type,
+                headers={
+                    'Cache-Control': 'no-cache, no-store, must-revalidate',
+                    'Pragma': 'no-cache',
+                    'Expires': '0',
+                }
+            )
 
         @self.app.route('/snapshot')
         def snapshot_proxy():
-            """Proxy a single snapshot from ustreamer."""
+            """Latest preview frame (cached from the stream, else one from ustreamer)."""
             try:
-                url = f'http://localhost:{self.ustreamer_port}/snapshot'
-                req = requests.get(url, timeout=5)
+                jpeg = self.broadcaster.latest_frame()
+                if jpeg is None:
+                    url = f'http://localhost:{self.ustreamer_port}/snapshot'
+                    jpeg = requests.get(url, timeout=2).content
                 return Response(
-                    req.content,
+                    jpeg,
                     mimetype='image/jpeg',
                     headers={
                         'Cache-Control': 'no-cache, no-store, must-revalidate',
@@ -1077,17 +1238,25 @@ class WebUI:
             - type: 'ads', 'non_ads', 'vlm_spastic', 'static' (default: 'ads')
             - page: page number starting from 1 (default: 1)
             - limit: items per page (default: 5, max: 20)
+            - cursor: keyset cursor from a previous response's next_cursor
+              (takes precedence over page)
+            - keyword: only screenshots whose OCR matched this keyword
+            - source: only screenshots from this source (ocr, vlm, static,
+              user, sampler)
             """
             try:
                 screenshot_type = request.args.get('type', 'ads')
                 page = max(1, int(request.args.get('page', 1)))
                 limit = min(20, max(1, int(request.args.get('limit', 5))))
+                cursor = request.args.get('cursor') or None
+                keyword = request.args.get('keyword') or None
+                source = request.args.get('source') or None
 
                 valid_types = ['ads', 'non_ads', 'vlm_spastic', 'static']
                 if screenshot_type not in valid_types:
                     screenshot_type = 'ads'
 
-                screenshots_dir = Path(__file__).parent.parent / 'screenshots' / screenshot_type
+                screenshots_dir = SCREENSHOTS_BASE / screenshot_type
 
                 if not screenshots_dir.exists():
                     return jsonify({
@@ -1095,27 +1264,35 @@ class WebUI:
                         'total': 0,
                         'page': page,
                         'pages': 0,
-                        'has_more': False
+                        'has_more': False,
+                        'next_cursor': None,
                     })
 
-                # Get all files sorted by modification time
-                all_files = sorted(screenshots_dir.glob('*.png'), key=lambda x: x.stat().st_mtime, reverse=True)
-                total = len(all_files)
+                # Newest first, straight off the catalog's (category, ts) index
+                catalog = self._screenshot_catalog()
+                total = catalog.count(screenshot_type, keyword=keyword, source=source)
                 pages = (total + limit - 1) // limit  # Ceiling division
-
-                # Paginate
-                start = (page - 1) * limit
-                end = start + limit
-                files = all_files[start:end]
-
-                screenshots = [{'name': f.name, 'path': f'/api/screenshots/{screenshot_type}/{f.name}'} for f in files]
+                rows, next_cursor = catalog.page(
+                    screenshot_type, limit=limit, cursor=cursor,
+                    offset=(page - 1) * limit, keyword=keyword, source=source)
+
+                screenshots = [{
+                    'name': r['name'],
+                    'path': f"/api/screenshots/{screenshot_type}/{r['name']}",
+                    'ts': r['ts'],
+                    'size': r['size'],
+                    'source': r['source'],
+                    'keywords': r['keywords'],
+                    'reviewed': r['reviewed'],
+                } for r in rows]
 
                 return jsonify({
                     'screenshots': screenshots,
                     'total': total,
                     'page': page,
                     'pages': pages,
-                    'has_more': page < pages
+                    'has_more': next_cursor is not None,
+                    'next_cursor': next_cursor,
                 })
             except Exception as e:
                 logger.error(f"Error listing screenshots: {e}")
@@ -1123,7 +1300,12 @@ class WebUI:
 
         @self.app.route('/api/screenshots/<subdir>/<filename>')
         def api_screenshot_file(subdir, filename):
-            """Serve a screenshot file."""
+            """Serve a screenshot file.
+
+            Query params:
+            - size: 'thumb' (320px) or 'preview' (960px) serves a cached
+              derivative instead of the full-resolution original
+            """
             try:
                 valid_subdirs = ['ads', 'non_ads', 'vlm_spastic', 'static', 'debug']
                 if subdir not in valid_subdirs:
@@ -1131,8 +1313,15 @@ class WebUI:
                 # Sanitize filename
                 if '..' in filename or '/' in filename:
                     return Response(status=400)
-                screenshots_dir = Path(__file__).parent.parent / 'screenshots' / subdir
-                return send_from_directory(screenshots_dir, filename)
+                screenshots_dir = SCREENSHOTS_BASE / subdir
+                size = request.args.get('size')
+                if size:
+                    derivative = self._send_derivative(screenshots_dir / filename, size)
+                    if derivative is not None:
+                        return derivative
+                # Originals never change under the same name (atomic writes)
+                return send_from_directory(screenshots_dir, filename,
+                                           max_age=THUMB_MAX_AGE)
             except Exception as e:
                 logger.error(f"Error serving screenshot: {e}")
                 return Response(status=404)
@@ -1145,32 +1334,43 @@ class WebUI:
         def api_screenshots_review(category):
             """Get unreviewed screenshots for swipe classification.
 
-            Returns oldest-first, skipping already-reviewed items.
+            Returns oldest-first, skipping already-reviewed items. Pass
+            `cursor` (the previous response's next_cursor) for the next batch.
             """
             try:
                 valid = {'ads', 'non_ads', 'vlm_spastic', 'static'}
                 if category not in valid:
                     return jsonify({'error': 'Invalid category'}), 400
 
-                screenshots_dir = Path(__file__).parent.parent / 'screenshots' / category
+                screenshots_dir = SCREENSHOTS_BASE / category
                 if not screenshots_dir.exists():
                     return jsonify({'items': [], 'total': 0, 'unreviewed': 0, 'reviewed_count': 0})
 
-                all_files = sorted(screenshots_dir.glob('*.png'), key=lambda x: x.stat().st_mtime)
-                total = len(all_files)
-                unreviewed = [f for f in all_files if f.name not in self._reviewed]
+                catalog = self._screenshot_catalog()
+                total = catalog.count(category)
+                unreviewed = catalog.count(category, reviewed=False)
 
                 # Return up to 200 items (lazy-load images on frontend)
+                rows, next_cursor = catalog.page(
+                    category, limit=200, cursor=request.args.get('cursor') or None,
+                    newest_first=False, reviewed=False)
+
+                # Warm the review-card previews for the first few cards
+                from thumbnail_cache import get_thumbnail_cache
+                thumbs = get_thumbnail_cache()
+                for r in rows[:REVIEW_PREFETCH]:
+                    thumbs.prefetch(screenshots_dir / r['name'], 'preview')
                 items = [{
-                    'name': f.name,
-                    'path': f'/api/screenshots/{category}/{f.name}',
-                } for f in unreviewed[:200]]
+                    'name': r['name'],
+                    'path': f"/api/screenshots/{category}/{r['name']}",
+                } for r in rows]
 
                 return jsonify({
                     'items': items,
                     'total': total,
-                    'unreviewed': len(unreviewed),
-                    'reviewed_count': total - len(unreviewed),
+                    'unreviewed': unreviewed,
+                    'reviewed_count': total - unreviewed,
+                    'next_cursor': next_cursor,
                 })
             except Exception as e:
                 logger.error(f"Error listing review screenshots: {e}")
@@ -1192,7 +1392,7 @@ class WebUI:
                 if not filename or '..' in filename or '/' in filename:
                     return jsonify({'error': 'Invalid filename'}), 400
 
-                base = Path(__file__).parent.parent / 'screenshots'
+                base = SCREENSHOTS_BASE
                 source_path = base / source / filename
                 if not source_path.exists():
                     return jsonify({'error': 'File not found'}), 404
@@ -1201,12 +1401,14 @@ class WebUI:
                 # Handle filename collision
                 if target_path.exists():
                     stem = target_path.stem
-                    target_path = base / target / f"{stem}_reclassified.png"
+                    target_path = base / target / f"{stem}_reclassified{target_path.suffix}"
 
+                st = source_path.stat()
                 shutil.move(str(source_path), str(target_path))
 
-                self._reviewed.add(target_path.name)
-                self._save_reviewed()
+                self._screenshot_catalog().move(
+                    source, filename, target, target_path.name, reviewed=True,
+                    ts=st.st_mtime, size=st.st_size)
 
                 self._undo_stack.append({
                     'action': 'classify',
@@ -1232,13 +1434,18 @@ class WebUI:
                 if not filename or not category:
                     return jsonify({'error': 'Missing filename or category'}), 400
 
-                base = Path(__file__).parent.parent / 'screenshots'
-                path = base / category / filename
+                if '..' in category or '/' in category or '..' in filename or '/' in filename:
+                    return jsonify({'error': 'Invalid filename or category'}), 400
+
+                path = SCREENSHOTS_BASE / category / filename
                 if not path.exists():
                     return jsonify({'error': 'File not found'}), 404
 
-                self._reviewed.add(filename)
-                self._save_reviewed()
+                catalog = self._screenshot_catalog()
+                if not catalog.set_reviewed(category, filename, True):
+                    st = path.stat()
+                    catalog.move(category, filename, category, filename, reviewed=True,
+                                 ts=st.st_mtime, size=st.st_size)
 
                 self._undo_stack.append({
                     'action': 'approve',
@@ -1259,18 +1466,18 @@ class WebUI:
                     return jsonify({'error': 'Nothing to undo'}), 400
 
                 last = self._undo_stack.pop()
-                base = Path(__file__).parent.parent / 'screenshots'
+                base = SCREENSHOTS_BASE
+                catalog = self._screenshot_catalog()
 
                 if last['action'] == 'classify':
                     current = base / last['target'] / last['new_name']
                     original = base / last['source'] / last['original_name']
                     if current.exists():
                         shutil.move(str(current), str(original))
-                    self._reviewed.discard(last['new_name'])
-                    self._save_reviewed()
+                    catalog.move(last['target'], last['new_name'],
+                                 last['source'], last['original_name'], reviewed=False)
                 elif last['action'] == 'approve':
-                    self._reviewed.discard(last['original_name'])
-                    self._save_reviewed()
+                    catalog.set_reviewed(last['category'], last['original_name'], False)
 
                 return jsonify({'success': True, 'undone': last})
             except Exception as e:
@@ -1317,11 +1524,15 @@ class WebUI:
                     logger.warning(f"[WebUI] Failed to capture snapshot: {e}")
 
                 # Read last 100 log lines
+                import log_ring
                 log_lines = []
-                log_file = Path('/tmp/minus.log')
-                if log_file.exists():
-                    with open(log_file, 'r') as f:
-                        log_lines = [line.rstrip() for line in f.readlines()[-100:]]
+                if log_ring.is_installed():
+                    records, _ = log_ring.get_log_ring().query(limit=100)
+                    log_lines = [r['line'] for r in records]
+                else:
+                    log_file = Path('/tmp/minus.log')
+                    if log_file.exists():
+                        log_lines = log_ring.read_tail_lines(log_file, 100)
 
                 # Save log lines to companion file
                 log_filename = f'debug_{timestamp}.log'
@@ -1815,26 +2026,7 @@ class WebUI:
         def api_stats():
             """Get blocking statistics."""
             try:
-                stats = {
-                    'ads_blocked_today': 0,
-                    'total_blocking_time': 0,
-                    'time_saved': 0,
-                    'blocking_start_time': None,
-                    'current_blocking_duration': 0,
-                }
-
-                if self.minus.ad_blocker:
-                    stats['ads_blocked_today'] = getattr(self.minus.ad_blocker, '_total_ads_blocked', 0)
-                    stats['total_blocking_time'] = getattr(self.minus.ad_blocker, '_total_blocking_time', 0)
-                    stats['time_saved'] = getattr(self.minus.ad_blocker, '_total_time_saved', 0)
-
-                    if self.minus.ad_blocker.is_visible:
-                        start_time = getattr(self.minus.ad_blocker, '_current_block_start', 0)
-                        if start_time:
-                            stats['blocking_start_time'] = start_time
-                            stats['current_blocking_duration'] = time.time() - start_time
-
-                return jsonify(stats)
+                return jsonify(self.status_publisher.get('stats'))
             except Exception as e:
                 logger.error(f"Error getting stats: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -1847,10 +2039,7 @@ class WebUI:
         def api_audio_status():
             """Get audio mute status."""
             try:
-                muted = False
-                if hasattr(self.minus, 'audio') and self.minus.audio:
-                    muted = getattr(self.minus.audio, '_muted', False)
-                return jsonify({'muted': muted})
+                return jsonify(self.status_publisher.get('audio'))
             except Exception as e:
                 logger.error(f"Error getting audio status: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -1865,6 +2054,7 @@ class WebUI:
             try:
                 if hasattr(self.minus, 'audio') and self.minus.audio:
                     result = self.minus.audio.reset_av_sync()
+                    self._publish_change('audio')
                     logger.info(f"[WebUI] A/V sync reset: {result.get('message', 'unknown')}")
                     return jsonify(result)
                 return jsonify({'success': False, 'error': 'Audio not initialized'}), 500
@@ -1876,6 +2066,25 @@ class WebUI:
         # Webhooks
         # =========================================================================
 
+        @self.app.route('/api/placement')
+        def api_placement():
+            """Core placement policy, actual placement per task, per-core load."""
+            try:
+                from placement import get_placement_manager
+                return jsonify(get_placement_manager().report())
+            except Exception as e:
+                logger.error(f"Error getting placement: {e}")
+                return jsonify({'success': False, 'error': str(e)}), 500
+
+        @self.app.route('/api/boot')
+        def api_boot():
+            """Boot timeline: phases, milestones, critical path."""
+            try:
+                return jsonify(self.minus.boot.timeline())
+            except Exception as e:
+                logger.error(f"Error getting boot timeline: {e}")
+                return jsonify({'success': False, 'error': str(e)}), 500
+
         @self.app.route('/api/webhooks')
         def api_webhooks_get():
             """Get webhook configuration."""
@@ -1884,7 +2093,8 @@ class WebUI:
                 manager = get_webhook_manager()
                 return jsonify({
                     'enabled': manager.enabled,
-                    'urls': manager.get_urls()
+                    'urls': manager.get_urls(),
+                    'delivery': manager.stats(),
                 })
             except Exception as e:
                 logger.error(f"Error getting webhooks: {e}")
@@ -1940,7 +2150,7 @@ class WebUI:
                 manager.notify('test', {'message': 'Test notification from Minus'})
                 return jsonify({
                     'success': True,
-                    'message': f'Test notification sent to {len(manager.urls)} URL(s)'
+                    'message': f'Test notification queued for {len(manager.urls)} URL(s)'
                 })
             except Exception as e:
                 logger.error(f"Error testing webhooks: {e}")
@@ -1969,6 +2179,12 @@ class WebUI:
 
                 issues = []
 
+                # Shared snapshot from the health monitor loop (no checks
+                # run on this request thread)
+                hm_status = None
+                if hasattr(self.minus, 'health_monitor') and self.minus.health_monitor:
+                    hm_status = self.minus.health_monitor.get_status()
+
                 # Video subsystem
                 video_status = {'status': 'not_initialized'}
                 if hasattr(self.minus, 'ad_blocker') and self.minus.ad_blocker:
@@ -2003,11 +2219,10 @@ class WebUI:
                 # but projector silently wedged" state that a Minus restart
                 # does not fix. Surfaces it so the user can see when to power-
                 # cycle the TV.
-                if hasattr(self.minus, 'health_monitor') and self.minus.health_monitor:
-                    hm = self.minus.health_monitor
+                if hm_status is not None:
                     audio_status['hdmi_tx_link'] = {
-                        'ok': bool(getattr(hm, '_hdmi_tx_audio_link_ok', True)),
-                        'details': dict(getattr(hm, '_hdmi_tx_audio_link_details', {})),
+                        'ok': bool(hm_status.hdmi_tx_audio_link_ok),
+                        'details': hm_status.hdmi_tx_audio_link_details,
                     }
                     if not audio_status['hdmi_tx_link']['ok']:
                         issues.append('hdmi_tx_audio_link_desync')
@@ -2051,11 +2266,12 @@ class WebUI:
                 health['subsystems']['fire_tv'] = firetv_status
 
                 # Health monitor status
-                if hasattr(self.minus, 'health_monitor') and self.minus.health_monitor:
-                    hm_status = self.minus.health_monitor.get_status()
+                if hm_status is not None:
                     health['hdmi_signal'] = hm_status.hdmi_signal
                     health['hdmi_resolution'] = hm_status.hdmi_resolution
                     health['uptime_seconds'] = hm_status.uptime_seconds
+                    health['snapshot_age_seconds'] = round(
+                        max(0.0, time.time() - hm_status.collected_at), 2)
 
                 # File descriptor usage — we've had FD leaks cause 500 errors
                 # once the soft limit was hit. Surface fd count + limit for
@@ -2100,17 +2316,12 @@ class WebUI:
             Returns metrics in Prometheus text format for monitoring systems.
             """
             try:
+                from metrics import REGISTRY, format_metric
                 lines = []
 
-                # Helper to add metric
+                # Snapshot values read off live objects at scrape time
                 def add_metric(name, value, help_text, metric_type='gauge', labels=None):
-                    lines.append(f'# HELP {name} {help_text}')
-                    lines.append(f'# TYPE {name} {metric_type}')
-                    if labels:
-                        label_str = ','.join(f'{k}="{v}"' for k, v in labels.items())
-                        lines.append(f'{name}{{{label_str}}} {value}')
-                    else:
-                        lines.append(f'{name} {value}')
+                    lines.extend(format_metric(name, value, help_text, metric_type, labels))
 
                 # Uptime
                 uptime = 0
@@ -2188,7 +2399,9 @@ class WebUI:
                         add_metric('minus_axera_cmm_total_kib', axera['cmm_total_kib'],
                                    'Axera CMM memory total')
 
-                response = '\n'.join(lines) + '\n'
+                # Counters, gauges and latency histograms recorded by the
+                # hot paths (see metrics.py)
+                response = '\n'.join(lines) + '\n' + REGISTRY.render()
                 return response, 200, {'Content-Type': 'text/plain; charset=utf-8'}
             except Exception as e:
                 logger.error(f"Metrics error: {e}")
@@ -2426,14 +2639,7 @@ class WebUI:
         def api_vlm_status():
             """Get detailed VLM status including model load state."""
             try:
-                if hasattr(self.minus, 'get_vlm_status'):
-                    status = self.minus.get_vlm_status()
-                    return jsonify(status)
-                return jsonify({
-                    'initialized': False,
-                    'disabled': True,
-                    'model_loaded': False
-                })
+                return jsonify(self.status_publisher.get('vlm'))
             except Exception as e:
                 logger.error(f"Error getting VLM status: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -2448,6 +2654,7 @@ class WebUI:
             try:
                 if hasattr(self.minus, 'disable_vlm'):
                     result = self.minus.disable_vlm()
+                    self._publish_change('status', 'vlm')
                     if result.get('success'):
                         return jsonify(result)
                     return jsonify(result), 500
@@ -2466,6 +2673,7 @@ class WebUI:
             try:
                 if hasattr(self.minus, 'enable_vlm'):
                     result = self.minus.enable_vlm()
+                    self._publish_change('status', 'vlm')
                     if result.get('success'):
                         return jsonify(result)
                     return jsonify(result), 500
@@ -2496,6 +2704,7 @@ class WebUI:
             """Enable ASR (faster-whisper confirm/veto) and start the worker."""
             try:
                 result = self.minus.set_asr_enabled(True)
+                self._publish_change('status')
                 return jsonify(result), (200 if result.get('success') else 500)
             except Exception as e:
                 logger.error(f"Error enabling ASR: {e}")
@@ -2506,6 +2715,7 @@ class WebUI:
             """Disable ASR and stop the worker (frees the whisper model)."""
             try:
                 result = self.minus.set_asr_enabled(False)
+                self._publish_change('status')
                 return jsonify(result), (200 if result.get('success') else 500)
             except Exception as e:
                 logger.error(f"Error disabling ASR: {e}")
@@ -2675,12 +2885,18 @@ class WebUI:
                 if request.method == 'DELETE':
                     removed = lib.remove_photo(photo_id)
                     return jsonify({'success': removed})
-                # GET — return JPEG bytes inline
-                data = lib.get_photo_bytes(photo_id)
-                if data is None:
+                # GET — return JPEG inline (or a cached ?size= derivative).
+                # Photo ids are content hashes, so the id is a stable ETag.
+                path = lib.get_photo_path(photo_id)
+                if path is None:
                     return jsonify({'error': 'not found'}), 404
-                from flask import Response
-                return Response(data, mimetype='image/jpeg')
+                size = request.args.get('size')
+                if size:
+                    derivative = self._send_derivative(path, size)
+                    if derivative is not None:
+                        return derivative
+                return send_file(path, mimetype='image/jpeg', conditional=True,
+                                 etag=path.stem, max_age=THUMB_MAX_AGE)
             except Exception as e:
                 logger.error(f"Error in photo detail {photo_id}: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
@@ -2996,6 +3212,7 @@ class WebUI:
                     self.minus.ocr_ad_detected = False
                     self.minus.vlm_ad_detected = False
                     self.minus.blocking_source = None
+                    self.notify_status_changed()  # Mute and blocking state
                 import threading
                 threading.Thread(target=_unblock_after_skip, daemon=True).start()
 
@@ -3200,32 +3417,75 @@ class WebUI:
                 logger.error(f"Error setting autonomous mode schedule: {e}")
                 return jsonify({'success': False, 'error': str(e)}), 500
 
-    def _load_reviewed(self):
-        """Load reviewed screenshots set from disk."""
-        try:
-            if REVIEWED_FILE.exists():
-                with open(REVIEWED_FILE) as f:
-                    self._reviewed = set(json.load(f))
-                logger.info(f"[WebUI] Loaded {len(self._reviewed)} reviewed screenshots")
-        except Exception as e:
-            logger.warning(f"[WebUI] Could not load reviewed screenshots: {e}")
-            self._reviewed = set()
-
-    def _save_reviewed(self):
-        """Save reviewed screenshots set to disk (atomic, thread-safe).
-
-        Holds a lock across the full snapshot+write+rename so concurrent
-        review requests can't race on the JSON file. Atomic rename via a
-        tmp file prevents readers from ever seeing a partial write.
+    # =========================================================================
+    # Status topics (built by the status publisher, served from its cache)
+    # =========================================================================
+
+    def _build_stats(self) -> dict:
+        """Blocking statistics for /api/stats."""
+        stats = {
+            'ads_blocked_today': 0,
+            'total_blocking_time': 0,
+            'time_saved': 0,
+            'blocking_start_time': None,
+            'current_blocking_duration': 0,
+        }
+
+        if self.minus.ad_blocker:
+            stats['ads_blocked_today'] = getattr(self.minus.ad_blocker, '_total_ads_blocked', 0)
+            stats['total_blocking_time'] = getattr(self.minus.ad_blocker, '_total_blocking_time', 0)
+            stats['time_saved'] = getattr(self.minus.ad_blocker, '_total_time_saved', 0)
+
+            if self.minus.ad_blocker.is_visible:
+                start_time = getattr(self.minus.ad_blocker, '_current_block_start', 0)
+                if start_time:
+                    stats['blocking_start_time'] = start_time
+                    stats['current_blocking_duration'] = time.time() - start_time
+        return stats
+
+    def _build_audio_status(self) -> dict:
+        """Audio mute state for /api/audio/status."""
+        muted = False
+        if hasattr(self.minus, 'audio') and self.minus.audio:
+            muted = getattr(self.minus.audio, '_muted', False)
+        return {'muted': muted}
+
+    def _build_vlm_status(self) -> dict:
+        """VLM status (model load state) for /api/vlm/status."""
+        if hasattr(self.minus, 'get_vlm_status'):
+            return self.minus.get_vlm_status()
+        return {
+            'initialized': False,
+            'disabled': True,
+            'model_loaded': False
+        }
+
+    def _send_derivative(self, source: Path, size: str):
+        """Response for a cached thumbnail/preview of `source`, or None to
+        fall back to the original (unknown size, missing or undecodable).
+
+        Conditional: honours If-None-Match / If-Modified-Since with a 304.
+        """
+        from thumbnail_cache import get_thumbnail_cache
+        cache = get_thumbnail_cache()
+        result = cache.get(source, size)
+        if result is None:
+            return None
+        path, etag = result
+        return send_file(path, mimetype=cache.mimetype, conditional=True,
+                         etag=etag, last_modified=source.stat().st_mtime,
+                         max_age=THUMB_MAX_AGE)
+
+    def _screenshot_catalog(self):
+        """Shared screenshot catalog (same instance Minus' writer updates).
+
+        The first call on a fresh tree imports the existing files and the
+        legacy reviewed-JSON state; afterwards this is a dict lookup.
         """
-        try:
-            with self._reviewed_lock:
-                tmp = REVIEWED_FILE.with_suffix('.tmp')
-                with open(tmp, 'w') as f:
-                    json.dump(sorted(self._reviewed), f)
-                tmp.replace(REVIEWED_FILE)
-        except Exception as e:
-            logger.warning(f"[WebUI] Could not save reviewed screenshots: {e}")
+        from screenshot_catalog import get_screenshot_catalog
+        catalog = get_screenshot_catalog(SCREENSHOTS_BASE)
+        catalog.ensure_backfilled()
+        return catalog
 
     def start(self):
         """Start the web server in a background thread."""
@@ -3233,19 +3493,30 @@ class WebUI:
             return
 
         self.running = True
+        self.status_publisher.start()
 
         def run_server():
             logger.info(f"[WebUI] Starting on http://0.0.0.0:{self.port}")
-            try:
-                # Use threaded=True for concurrent requests
-                self.app.run(
-                    host='0.0.0.0',
-                    port=self.port,
-                    threaded=True,
-                    use_reloader=False,
-                    debug=False,
-                )
-            except Exception as e:
+            # Little cores; the server's worker threads inherit this
+            from placement import apply_placement
+            apply_placement('webui')
+            try:
+                if os.environ.get('MINUS_WEBUI_SERVER', 'pooled') == 'dev':
+                    # Flask development server: one thread per connection
+                    self.app.run(
+                        host='0.0.0.0',
+                        port=self.port,
+                        threaded=True,
+                        use_reloader=False,
+                        debug=False,
+                    )
+                    return
+                from web_server import PooledWSGIServer
+                self.server = PooledWSGIServer('0.0.0.0', self.port, self.app)
+                self.server.register_metrics()
+                self.server.serve_forever()
+            except (Exception, SystemExit) as e:
+                # werkzeug exits (SystemExit) when the port is taken
                 logger.error(f"[WebUI] Server error: {e}")
             finally:
                 self.running = False
@@ -3257,9 +3528,53 @@ class WebUI:
         time.sleep(0.5)
         logger.info(f"[WebUI] Server started on port {self.port}")
 
+    def _register_metrics(self):
+        """Scrape-time gauges/counters for state owned by other objects."""
+        from metrics import counter, gauge
+        from log_queue import get_log_queue_stats
+
+        minus = self.minus
+        depth = gauge('minus_queue_depth', 'Items waiting in internal queues', ['queue'])
+        depth.labels(queue='screenshot_writes').set_function(
+            lambda: len(minus.screenshot_manager._write_queue))
+        depth.labels(queue='log_records').set_function(
+            lambda: get_log_queue_stats()['queued'])
+        depth.labels(queue='ocr_requests').set_function(
+            lambda: minus.ocr.request_queue.qsize())
+        depth.labels(queue='vlm_requests').set_function(
+            lambda: minus.vlm.request_queue.qsize())
+
+        counter('minus_log_records_dropped_total',
+                'Log records dropped because the log queue was full').set_function(
+            lambda: get_log_queue_stats()['dropped'])
+        counter('minus_screenshot_writes_dropped_total',
+                'Screenshots dropped because the write queue was full').set_function(
+            lambda: minus.screenshot_manager.writes_dropped)
+        gauge('minus_preview_viewers', 'Open /stream viewers').set_function(
+            self.broadcaster.viewer_count)
+        gauge('minus_status_subscribers', 'Open /api/events streams').set_function(
+            lambda: self.status_publisher.get_stats()['subscribers'])
+
+    def notify_status_changed(self, topic: str = None):
+        """Push a fresh status snapshot now instead of on the next tick."""
+        self.status_publisher.poke(topic)
+
+    def _publish_change(self, *topics: str):
+        """Rebuild `topics` before a mutating route returns, so the
+        /api/status read the page makes right after sees the change."""
+        for topic in topics:
+            try:
+                self.status_publisher.refresh(topic)
+            except Exception as e:
+                logger.debug(f"[WebUI] status refresh failed: {e}")
+
     def stop(self):
         """Stop the web server."""
         self.running = False
+        self.status_publisher.stop()
         logger.info("[WebUI] Server stopping...")
-        # Flask doesn't have a clean shutdown in this mode,
-        # but since it's a daemon thread, it will stop when the process exits
+        if self.server is not None:
+            # Stops the accept loop; open streams end with the process
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        # The dev server has no clean shutdown, but its thread is a daemon
+        # and stops when the process exits
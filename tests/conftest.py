@@ -0,0 +1,8 @@
+"""Session-wide pytest setup."""
+
+import os
+
+# The suite runs as root on the device: keep thread placement from changing
+# nice, affinity and scheduling class of the test runner's own threads.
+# Placement tests opt back in with PlacementManager(enabled=True).
+os.environ['MINUS_PLACEMENT'] = 'off'
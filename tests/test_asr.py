@@ -213,13 +213,11 @@ class TestASRManager(unittest.TestCase):
         """A confirm from outside the 8s window should no longer count."""
         m = self._make()
         m.is_running = True
-        # Inject a hit, then time-travel forward beyond the window.
-        m._record_result('ok', 'Call now! Available at brand dot com.', 0.5)
+        # Inject a hit timestamped beyond the window.
         old_ts = time.time() - (m.HISTORY_WINDOW_S + 1)
-        # Replace the lone entry's timestamp
-        with m._lock:
-            ts, hits, words = m._history[0]
-            m._history[0] = (old_ts, hits, words)
+        with patch('asr.time.time', return_value=old_ts):
+            m._record_result('ok', 'Call now! Available at brand dot com.', 0.5)
+        self.assertEqual(len(m._history), 1)
         self.assertEqual(m.verdict(), 'unknown')
 
     def test_get_status_keys(self):
@@ -238,6 +236,28 @@ class TestASRManager(unittest.TestCase):
         self.assertEqual(s['engine'], expected_engine)
         self.assertIn(s['engine'], ('moonshine', 'faster-whisper'))
 
+    def test_stop_not_blocked_by_preload(self):
+        """A boot-time preload still loading must not hold up stop()."""
+        m = self._make()
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_start():
+            loading.set()
+            release.wait(5)
+            return True
+
+        m._process.start.side_effect = slow_start
+        with patch('asr.is_asr_available', return_value=True):
+            preload = threading.Thread(target=m.preload, daemon=True)
+            preload.start()
+            self.assertTrue(loading.wait(2))
+            t0 = time.monotonic()
+            m.stop()
+            self.assertLess(time.monotonic() - t0, 0.5)
+        release.set()
+        preload.join(2)
+
     def test_record_result_timeouts_increment_counter(self):
         m = self._make()
         m._record_result('timeout', '', 2.5)
@@ -356,6 +376,17 @@ class TestASRProcessTimeouts(unittest.TestCase):
         # After successful drain + fresh result, pending is cleared
         self.assertFalse(proc._pending_response)
 
+    def test_start_waits_for_load_in_progress(self):
+        """A second start() during a preload's load waits for that worker."""
+        proc = self._make()
+        proc.is_ready = False
+        proc.ready_event = threading.Event()
+        threading.Timer(0.2, proc.ready_event.set).start()
+        t0 = time.monotonic()
+        self.assertTrue(proc.start())
+        self.assertGreaterEqual(time.monotonic() - t0, 0.15)
+        self.assertTrue(proc.is_ready)
+
     def test_get_latency_stats_empty(self):
         from asr_worker import ASRProcess
         proc = ASRProcess()
@@ -10,6 +10,8 @@ import sys
 import os
 import tempfile
 import shutil
+import logging
+import json
 import time
 import threading
 from pathlib import Path
@@ -627,32 +629,23 @@ class TestOverlay:
         overlay.set_background_alpha(-10)
         assert overlay._bg_alpha == 0
 
-    @patch('overlay.urllib.request.urlopen')
-    def test_notification_overlay_show(self, mock_urlopen):
+    @patch('ustreamer_control.UstreamerControl.call', return_value={'ok': True})
+    def test_notification_overlay_show(self, mock_call):
         """Test showing overlay."""
         from overlay import NotificationOverlay
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.__enter__ = MagicMock(return_value=mock_response)
-        mock_response.__exit__ = MagicMock(return_value=False)
-        mock_urlopen.return_value = mock_response
 
         overlay = NotificationOverlay()
         overlay.show("Test message")
 
         assert overlay._visible is True
         assert overlay._current_text == "Test message"
-        mock_urlopen.assert_called()
+        mock_call.assert_called()
+        assert mock_call.call_args[0][0] == '/overlay/set'
 
-    @patch('overlay.urllib.request.urlopen')
-    def test_notification_overlay_hide(self, mock_urlopen):
+    @patch('ustreamer_control.UstreamerControl.call', return_value={'ok': True})
+    def test_notification_overlay_hide(self, mock_call):
         """Test hiding overlay."""
         from overlay import NotificationOverlay
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.__enter__ = MagicMock(return_value=mock_response)
-        mock_response.__exit__ = MagicMock(return_value=False)
-        mock_urlopen.return_value = mock_response
 
         overlay = NotificationOverlay()
         overlay._visible = True
@@ -1690,7 +1683,7 @@ class TestIntegration:
         """Test that overlay cleanup works properly."""
         from overlay import NotificationOverlay
 
-        with patch('overlay.urllib.request.urlopen'):
+        with patch('ustreamer_control.UstreamerControl.call'):
             overlay = NotificationOverlay()
             overlay._visible = True
             overlay._current_text = "Test"
@@ -4733,6 +4726,3407 @@ class TestHDCPHandling:
         assert ScreenshotManager._is_blank_frame(noisy_black) is True
 
 
+# ============================================================================
+# Vote Window Tests
+# ============================================================================
+
+class TestVoteWindow:
+    """Tests for vote_window.py (streaming VLM/ASR vote aggregation)."""
+
+    def test_agreement_is_confidence_weighted(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(8.0)
+        w.append(True, 0.9, now=100.0)
+        w.append(True, 0.9, now=100.5)
+        w.append(False, 0.2, now=101.0)
+        ad, no_ad, total = w.agreement(now=101.0)
+        assert total == 3
+        assert abs(ad - 1.8 / 2.0) < 1e-9
+        assert abs(no_ad - 0.2 / 2.0) < 1e-9
+
+    def test_empty_window_agreement(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(8.0)
+        assert w.agreement(now=0.0) == (0.0, 0.0, 0)
+        assert not w
+
+    def test_entries_expire_and_sums_follow(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(8.0)
+        w.append(True, 1.0, now=100.0)
+        w.append(False, 1.0, now=105.0)
+        assert w.agreement(now=105.0)[2] == 2
+        # First vote falls out of the 8s window
+        ad, no_ad, total = w.agreement(now=108.5)
+        assert total == 1
+        assert ad == 0.0 and no_ad == 1.0
+        assert w.agreement(now=200.0) == (0.0, 0.0, 0)
+
+    def test_matches_full_rescan(self):
+        """Running sums must agree with a brute-force recount."""
+        import random
+        from vote_window import VoteWindow
+        rng = random.Random(7)
+        w = VoteWindow(5.0)
+        history = []
+        now = 0.0
+        for _ in range(500):
+            now += rng.uniform(0.1, 1.5)
+            vote, conf = rng.random() < 0.4, rng.uniform(0.5, 1.0)
+            w.append(vote, conf, now=now)
+            history.append((now, vote, conf))
+            recent = [h for h in history if h[0] >= now - 5.0]
+            ad_w = sum(c for _, v, c in recent if v)
+            no_w = sum(c for _, v, c in recent if not v)
+            ad, no_ad, total = w.agreement(now=now)
+            assert total == len(recent)
+            assert abs(ad - ad_w / (ad_w + no_w)) < 1e-6
+            assert abs(no_ad - no_w / (ad_w + no_w)) < 1e-6
+
+    def test_maxlen_evicts_oldest(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(60.0, maxlen=3)
+        for i in range(5):
+            w.append(True, weight=i, now=float(i))
+        stats = w.stats(now=5.0)
+        assert stats.count == 3
+        assert stats.positive_weight == 2 + 3 + 4
+
+    def test_passes_applies_hysteresis_and_cap(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(8.0)
+        for t in range(4):
+            w.append(True, 0.8, now=float(t))
+        w.append(False, 0.8, now=4.0)
+        # 80% ad: clears 0.70 alone and 0.70 + 0.10 boost
+        assert w.passes(True, 0.70, min_count=3, boost=0.10, now=4.0)
+        # 0.75 + 0.10 = 0.85 is out of reach...
+        assert not w.passes(True, 0.75, min_count=3, boost=0.10, now=4.0)
+        # ...unless the cap pulls the requirement back down
+        assert w.passes(True, 0.75, min_count=3, boost=0.10, cap=0.80, now=4.0)
+        # Not enough decisions
+        assert not w.passes(True, 0.5, min_count=6, now=4.0)
+
+    def test_streak_and_last_n_consecutive(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(10.0)
+        for t, vote in enumerate([True, False, False, False]):
+            w.append(vote, now=float(t))
+        assert w.streak(False, now=3.0) == 3
+        assert w.streak(True, now=3.0) == 0
+        assert w.last_n_consecutive(3, False, now=3.0)
+        assert not w.last_n_consecutive(4, False, now=3.0)
+        # Expiry shortens the run to what is still in the window
+        assert w.streak(False, now=12.5) == 1
+
+    def test_clear_and_list_compat(self):
+        from vote_window import VoteWindow
+        w = VoteWindow(8.0)
+        w.append(True, 0.9, now=1.0)
+        assert len(w) == 1
+        w.clear()
+        assert w == []
+        assert w.stats(now=1.0).count == 0
+
+    def test_minus_should_vlm_start_blocking(self):
+        """Minus' start gate reads the window with hysteresis + cap."""
+        if not HAS_NUMPY:
+            return
+        import minus as minus_mod
+        from vote_window import VoteWindow
+        m = minus_mod.Minus.__new__(minus_mod.Minus)
+        m.vlm_decision_history = VoteWindow(8.0)
+        m.vlm_min_decisions = 3
+        m.vlm_start_agreement = 0.70
+        m.vlm_hysteresis_boost = 0.10
+        m.vlm_start_threshold_cap = 0.95
+        m.vlm_stop_agreement = 0.75
+        m.vlm_ad_detected = False
+        m.vlm_cooldown_active = False
+        m.vlm_last_state_change = 0
+        m.vlm_min_state_duration = 8.0
+        m._add_vlm_decision(True, 0.9)
+        m._add_vlm_decision(True, 0.9)
+        assert m._should_vlm_start_blocking() is False  # only 2 decisions
+        m._add_vlm_decision(True, 0.9)
+        assert m._should_vlm_start_blocking() is True
+        m.vlm_cooldown_active = True
+        m.vlm_last_state_change = time.time()
+        assert m._should_vlm_start_blocking() is False
+        assert m._should_vlm_stop_blocking() is False
+
+
+# ============================================================================
+# Screenshot Writer Tests
+# ============================================================================
+
+class TestScreenshotWriter:
+    """Tests for the async screenshot writer and in-memory disk budget."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base_dir = Path(self.test_dir)
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _img(self, seed):
+        return np.random.RandomState(seed).randint(30, 220, (100, 100, 3), dtype=np.uint8)
+
+    def test_async_write_lands_after_flush(self):
+        if not HAS_NUMPY:
+            return
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir, async_writes=True)
+        try:
+            manager.save_ad_screenshot(self._img(1), [("skip", "skip ad")], ["skip ad"])
+            assert manager.flush(timeout=5.0)
+            assert len(list(manager.ads_dir.glob("ad_*.png"))) == 1
+            assert manager.get_writer_stats()['written'] == 1
+        finally:
+            manager.stop()
+
+    def test_queue_overflow_drops_oldest(self):
+        if not HAS_NUMPY:
+            return
+        import screenshots
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir, async_writes=True)
+        manager._min_screenshot_interval = 0
+        gate = threading.Event()
+        real_write = manager._write_job
+
+        def slow_write(job):
+            gate.wait(5.0)
+            real_write(job)
+
+        manager._write_job = slow_write
+        try:
+            with patch.object(screenshots, 'SCREENSHOT_QUEUE_SIZE', 2):
+                manager.save_static_ad_screenshot(self._img(200))
+                # Wait until the writer holds the first job in flight
+                deadline = time.time() + 5.0
+                while manager._write_queue and time.time() < deadline:
+                    time.sleep(0.01)
+                for i in range(1, 6):
+                    manager.save_static_ad_screenshot(self._img(200 + i))
+            gate.set()
+            assert manager.flush(timeout=5.0)
+            stats = manager.get_writer_stats()
+            # One job is in flight when the rest queue up; 2 queued survive
+            assert stats['dropped'] == 3
+            assert stats['written'] == 3
+            assert len(list(manager.static_dir.glob("static_*.png"))) == 3
+        finally:
+            gate.set()
+            manager.stop()
+
+    def test_configured_formats(self):
+        if not HAS_NUMPY:
+            return
+        import screenshots
+        from screenshots import ScreenshotManager
+        with patch.object(screenshots, 'SCREENSHOT_FORMAT', 'webp'), \
+                patch.object(screenshots, 'NON_AD_SCREENSHOT_FORMAT', 'jpg'):
+            manager = ScreenshotManager(base_dir=self.base_dir)
+        manager.save_static_ad_screenshot(self._img(3))
+        manager.save_non_ad_screenshot(self._img(4))
+        assert len(list(manager.static_dir.glob("static_*.webp"))) == 1
+        assert len(list(manager.non_ads_dir.glob("non_ad_*.jpg"))) == 1
+        files = screenshots.list_screenshot_files(manager.non_ads_dir)
+        assert [f.suffix for f in files] == ['.jpg']
+
+    def test_budget_evicts_oldest_from_index(self):
+        if not HAS_NUMPY:
+            return
+        import screenshots
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir)
+        manager._min_screenshot_interval = 0
+        for i in range(4):
+            manager.save_ad_screenshot(self._img(300 + i), [("ad", "ad")], ["ad"])
+            time.sleep(0.01)
+        oldest = sorted(manager.ads_dir.glob("ad_*.png"))[0]
+        per_file = manager.get_writer_stats()['total_bytes'] / 4
+        # Budget of ~3.5 files: the next write must evict down to 90%
+        with patch.object(screenshots, 'SCREENSHOTS_MAX_GB', per_file * 4.5 / 1024 ** 3), \
+                patch.object(screenshots, 'SCREENSHOTS_MIN_FREE_GB', 0):
+            manager.save_ad_screenshot(self._img(399), [("ad", "ad")], ["ad"])
+        stats = manager.get_writer_stats()
+        assert not oldest.exists()
+        assert stats['files'] == len(list(manager.ads_dir.glob("ad_*.png")))
+        assert stats['total_bytes'] <= per_file * 4.5 * 0.9 + 1
+
+    def test_index_tolerates_external_deletes(self):
+        if not HAS_NUMPY:
+            return
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir, max_screenshots=2)
+        manager._min_screenshot_interval = 0
+        manager.save_ad_screenshot(self._img(500), [("ad", "ad")], ["ad"])
+        # Review UI moved the file away behind the manager's back
+        for f in manager.ads_dir.glob("ad_*.png"):
+            f.unlink()
+        for i in range(3):
+            manager.save_ad_screenshot(self._img(501 + i), [("ad", "ad")], ["ad"])
+        assert len(list(manager.ads_dir.glob("ad_*.png"))) == 2
+
+
+# ============================================================================
+# Screenshot Catalog Tests
+# ============================================================================
+
+class TestScreenshotCatalog:
+    """Tests for the SQLite screenshot catalog behind the review UI."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base_dir = Path(self.test_dir)
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _catalog(self):
+        from screenshot_catalog import ScreenshotCatalog
+        return ScreenshotCatalog(self.base_dir)
+
+    def test_keyset_pagination_newest_first(self):
+        catalog = self._catalog()
+        for i in range(7):
+            catalog.add('ads', f'ad_{i}.png', ts=1000.0 + i, size=10)
+        names, cursor = [], None
+        while True:
+            rows, cursor = catalog.page('ads', limit=3, cursor=cursor)
+            names.extend(r['name'] for r in rows)
+            if cursor is None:
+                break
+        assert names == [f'ad_{i}.png' for i in range(6, -1, -1)]
+        assert catalog.count('ads') == 7
+
+    def test_offset_page_matches_keyset(self):
+        catalog = self._catalog()
+        for i in range(5):
+            catalog.add('ads', f'ad_{i}.png', ts=1000.0, size=10)  # identical ts
+        first, cursor = catalog.page('ads', limit=2)
+        second, _ = catalog.page('ads', limit=2, cursor=cursor)
+        by_offset, _ = catalog.page('ads', limit=2, offset=2)
+        assert [r['name'] for r in second] == [r['name'] for r in by_offset]
+        assert not {r['name'] for r in first} & {r['name'] for r in second}
+
+    def test_keyword_and_source_filters(self):
+        catalog = self._catalog()
+        catalog.add('ads', 'a.png', 1.0, 1, source='ocr', keywords=['Skip', 'ad'],
+                    ocr_texts=['Skip Ad'])
+        catalog.add('ads', 'b.png', 2.0, 1, source='ocr', keywords=['sponsored'])
+        catalog.add('ads', 'c.png', 3.0, 1, source='vlm')
+        rows, _ = catalog.page('ads', keyword='skip')
+        assert [r['name'] for r in rows] == ['a.png']
+        assert rows[0]['ocr_texts'] == ['Skip Ad']
+        assert catalog.count('ads', source='ocr') == 2
+        assert catalog.count('ads', source='vlm', keyword='skip') == 0
+
+    def test_dhash_roundtrips_unsigned(self):
+        catalog = self._catalog()
+        h = (1 << 64) - 5
+        catalog.add('static', 's.png', 1.0, 1, dhash=h)
+        assert catalog.get('static', 's.png')['dhash'] == h
+
+    def test_move_and_review_state(self):
+        catalog = self._catalog()
+        catalog.add('vlm_spastic', 'v.png', 1.0, 1)
+        assert catalog.count('vlm_spastic', reviewed=False) == 1
+        assert catalog.move('vlm_spastic', 'v.png', 'non_ads', 'v.png', reviewed=True)
+        assert catalog.count('vlm_spastic') == 0
+        assert catalog.get('non_ads', 'v.png')['reviewed'] is True
+        catalog.move('non_ads', 'v.png', 'vlm_spastic', 'v.png', reviewed=False)
+        assert catalog.count('vlm_spastic', reviewed=False) == 1
+
+    def test_backfill_imports_tree_and_legacy_reviewed(self):
+        (self.base_dir / 'ads').mkdir()
+        (self.base_dir / 'ads' / 'old1.png').write_bytes(b'x' * 5)
+        (self.base_dir / 'ads' / 'old2.jpg').write_bytes(b'x' * 7)
+        reviewed_file = self.base_dir / 'reviewed.json'
+        reviewed_file.write_text(json.dumps(['old1.png']))
+        catalog = self._catalog()
+        assert catalog.ensure_backfilled(reviewed_file) is True
+        assert catalog.ensure_backfilled(reviewed_file) is False
+        assert catalog.count('ads') == 2
+        assert catalog.count('ads', reviewed=False) == 1
+
+    def test_sync_category_drops_missing_files(self):
+        catalog = self._catalog()
+        catalog.add('ads', 'gone.png', 1.0, 1)
+        added, removed = catalog.sync_category('ads', {'new.png': (2.0, 3)})
+        assert (added, removed) == (1, 1)
+        assert [r['name'] for r in catalog.page('ads')[0]] == ['new.png']
+
+    def test_manager_records_metadata_and_evictions(self):
+        if not HAS_NUMPY:
+            return
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir, max_screenshots=1)
+        manager._min_screenshot_interval = 0
+        for seed in (11, 12):
+            img = np.random.RandomState(seed).randint(30, 220, (100, 100, 3), dtype=np.uint8)
+            manager.save_ad_screenshot(img, [("skip", "skip ad")], ["skip ad"])
+        rows, _ = manager.catalog.page('ads')
+        on_disk = [p.name for p in manager.ads_dir.glob("ad_*.png")]
+        assert [r['name'] for r in rows] == on_disk
+        assert rows[0]['source'] == 'ocr'
+        assert rows[0]['keywords'] == ['skip']
+        assert rows[0]['dhash'] is not None
+
+
+# ============================================================================
+# Hamming Index Tests
+# ============================================================================
+
+class TestHammingIndex:
+    """Tests for the multi-index Hamming search and whole-corpus dedup."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base_dir = Path(self.test_dir)
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _img(self, seed):
+        return np.random.RandomState(seed).randint(30, 220, (100, 100, 3), dtype=np.uint8)
+
+    def test_find_matches_linear_scan(self):
+        import random
+        from hamming_index import HammingIndex, hamming_distance
+        rng = random.Random(7)
+        index = HammingIndex()
+        stored = {}
+        for i in range(2000):
+            h = rng.getrandbits(64)
+            stored[i] = h
+            index.add(i, h)
+        # Queries near stored hashes (flip up to 9 bits) plus random ones
+        for q in range(200):
+            base = stored[rng.randrange(2000)] if q % 2 else rng.getrandbits(64)
+            for bit in rng.sample(range(64), rng.randint(0, 9)):
+                base ^= 1 << bit
+            expected = sorted(k for k, h in stored.items() if hamming_distance(base, h) <= 9)
+            assert sorted(k for _, k in index.find(base, 9)) == expected
+
+    def test_remove_and_replace(self):
+        from hamming_index import HammingIndex
+        index = HammingIndex()
+        index.add('a', 0xFFFF)
+        assert index.nearest_within(0xFFFE, 1) == (1, 'a')
+        index.add('a', 0xFFFF << 48)  # replace
+        assert index.nearest_within(0xFFFE, 3) is None
+        assert index.remove('a') == 0xFFFF << 48
+        assert len(index) == 0 and index.remove('a') is None
+
+    def test_large_radius_falls_back_to_scan(self):
+        from hamming_index import HammingIndex
+        index = HammingIndex()
+        index.add('x', 0)
+        assert index.nearest_within((1 << 20) - 1, 20) == (20, 'x')
+
+    def test_catalog_index_survives_reopen_and_moves(self):
+        from screenshot_catalog import ScreenshotCatalog
+        catalog = ScreenshotCatalog(self.base_dir)
+        catalog.add('vlm_spastic', 'v.png', 1.0, 1, dhash=0xABCDEF)
+        catalog.close()
+        catalog = ScreenshotCatalog(self.base_dir)
+        assert catalog.find_near('vlm_spastic', 0xABCDEE, 2) == (1, 'v.png')
+        catalog.move('vlm_spastic', 'v.png', 'ads', 'v.png', reviewed=True)
+        assert catalog.find_near('vlm_spastic', 0xABCDEF, 2) is None
+        assert catalog.find_near('ads', 0xABCDEF, 2) == (0, 'v.png')
+        catalog.remove('ads', 'v.png')
+        assert catalog.hash_count() == 0
+
+    def test_duplicate_rejected_across_sessions(self):
+        if not HAS_NUMPY:
+            return
+        from screenshots import ScreenshotManager
+        manager = ScreenshotManager(base_dir=self.base_dir)
+        manager._min_screenshot_interval = 0
+        manager.save_ad_screenshot(self._img(1), [("skip", "skip ad")], ["skip ad"])
+        # Fresh manager (restart): no recent hashes, index still knows the frame
+        manager = ScreenshotManager(base_dir=self.base_dir)
+        manager._min_screenshot_interval = 0
+        assert manager._recent_hashes['ads'] == []
+        assert manager._should_save(self._img(1), 'ads') is False
+        assert manager._should_save(self._img(2), 'ads') is True
+
+    def test_offline_dedup_pass(self):
+        if not HAS_NUMPY:
+            return
+        import cv2
+        from screenshots import dedup_screenshot_tree
+        ads = self.base_dir / 'ads'
+        ads.mkdir()
+        img = self._img(3)
+        for i, name in enumerate(['a.png', 'b.png', 'c.png']):
+            frame = img if name != 'c.png' else self._img(4)
+            cv2.imwrite(str(ads / name), frame)
+            os.utime(ads / name, (1000 + i, 1000 + i))
+        report = dedup_screenshot_tree(self.base_dir)
+        assert report['hashed'] == 3
+        assert report['duplicate_files']['ads'] == ['b.png']
+        assert (ads / 'b.png').exists()
+        report = dedup_screenshot_tree(self.base_dir, apply=True)
+        assert report['removed'] == 1 and report['hashed'] == 0
+        assert sorted(p.name for p in ads.iterdir()) == ['a.png', 'c.png']
+
+
+# ============================================================================
+# Thumbnail Cache Tests
+# ============================================================================
+
+class TestThumbnailCache:
+    """Tests for the derivative cache behind ?size= image requests."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base_dir = Path(self.test_dir)
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _source(self, name='src.png', seed=0, shape=(1080, 1920, 3)):
+        import cv2
+        path = self.base_dir / name
+        img = np.random.RandomState(seed).randint(0, 255, shape, dtype=np.uint8)
+        cv2.imwrite(str(path), img)
+        return path
+
+    def test_thumb_generated_once_then_hit(self):
+        if not HAS_NUMPY:
+            return
+        import cv2
+        from thumbnail_cache import ThumbnailCache
+        cache = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        src = self._source()
+        path, etag = cache.get(src, 'thumb')
+        img = cv2.imread(str(path))
+        assert max(img.shape[:2]) == 320
+        assert cache.get(src, 'thumb') == (path, etag)
+        stats = cache.get_stats()
+        assert (stats['misses'], stats['hits']) == (1, 1)
+
+    def test_key_changes_when_source_replaced(self):
+        if not HAS_NUMPY:
+            return
+        from thumbnail_cache import ThumbnailCache
+        src = self._source(shape=(100, 100, 3))
+        key1 = ThumbnailCache.make_key(src, 'thumb')
+        os.utime(src, (1, 1))
+        assert ThumbnailCache.make_key(src, 'thumb') != key1
+        assert ThumbnailCache.make_key(src, 'preview') != ThumbnailCache.make_key(src, 'thumb')
+        assert ThumbnailCache.make_key(self.base_dir / 'missing.png', 'thumb') is None
+
+    def test_unknown_variant_and_undecodable_source(self):
+        if not HAS_NUMPY:
+            return
+        from thumbnail_cache import ThumbnailCache
+        cache = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        bad = self.base_dir / 'bad.png'
+        bad.write_bytes(b'not an image')
+        assert cache.get(self._source(), 'huge') is None
+        assert cache.get(bad, 'thumb') is None
+
+    def test_lru_eviction_within_budget(self):
+        if not HAS_NUMPY:
+            return
+        from thumbnail_cache import ThumbnailCache
+        cache = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        # Same pixels under different names -> equal-sized derivatives
+        sources = [self._source(f's{i}.png', shape=(400, 400, 3)) for i in range(3)]
+        first, _ = cache.get(sources[0], 'thumb')
+        cache.max_bytes = first.stat().st_size * 2 + 1
+        cache.get(sources[1], 'thumb')
+        cache.get(sources[0], 'thumb')      # touch: sources[1] is now LRU
+        cache.get(sources[2], 'thumb')
+        assert cache.get_stats()['evictions'] == 1
+        assert first.exists()
+        assert cache.get_stats()['bytes'] <= cache.max_bytes
+
+    def test_lru_reloaded_from_disk(self):
+        if not HAS_NUMPY:
+            return
+        from thumbnail_cache import ThumbnailCache
+        cache = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        cache.get(self._source(shape=(200, 200, 3)), 'thumb')
+        reopened = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        assert reopened.get_stats()['files'] == 1
+        assert reopened.get_stats()['bytes'] == cache.get_stats()['bytes']
+
+    def test_webui_serves_conditional_thumbnail(self):
+        if not HAS_NUMPY:
+            return
+        import webui
+        import thumbnail_cache
+        from thumbnail_cache import ThumbnailCache
+        (self.base_dir / 'ads').mkdir()
+        self._source('ads/ad_1.png')
+        cache = ThumbnailCache(cache_dir=self.base_dir / 'thumbs')
+        with patch.object(webui, 'SCREENSHOTS_BASE', self.base_dir), \
+                patch.object(thumbnail_cache, '_singleton', cache):
+            ui = webui.WebUI(MagicMock())
+            with ui.app.test_client() as client:
+                r = client.get('/api/screenshots/ads/ad_1.png?size=thumb')
+                assert r.status_code == 200
+                assert r.mimetype == cache.mimetype
+                assert 'max-age' in r.headers['Cache-Control']
+                assert r.headers.get('Last-Modified')
+                etag = r.headers['ETag']
+                r2 = client.get('/api/screenshots/ads/ad_1.png?size=thumb',
+                                headers={'If-None-Match': etag})
+                assert r2.status_code == 304
+                full = client.get('/api/screenshots/ads/ad_1.png')
+                assert full.mimetype == 'image/png'
+                assert len(full.data) > len(r.data)
+
+
+# ============================================================================
+# Status Publisher Tests
+# ============================================================================
+
+class TestStatusPublisher:
+    """Tests for the versioned status snapshot and its SSE stream."""
+
+    def setup_method(self):
+        from status_publisher import StatusPublisher
+        self.state = {'blocking': False, 'fps': 30}
+        self.calls = 0
+        self.pub = StatusPublisher()
+
+        def build():
+            self.calls += 1
+            return dict(self.state)
+        self.pub.add_topic('status', build, 60.0)
+
+    def teardown_method(self):
+        self.pub.stop()
+
+    def test_get_builds_inline_before_start(self):
+        assert self.pub.get('status') == self.state
+        self.state['fps'] = 29
+        assert self.pub.get('status')['fps'] == 29
+        assert self.calls == 2
+
+    def test_cached_reads_and_versioned_deltas(self):
+        self.pub.start()
+        assert self.pub.get('status') == {'blocking': False, 'fps': 30}
+        for _ in range(50):
+            self.pub.get('status')
+        assert self.calls == 1  # REST reads are served from the snapshot
+        version, topics = self.pub.snapshot()
+        assert topics['status']['fps'] == 30
+
+        self.state['blocking'] = True
+        self.pub.poke('status')
+        deltas = self.pub.wait_for_deltas(version, timeout=2.0)
+        assert deltas == [{'version': version + 1, 'topic': 'status',
+                           'changes': {'blocking': True}, 'removed': []}]
+
+    def test_unchanged_rebuild_publishes_nothing(self):
+        self.pub.start()
+        self.pub.get('status')
+        version, _ = self.pub.snapshot()
+        self.pub.poke('status')
+        assert self.pub.wait_for_deltas(version, timeout=0.3) == []
+        assert self.calls >= 2
+
+    def test_lagging_reader_must_resync(self):
+        from collections import deque
+        self.pub.start()
+        self.pub.get('status')
+        self.pub._deltas = deque(maxlen=2)  # Tiny delta log
+        for fps in range(3):
+            self.state['fps'] = fps
+            self.pub._refresh(self.pub._topics['status'])
+        assert self.pub.wait_for_deltas(0, timeout=0.1) is None
+        version, _ = self.pub.snapshot()
+        assert len(self.pub.wait_for_deltas(version - 2, timeout=0.1)) == 2
+
+    def test_idle_publisher_does_not_rebuild(self):
+        import status_publisher
+        self.pub._topics['status'].interval = 0.05
+        with patch.object(status_publisher, 'IDLE_AFTER_S', 0.0):
+            self.pub.start()
+            time.sleep(0.3)
+        assert self.calls == 0
+
+    def test_build_failure_surfaces_as_500(self):
+        from webui import WebUI
+        mock_minus = MagicMock()
+        mock_minus.get_status_dict.side_effect = RuntimeError('stats broke')
+        ui = WebUI(mock_minus)
+        ui.status_publisher.start()
+        try:
+            with ui.app.test_client() as client:
+                resp = client.get('/api/status')
+                assert resp.status_code == 500
+                assert resp.get_json()['error'] == 'stats broke'
+        finally:
+            ui.status_publisher.stop()
+
+    def test_failed_rebuild_keeps_last_value_and_warns(self, caplog):
+        self.pub.start()
+        assert self.pub.get('status')['fps'] == 30
+        topic = self.pub._topics['status']
+
+        def broken():
+            raise RuntimeError('boom')
+        topic.builder = broken
+        with caplog.at_level(logging.WARNING, logger='status_publisher'):
+            self.pub.refresh('status')
+            self.pub.refresh('status')
+        warnings = [r for r in caplog.records if 'build failed' in r.getMessage()]
+        assert len(warnings) == 1  # once per run of failures
+        assert self.pub.get('status')['fps'] == 30
+        assert self.pub.build_errors >= 2  # the refresh thread may have tried too
+
+    def test_pause_visible_in_next_status_read(self):
+        from webui import WebUI
+        state = {'paused': False}
+        mock_minus = MagicMock()
+        mock_minus.blocking_paused_until = 0
+        mock_minus.get_status_dict.side_effect = lambda: dict(state)
+        mock_minus.pause_blocking.side_effect = lambda seconds: state.update(paused=True)
+        mock_minus.resume_blocking.side_effect = lambda: state.update(paused=False)
+        ui = WebUI(mock_minus)
+        ui.status_publisher.start()
+        try:
+            with ui.app.test_client() as client:
+                assert client.get('/api/status').get_json() == {'paused': False}
+                assert client.post('/api/pause/5').status_code == 200
+                assert client.get('/api/status').get_json() == {'paused': True}
+                assert client.post('/api/resume').status_code == 200
+                assert client.get('/api/status').get_json() == {'paused': False}
+        finally:
+            ui.status_publisher.stop()
+
+    def test_sse_stream_sends_snapshot_then_delta(self):
+        from webui import WebUI
+        mock_minus = MagicMock()
+        mock_minus.get_status_dict.return_value = {'blocking': False}
+        ui = WebUI(mock_minus)
+        try:
+            with ui.app.test_client() as client:
+                response = client.get('/api/events', buffered=False)
+                assert response.mimetype == 'text/event-stream'
+                chunks = response.response
+                first = next(chunks).decode()
+                assert first.startswith('event: snapshot')
+                snapshot = json.loads(first.split('data: ', 1)[1])
+                assert snapshot['topics']['status'] == {'blocking': False}
+                mock_minus.get_status_dict.return_value = {'blocking': True}
+                ui.notify_status_changed('status')
+                delta = next(chunks).decode()
+                assert delta.startswith('event: delta')
+                assert json.loads(delta.split('data: ', 1)[1])['changes'] == {'blocking': True}
+                response.close()
+        finally:
+            ui.status_publisher.stop()
+
+
+# ============================================================================
+# MJPEG Broadcaster Tests
+# ============================================================================
+
+def _mjpeg_part(jpeg, boundary=b'boundarydonotcross', length=True):
+    headers = b'Content-Type: image/jpeg\r\n'
+    if length:
+        headers += b'Content-Length: %d\r\n' % len(jpeg)
+    return b'--' + boundary + b'\r\n' + headers + b'\r\n' + jpeg + b'\r\n'
+
+
+class _FakeMJPEGResponse:
+    """Stand-in for a streaming requests.Response from ustreamer."""
+
+    def __init__(self, frames, delay=0.0, hold=0.0):
+        self.headers = {'Content-Type': 'multipart/x-mixed-replace;boundary=boundarydonotcross'}
+        self.frames = frames
+        self.delay = delay
+        self.hold = hold
+        self.closed = False
+
+    def iter_content(self, chunk_size=65536):
+        for jpeg in self.frames:
+            data = _mjpeg_part(jpeg)
+            # Split every part so boundaries straddle chunks
+            yield data[:7]
+            yield data[7:]
+            time.sleep(self.delay)
+        time.sleep(self.hold)
+
+    def close(self):
+        self.closed = True
+
+
+class TestMJPEGBroadcaster:
+    """Tests for the shared-upstream MJPEG fan-out."""
+
+    def setup_method(self):
+        import mjpeg_broadcaster
+        self.mod = mjpeg_broadcaster
+        self._saved = (mjpeg_broadcaster.IDLE_TIMEOUT_S, mjpeg_broadcaster.RECONNECT_DELAY_S)
+        mjpeg_broadcaster.IDLE_TIMEOUT_S = 0.2
+        mjpeg_broadcaster.RECONNECT_DELAY_S = 0.05
+        self.connects = []
+
+    def teardown_method(self):
+        self.mod.IDLE_TIMEOUT_S, self.mod.RECONNECT_DELAY_S = self._saved
+
+    def _patch_upstream(self, frames, **kw):
+        def fake_get(url, stream=False, timeout=None):
+            resp = _FakeMJPEGResponse(frames, **kw)
+            self.connects.append(resp)
+            return resp
+        return patch.object(self.mod.requests, 'get', side_effect=fake_get)
+
+    def test_parser_with_and_without_content_length(self):
+        parser = self.mod.MultipartJPEGParser('"--boundarydonotcross"')
+        data = (_mjpeg_part(b'\xff\xd8one\xff\xd9') +
+                _mjpeg_part(b'\xff\xd8two\r\n--x\xff\xd9') +
+                _mjpeg_part(b'\xff\xd8three\xff\xd9', length=False) +
+                b'--boundarydonotcross\r\n')
+        frames = []
+        for i in range(0, len(data), 5):
+            frames += parser.feed(data[i:i + 5])
+        assert frames == [b'\xff\xd8one\xff\xd9', b'\xff\xd8two\r\n--x\xff\xd9',
+                          b'\xff\xd8three\xff\xd9']
+
+    def test_viewers_share_one_upstream(self):
+        frames = [b'frame%d' % i for i in range(40)]
+        b = self.mod.MJPEGBroadcaster('http://upstream/stream')
+        with self._patch_upstream(frames, delay=0.01, hold=1.0):
+            s1, s2, s3 = b.stream(), b.stream(), b.stream()
+            parts = [next(s1), next(s2), next(s3)]
+            assert b.viewer_count() == 3
+            for part in parts:
+                assert part.startswith(b'--minusframe\r\nContent-Type: image/jpeg')
+            for s in (s1, s2, s3):
+                s.close()
+        assert len(self.connects) == 1
+        assert b.viewer_count() == 0
+        assert 'boundary=minusframe' in b.content_type
+
+    def test_slow_viewer_drops_old_frames(self):
+        frames = [b'frame%02d' % i for i in range(30)]
+        b = self.mod.MJPEGBroadcaster('http://upstream/stream')
+        with self._patch_upstream(frames, delay=0.005, hold=1.0):
+            s = b.stream()
+            next(s)
+            time.sleep(0.4)  # Upstream finishes while this viewer is stalled
+            part = next(s)
+            s.close()
+        assert part.endswith(b'frame29\r\n')  # Newest, not the next in line
+        assert b.get_stats()['frames_dropped'] > 0
+
+    def test_upstream_closes_when_idle(self):
+        b = self.mod.MJPEGBroadcaster('http://upstream/stream')
+        with self._patch_upstream([b'a', b'b'], hold=0.05):
+            s = b.stream()
+            next(s)
+            s.close()
+            deadline = time.time() + 3.0
+            while b.get_stats()['upstream_connected'] and time.time() < deadline:
+                time.sleep(0.05)
+        assert not b.get_stats()['upstream_connected']
+        assert all(r.closed for r in self.connects)
+
+    def test_snapshot_served_from_latest_frame(self):
+        b = self.mod.MJPEGBroadcaster('http://upstream/stream')
+        with self._patch_upstream([b'first', b'latest'], hold=0.5):
+            assert b.latest_frame() is None  # Nobody watching: no upstream
+            assert self.connects == []
+            s = b.stream()
+            next(s)
+            time.sleep(0.1)
+            assert b.latest_frame() == b'latest'
+            s.close()
+        assert len(self.connects) == 1
+        assert b.latest_frame(max_age=0.0) is None
+
+    def test_webui_snapshot_falls_back_to_ustreamer(self):
+        from webui import WebUI
+        ui = WebUI(MagicMock())
+        ui.broadcaster.latest_frame = MagicMock(return_value=None)
+        with patch('webui.requests.get') as get:
+            get.return_value.content = b'jpegbytes'
+            resp = ui.app.test_client().get('/snapshot')
+        assert resp.data == b'jpegbytes'
+        ui.broadcaster.latest_frame = MagicMock(return_value=b'cached')
+        resp = ui.app.test_client().get('/snapshot')
+        assert resp.data == b'cached'
+
+
+# ============================================================================
+# Log Ring Tests
+# ============================================================================
+
+class TestLogRing:
+    """Tests for the in-memory log ring and the /api/logs cursor API."""
+
+    def setup_method(self):
+        from log_ring import LogRing
+        self.ring = LogRing(capacity=5)
+        self.ring.setFormatter(logging.Formatter('[%(levelname).1s] %(message)s'))
+        self.log = logging.getLogger('Minus.TestLogRing')
+        self.log.setLevel(logging.DEBUG)
+        self.log.propagate = False
+        self.log.addHandler(self.ring)
+
+    def teardown_method(self):
+        self.log.removeHandler(self.ring)
+
+    def test_seq_cursor_returns_only_new_records(self):
+        self.log.info("[Screenshot] one")
+        self.log.info("[Screenshot] two")
+        records, cursor = self.ring.query()
+        assert [r['seq'] for r in records] == [1, 2]
+        assert cursor == 2
+        assert self.ring.query(since=cursor) == ([], 2)
+        self.log.info("three")
+        records, cursor = self.ring.query(since=cursor)
+        assert [r['message'] for r in records] == ['three']
+        assert cursor == 3
+
+    def test_ring_is_bounded(self):
+        for i in range(12):
+            self.log.info(f"line {i}")
+        records, cursor = self.ring.query(limit=0)
+        assert [r['message'] for r in records] == [f"line {i}" for i in range(7, 12)]
+        assert cursor == 12
+        # A cursor older than the ring just gets what is left
+        assert len(self.ring.query(since=3, limit=0)[0]) == 5
+
+    def test_filters(self):
+        self.log.info("[Screenshot] saved ad")
+        self.log.warning("[VLM] slow response")
+        self.log.error("[Screenshot] disk full")
+        self.log.debug("noise")
+        records, _ = self.ring.query(level='warning')
+        assert [r['message'] for r in records] == ["[VLM] slow response", "[Screenshot] disk full"]
+        records, _ = self.ring.query(component='screenshot')
+        assert [r['level'] for r in records] == ['INFO', 'ERROR']
+        records, _ = self.ring.query(text='DISK')
+        assert records[0]['line'] == '[E] [Screenshot] disk full'
+        assert self.ring.query(component='TestLogRing')[0][0]['message'] == 'noise'
+        try:
+            self.ring.query(level='loud')
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    def test_wait_wakes_on_new_record(self):
+        assert self.ring.wait(0, timeout=0.05) is False
+        threading.Timer(0.05, lambda: self.log.info("late")).start()
+        assert self.ring.wait(0, timeout=2.0) is True
+
+    def test_read_tail_lines(self):
+        from log_ring import read_tail_lines
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'big.log'
+            path.write_text(''.join(f"line {i}\n" for i in range(5000)))
+            assert read_tail_lines(path, 3, block_size=16) == ['line 4997', 'line 4998', 'line 4999']
+            assert len(read_tail_lines(path, 10000)) == 5000
+            assert read_tail_lines(path, 0) == []
+
+    def test_install_skips_ring_behind_queue_listener(self):
+        import log_ring
+        front = logging.NullHandler()
+        front.listener_handlers = (self.ring,)  # As log_queue's QueueHandler
+        root = logging.getLogger()
+        root.addHandler(front)
+        try:
+            with patch.object(log_ring, '_singleton', self.ring):
+                assert log_ring.is_installed()
+                assert log_ring.install_log_ring() is self.ring
+            assert self.ring not in root.handlers
+        finally:
+            root.removeHandler(front)
+            root.removeHandler(self.ring)
+
+    def test_webui_logs_since_cursor(self):
+        import log_ring
+        from webui import WebUI
+        # The test's own ring, not the process-wide one on the root logger
+        with patch.object(log_ring, '_singleton', self.ring), \
+                patch.object(log_ring, 'is_installed', return_value=True):
+            client = WebUI(MagicMock()).app.test_client()
+            self.log.info("[Audio] first")
+            data = client.get('/api/logs?component=audio').get_json()
+            assert data['lines'] == ['[I] [Audio] first']
+            self.log.info("[Audio] second")
+            data = client.get(f"/api/logs?since={data['last_seq']}&component=audio").get_json()
+            assert data['lines'] == ['[I] [Audio] second']
+            assert client.get('/api/logs?level=bogus').status_code == 400
+
+
+# ============================================================================
+# Queued Logging Tests
+# ============================================================================
+
+class _SlowHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        self.messages.append(self.format(record))
+
+
+class TestLogQueue:
+    """Tests for the queued (non-blocking) logging setup and LogThrottle."""
+
+    def setup_method(self):
+        import log_queue
+        self.mod = log_queue
+        # Importing minus.py elsewhere in the run installs the root listener
+        self._saved = (log_queue._listener, log_queue._queue_handler, log_queue._target)
+        log_queue._listener = log_queue._queue_handler = log_queue._target = None
+        self.log = logging.getLogger('Minus.TestLogQueue')
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+
+    def teardown_method(self):
+        self.mod.stop_queued_logging()
+        for h in list(self.log.handlers):
+            self.log.removeHandler(h)
+        self.mod._listener, self.mod._queue_handler, self.mod._target = self._saved
+
+    def test_records_written_off_the_calling_thread(self):
+        sink = _SlowHandler(delay=0.05)
+        self.log.addHandler(sink)
+        self.mod.start_queued_logging(self.log)
+        started = time.time()
+        for i in range(10):
+            self.log.info(f"frame {i}")
+        assert time.time() - started < 0.2  # Caller never waits on the sink
+        self.mod.stop_queued_logging()  # Flushes
+        assert sink.messages == [f"frame {i}" for i in range(10)]
+        assert threading.current_thread().name not in sink.threads
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        sink = _SlowHandler(delay=0.2)
+        self.log.addHandler(sink)
+        handler = self.mod.start_queued_logging(self.log, queue_size=2)
+        started = time.time()
+        for i in range(20):
+            self.log.info(f"burst {i}")
+        assert time.time() - started < 0.2
+        assert handler.dropped > 0
+        assert self.mod.get_log_queue_stats()['dropped'] == handler.dropped
+        # Stopping with the queue still full waits for room, no queue.Full
+        self.mod.stop_queued_logging()
+
+    def test_handler_levels_and_exceptions_survive_the_queue(self):
+        sink = _SlowHandler()
+        sink.setLevel(logging.WARNING)
+        self.log.addHandler(sink)
+        self.mod.start_queued_logging(self.log)
+        self.log.info("quiet")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            self.log.exception("failed %s", "op")
+        self.mod.stop_queued_logging()
+        assert len(sink.messages) == 1
+        assert sink.messages[0].startswith("failed op")
+        assert "RuntimeError: boom" in sink.messages[0]
+
+    def test_throttle_counts_suppressed_lines(self):
+        throttle = self.mod.LogThrottle(0.1)
+        assert throttle.ready('skip') == 0
+        assert throttle.ready('skip') is None
+        assert throttle.ready('skip') is None
+        assert throttle.ready('other') == 0  # Keys are independent
+        assert throttle.suppressed('skip') == 2
+        time.sleep(0.12)
+        assert throttle.ready('skip') == 2
+        assert throttle.suppressed('skip') == 0
+
+
+# ============================================================================
+# Metrics Registry Tests
+# ============================================================================
+
+class TestMetricsRegistry:
+    """Tests for the in-process metrics registry and its Prometheus output."""
+
+    def setup_method(self):
+        from metrics import Registry
+        self.reg = Registry()
+
+    def test_counter_and_gauge_render(self):
+        c = self.reg.counter('t_events_total', 'Events', ['kind'])
+        c.labels(kind='ocr').inc()
+        c.labels(kind='ocr').inc(2)
+        c.labels(kind='vlm').inc()
+        g = self.reg.gauge('t_depth', 'Depth')
+        g.set(3)
+        g.dec()
+        text = self.reg.render()
+        assert '# TYPE t_events_total counter' in text
+        assert 't_events_total{kind="ocr"} 3' in text
+        assert 't_events_total{kind="vlm"} 1' in text
+        assert '# TYPE t_depth gauge' in text
+        assert 't_depth 2' in text
+        try:
+            c.labels(kind='ocr').inc(-1)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    def test_histogram_cumulative_buckets(self):
+        h = self.reg.histogram('t_latency_seconds', 'Latency', buckets=(0.1, 0.5, 1.0))
+        for v in (0.05, 0.1, 0.3, 0.7, 2.0):
+            h.observe(v)
+        text = self.reg.render()
+        assert 't_latency_seconds_bucket{le="0.1"} 2' in text
+        assert 't_latency_seconds_bucket{le="0.5"} 3' in text
+        assert 't_latency_seconds_bucket{le="1"} 4' in text
+        assert 't_latency_seconds_bucket{le="+Inf"} 5' in text
+        assert 't_latency_seconds_count 5' in text
+        assert 't_latency_seconds_sum 3.15' in text
+        assert h.quantile(0.5) == 0.5
+        assert h.quantile(0.95) == float('inf')
+
+    def test_histogram_timer(self):
+        h = self.reg.histogram('t_timer_seconds', 'Timer', ['stage'])
+        with h.labels(stage='encode').time():
+            time.sleep(0.01)
+        counts, total, count = h.labels(stage='encode').snapshot()
+        assert count == 1 and total >= 0.01
+        assert 't_timer_seconds_bucket{stage="encode",le="0.025"} 1' in self.reg.render()
+
+    def test_function_backed_values(self):
+        g = self.reg.gauge('t_queue_depth', 'Depth', ['queue'])
+        g.labels(queue='ok').set_function(lambda: 7)
+        g.labels(queue='broken').set_function(lambda: 1 / 0)
+        g.labels(queue='mock').set_function(lambda: MagicMock())
+        text = self.reg.render()
+        assert 't_queue_depth{queue="ok"} 7' in text
+        assert 'broken' not in text and 'mock' not in text
+
+    def test_redefinition_returns_same_metric(self):
+        a = self.reg.counter('t_same_total', 'Same')
+        assert self.reg.counter('t_same_total', 'Same') is a
+        try:
+            self.reg.gauge('t_same_total', 'Same')
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    def test_ocr_worker_timings_recorded(self):
+        from ocr_worker import OCRProcess, OCR_DETECT_TIME, OCR_RECOGNIZE_TIME
+        proc = OCRProcess()
+        proc.is_ready = True
+        proc.process = MagicMock()
+        proc.request_queue = MagicMock()
+        proc.response_queue = MagicMock()
+        proc.response_queue.get.return_value = ('ok', [{'text': 'Ad'}],
+                                                {'detect': 0.04, 'recognize': 0.02})
+        before = OCR_DETECT_TIME._default().snapshot()[2]
+        assert proc.ocr(MagicMock()) == [{'text': 'Ad'}]
+        assert OCR_DETECT_TIME._default().snapshot()[2] == before + 1
+        assert OCR_RECOGNIZE_TIME._default().snapshot()[2] >= 1
+        # Legacy 2-tuple responses still work
+        proc.response_queue.get.return_value = ('ok', [])
+        assert proc.ocr(MagicMock()) == []
+
+    def test_webui_metrics_include_histograms(self):
+        from webui import WebUI
+        from capture import CAPTURE_LATENCY
+        CAPTURE_LATENCY.observe(0.02)
+        mock_minus = MagicMock()
+        mock_minus.health_monitor = None
+        mock_minus.screenshot_manager._write_queue = [1, 2]
+        ui = WebUI(mock_minus)
+        data = ui.app.test_client().get('/api/metrics').data.decode()
+        assert '# TYPE minus_capture_latency_seconds histogram' in data
+        assert 'minus_capture_latency_seconds_bucket{le="+Inf"}' in data
+        assert 'minus_queue_depth{queue="screenshot_writes"} 2' in data
+        assert '# TYPE minus_worker_restarts_total counter' in data
+
+
+# ============================================================================
+# Frame Tracing Tests
+# ============================================================================
+
+class TestFrameTracing:
+    """Tests for per-frame trace IDs, the span ring and Chrome export."""
+
+    def setup_method(self):
+        import tracing
+        self.tracer = tracing.get_tracer()
+        self.saved = (self.tracer.enabled, self.tracer.sample_rate)
+        self.tracer.end_trace()
+        self.tracer.clear()
+
+    def teardown_method(self):
+        self.tracer.end_trace()
+        self.tracer.configure(enabled=self.saved[0], sample_rate=self.saved[1])
+        self.tracer.clear()
+
+    def test_disabled_records_nothing(self):
+        import tracing
+        self.tracer.configure(enabled=False)
+        assert tracing.start_trace('ocr_frame') is None
+        with tracing.span('capture.fetch') as s:
+            pass
+        assert s is tracing._NOOP
+        tracing.add_span('decision', 0.0, 1.0)
+        assert self.tracer.get_stats()['spans_buffered'] == 0
+
+    def test_spans_share_thread_trace_id(self):
+        import tracing
+        self.tracer.configure(enabled=True, sample_rate=1.0)
+        trace_id = tracing.start_trace('ocr_frame')
+        with tracing.span('capture.fetch'):
+            time.sleep(0.002)
+        with tracing.span('ocr.keywords', matched=2):
+            pass
+        tracing.end_trace()
+        events = [e for e in self.tracer.export()['traceEvents'] if e['ph'] == 'X']
+        names = [e['name'] for e in events]
+        assert names == ['ocr_frame', 'capture.fetch', 'ocr.keywords']
+        assert all(e['args']['trace_id'] == trace_id for e in events)
+        fetch = events[1]
+        assert fetch['cat'] == 'capture' and fetch['dur'] >= 2000
+        assert events[2]['args']['matched'] == 2
+        # Spans outside a trace are dropped
+        with tracing.span('orphan'):
+            pass
+        assert self.tracer.get_stats()['spans_buffered'] == 3
+
+    def test_sampling(self):
+        import tracing
+        self.tracer.configure(enabled=True, sample_rate=0.0)
+        assert tracing.start_trace() is None
+        try:
+            self.tracer.configure(sample_rate=1.5)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    def test_worker_spans_and_export_window(self):
+        import tracing
+        self.tracer.configure(enabled=True, sample_rate=1.0)
+        trace_id = tracing.start_trace('ocr_frame')
+        now = time.time()
+        timings = {'start': now - 0.3, 'end': now - 0.1, 'detect': 0.15,
+                   'recognize': 0.05, 'trace_id': trace_id}
+        self.tracer.add_worker_spans('ocr', trace_id, timings, ('detect', 'recognize'))
+        # Stale response for another frame is ignored
+        self.tracer.add_worker_spans('ocr', trace_id, dict(timings, trace_id=-1), ('detect',))
+        tracing.add_span('old', now - 100, now - 99)
+        trace = self.tracer.export(seconds=10)
+        events = {e['name']: e for e in trace['traceEvents'] if e['ph'] == 'X'}
+        assert set(events) == {'ocr', 'ocr.detect', 'ocr.recognize'}
+        # Stages are laid out in float seconds from a wall-clock start, so each
+        # ts carries up to ~0.25us of error before rounding to whole microseconds
+        assert abs(events['ocr.recognize']['ts'] - events['ocr.detect']['ts'] - 150000) <= 1
+        threads = {e['args']['name'] for e in trace['traceEvents'] if e['name'] == 'thread_name'}
+        assert threads == {'ocr worker'}
+
+    def test_ocr_process_propagates_trace_id(self):
+        import tracing
+        from ocr_worker import OCRProcess
+        self.tracer.configure(enabled=True, sample_rate=1.0)
+        trace_id = tracing.start_trace('ocr_frame')
+        proc = OCRProcess()
+        proc.is_ready = True
+        proc.process = MagicMock()
+        proc.request_queue = MagicMock()
+        proc.response_queue = MagicMock()
+        now = time.time()
+        proc.response_queue.get.return_value = (
+            'ok', [], {'detect': 0.01, 'recognize': 0.0, 'start': now, 'end': now + 0.01,
+                       'trace_id': trace_id})
+        proc.ocr(MagicMock())
+        assert proc.request_queue.put.call_args[0][0][2] == trace_id
+        names = {e['name'] for e in self.tracer.export()['traceEvents'] if e['ph'] == 'X'}
+        assert {'ocr.request', 'ocr', 'ocr.detect'} <= names
+
+    def test_webui_trace_endpoints(self):
+        from webui import WebUI
+        mock_minus = MagicMock()
+        mock_minus.health_monitor = None
+        client = WebUI(mock_minus).app.test_client()
+        resp = client.post('/api/trace/enable', json={'sample_rate': 0.5})
+        assert resp.get_json()['enabled'] is True
+        assert resp.get_json()['sample_rate'] == 0.5
+        assert client.post('/api/trace/enable', json={'sample_rate': 2}).status_code == 400
+        resp = client.get('/api/trace/export?seconds=5')
+        assert 'attachment' in resp.headers['Content-Disposition']
+        assert 'traceEvents' in json.loads(resp.data)
+        assert client.post('/api/trace/disable').get_json()['enabled'] is False
+
+
+# ============================================================================
+# Web Server Tests
+# ============================================================================
+
+class TestWebServer:
+    """Tests for the pooled web UI server and its Flask hooks."""
+
+    def _serve(self, app, **kwargs):
+        import http.client
+        from web_server import PooledWSGIServer
+        server = PooledWSGIServer('127.0.0.1', 0, app, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server, lambda: http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+
+    def setup_method(self):
+        self.servers = []
+
+    def teardown_method(self):
+        for server in self.servers:
+            server.shutdown()
+
+    def _app(self):
+        from flask import Flask, Response, jsonify
+        from web_server import install_compression, install_request_timing
+        app = Flask(__name__)
+        install_request_timing(app)
+        install_compression(app)
+        self.release = threading.Event()
+
+        @app.route('/api/big')
+        def big():
+            return jsonify({'items': ['minus'] * 500})
+
+        @app.route('/slow')
+        def slow():
+            self.release.wait(5)
+            return 'ok'
+
+        @app.route('/api/events')
+        def events():
+            def gen():
+                for _ in range(50):
+                    yield 'data: ' + 'x' * 2000 + '\n\n'
+                    if self.release.wait(0.05):
+                        return
+            return Response(gen(), mimetype='text/event-stream')
+        return app
+
+    def test_gzip_json(self):
+        import gzip as gz
+        _, connect = self._serve(self._app())
+        conn = connect()
+        conn.request('GET', '/api/big', headers={'Accept-Encoding': 'gzip, deflate'})
+        resp = conn.getresponse()
+        body = resp.read()
+        assert resp.getheader('Content-Encoding') == 'gzip'
+        assert 'Accept-Encoding' in resp.getheader('Vary')
+        assert json.loads(gz.decompress(body))['items'][0] == 'minus'
+        conn = connect()
+        conn.request('GET', '/api/big')
+        resp = conn.getresponse()
+        assert resp.getheader('Content-Encoding') is None
+        assert json.loads(resp.read())['items'][0] == 'minus'
+
+    def test_event_stream_not_compressed(self):
+        _, connect = self._serve(self._app())
+        conn = connect()
+        conn.request('GET', '/api/events', headers={'Accept-Encoding': 'gzip'})
+        resp = conn.getresponse()
+        assert resp.getheader('Content-Encoding') is None
+        assert resp.read(6) == b'data: '
+        self.release.set()
+
+    def test_streams_do_not_use_request_workers(self):
+        server, connect = self._serve(self._app(), workers=1, queue_size=1, stream_slots=2)
+        streams = []
+        for _ in range(2):
+            conn = connect()
+            conn.request('GET', '/api/events')
+            resp = conn.getresponse()
+            assert resp.read(6) == b'data: '
+            streams.append(resp)  # The response holds the socket open
+        conn = connect()
+        conn.request('GET', '/api/big')
+        assert conn.getresponse().status == 200
+        stats = server.get_stats()
+        assert stats['stream']['busy'] == 2
+        # Every slot is taken: the next viewer is refused at once, not queued
+        extra = connect()
+        start = time.time()
+        extra.request('GET', '/api/events')
+        resp = extra.getresponse()
+        assert resp.status == 503
+        assert b'stream slots in use' in resp.read()
+        assert time.time() - start < 1.0
+        assert server.get_stats()['stream']['rejected'] == 1
+        self.release.set()
+
+    def test_polling_requests_reuse_connection(self):
+        import socket as sock_mod
+        server, connect = self._serve(self._app(), workers=1, queue_size=1, stream_slots=1)
+        conn = connect()
+        sockets = set()
+        for _ in range(3):
+            conn.request('GET', '/api/big')
+            sockets.add(conn.sock)
+            resp = conn.getresponse()
+            assert resp.getheader('Connection') == 'keep-alive'
+            assert json.loads(resp.read())['items'][0] == 'minus'
+        assert len(sockets) == 1
+        # A stream on the same connection still moves to a stream slot
+        conn.request('GET', '/api/events')
+        resp = conn.getresponse()
+        assert resp.read(6) == b'data: '
+        assert server.get_stats()['stream']['busy'] == 1
+        self.release.set()
+        # Pipelined requests: the second one is not lost to the first's drain
+        raw = sock_mod.create_connection(('127.0.0.1', server.port), timeout=5)
+        try:
+            raw.sendall(b'GET /api/big HTTP/1.1\r\nHost: x\r\n\r\n' * 2)
+            data = b''
+            while data.count(b'HTTP/1.1 200') < 2:
+                chunk = raw.recv(65536)
+                assert chunk
+                data += chunk
+        finally:
+            raw.close()
+        assert server.get_stats()['request']['served'] <= 2
+
+    def test_saturated_pool_returns_503(self):
+        server, connect = self._serve(self._app(), workers=1, queue_size=1, stream_slots=1)
+        results = []
+
+        def hit():
+            conn = connect()
+            conn.request('GET', '/slow')
+            results.append(conn.getresponse().status)
+
+        threads = [threading.Thread(target=hit) for _ in range(3)]
+        for t in threads:
+            t.start()
+            time.sleep(0.1)
+        self.release.set()
+        for t in threads:
+            t.join(5)
+        assert sorted(results) == [200, 200, 503]
+        assert server.get_stats()['request']['rejected'] == 1
+        assert threading.active_count() < 50
+
+    def test_idle_connection_released_when_others_wait(self):
+        import socket as sock_mod
+        server, connect = self._serve(self._app(), workers=1, queue_size=2, stream_slots=1)
+        idle = sock_mod.create_connection(('127.0.0.1', server.port))
+        try:
+            time.sleep(0.1)
+            start = time.time()
+            conn = connect()
+            conn.request('GET', '/api/big')
+            assert conn.getresponse().status == 200
+            assert time.time() - start < 2.0  # Not the full idle timeout
+        finally:
+            idle.close()
+
+    def test_metrics_registered(self):
+        from metrics import REGISTRY
+        server, _ = self._serve(self._app(), workers=2)
+        server.register_metrics()
+        text = REGISTRY.render()
+        assert 'minus_web_pool_size{pool="request"} 2' in text
+        assert 'minus_web_rejected_total{pool="stream"}' in text
+        assert '# TYPE minus_http_request_seconds histogram' in text
+
+
+# ============================================================================
+# Health Snapshot / Kernel Event Tests
+# ============================================================================
+
+class TestHealthSnapshot:
+    """Tests for the cached health snapshot and its subprocess-free sources."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _kmsg_fifo(self):
+        from kernel_events import KmsgTail
+        path = os.path.join(self.test_dir, 'kmsg')
+        os.mkfifo(path)
+        tail = KmsgTail(path)
+        assert tail.available()
+        writer = os.open(path, os.O_WRONLY)
+        return tail, writer
+
+    def test_kmsg_tail_reads_incrementally(self):
+        """Only records added since the last poll are parsed; old ones age out."""
+        from kernel_events import _monotonic
+        tail, writer = self._kmsg_fifo()
+        try:
+            tail.watch('i2c', lambda msg: 'i2c read err' in msg)
+            now_us = int(_monotonic() * 1e6)
+            os.write(writer, f"3,100,{now_us},-;dwhdmi-rockchip fde80000.hdmi: i2c read err!\n"
+                             f" SUBSYSTEM=platform\n".encode())
+            os.write(writer, f"6,101,{now_us},-;unrelated message\n".encode())
+            assert tail.poll() == 2
+            assert tail.poll() == 0
+            os.write(writer, f"3,102,{now_us - 60_000_000},-;i2c read err!\n".encode())
+            assert len(tail.recent('i2c', 5.0)) == 1
+            assert len(tail.recent('i2c', 120.0)) == 2
+            assert tail.records_read == 3
+        finally:
+            os.close(writer)
+            tail.close()
+
+    def test_check_hdmi_i2c_errors_uses_kmsg(self):
+        """check_hdmi_i2c_errors counts kmsg records and never runs dmesg."""
+        import kernel_events
+        from drm import check_hdmi_i2c_errors
+        tail, writer = self._kmsg_fifo()
+        old = kernel_events._kmsg_tail
+        kernel_events._kmsg_tail = tail
+        try:
+            now_us = int(kernel_events._monotonic() * 1e6)
+            records = ''.join(f"3,{i},{now_us - i * 1000},-;dwhdmi-rockchip fde80000.hdmi: i2c read err!\n"
+                              for i in range(12))
+            os.write(writer, records.encode())
+            with patch('drm.subprocess.run') as mock_run:
+                has_errors, count, rate = check_hdmi_i2c_errors(threshold=10, window_seconds=5.0)
+                mock_run.assert_not_called()
+            assert has_errors is True
+            assert count == 12
+            assert rate > 0
+        finally:
+            kernel_events._kmsg_tail = old
+            os.close(writer)
+            tail.close()
+
+    def test_check_hdmi_i2c_errors_falls_back_to_dmesg(self):
+        """Without /dev/kmsg access the dmesg dump is parsed as before."""
+        import kernel_events
+        from drm import check_hdmi_i2c_errors
+        old = kernel_events._kmsg_tail
+        kernel_events._kmsg_tail = kernel_events.KmsgTail(os.path.join(self.test_dir, 'missing'))
+        try:
+            with open('/proc/uptime') as f:
+                uptime = float(f.read().split()[0])
+            lines = '\n'.join(f"[{uptime - 1:.6f}] dwhdmi-rockchip fde80000.hdmi: i2c read err!"
+                              for _ in range(3))
+            with patch('drm.subprocess.run') as mock_run:
+                mock_run.return_value = MagicMock(returncode=0, stdout=lines)
+                has_errors, count, _ = check_hdmi_i2c_errors(threshold=10, window_seconds=5.0)
+                mock_run.assert_called_once()
+            assert (has_errors, count) == (False, 3)
+        finally:
+            kernel_events._kmsg_tail = old
+
+    def test_uevent_parse_and_dispatch(self):
+        """Uevents are parsed and delivered only for watched subsystems."""
+        from kernel_events import UeventListener, parse_uevent
+        event = parse_uevent(b'change@/devices/platform/display-subsystem/drm/card0\0'
+                             b'ACTION=change\0SUBSYSTEM=drm\0HOTPLUG=1\0')
+        assert event == {'ACTION': 'change', 'SUBSYSTEM': 'drm', 'HOTPLUG': '1'}
+        assert parse_uevent(b'libudev\0\xfe\xed') is None
+
+        listener = UeventListener(subsystems=('drm',))
+        received = []
+        listener.subscribe(received.append)
+        listener.dispatch(event)
+        listener.dispatch({'ACTION': 'add', 'SUBSYSTEM': 'usb'})
+        assert received == [event]
+        assert listener.events_received == 1
+
+    def test_hotplug_uevent_wakes_monitor(self):
+        """A drm HOTPLUG uevent wakes the monitor loop; other drm events don't."""
+        from health import HealthMonitor
+        monitor = HealthMonitor(MagicMock())
+        monitor._on_uevent({'ACTION': 'change', 'SUBSYSTEM': 'drm'})
+        assert not monitor._wake_event.is_set()
+        monitor._on_uevent({'ACTION': 'change', 'SUBSYSTEM': 'drm', 'HOTPLUG': '1'})
+        assert monitor._wake_event.is_set()
+
+    def test_get_status_shares_snapshot(self):
+        """get_status() reuses one snapshot instead of re-running the checks."""
+        from health import HealthMonitor, HealthStatus
+        monitor = HealthMonitor(MagicMock(), check_interval=60.0)
+        calls = []
+
+        def collect():
+            calls.append(1)
+            return HealthStatus(hdmi_signal=True, collected_at=time.time(),
+                                hdmi_tx_audio_link_details={'jack': 'on'})
+
+        with patch.object(monitor, '_collect_status', side_effect=collect):
+            first = monitor.get_status()
+            first.hdmi_tx_audio_link_details['jack'] = 'off'
+            second = monitor.get_status()
+        assert len(calls) == 1
+        assert second.hdmi_signal is True
+        assert second.hdmi_tx_audio_link_details == {'jack': 'on'}
+
+    def test_ustreamer_alive_without_pgrep(self):
+        """_check_ustreamer_alive finds the process by cmdline, no subprocess."""
+        import subprocess as sp
+        from health import HealthMonitor
+        monitor = HealthMonitor(MagicMock())
+        proc = sp.Popen([sys.executable, '-c', 'import time; time.sleep(30)', 'ustreamer'])
+        try:
+            # Until exec() the child still shows pytest's cmdline
+            deadline = time.time() + 5
+            while not monitor._cmdline_has(proc.pid, b'ustreamer') and time.time() < deadline:
+                time.sleep(0.01)
+            with patch('health.subprocess.run') as mock_run:
+                assert monitor._check_ustreamer_alive() is True
+                mock_run.assert_not_called()
+            # Cached PID is re-checked first on the next call
+            assert monitor._cmdline_has(monitor._ustreamer_pid, b'ustreamer')
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def test_ioctl_request_codes(self):
+        """ioctl numbers match the kernel headers (64-bit layouts)."""
+        import ctypes
+        import alsa_ctl
+        import v4l2
+        if ctypes.sizeof(ctypes.c_void_p) != 8:
+            return
+        assert v4l2.VIDIOC_G_FMT == 0xc0d05604
+        assert alsa_ctl.SNDRV_CTL_IOCTL_ELEM_LIST == 0xc0505510
+        assert alsa_ctl.SNDRV_CTL_IOCTL_ELEM_READ == 0xc4c85512
+        assert v4l2.read_v4l2_format('/dev/video99') is None
+
+    def test_audio_link_falls_back_to_amixer(self):
+        """Without a control device the amixer parser still runs."""
+        from health import HealthMonitor
+        mock_minus = MagicMock()
+        mock_minus.audio.playback_device = 'hw:1,0'
+        monitor = HealthMonitor(mock_minus)
+        with patch('alsa_ctl.hdmi_audio_link', return_value=None), \
+                patch.object(monitor, '_check_hdmi_tx_audio_link_amixer',
+                             return_value=(False, {'jack': 'off'})) as amixer:
+            assert monitor._check_hdmi_tx_audio_link() == (False, {'jack': 'off'})
+            amixer.assert_called_once_with('1')
+        with patch('alsa_ctl.hdmi_audio_link',
+                   return_value={'ok': True, 'details': {'jack': 'on', 'eld_mfr': 'ok'}}):
+            assert monitor._check_hdmi_tx_audio_link() == (True, {'jack': 'on', 'eld_mfr': 'ok'})
+
+
+# ============================================================================
+# HDMI Source-Change Watcher Tests
+# ============================================================================
+
+class _FakeSourceEvents:
+    """Stands in for V4L2EventSource: queued events and scripted timings."""
+
+    def __init__(self, pixel_format='NV12'):
+        self.events = []
+        self.timings = []  # DVTimings, None (no signal) or an exception to raise
+        self.pixel_format = pixel_format
+        self.opened = self.closed = False
+        self._cond = threading.Condition()
+
+    def push(self, timings, changes=1):
+        with self._cond:
+            self.timings.append(timings)
+            self.events.append(changes)
+            self._cond.notify_all()
+
+    def open(self):
+        self.opened = True
+
+    def close(self):
+        self.closed = True
+
+    def wait(self, timeout):
+        with self._cond:
+            return self._cond.wait_for(lambda: self.events, timeout)
+
+    def dequeue(self):
+        with self._cond:
+            events, self.events = self.events, []
+            return events
+
+    def query_timings(self):
+        from hdmi_source_watcher import NoSignal
+        result = self.timings.pop(0)
+        if result is None:
+            raise NoSignal()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def read_format(self):
+        return self.pixel_format
+
+
+class TestHDMISourceWatcher:
+    """Tests for hdmi_source_watcher.py and its HealthMonitor hookup."""
+
+    def _wait_for(self, predicate, timeout=2.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_watcher_reports_settled_timings(self):
+        """ENOLCK answers are retried until the receiver locks."""
+        from hdmi_source_watcher import DVTimings, SourceChangeWatcher, Unstable
+        source = _FakeSourceEvents(pixel_format='NV24')
+        changes = []
+        watcher = SourceChangeWatcher(source, lambda t, f: changes.append((t, f)),
+                                      wait_timeout=0.05)
+        assert watcher.start()
+        try:
+            source.timings.append(Unstable())
+            source.push(DVTimings(1280, 720, 60.0))
+            assert self._wait_for(lambda: changes)
+            assert changes == [(DVTimings(1280, 720, 60.0), 'NV24')]
+            source.push(None)
+            assert self._wait_for(lambda: len(changes) == 2)
+            assert changes[1] == (None, None)
+        finally:
+            watcher.stop()
+        assert source.closed
+        assert watcher.events_received == 2
+
+    def test_watcher_falls_back_when_unsupported(self):
+        """A device without event support leaves polling in charge."""
+        from hdmi_source_watcher import SourceChangeWatcher
+        source = MagicMock()
+        source.open.side_effect = OSError(25, 'Inappropriate ioctl for device')
+        watcher = SourceChangeWatcher(source, MagicMock())
+        assert watcher.start() is False
+        assert not watcher.running
+
+    def test_query_dv_timings_errors_and_fps(self):
+        """Receiver errno values map to NoSignal/Unstable; fps comes from totals."""
+        import ctypes
+        import errno
+        import hdmi_source_watcher as hsw
+
+        def fill_1080p60(fd, request, buf):
+            bt = buf.u.bt
+            bt.width, bt.height, bt.pixelclock = 1920, 1080, 148500000
+            bt.hfrontporch, bt.hsync, bt.hbackporch = 88, 44, 148
+            bt.vfrontporch, bt.vsync, bt.vbackporch = 4, 5, 36
+
+        with patch('hdmi_source_watcher.fcntl.ioctl', side_effect=fill_1080p60):
+            assert hsw.query_dv_timings(0) == hsw.DVTimings(1920, 1080, 60.0)
+        for err, exc in ((errno.ENOLINK, hsw.NoSignal), (errno.ENOLCK, hsw.Unstable)):
+            with patch('hdmi_source_watcher.fcntl.ioctl', side_effect=OSError(err, 'x')):
+                try:
+                    hsw.query_dv_timings(0)
+                    assert False, 'expected exception'
+                except exc:
+                    pass
+        if ctypes.sizeof(ctypes.c_void_p) == 8:
+            assert hsw.VIDIOC_QUERY_DV_TIMINGS == 0x80845663
+            assert hsw.VIDIOC_SUBSCRIBE_EVENT == 0x4020565a
+            assert hsw.VIDIOC_DQEVENT == 0x80885659
+
+    def test_health_monitor_callbacks_from_source_events(self):
+        """Loss, restore and format change fire immediately (no 5s poll, no debounce)."""
+        from health import HealthMonitor
+        from hdmi_source_watcher import DVTimings
+        monitor = HealthMonitor(MagicMock())
+        monitor._start_time = time.time() - 3600  # Past the startup grace period
+        monitor._last_hdmi_signal = True
+        monitor._last_hdmi_format = 'NV12@1920x1080'
+        lost, restored, formats = MagicMock(), MagicMock(), []
+        monitor.on_hdmi_lost(lost)
+        monitor.on_hdmi_restored(restored)
+        monitor.on_format_change(formats.append)
+
+        source = _FakeSourceEvents(pixel_format='NV12')
+        monitor._start_source_watcher(source)
+        try:
+            source.push(None)
+            assert self._wait_for(lambda: lost.called)
+            source.push(DVTimings(1920, 1080, 60.0))
+            assert self._wait_for(lambda: restored.called)
+            source.pixel_format = 'NV24'
+            source.push(DVTimings(1280, 720, 60.0))
+            assert self._wait_for(lambda: formats)
+        finally:
+            monitor._source_watcher.stop()
+        assert lost.call_count == 1 and restored.call_count == 1
+        assert formats == ['NV24@1280x720']
+        assert monitor._source_event_recent()
+
+    def test_source_event_callbacks_run_off_watcher_thread_and_lock(self):
+        """A slow recovery callback neither blocks the watcher nor holds the lock."""
+        from health import HealthMonitor
+        monitor = HealthMonitor(MagicMock())
+        monitor._start_time = time.time() - 3600
+        monitor._last_hdmi_signal = True
+        seen = []
+
+        def slow_lost():
+            seen.append((threading.current_thread(), monitor._transition_lock.locked()))
+            time.sleep(0.5)
+
+        monitor.on_hdmi_lost(slow_lost)
+        start = time.monotonic()
+        monitor._on_source_change(None, None)
+        assert time.monotonic() - start < 0.2
+        assert self._wait_for(lambda: seen)
+        assert seen[0][0] is not threading.current_thread()
+        assert seen[0][1] is False
+        monitor.stop()
+
+    def test_unknown_pixel_format_is_not_a_format_change(self):
+        from health import HealthMonitor, _format_changed
+        from hdmi_source_watcher import DVTimings
+        assert not _format_changed('NV12@1920x1080', 'unknown@1920x1080')
+        assert not _format_changed('unknown@1920x1080', 'NV24@1920x1080')
+        assert _format_changed('NV12@1920x1080', 'unknown@1280x720')
+        assert _format_changed('NV12@1920x1080', 'NV24@1920x1080')
+
+        monitor = HealthMonitor(MagicMock())
+        monitor._start_time = time.time() - 3600
+        monitor._last_hdmi_signal = True
+        monitor._last_hdmi_format = 'NV12@1920x1080'
+        formats = []
+        monitor.on_format_change(formats.append)
+        monitor._on_source_change(DVTimings(1920, 1080, 60.0), None)
+        time.sleep(0.1)
+        assert formats == []
+        assert monitor._last_hdmi_format == 'NV12@1920x1080'
+
+    def test_source_events_ignored_during_startup_grace(self):
+        """Source changes during startup only record state."""
+        from health import HealthMonitor
+        monitor = HealthMonitor(MagicMock())
+        monitor._last_hdmi_signal = True
+        lost = MagicMock()
+        monitor.on_hdmi_lost(lost)
+        monitor._on_source_change(None, None)
+        lost.assert_not_called()
+        assert monitor._last_hdmi_signal is False
+        assert monitor._hdmi_lost_time == 0
+
+
+# =============================================================================
+# Pre-armed Blocking Overlay Tests
+# =============================================================================
+
+class TestBlockPrearm:
+    """Tests for the pre-armed blocking state and block-onset metrics."""
+
+    def _blocker(self, calls):
+        from ad_blocker import DRMAdBlocker
+        blocker = DRMAdBlocker.__new__(DRMAdBlocker)
+        blocker._lock = threading.Lock()
+        blocker.is_visible = False
+        blocker.current_source = None
+        blocker._animating = False
+        blocker._animation_direction = None
+        blocker._animation_enabled = False
+        blocker._animation_source = None
+        blocker._frame_width, blocker._frame_height = 1920, 1080
+        blocker._preview_w, blocker._preview_h, blocker._preview_padding = 384, 216, 21
+        blocker._preview_enabled = True
+        blocker._preview_grayscale = True
+        blocker._debug_overlay_enabled = True
+        blocker._pixelated_background_enabled = False
+        blocker._box_alpha = 220
+        blocker._text_y, blocker._text_u, blocker._text_v = 235, 128, 128
+        blocker._locked_content_kind = None
+        blocker._content_kind_lock_until = 0.0
+        blocker.CONTENT_KIND_COOLDOWN_SECONDS = 30.0
+        blocker._prearmed = None
+        blocker._block_text_armed = False
+        blocker._onset_pending = None
+        blocker._ocr_trigger_text = ''
+        blocker._current_vocab = None
+        blocker._test_blocking_until = 0
+        blocker._current_block_start = None
+        blocker.minus = None
+        blocker.audio = None
+        blocker.pipeline = None
+        blocker._get_enabled_replacement_modes = lambda: {'vocab'}
+        blocker._set_led_state = lambda state: None
+        blocker._on_start_animation_complete = lambda: None
+        blocker._stop_rotation_thread = lambda: None
+        blocker._stop_debug_thread = lambda: None
+        blocker._blocking_api_call = (
+            lambda endpoint, params=None, **kw: calls.append((endpoint, params)) or {'ok': True})
+        blocker._blocking_set = lambda params: calls.append(('/blocking/set', params))
+        sent = MagicMock(done=True, result={'ok': True})
+        blocker._blocking_queue = lambda params: calls.append(('/blocking/set', params)) or sent
+        blocker._blocking_result = lambda pending: pending.result
+        return blocker
+
+    def test_prearm_pushes_state_without_enabling(self):
+        """Pre-arm sends text, colors and geometry but leaves blocking off."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            assert blocker._prearm() is True
+            assert len(calls) == 1
+            endpoint, params = calls[0]
+            assert endpoint == '/blocking/set'
+            assert 'enabled' not in params
+            assert params['text_vocab'] == blocker._prearmed['text']
+            assert params['text_vocab'].startswith('[ BLOCKING ]')
+            assert 'word_y' in params and 'box_alpha' in params
+            # Animation disabled: the block starts in the corner
+            assert params['preview_w'] == '384'
+            # Still fresh: nothing re-sent
+            assert blocker._prearm() is True
+            assert len(calls) == 1
+        except ImportError:
+            pass
+
+    def test_prearm_skipped_while_blocking(self):
+        """Pre-arm never touches ustreamer while the overlay is up."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            blocker.is_visible = True
+            assert blocker._prearm() is False
+            assert calls == []
+            assert blocker._prearmed is None
+        except ImportError:
+            pass
+
+    def test_prearm_reply_awaited_outside_lock(self):
+        """show() never waits on the pre-arm round trip; a failed one disarms."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            held = []
+
+            def reply(*args, **kwargs):
+                held.append(blocker._lock.locked())
+                return None
+            blocker._blocking_result = blocker._blocking_api_call = reply
+            assert blocker._prearm() is False
+            assert held == [False]
+            assert blocker._prearmed is None
+        except ImportError:
+            pass
+
+    def test_show_prearmed_is_single_call(self):
+        """A pre-armed show() is one enable call carrying the source header."""
+        try:
+            from ad_blocker import BLOCK_ENABLE_ACK, BLOCK_ONSET
+            calls = []
+            blocker = self._blocker(calls)
+            blocker._prearm()
+            armed_item = blocker._prearmed['item']
+            calls.clear()
+            acks = BLOCK_ENABLE_ACK.labels(path='prearmed').count
+            onsets = BLOCK_ONSET.labels(path='prearmed').count
+            with patch('builtins.open', side_effect=OSError):
+                blocker.show('ocr')
+            assert len(calls) == 1
+            params = calls[0][1]
+            assert params['enabled'] == 'true'
+            assert params['text_vocab'].startswith('[ BLOCKING // OCR ]')
+            assert 'preview_x' not in params
+            assert blocker._current_vocab == armed_item
+            assert blocker._block_text_armed is True
+            assert blocker._prearmed is None
+            assert BLOCK_ENABLE_ACK.labels(path='prearmed').count == acks + 1
+            # No display pipeline: onset is taken at the ack
+            assert BLOCK_ONSET.labels(path='prearmed').count == onsets + 1
+        except ImportError:
+            pass
+
+    def test_show_without_prearm_sends_full_state(self):
+        """Without pre-armed state show() falls back to the full setup."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            with patch('builtins.open', side_effect=OSError):
+                blocker.show('vlm')
+            params = calls[0][1]
+            assert params['enabled'] == 'true'
+            assert params['text_vocab'] == ''
+            assert 'text_vocab_scale' in params and 'preview_x' in params
+            assert blocker._block_text_armed is False
+        except ImportError:
+            pass
+
+    def test_stale_prearm_falls_back(self):
+        """A setting change after pre-arming makes show() send everything."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            blocker._prearm()
+            blocker._frame_width, blocker._frame_height = 3840, 2160
+            calls.clear()
+            with patch('builtins.open', side_effect=OSError):
+                blocker.show('ocr')
+            assert calls[0][1]['text_vocab_scale'] == '10'
+        except ImportError:
+            pass
+
+    def test_idle_hide_keeps_prearmed_text(self):
+        """hide() while nothing is shown doesn't wipe the pre-armed text."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            blocker._prearm()
+            calls.clear()
+            with patch('builtins.open', side_effect=OSError):
+                blocker.hide()
+            assert not any(p and p.get('text_vocab') == '' for _, p in calls)
+            assert blocker._prearmed is not None
+        except ImportError:
+            pass
+
+    def test_onset_skips_frames_queued_before_enable(self):
+        """The first frame after the queued ones completes the onset."""
+        try:
+            from ad_blocker import BLOCK_ONSET
+            blocker = self._blocker([])
+            before = BLOCK_ONSET.labels(path='full').count
+            blocker._onset_pending = [time.monotonic(), 'full', 2]
+            blocker._observe_onset_frame()
+            blocker._observe_onset_frame()
+            assert BLOCK_ONSET.labels(path='full').count == before
+            blocker._observe_onset_frame()
+            assert BLOCK_ONSET.labels(path='full').count == before + 1
+            assert blocker._onset_pending is None
+        except ImportError:
+            pass
+
+    def test_pixelated_background_built_from_thumbnail(self):
+        """A 4K snapshot becomes a small block image, not a 4K JPEG."""
+        if not HAS_NUMPY:
+            return
+        try:
+            import cv2
+            from collections import deque
+            from ad_blocker import PIXELATE_FACTOR, PIXELATE_OUTPUT_WIDTH
+            blocker = self._blocker([])
+            snapshot = np.full((2160, 3840, 3), 200, dtype=np.uint8)
+            blocker._snapshot_buffer = deque([{'data': cv2.imencode('.jpg', snapshot)[1].tobytes()}])
+            data, origin = blocker._background_jpeg()
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            cols = 3840 // PIXELATE_FACTOR
+            assert img.shape[1] == cols * (PIXELATE_OUTPUT_WIDTH // cols)
+            assert origin.startswith(f"pixelated {cols}x")
+            assert abs(int(img[0, 0, 0]) - 120) <= 3  # darkened to 60%
+        except ImportError:
+            pass
+
+    def test_photo_background_posts_cached_frame(self):
+        """Photo mode sends the pre-rendered frame without rendering."""
+        try:
+            calls = []
+            blocker = self._blocker(calls)
+            blocker.output_width, blocker.output_height = 1920, 1080
+            cache = MagicMock()
+            cache.random_frame.return_value = ('abc', b'frame-jpeg')
+            with patch('ad_blocker.get_photo_frame_cache', return_value=cache):
+                assert blocker._push_photo_background()
+                cache.random_frame.return_value = None
+                assert blocker._push_photo_background() is False
+            # Mid-block: no sync started, nothing rendered on a cold cache
+            cache.set_resolution.assert_not_called()
+            cache.refresh.assert_not_called()
+            cache.render.assert_not_called()
+            assert calls == [('/blocking/background', None)]
+        except ImportError:
+            pass
+
+
+# =============================================================================
+# ustreamer Control Client Tests
+# =============================================================================
+
+class TestUstreamerControl:
+    """Tests for the coalescing ustreamer control client."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.temp_dir, 'minus_blocking_state')
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _control(self, tick=0.05, delay=0.0):
+        from ustreamer_control import UstreamerControl
+        control = UstreamerControl(port=1, state_path=self.state_path, tick=tick)
+        sent = []
+
+        def fake_call(endpoint, params=None, **kwargs):
+            sent.append((endpoint, dict(params or {})))
+            if delay:
+                time.sleep(delay)
+            return {'ok': True}
+        control.call = fake_call
+        return control, sent
+
+    def test_fire_and_forget_updates_coalesce(self):
+        """Updates within one tick become one request, last writer wins."""
+        control, sent = self._control()
+        control.set_blocking({'text_vocab': 'uno'}, wait=False)
+        control.set_blocking({'text_stats': 'x'}, wait=False)
+        control.set_blocking({'text_vocab': 'dos'}, wait=False)
+        assert sent == []
+        deadline = time.time() + 2.0
+        while not sent and time.time() < deadline:
+            time.sleep(0.01)
+        assert sent == [('/blocking/set', {'text_vocab': 'dos', 'text_stats': 'x'})]
+
+    def test_wait_sends_pending_fields_immediately(self):
+        """A waiting call carries pending fields without waiting a tick."""
+        control, sent = self._control(tick=10.0)
+        control.set_blocking({'preview_x': 5}, wait=False)
+        result = control.set_blocking({'enabled': 'true', 'preview_x': 0})
+        assert result == {'ok': True}
+        assert sent == [('/blocking/set', {'preview_x': '0', 'enabled': 'true'})]
+
+    def test_calls_during_flight_join_next_request(self):
+        """Callers arriving while a request is in flight share the next one."""
+        control, sent = self._control(tick=10.0, delay=0.2)
+        first = threading.Thread(target=control.set_blocking, args=({'a': 1},))
+        first.start()
+        time.sleep(0.05)
+        joiners = [threading.Thread(target=control.set_blocking, args=({f'k{i}': i},))
+                   for i in range(3)]
+        for t in joiners:
+            t.start()
+        for t in [first] + joiners:
+            t.join(timeout=5)
+        assert len(sent) == 2
+        assert sent[1][1] == {'k0': '0', 'k1': '1', 'k2': '2'}
+
+    def test_queued_fields_keep_call_order(self):
+        """Queued fields go out before a later caller's; result() waits for them."""
+        control, sent = self._control(tick=10.0)
+        pending = control.queue_blocking({'text_vocab': 'hola', 'preview_x': 5})
+        control.set_blocking({'enabled': 'true', 'preview_x': 0})
+        assert control.result(pending) == {'ok': True}
+        assert sent == [('/blocking/set', {'text_vocab': 'hola', 'preview_x': '0',
+                                           'enabled': 'true'})]
+
+    def test_clear_drops_pending_fields(self):
+        """A clear supersedes fields queued before it."""
+        control, sent = self._control(tick=10.0)
+        control.set_blocking({'text_vocab': 'hola'}, wait=False)
+        control.set_blocking({'clear': 'true'})
+        assert sent == [('/blocking/set', {'clear': 'true'})]
+
+    def test_blocking_state_file_published(self):
+        """Enable/disable is written to the shared state file."""
+        control, _ = self._control()
+        control.set_blocking({'enabled': 'true'})
+        with open(self.state_path) as f:
+            assert f.read() == '1'
+        control.set_blocking({'enabled': 'false', 'text_vocab': ''})
+        with open(self.state_path) as f:
+            assert f.read() == '0'
+        assert not [n for n in os.listdir(self.temp_dir) if n.endswith('.tmp')]
+
+    def test_failures_counted_by_kind(self):
+        """Unreachable ustreamer shows up in the error counter, not silence."""
+        from ustreamer_control import UstreamerControl, REQUEST_ERRORS
+        control = UstreamerControl(port=1, state_path=self.state_path)
+        before = REQUEST_ERRORS.labels(endpoint='/overlay/set', kind='connection').value
+        assert control.call('/overlay/set', {'text': 'hi'}, timeout=0.5) is None
+        after = REQUEST_ERRORS.labels(endpoint='/overlay/set', kind='connection').value
+        assert after == before + 1
+        assert control.stats()['failing_endpoints'] == {'/overlay/set': 1}
+
+
+# =============================================================================
+# LAN Scanner Tests
+# =============================================================================
+
+class TestLanScan:
+    """Tests for the bounded LAN scanner behind Fire TV discovery."""
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.listeners = []
+
+    def teardown_method(self):
+        for sock in self.listeners:
+            sock.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _listen(self, ip, handler=None):
+        """Stand-in device on ip:port; handler(conn) runs per connection."""
+        import socket
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((ip, self.port if hasattr(self, 'port') else 0))
+        sock.listen(8)
+        self.port = sock.getsockname()[1]
+        self.listeners.append(sock)
+        if handler:
+            def serve():
+                while True:
+                    try:
+                        conn, _ = sock.accept()
+                    except OSError:
+                        return
+                    with conn:
+                        handler(conn)
+            threading.Thread(target=serve, daemon=True).start()
+        return sock
+
+    def _write(self, name, text):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_local_networks_from_route_table(self):
+        """Subnet comes from the netmask; default-route interfaces win."""
+        import ipaddress
+        from lan_scan import local_networks
+        routes = self._write('route', (
+            "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+            "wlan0\t00000000\t0100A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0\n"
+            "wlan0\t0000A8C0\t00000000\t0001\t0\t0\t600\t00FCFFFF\t0\t0\t0\n"
+            "docker0\t000011AC\t00000000\t0001\t0\t0\t0\t0000FFFF\t0\t0\t0\n"))
+        addresses = {'wlan0': ipaddress.IPv4Address('192.168.2.17'),
+                     'docker0': ipaddress.IPv4Address('172.17.0.1')}
+        nets = local_networks(routes, address_of=addresses.get)
+        assert nets == [ipaddress.IPv4Interface('192.168.2.17/22')]
+
+    def test_neighbor_ips_skips_incomplete_entries(self):
+        from lan_scan import neighbor_ips
+        arp = self._write('arp', (
+            "IP address       HW type     Flags       HW address            Mask     Device\n"
+            "192.168.1.20     0x1         0x2         aa:bb:cc:dd:ee:ff     *        wlan0\n"
+            "192.168.1.21     0x1         0x0         00:00:00:00:00:00     *        wlan0\n"))
+        assert neighbor_ips(arp) == ['192.168.1.20']
+
+    def test_sweep_capped_and_excludes_self(self):
+        import ipaddress
+        from lan_scan import sweep_hosts, MAX_SWEEP_HOSTS
+        hosts = sweep_hosts(ipaddress.IPv4Interface('10.1.7.9/16'))
+        assert len(hosts) == MAX_SWEEP_HOSTS - 1
+        assert '10.1.7.9' not in hosts
+        assert hosts[0] == '10.1.4.1'
+        assert len(sweep_hosts(ipaddress.IPv4Interface('192.168.1.5/24'))) == 253
+
+    def test_scan_finds_stand_in_listeners_and_remembers_them(self):
+        import ipaddress
+        from lan_scan import scan, KnownDevices
+        self._listen('127.0.0.5')
+        self._listen('127.0.0.77')
+        known = KnownDevices(os.path.join(self.test_dir, 'known.json'))
+        hits = scan(self.port, timeout=5.0, networks=[ipaddress.IPv4Interface('127.0.0.1/24')],
+                    neighbors=[], known=known, window=8, resolve=lambda ip: 'tv.lan')
+        assert [h['ip'] for h in hits] == ['127.0.0.5', '127.0.0.77']
+        assert hits[0]['hostname'] == 'tv.lan' and hits[0]['source'] == 'sweep'
+        assert known.get(self.port) == ['127.0.0.5', '127.0.0.77']
+
+    def test_first_only_stops_at_known_device(self):
+        import ipaddress
+        from lan_scan import scan, KnownDevices
+        self._listen('127.0.0.5')
+        self._listen('127.0.0.200')
+        known = KnownDevices(os.path.join(self.test_dir, 'known.json'))
+        known.remember(self.port, ['127.0.0.200'])
+        with patch('lan_scan.probe_hosts', wraps=__import__('lan_scan').probe_hosts) as probe:
+            hits = scan(self.port, timeout=5.0, first_only=True, known=known,
+                        networks=[ipaddress.IPv4Interface('127.0.0.1/24')],
+                        neighbors=['127.0.0.9', '8.8.8.8'], resolve=lambda ip: None)
+        assert [(h['ip'], h['source']) for h in hits] == [('127.0.0.200', 'known')]
+        # Known first, then neighbors on the LAN only, then the sweep
+        assert probe.call_args[0][0][:2] == ['127.0.0.200', '127.0.0.9']
+        assert '8.8.8.8' not in probe.call_args[0][0]
+
+    def test_verify_drops_non_adb_listener(self):
+        """A port that doesn't answer the ADB handshake isn't a device."""
+        import ipaddress
+        import struct
+        from lan_scan import scan, adb_handshake, KnownDevices
+
+        def adbd(conn):
+            conn.recv(64)
+            auth = 0x48545541
+            conn.sendall(struct.pack('<6I', auth, 1, 0, 20, 0, auth ^ 0xffffffff))
+
+        self._listen('127.0.0.30', handler=adbd)
+        self._listen('127.0.0.31', handler=lambda conn: conn.sendall(b'SSH-2.0-OpenSSH\r\n' * 2))
+        assert adb_handshake('127.0.0.30', self.port)
+        assert not adb_handshake('127.0.0.31', self.port)
+        hits = scan(self.port, timeout=5.0, verify=lambda ip: adb_handshake(ip, self.port),
+                    networks=[ipaddress.IPv4Interface('127.0.0.1/26')], neighbors=[],
+                    known=KnownDevices(os.path.join(self.test_dir, 'k.json')),
+                    resolve=lambda ip: None)
+        assert [(h['ip'], h['verified']) for h in hits] == [('127.0.0.30', True)]
+
+    def test_hostnames_resolved_concurrently_and_bounded(self):
+        import ipaddress
+        from lan_scan import scan, KnownDevices, RESOLVE_TIMEOUT_S
+        for i in (5, 6, 7, 8):
+            self._listen(f'127.0.0.{i}')
+
+        def resolve(ip):
+            time.sleep(30 if ip == '127.0.0.8' else 0.3)
+            return f'host-{ip}'
+
+        start = time.monotonic()
+        hits = scan(self.port, timeout=10.0, networks=[ipaddress.IPv4Interface('127.0.0.1/28')],
+                    neighbors=[], known=KnownDevices(os.path.join(self.test_dir, 'k.json')),
+                    resolve=resolve)
+        assert time.monotonic() - start < RESOLVE_TIMEOUT_S + 1.0
+        names = {h['ip']: h['hostname'] for h in hits}
+        assert names == {'127.0.0.5': 'host-127.0.0.5', '127.0.0.6': 'host-127.0.0.6',
+                         '127.0.0.7': 'host-127.0.0.7', '127.0.0.8': None}
+
+    def test_slow_on_open_does_not_expire_inflight_connects(self):
+        """A blocking verify isn't charged to connects still in flight."""
+        from lan_scan import probe_hosts
+        self._listen('127.0.0.40')
+        self._listen('127.0.0.41')
+        seen = []
+
+        def on_open(ip):
+            seen.append(ip)
+            time.sleep(0.3)
+            return False
+
+        real_select = __import__('selectors').DefaultSelector
+
+        class OneAtATime(real_select):
+            """Report one ready socket per select, like a slow second host."""
+            def select(self, timeout=None):
+                return super().select(timeout)[:1]
+
+        with patch('lan_scan.selectors.DefaultSelector', OneAtATime):
+            found = probe_hosts(['127.0.0.40', '127.0.0.41'], self.port, timeout=0.2, window=2,
+                                on_open=on_open)
+        assert sorted(found) == ['127.0.0.40', '127.0.0.41']
+        assert sorted(seen) == sorted(found)
+
+    def test_probe_window_and_deadline(self):
+        """Never more than `window` sockets open; stops at the deadline."""
+        import socket as socket_mod
+        from lan_scan import probe_hosts
+        opened = []
+        real_socket = socket_mod.socket
+
+        class CountingSocket(real_socket):
+            live = 0
+            peak = 0
+
+            def __init__(self, *a, **kw):
+                super().__init__(*a, **kw)
+                CountingSocket.live += 1
+                CountingSocket.peak = max(CountingSocket.peak, CountingSocket.live)
+                opened.append(self)
+
+            def close(self):
+                if self.fileno() != -1:
+                    CountingSocket.live -= 1
+                super().close()
+
+        # TEST-NET-1 is never routed: connects hang until the timeout
+        hosts = [f'192.0.2.{i}' for i in range(1, 60)]
+        start = time.monotonic()
+        with patch('lan_scan.socket.socket', CountingSocket):
+            found = probe_hosts(hosts, 5555, timeout=5.0, window=4,
+                                deadline=time.monotonic() + 0.3)
+        assert found == []
+        assert time.monotonic() - start < 2.0
+        assert CountingSocket.peak <= 4
+        assert CountingSocket.live == 0
+
+    def test_fire_tv_discovery_uses_scanner(self):
+        from fire_tv import FireTVController, ADB_PORT
+        hit = {'ip': '192.168.1.50', 'hostname': None, 'port': ADB_PORT,
+               'source': 'neighbor', 'verified': True}
+        with patch('lan_scan.scan', return_value=[hit]) as scan:
+            devices = FireTVController.discover_devices(timeout=3.0, verify_fire_tv=True,
+                                                        first_only=True)
+        assert devices == [{'ip': '192.168.1.50', 'hostname': None, 'port': ADB_PORT,
+                            'source': 'neighbor', 'adb': True}]
+        assert scan.call_args.kwargs['first_only'] is True
+        assert scan.call_args.kwargs['verify'] is not None
+
+
+# =============================================================================
+# ADB Command Channel Tests
+# =============================================================================
+
+class TestAdbChannel:
+    """Tests for the batched ADB command channel behind FireTVController."""
+
+    FOCUS = ("  mCurrentFocus=Window{1a2b u0 com.netflix.ninja/com.netflix.ninja.MainActivity}\n"
+             "  mFocusedApp=AppWindowToken{3c ActivityRecord{4d u0 com.netflix.ninja/.Main t9}}\n")
+
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.key_log = os.path.join(self.test_dir, 'keys.log')
+        self.scripts = []
+        self.channels = []
+
+    def teardown_method(self):
+        for channel in self.channels:
+            channel.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _shell(self, script):
+        """Stand-in device shell: local sh with `input` and `dumpsys` stubbed."""
+        import subprocess
+        self.scripts.append(script)
+        prelude = (f'input() {{ echo "$*" >> {self.key_log}; }}\n'
+                   f"dumpsys() {{ printf '{self.FOCUS}'; }}\n")
+        return subprocess.run(['sh', '-c', prelude + script], capture_output=True,
+                              text=True, timeout=10).stdout
+
+    def _channel(self, **kwargs):
+        from adb_channel import AdbCommandChannel
+        channel = AdbCommandChannel(kwargs.pop('shell', self._shell), **kwargs)
+        self.channels.append(channel)
+        return channel
+
+    def _keys(self):
+        with open(self.key_log) as f:
+            return f.read().splitlines()
+
+    def test_run_returns_each_commands_output(self):
+        channel = self._channel()
+        assert channel.run('echo hello') == 'hello\n'
+        assert channel.run('printf x; false') == 'x'
+        job = channel.submit('exit_code_test() { return 3; }; exit_code_test')
+        job.wait()
+        assert job.status == 3
+
+    def test_queued_commands_share_one_round_trip(self):
+        lock = threading.Lock()
+        channel = self._channel(lock=lock)
+        with lock:
+            first = channel.submit('echo first')
+            time.sleep(0.1)  # Worker has taken `first` and waits for the lock
+            rest = [channel.submit(f'echo job{i}') for i in range(3)]
+        assert first.wait() == 'first\n'
+        assert [job.wait() for job in rest] == ['job0\n', 'job1\n', 'job2\n']
+        assert channel.stats()['round_trips'] == 2
+        assert channel.stats()['commands'] == 4
+        assert self.scripts[1].count('__MINUS_ADB_') == 3
+
+    def test_send_keys_packs_one_input_call(self):
+        channel = self._channel()
+        channel.send_keys(['KEYCODE_DPAD_RIGHT'] * 3)
+        assert self._keys() == ['keyevent KEYCODE_DPAD_RIGHT KEYCODE_DPAD_RIGHT KEYCODE_DPAD_RIGHT']
+
+    def test_send_keys_with_delay_spaces_presses_on_device(self):
+        channel = self._channel()
+        start = time.monotonic()
+        channel.send_keys(['KEYCODE_BACK', 'KEYCODE_HOME'], delay=0.2)
+        assert time.monotonic() - start >= 0.2
+        assert self._keys() == ['keyevent KEYCODE_BACK', 'keyevent KEYCODE_HOME']
+        assert len(self.scripts) == 1
+
+    def test_send_keys_rejects_shell_text(self):
+        import pytest
+        channel = self._channel()
+        with pytest.raises(ValueError):
+            channel.send_keys(['KEYCODE_BACK; reboot'])
+        assert self.scripts == []
+
+    def test_query_cached_until_ttl_or_other_command(self):
+        channel = self._channel()
+        assert channel.query('echo state', ttl=60) == 'state\n'
+        assert channel.query('echo state', ttl=60) == 'state\n'
+        assert len(self.scripts) == 1
+        assert channel.stats()['cache_hits'] == 1
+
+        channel.send_keys(['KEYCODE_BACK'])
+        channel.query('echo state', ttl=60)
+        assert len(self.scripts) == 3
+
+        channel.query('echo state', ttl=0)
+        assert len(self.scripts) == 4
+
+    def test_shell_failure_fails_batch_and_reports(self):
+        import pytest
+        from adb_channel import AdbChannelError
+        errors = []
+
+        def broken(script):
+            raise ConnectionResetError('device gone')
+
+        channel = self._channel(shell=broken, on_error=errors.append)
+        with pytest.raises(AdbChannelError):
+            channel.run('echo hi', timeout=2)
+        assert len(errors) == 1
+        assert channel.stats()['errors'] == 1
+
+        channel.close()
+        with pytest.raises(AdbChannelError):
+            channel.run('echo hi', timeout=2)
+
+    def test_command_latency_metric(self):
+        from adb_channel import COMMAND_LATENCY, ROUND_TRIP
+        keys_before = COMMAND_LATENCY.labels(kind='keys').count
+        trips_before = ROUND_TRIP._default().count
+        channel = self._channel()
+        channel.send_keys(['KEYCODE_BACK'])
+        assert COMMAND_LATENCY.labels(kind='keys').count == keys_before + 1
+        assert ROUND_TRIP._default().count == trips_before + 1
+
+    def test_fire_tv_controller_uses_channel(self):
+        from fire_tv import FireTVController
+
+        controller = FireTVController.__new__(FireTVController)
+        controller._lock = threading.Lock()
+        controller._connected = True
+        controller._device = MagicMock()
+        controller._channel = self._channel(lock=controller._lock,
+                                            on_error=controller._on_channel_error)
+
+        assert controller.skip_ad('seek_right') is True
+        assert self._keys() == ['keyevent KEYCODE_DPAD_RIGHT KEYCODE_DPAD_RIGHT KEYCODE_DPAD_RIGHT']
+        assert controller.send_keys('back', 'bogus') is False
+        assert controller.get_current_app() == 'com.netflix.ninja'
+        assert controller.shell('echo ok') == 'ok\n'
+        controller._device.adb_shell.assert_not_called()
+        controller._device.update.assert_not_called()
+
+    def test_fire_tv_channel_error_marks_disconnected(self):
+        from fire_tv import FireTVController
+
+        def broken(script):
+            raise OSError('connection reset')
+
+        controller = FireTVController.__new__(FireTVController)
+        controller._lock = threading.Lock()
+        controller._connected = True
+        controller._device = MagicMock()
+        controller._channel = self._channel(shell=broken, lock=controller._lock,
+                                            on_error=controller._on_channel_error)
+
+        assert controller.send_command('select') is False
+        assert controller._connected is False
+
+
+# =============================================================================
+# Roku ECP Client Tests
+# =============================================================================
+
+class TestRokuEcpClient:
+    """Tests for the keep-alive ECP client, against a local ECP stand-in."""
+
+    ACTIVE_APP = ('<active-app><app id="837" type="appl">YouTube</app>'
+                  '<screensaver id="55545" type="ssvr">Aquarium</screensaver></active-app>')
+    DEVICE_INFO = ('<device-info><serial-number>X001</serial-number>'
+                   '<model-name>Roku Ultra</model-name>'
+                   '<user-device-name>Den</user-device-name></device-info>')
+
+    def setup_method(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import roku_ecp
+        roku_ecp._clients.clear()
+        self.hits = []        # (method, path, client port)
+        self.delay = 0.0      # Per-request delay
+        self.close_each = False
+        self.drop_after = None  # Drop the connection unanswered after N requests
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _reply(self, status, body=b''):
+                test.hits.append((self.command, self.path, self.client_address[1]))
+                if test.drop_after is not None and len(test.hits) > test.drop_after:
+                    self.close_connection = True
+                    return
+                time.sleep(test.delay)
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                if test.close_each:
+                    self.send_header('Connection', 'close')
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/query/active-app':
+                    self._reply(200, test.ACTIVE_APP.encode())
+                elif self.path == '/query/device-info':
+                    self._reply(200, test.DEVICE_INFO.encode())
+                else:
+                    self._reply(200)
+
+            def do_POST(self):
+                self._reply(202 if self.path.startswith('/keypress/') else 200)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def teardown_method(self):
+        import roku_ecp
+        for client in roku_ecp._clients.values():
+            client.close()
+        roku_ecp._clients.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, ip='127.0.0.1'):
+        """Register a client for `ip` on the stand-in's port, as get_ecp_client would."""
+        import roku_ecp
+        client = roku_ecp.EcpClient(ip, self.port)
+        roku_ecp._clients[(ip, roku_ecp.ROKU_PORT)] = client
+        return client
+
+    def test_requests_reuse_one_connection(self):
+        client = self._client()
+        assert client.request('GET', '/')[0] == 200
+        assert client.request('POST', '/keypress/Back')[0] == 202
+        assert len({port for _, _, port in self.hits}) == 1
+
+    def test_keypresses_pipelined_in_order(self):
+        client = self._client()
+        assert client.keypresses(['Right', 'Right', 'Select']) == [202, 202, 202]
+        assert [path for _, path, _ in self.hits] == [
+            '/keypress/Right', '/keypress/Right', '/keypress/Select']
+        assert len({port for _, _, port in self.hits}) == 1
+        # The connection is still usable afterwards
+        assert client.request('GET', '/')[0] == 200
+
+    def test_pipeline_falls_back_when_roku_closes(self):
+        self.close_each = True
+        client = self._client()
+        assert client.keypresses(['Up', 'Down', 'Left']) == [202, 202, 202]
+        assert [path for _, path, _ in self.hits] == [
+            '/keypress/Up', '/keypress/Down', '/keypress/Left']
+
+    def test_pipeline_drop_reports_unanswered_keys_without_resending(self):
+        self.drop_after = 1
+        client = self._client()
+        assert client.keypresses(['Up', 'Down', 'Left']) == [202, None, None]
+        time.sleep(0.1)
+        assert [path for _, path, _ in self.hits] == ['/keypress/Up', '/keypress/Down']
+
+    def test_query_cached_until_ttl_or_post(self):
+        from roku_ecp import ACTIVE_APP, DEVICE_INFO
+        client = self._client()
+        assert client.query(ACTIVE_APP, ttl=60)[1] == self.ACTIVE_APP
+        client.query(ACTIVE_APP, ttl=60)
+        client.query(DEVICE_INFO, ttl=60)
+        assert len(self.hits) == 2
+
+        client.keypresses(['Back'])
+        client.query(ACTIVE_APP, ttl=60)
+        client.query(DEVICE_INFO, ttl=60)  # Kept across keypresses
+        assert [path for _, path, _ in self.hits[2:]] == ['/keypress/Back', ACTIVE_APP]
+        assert client.stats()['cache_hits'] == 2
+
+    def test_concurrent_queries_share_one_request(self):
+        from roku_ecp import ACTIVE_APP
+        self.delay = 0.2
+        client = self._client()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.query(ACTIVE_APP, ttl=1)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 5 and all(r[0] == 200 for r in results)
+        assert len(self.hits) == 1
+
+    def test_controller_app_queries_share_one_fetch(self):
+        from roku import RokuController
+        self._client()
+        controller = RokuController()
+        controller._connected = True
+        controller._ip_address = '127.0.0.1'
+
+        assert controller.is_screensaver_active() is True
+        assert controller.get_active_app_id() == '837'
+        assert controller.get_active_app() == 'YouTube'
+        assert len(self.hits) == 1
+
+        assert controller.send_keys('right', 'right', 'select', delay=0) is True
+        assert controller.send_keys('right', 'bogus') is False
+        assert [path for _, path, _ in self.hits[1:]] == [
+            '/keypress/Right', '/keypress/Right', '/keypress/Select']
+
+    def test_discovery_fetches_device_info_concurrently(self):
+        import socket
+        from roku import RokuController
+        self.delay = 0.3
+        responders = ['127.0.0.1', '127.0.0.2', '127.0.0.3']
+        for ip in responders:
+            self._client(ip)
+
+        fake = MagicMock()
+        fake.recvfrom.side_effect = [(b'HTTP/1.1 200 OK\r\nST: roku:ecp\r\n', (ip, 1900))
+                                     for ip in responders] + [socket.timeout()]
+        # Only roku's SSDP socket is faked; ECP still goes over real TCP
+        fake_socket_module = MagicMock(timeout=socket.timeout)
+        fake_socket_module.socket.return_value = fake
+
+        start = time.monotonic()
+        with patch('roku.socket', fake_socket_module):
+            devices = RokuController.discover_devices(timeout=2.0)
+        elapsed = time.monotonic() - start
+
+        assert sorted(d['ip'] for d in devices) == responders
+        assert all(d['serial'] == 'X001' for d in devices)
+        assert elapsed < 0.3 * len(responders)
+
+
+# =============================================================================
+# Webhook Delivery Tests
+# =============================================================================
+
+class TestWebhookDelivery:
+    """Tests for the queued webhook delivery engine, against local endpoints."""
+
+    def setup_method(self):
+        self.servers = []
+        self.managers = []
+
+    def teardown_method(self):
+        for manager in self.managers:
+            manager.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def _endpoint(self, statuses=(), delay=0.0):
+        """Local webhook receiver; replies with `statuses` in turn, then 200.
+
+        Returns (url, received) where received lists (payload, client port).
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        received = []
+        replies = list(statuses)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                time.sleep(delay)
+                status = replies.pop(0) if replies else 200
+                if status == 200:
+                    received.append((json.loads(body), self.client_address[1]))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/hook", received
+
+    def _manager(self, *urls, window=0.05, interval=0.3):
+        from webhooks import WebhookManager
+        manager = WebhookManager(urls=list(urls))
+        manager.batch_window = window
+        manager._min_notification_interval = interval
+        self.managers.append(manager)
+        return manager
+
+    @staticmethod
+    def _wait_for(predicate, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_single_event_keeps_payload_shape(self):
+        url, received = self._endpoint()
+        manager = self._manager(url)
+        manager.notify('test', {'message': 'hi'})
+        assert self._wait_for(lambda: len(received) == 1)
+        payload = received[0][0]
+        assert payload['event'] == 'test'
+        assert payload['data'] == {'message': 'hi'}
+        assert 'timestamp' in payload
+
+    def test_events_in_window_batched_and_types_not_dropped(self):
+        url, received = self._endpoint()
+        manager = self._manager(url, window=0.2)
+        manager.notify('ad_detected', {'source': 'ocr'})
+        manager.notify('blocking_started', {'source': 'ocr'})
+        manager.notify('blocking_stopped', {'source': 'ocr'})
+        assert self._wait_for(lambda: len(received) == 1)
+        payload = received[0][0]
+        assert payload['event'] == 'batch'
+        assert [e['event'] for e in payload['events']] == [
+            'ad_detected', 'blocking_started', 'blocking_stopped']
+
+    def test_rate_limit_coalesces_same_type(self):
+        url, received = self._endpoint()
+        manager = self._manager(url)
+        manager.notify('ad_detected', {'n': 1})
+        assert self._wait_for(lambda: len(received) == 1)
+        for n in (2, 3, 4):
+            manager.notify('ad_detected', {'n': n})
+        assert self._wait_for(lambda: len(received) == 2)
+        later = received[1][0]
+        assert later['data'] == {'n': 4}
+        assert later['coalesced'] == 2
+        time.sleep(0.4)
+        assert len(received) == 2
+
+    def test_coalescing_keeps_start_stop_order(self):
+        url, received = self._endpoint()
+        manager = self._manager(url, window=0.25, interval=1.0)
+        sequence = [(0.0, 'blocking_started'), (0.3, 'blocking_stopped'),
+                    (0.6, 'blocking_started'), (0.7, 'blocking_stopped'),
+                    (1.0, 'blocking_started')]
+        start = time.monotonic()
+        for n, (at, event) in enumerate(sequence):
+            time.sleep(max(0.0, start + at - time.monotonic()))
+            manager.notify(event, {'n': n})
+
+        def delivered():
+            events = []
+            for payload, _ in received:
+                events.extend(payload['events'] if payload['event'] == 'batch' else [payload])
+            return events
+
+        assert self._wait_for(lambda: any(e['data']['n'] == 4 for e in delivered()), timeout=4.0)
+        time.sleep(1.2)  # Nothing may follow the latest start
+        events = delivered()
+        assert events[-1]['event'] == 'blocking_started'
+        assert events[-1]['data'] == {'n': 4}
+        stamps = [e['timestamp'] for e in events]
+        assert stamps == sorted(stamps)
+
+    def test_retries_with_backoff_then_delivers(self):
+        import webhooks
+        url, received = self._endpoint(statuses=(503, 503))
+        manager = self._manager(url)
+        retries_before = webhooks.DELIVERY_RETRIES.get()
+        delivered_before = webhooks.EVENTS_DELIVERED.get()
+        with patch.object(webhooks, 'RETRY_BASE_S', 0.01):
+            manager.notify('blocking_stopped', {'source': 'ocr'})
+            assert self._wait_for(lambda: len(received) == 1)
+        assert webhooks.DELIVERY_RETRIES.get() == retries_before + 2
+        assert self._wait_for(lambda: webhooks.EVENTS_DELIVERED.get() == delivered_before + 1)
+
+    def test_gives_up_and_counts_drop(self):
+        import webhooks
+        url, received = self._endpoint(statuses=(500,) * 10)
+        manager = self._manager(url)
+        dropped_before = webhooks.EVENTS_DROPPED.get(reason='retries')
+        with patch.object(webhooks, 'RETRY_BASE_S', 0.01), \
+                patch.object(webhooks, 'MAX_ATTEMPTS', 2):
+            manager.notify('blocking_started', {})
+            assert self._wait_for(
+                lambda: webhooks.EVENTS_DROPPED.get(reason='retries') == dropped_before + 1)
+        assert received == []
+
+    def test_client_error_not_retried(self):
+        import webhooks
+        url, received = self._endpoint(statuses=(404, 404))
+        manager = self._manager(url)
+        rejected_before = webhooks.EVENTS_DROPPED.get(reason='rejected')
+        manager.notify('test', {})
+        assert self._wait_for(
+            lambda: webhooks.EVENTS_DROPPED.get(reason='rejected') == rejected_before + 1)
+
+    def test_keep_alive_connection_reused(self):
+        url, received = self._endpoint()
+        manager = self._manager(url, interval=0.0)
+        manager.notify('ad_detected', {})
+        assert self._wait_for(lambda: len(received) == 1)
+        manager.notify('blocking_started', {})
+        assert self._wait_for(lambda: len(received) == 2)
+        assert received[0][1] == received[1][1]
+
+    def test_slow_endpoint_does_not_block_others_or_add_threads(self):
+        slow_url, slow_received = self._endpoint(delay=0.5)
+        fast_url, fast_received = self._endpoint()
+        manager = self._manager(slow_url, fast_url, interval=0.0, window=0.01)
+        webhook_threads = lambda: sum(t.name.startswith('Webhook') for t in threading.enumerate())
+        threads_before = webhook_threads()
+        for i in range(10):
+            manager.notify(f'event_{i}', {})
+            time.sleep(0.02)
+        assert self._wait_for(lambda: len(fast_received) >= 5, timeout=1.0)
+        assert len(slow_received) <= 2
+        # Dispatcher plus one sender per endpoint, however many events
+        assert webhook_threads() - threads_before <= 3
+
+    def test_metrics_exported(self):
+        from metrics import REGISTRY
+        import webhooks  # noqa: F401
+        text = REGISTRY.render()
+        for name in ('minus_webhook_events_delivered_total', 'minus_webhook_retries_total',
+                     'minus_webhook_events_dropped_total'):
+            assert f'# TYPE {name} counter' in text
+
+
+# =============================================================================
+# Thermal Governor Tests
+# =============================================================================
+
+class TestThermalGovernor:
+    """Tests for the thermal governor policy, driven by synthetic sensor traces."""
+
+    def _governor(self):
+        from thermal_governor import ThermalGovernor
+        return ThermalGovernor(sensors=lambda: {})
+
+    @staticmethod
+    def _run(governor, trace, start=0.0, step=5.0):
+        """Feed (soc °C) samples every `step` seconds; the level after each."""
+        levels = []
+        for i, temp in enumerate(trace):
+            levels.append(governor.step({'soc': temp}, start + i * step))
+        return levels
+
+    def test_steady_cool_session_stays_normal(self):
+        import math
+        governor = self._governor()
+        # Four hours at 55-60°C with sensor noise
+        trace = [57.5 + 2.5 * math.sin(i / 7.0) for i in range(4 * 3600 // 5)]
+        assert set(self._run(governor, trace)) == {0}
+        assert governor.decisions() == []
+        assert governor.ocr_pause_s == 0.1
+        assert governor.vlm_pause_s == 0.5
+        assert governor.capture_scale == 1
+
+    def test_backs_off_before_trip_on_a_climb(self):
+        governor = self._governor()
+        # 50°C -> 84°C over ten minutes, never reaching the 85°C trip
+        trace = [50 + 34 * i / 120 for i in range(121)]
+        levels = self._run(governor, trace)
+        first_raise = next(i for i, level in enumerate(levels) if level > 0)
+        assert trace[first_raise] < 70  # Lookahead acts below the soft limit
+        assert levels[-1] >= 2
+        assert governor.vlm_pause_s > 0.5
+        assert governor.asr_interval_scale > 1.0
+
+    def test_restores_stepwise_after_cooldown(self):
+        from thermal_governor import COOLDOWN_S, TIERS
+        governor = self._governor()
+        self._run(governor, [86.0] * 3)
+        assert governor.level == len(TIERS) - 1
+
+        cool = [55.0] * int(4 * COOLDOWN_S / 5 + 10)
+        levels = self._run(governor, cool, start=15.0)
+        assert levels[0] == len(TIERS) - 1
+        # Never drops more than one level per sample
+        assert all(a - b <= 1 for a, b in zip(levels, levels[1:]))
+        assert levels[-1] == 0
+        assert [d['to'] for d in governor.decisions()][-3:] == ['hot', 'warm', 'normal']
+
+    def test_hysteresis_prevents_flapping(self):
+        from thermal_governor import SENSOR_LIMITS, TIERS
+        soft, trip = SENSOR_LIMITS['soc']
+        governor = self._governor()
+        entry = soft + TIERS[1].enter * (trip - soft)
+        # Flat around the 'warm' entry point, wobbling +-1°C for an hour
+        trace = [entry + (0.5 if i % 2 else -1.0) for i in range(720)]
+        self._run(governor, trace, step=5.0)
+        assert len(governor.decisions()) <= 2
+
+    def test_latency_degradation_raises_level(self):
+        from thermal_governor import LATENCY_WINDOW
+        governor = self._governor()
+        for _ in range(LATENCY_WINDOW):
+            governor.record_latency('vlm', 0.9)
+        assert governor.step({'soc': 55.0}, 0.0) == 0
+        for _ in range(LATENCY_WINDOW):
+            governor.record_latency('vlm', 1.9)
+        level = governor.step({'soc': 55.0}, 5.0)
+        assert level >= 2
+        assert governor.decisions()[-1]['driver'] == 'vlm_latency'
+        assert governor.status()['latency']['vlm']['best_median_s'] == 0.9
+
+    def test_axera_and_missing_sensors(self):
+        governor = self._governor()
+        assert governor.step({'soc': 55.0, 'npu': None, 'axera': 95.0}, 0.0) == 3
+        status = governor.status()
+        assert status['temperatures_c'] == {'soc': 55.0, 'axera': 95.0}
+        assert status['pressures']['axera'] == 1.0
+        assert status['tier'] == 'critical'
+
+    def test_sensor_failure_keeps_level(self):
+        def broken():
+            raise OSError('sysfs gone')
+
+        from thermal_governor import ThermalGovernor
+        governor = ThermalGovernor(sensors=broken)
+        assert governor.sample(now=0.0) == 0
+
+    def test_decisions_in_metrics(self):
+        from thermal_governor import DECISIONS, LEVEL
+        from metrics import REGISTRY
+        up_before = DECISIONS.get(direction='up')
+        governor = self._governor()
+        governor.step({'soc': 90.0}, 0.0)
+        assert DECISIONS.get(direction='up') == up_before + 1
+        assert LEVEL.get() == 3
+        text = REGISTRY.render()
+        assert '# TYPE minus_thermal_decisions_total counter' in text
+        assert '# TYPE minus_thermal_level gauge' in text
+
+    def test_read_thermal_zones_groups_npu(self):
+        import glob
+        test_dir = tempfile.mkdtemp()
+        try:
+            for i, (kind, milli) in enumerate([('soc-thermal', '61000'),
+                                               ('bigcore0-thermal', '64500'),
+                                               ('npu-thermal', '58000')]):
+                zone = os.path.join(test_dir, f'thermal_zone{i}')
+                os.makedirs(zone)
+                with open(os.path.join(zone, 'type'), 'w') as f:
+                    f.write(kind + '\n')
+                with open(os.path.join(zone, 'temp'), 'w') as f:
+                    f.write(milli + '\n')
+            from thermal_governor import read_thermal_zones
+            with patch('thermal_governor.glob.glob',
+                       return_value=sorted(glob.glob(os.path.join(test_dir, 'thermal_zone*')))):
+                assert read_thermal_zones() == {'soc': 64.5, 'npu': 58.0}
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+
+    def test_axera_temperature_runs_only_the_temp_query(self):
+        import subprocess
+        import thermal_governor
+        done = subprocess.CompletedProcess([], 0, stdout='temperature : 61250\n')
+        with patch('thermal_governor.os.path.exists', return_value=True), \
+                patch('thermal_governor.subprocess.run', return_value=done) as run:
+            assert thermal_governor.read_axera_temperature() == 61.25
+        assert run.call_count == 1
+        assert run.call_args[0][0][1:] == ['info', '--temp']
+        with patch('thermal_governor.os.path.exists', return_value=False):
+            assert thermal_governor.read_axera_temperature() is None
+
+# =============================================================================
+# Core Placement Tests
+# =============================================================================
+
+class TestPlacement:
+    """Tests for the core placement policy manager."""
+
+    def _in_thread(self, func):
+        """Run func in a fresh thread (nice/affinity are per thread); its result."""
+        result = {}
+
+        def target():
+            try:
+                result['value'] = func()
+            except BaseException as e:  # Surface assertion errors to the test
+                result['error'] = e
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    def test_parse_cores(self):
+        from placement import parse_cores
+        assert parse_cores('0-3,6,7') == {0, 1, 2, 3, 6, 7}
+        assert parse_cores('5') == {5}
+        assert parse_cores('') == frozenset()
+
+    def test_resolve_drops_missing_cores(self):
+        from placement import resolve
+        placement = resolve('capture', available=frozenset(range(8)))
+        assert placement.cores == {4, 5}
+        assert placement.nice == -5
+        small = resolve('capture', available=frozenset({0, 1}))
+        assert small.cores is None  # Leave affinity alone rather than fail
+        assert resolve('asr_worker', available=frozenset({0, 1, 2})).cores == {1, 2}
+        assert resolve('no_such_role') is None
+
+    def test_env_overrides(self):
+        from placement import resolve
+        with patch.dict(os.environ, {'MINUS_PLACEMENT_WEBUI': '2-3:7:idle'}):
+            placement = resolve('webui', available=frozenset(range(8)))
+        assert placement.cores == {2, 3}
+        assert placement.nice == 7
+        assert placement.policy == 'idle'
+        with patch.dict(os.environ, {'MINUS_ASR_CPU_AFFINITY': '3,4,5'}):
+            assert resolve('asr_worker', available=frozenset(range(8))).cores == {3, 4, 5}
+
+    def test_apply_sets_thread_placement(self):
+        from placement import PlacementManager, read_task
+        manager = PlacementManager(enabled=True)
+        with patch.dict(os.environ, {'MINUS_PLACEMENT_TEST_ROLE': '0:7'}), \
+                patch.dict('placement.PLACEMENT_POLICY', {'test_role': {'cores': '0'}}):
+            def check():
+                assert manager.apply('test_role') is True
+                return read_task(threading.get_native_id())
+            actual = self._in_thread(check)
+        assert actual == {'cores': [0], 'nice': 7, 'policy': 'other'}
+
+    def test_verify_reapplies_drift(self):
+        from placement import PLACEMENT_DRIFT, PlacementManager
+        manager = PlacementManager(enabled=True)
+        drift_before = PLACEMENT_DRIFT.get(role='test_role')
+        with patch.dict(os.environ, {'MINUS_PLACEMENT_TEST_ROLE': '0:6'}), \
+                patch.dict('placement.PLACEMENT_POLICY', {'test_role': {'cores': '0'}}):
+            def check():
+                manager.apply('test_role')
+                tid = threading.get_native_id()
+                os.setpriority(os.PRIO_PROCESS, tid, 9)
+                first = [t for t in manager.verify() if t['tid'] == tid]
+                second = [t for t in manager.verify() if t['tid'] == tid]
+                return first, second, os.getpriority(os.PRIO_PROCESS, tid)
+            first, second, nice = self._in_thread(check)
+        assert first[0]['ok'] is False and first[0]['nice'] == 9
+        assert second[0]['ok'] is True
+        assert nice == 6
+        assert PLACEMENT_DRIFT.get(role='test_role') == drift_before + 1
+        # The thread has exited: no longer tracked
+        assert all(t['role'] != 'test_role' for t in manager.verify())
+
+    def test_report_does_not_reapply(self):
+        from placement import PLACEMENT_DRIFT, PlacementManager
+        manager = PlacementManager(enabled=True)
+        drift_before = PLACEMENT_DRIFT.get(role='test_role')
+        with patch.dict(os.environ, {'MINUS_PLACEMENT_TEST_ROLE': '0:6'}), \
+                patch.dict('placement.PLACEMENT_POLICY', {'test_role': {'cores': '0'}}):
+            def check():
+                manager.apply('test_role')
+                tid = threading.get_native_id()
+                os.setpriority(os.PRIO_PROCESS, tid, 9)
+                report = manager.report()
+                return report, os.getpriority(os.PRIO_PROCESS, tid)
+            report, nice = self._in_thread(check)
+        assert [t['ok'] for t in report['roles']['test_role']['tasks']] == [False]
+        assert report['misplaced'] >= 1
+        assert nice == 9
+        assert PLACEMENT_DRIFT.get(role='test_role') == drift_before
+
+    def test_only_display_pipeline_threads_claimed(self):
+        from placement import _is_video_streaming_thread
+        assert _is_video_streaming_thread('videoqueue:src')
+        assert _is_video_streaming_thread('videosrc:src')
+        assert not _is_video_streaming_thread('alsasrc0:src')
+        assert not _is_video_streaming_thread('audioqueue:src')
+        assert not _is_video_streaming_thread('videoqueue')
+
+    def test_apply_to_child_process(self):
+        import subprocess
+        from placement import PlacementManager
+        manager = PlacementManager(enabled=True)
+        child = subprocess.Popen(['sleep', '5'])
+        try:
+            with patch.dict(os.environ, {'MINUS_PLACEMENT_CAPTURE': '0:3'}):
+                assert manager.apply_to_process('capture', child.pid) is True
+                tasks = [t for t in manager.verify() if t['pid'] == child.pid]
+            assert len(tasks) == 1
+            assert tasks[0]['role'] == 'capture'
+            assert tasks[0]['nice'] == 3 and tasks[0]['ok'] is True
+        finally:
+            child.kill()
+            child.wait()
+        assert all(t['pid'] != child.pid for t in manager.verify())
+
+    def test_disabled_does_nothing(self):
+        from placement import PlacementManager
+        manager = PlacementManager(enabled=False)
+
+        def check():
+            before = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+            assert manager.apply('screenshots') is False
+            return before, os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+        before, after = self._in_thread(check)
+        assert before == after
+        assert manager.verify() == []
+
+    def test_core_utilization_from_proc_stat(self):
+        from placement import CORE_UTILIZATION, PlacementManager
+        manager = PlacementManager(enabled=True)
+        first = ("cpu  300 0 100 600 0 0 0 0 0 0\n"
+                 "cpu0 100 0 50 350 0 0 0 0 0 0\n"
+                 "cpu1 200 0 50 250 0 0 0 0 0 0\n")
+        second = ("cpu  500 0 100 1000 0 0 0 0 0 0\n"
+                  "cpu0 175 0 50 375 0 0 0 0 0 0\n"
+                  "cpu1 250 0 50 400 0 0 0 0 0 0\n")
+        manager.core_utilization(first)
+        assert manager.core_utilization(second) == {0: 0.75, 1: 0.25}
+        assert CORE_UTILIZATION.labels(core='0').get() == 0.75
+
+    def test_report_shape(self):
+        from placement import PlacementManager
+        report = PlacementManager(enabled=True).report()
+        assert report['enabled'] is True
+        assert report['roles']['capture']['wanted']['nice'] == -5
+        assert report['roles']['ir_transmit']['wanted']['policy'] == 'fifo'
+        assert report['cores']
+        assert all(core['type'] in ('big', 'little', 'other') for core in report['cores'].values())
+
+
+# =============================================================================
+# Startup Graph Tests
+# =============================================================================
+
+class TestStartupGraph:
+    """Tests for dependency-ordered boot phases and the boot timeline."""
+
+    def _graph(self):
+        from startup import StartupGraph
+        return StartupGraph(started_ago=0.0)
+
+    def test_dependent_phase_waits_and_independent_ones_overlap(self):
+        graph = self._graph()
+        release = threading.Event()
+        order = []
+
+        def slow():
+            order.append('slow')
+            release.wait(5)
+
+        graph.start('slow', slow)
+        graph.start('fast', lambda: order.append('fast'))
+        graph.start('child', lambda: order.append('child'), after=('slow',))
+
+        assert graph.wait('fast', 2)
+        assert not graph.is_done('child')
+        release.set()
+        assert graph.wait('child', 2)
+        assert order.index('child') > order.index('slow')
+
+        phases = {row['name']: row for row in graph.timeline()['phases']}
+        assert phases['child']['start_s'] >= phases['slow']['end_s']
+        assert phases['fast']['end_s'] <= phases['slow']['end_s']
+
+    def test_failure_and_exception_release_waiters(self):
+        graph = self._graph()
+        graph.start('returns_false', lambda: False)
+
+        def boom():
+            raise RuntimeError('no model')
+
+        graph.start('raises', boom)
+        assert graph.wait('returns_false', 2) is False
+        assert graph.wait('raises', 2) is False
+        assert graph.is_done('raises')
+        rows = {row['name']: row for row in graph.timeline()['phases']}
+        assert rows['returns_false']['state'] == 'failed'
+        assert rows['raises']['error'] == 'no model'
+
+    def test_skip_releases_dependents(self):
+        graph = self._graph()
+        ran = []
+        graph.start('loop', lambda: ran.append(True), after=('ocr_model',))
+        graph.skip('ocr_model', 'OCR disabled')
+        assert graph.wait('loop', 2) is False
+        assert graph.is_done('loop')
+        assert ran == []
+        assert graph.wait('ocr_model', 0) is False
+        rows = graph.timeline()['phases']
+        assert (rows[0]['name'], rows[0]['state'], rows[0]['error']) == (
+            'ocr_model', 'skipped', 'OCR disabled')
+        assert (rows[1]['name'], rows[1]['state'], rows[1]['error']) == (
+            'loop', 'skipped', 'ocr_model skipped')
+
+    def test_failed_dependency_skips_dependents_down_the_graph(self):
+        graph = self._graph()
+        ran = []
+        graph.start('vlm_model', lambda: ran.append('vlm_model'), after=('hdmi_signal',))
+        graph.start('autonomous', lambda: ran.append('autonomous'),
+                    after=('hdmi_signal', 'vlm_model'))
+        with graph.phase('hdmi_signal') as phase:
+            phase.ok = False
+        assert graph.wait('autonomous', 2) is False
+        assert ran == []
+        rows = {row['name']: row for row in graph.timeline()['phases']}
+        assert rows['hdmi_signal']['state'] == 'failed'
+        assert (rows['vlm_model']['state'], rows['vlm_model']['error']) == (
+            'skipped', 'hdmi_signal failed')
+        assert rows['autonomous']['state'] == 'skipped'
+
+        # A dependency that succeeded but whose func failed also blocks
+        graph.start('model', lambda: False)
+        graph.start('loop', lambda: ran.append('loop'), after=('model',))
+        assert graph.wait('loop', 2) is False
+        assert graph.timeline()['phases'][-1]['error'] == 'model failed'
+        assert ran == []
+
+    def test_wait_times_out_on_running_phase(self):
+        graph = self._graph()
+        release = threading.Event()
+        graph.start('slow', lambda: release.wait(5))
+        assert graph.wait('slow', 0.05) is False
+        assert not graph.is_done('slow')
+        release.set()
+        assert graph.wait('slow', 2)
+
+    def test_inline_phase_ok_flag_and_exception(self):
+        import pytest
+        graph = self._graph()
+        with graph.phase('display') as phase:
+            phase.ok = False
+        assert graph.wait('display', 0) is False
+        with pytest.raises(ValueError):
+            with graph.phase('webui'):
+                raise ValueError('port in use')
+        assert graph.timeline()['phases'][1]['state'] == 'failed'
+
+    def test_critical_path_follows_latest_dependency(self):
+        from startup import FIRST_PROTECTED_FRAME, StartupGraph
+        now = [0.0]
+        graph = StartupGraph(clock=lambda: now[0], started_ago=1.0)
+        graph.record('init', 0.5)                      # 0.5 -> 1.0
+        with graph.phase('hdmi_check', after=('init',)):
+            now[0] = 0.5                               # 1.0 -> 1.5
+        with graph.phase('display', after=('hdmi_check',)):
+            now[0] = 4.0                               # 1.5 -> 5.0
+        graph.record('ocr_model', 1.0, after=('init',))  # 1.0 -> 5.0
+        now[0] = 6.0
+        graph.record('ocr_model_late', 1.0)            # unrelated
+        now[0] = 6.5
+        assert graph.mark(FIRST_PROTECTED_FRAME, after=('display', 'ocr_model'))
+        assert not graph.mark(FIRST_PROTECTED_FRAME)
+
+        timeline = graph.timeline()
+        assert timeline['time_to_protected_s'] == 7.5
+        assert timeline['critical_path_s'] == 7.5
+        assert timeline['critical_path'][-1] == FIRST_PROTECTED_FRAME
+        assert timeline['critical_path'][0] == 'init'
+        assert 'ocr_model_late' not in timeline['critical_path']
+
+    def test_timeline_shape_and_metrics(self):
+        from startup import PHASE_SECONDS, StartupGraph
+        from metrics import REGISTRY
+        now = [10.0]
+        graph = StartupGraph(clock=lambda: now[0], started_ago=2.0)
+        graph.start('never', lambda: None, after=('pending',))
+        assert not graph.is_done('pending')
+        with graph.phase('wifi'):
+            now[0] = 12.5
+        timeline = graph.timeline()
+        assert timeline['uptime_s'] == 4.5
+        rows = {row['name']: row for row in timeline['phases']}
+        assert rows['wifi'] == {'name': 'wifi', 'after': [], 'start_s': 2.0, 'end_s': 4.5,
+                                'duration_s': 2.5, 'state': 'ready', 'error': None}
+        assert rows['pending']['state'] == 'waiting'
+        assert timeline['time_to_protected_s'] is None
+        assert PHASE_SECONDS.labels(phase='wifi').get() == 2.5
+        assert '# TYPE minus_boot_phase_seconds gauge' in REGISTRY.render()
+        graph.skip('pending')
+        assert graph.wait('never', 2) is False
+        assert graph.is_done('never')
+
+    def test_process_age(self):
+        from startup import process_age
+        age = process_age()
+        assert 0.0 <= age < 24 * 3600
+
+
+# =============================================================================
+# Import Budget Tests
+# =============================================================================
+
+class TestImportBudget:
+    """Import-time budgets for minus.py and the spawned worker processes.
+
+    Budgets are generous for CI; tighten on the device with
+    MINUS_IMPORT_BUDGET_S / MINUS_SPAWN_BUDGET_S.
+    """
+
+    ROOT = Path(__file__).parent.parent
+    IMPORT_BUDGET_S = float(os.environ.get('MINUS_IMPORT_BUDGET_S', '2.0'))
+    SPAWN_BUDGET_S = float(os.environ.get('MINUS_SPAWN_BUDGET_S', '1.0'))
+    WORKER_MODULE_BUDGET_S = 0.25
+
+    # Loaded by the worker processes only
+    INFERENCE_RUNTIMES = {'rknnlite', 'axengine', 'faster_whisper', 'ctranslate2',
+                          'ocr', 'vlm', 'PIL'}
+    # Loaded by Minus itself, never needed in a worker
+    PARENT_ONLY = {'flask', 'gi', 'webui', 'ad_blocker', 'audio', 'capture',
+                   'screenshots', 'autonomous_mode', 'requests', 'log_queue'}
+    # Imported where Minus constructs them, not by `import minus`
+    SUBSYSTEMS = {'gi', 'ad_blocker', 'audio', 'fire_tv_setup', 'fire_tv', 'adb_shell',
+                  'autonomous_mode', 'wifi_manager', 'overlay', 'ir_transmitter',
+                  'status_led_controller'}
+
+    def _importtime(self, code, cwd):
+        """Run `code` under -X importtime; {module: cumulative seconds}."""
+        import subprocess
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                cwd=cwd, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr[-2000:]
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            modules[name.strip()] = int(cumulative) / 1e6
+        return modules
+
+    def test_worker_entry_modules_stay_light(self):
+        modules = self._importtime('import ocr_worker, vlm_worker, asr_worker',
+                                   self.ROOT / 'src')
+        loaded = set(modules)
+        assert not loaded & (self.INFERENCE_RUNTIMES | self.PARENT_ONLY)
+        assert not loaded & {'numpy', 'cv2'}
+        for name in ('ocr_worker', 'vlm_worker', 'asr_worker'):
+            assert modules[name] < self.WORKER_MODULE_BUDGET_S, (name, modules[name])
+
+    def test_minus_import_skips_inference_runtimes(self):
+        modules = self._importtime('import minus', self.ROOT)
+        assert not set(modules) & self.INFERENCE_RUNTIMES
+        assert 'flask' not in modules  # Imported when run() starts the web UI
+        assert not set(modules) & self.SUBSYSTEMS
+        assert modules['minus'] < self.IMPORT_BUDGET_S, modules['minus']
+
+    def test_spawned_worker_skips_parent_only_imports(self):
+        code = ("import runpy, sys; sys.path.insert(0, 'src'); "
+                "runpy.run_path('minus.py', run_name='__mp_main__')")
+        modules = self._importtime(code, self.ROOT)
+        assert not set(modules) & self.PARENT_ONLY
+        assert not set(modules) & {'numpy', 'cv2'}
+
+    def test_worker_spawn_time(self):
+        import subprocess
+        # Spawn as minus.py does: the child re-runs minus.py as __mp_main__.
+        # The target exits non-zero if that pulled in anything beyond the
+        # worker's own imports (parent logging setup, subsystems).
+        unexpected = sorted(self.PARENT_ONLY | self.SUBSYSTEMS)
+        check = f"import sys; sys.exit(3 if set(sys.modules) & set({unexpected!r}) else 0)"
+        code = (
+            "import multiprocessing as mp, sys, time, __main__\n"
+            "sys.path.insert(0, 'src')\n"
+            f"__main__.__file__ = {str(self.ROOT / 'minus.py')!r}\n"
+            "mp.set_start_method('spawn', force=True)\n"
+            "times = []\n"
+            "for _ in range(3):\n"
+            "    start = time.perf_counter()\n"
+            f"    p = mp.Process(target=exec, args=({check!r},))\n"
+            "    p.start()\n"
+            "    p.join()\n"
+            "    times.append(time.perf_counter() - start)\n"
+            "print('SPAWN', min(times), p.exitcode)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=self.ROOT,
+                                capture_output=True, text=True, timeout=120)
+        line = next(l for l in result.stdout.splitlines() if l.startswith('SPAWN'))
+        _, seconds, exitcode = line.split()
+        assert exitcode == '0'
+        assert float(seconds) < self.SPAWN_BUDGET_S, seconds
+
+
 # ============================================================================
 # Test Runner
 # ============================================================================
@@ -4790,6 +8184,30 @@ def run_tests():
         TestScreenshotDedup,
         TestMemoryManagement,
         TestHDCPHandling,
+        TestVoteWindow,
+        TestScreenshotWriter,
+        TestScreenshotCatalog,
+        TestHammingIndex,
+        TestThumbnailCache,
+        TestStatusPublisher,
+        TestMJPEGBroadcaster,
+        TestLogRing,
+        TestLogQueue,
+        TestMetricsRegistry,
+        TestFrameTracing,
+        TestWebServer,
+        TestHealthSnapshot,
+        TestHDMISourceWatcher,
+        TestBlockPrearm,
+        TestUstreamerControl,
+        TestLanScan,
+        TestAdbChannel,
+        TestRokuEcpClient,
+        TestWebhookDelivery,
+        TestThermalGovernor,
+        TestPlacement,
+        TestStartupGraph,
+        TestImportBudget,
     ]
 
     total_tests = 0
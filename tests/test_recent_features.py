@@ -1167,6 +1167,123 @@ class TestPhotoLibrary(unittest.TestCase):
             self.lib.add_photo(b"this is just text, not an image",
                                 original_name='fake.jpg')
 
+    # ---- in-memory index ----
+
+    def test_reads_do_not_rescan_unchanged_dir(self):
+        """list/count/random are served from the index between writes."""
+        self.lib.add_photo(self._tiny_jpeg(), original_name='a.jpg')
+        self.lib.list_photos()
+        with patch.object(self.lib, '_scan', side_effect=AssertionError('rescanned')):
+            self.assertEqual(self.lib.count(), 1)
+            self.assertEqual(len(self.lib.list_photos()), 1)
+            self.assertIsNotNone(self.lib.random_photo_id())
+
+    def test_own_writes_update_index_and_version(self):
+        v0 = self.lib.version
+        meta = self.lib.add_photo(self._tiny_jpeg(), original_name='a.jpg')
+        self.assertGreater(self.lib.version, v0)
+        self.assertEqual(self.lib.photo_ids(), (meta['id'],))
+        v1 = self.lib.version
+        self.lib.remove_photo(meta['id'])
+        self.assertGreater(self.lib.version, v1)
+        self.assertEqual(self.lib.photo_ids(), ())
+
+    def test_outside_changes_invalidate_index(self):
+        """Files added or removed behind the library's back are noticed."""
+        import shutil
+        meta = self.lib.add_photo(self._tiny_jpeg(), original_name='a.jpg')
+        self.assertEqual(self.lib.count(), 1)
+        base = Path(self._tmpdir.name)
+        shutil.copy(base / f"{meta['id']}.jpg", base / '00ff.jpg')
+        (base / '00ff.meta').write_text('{"name": "copied.jpg", "uploaded": 1}')
+        self.assertEqual(self.lib.count(), 2)
+        self.assertIn('copied.jpg', [p['name'] for p in self.lib.list_photos()])
+        (base / f"{meta['id']}.jpg").unlink()
+        self.assertEqual(self.lib.photo_ids(), ('00ff',))
+
+    def test_list_returns_copies(self):
+        self.lib.add_photo(self._tiny_jpeg(), original_name='a.jpg')
+        self.lib.list_photos()[0]['name'] = 'mutated'
+        self.assertEqual(self.lib.list_photos()[0]['name'], 'a.jpg')
+
+
+class TestPhotoFrameCache(unittest.TestCase):
+    """Display-sized letterboxed frames rendered ahead of photo-mode blocks."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        base = Path(self._tmpdir.name)
+        from photo_library import PhotoLibrary
+        from replacement_cache import PhotoFrameCache
+        self.lib = PhotoLibrary(base_dir=base / 'photos')
+        self.cache = PhotoFrameCache(library=self.lib, cache_dir=base / 'frames')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _add(self, color=(128, 64, 32), size=(200, 100)):
+        from PIL import Image
+        import io as _io
+        buf = _io.BytesIO()
+        Image.new('RGB', size, color).save(buf, format='JPEG')
+        return self.lib.add_photo(buf.getvalue())['id']
+
+    def _sync(self, width=320, height=180):
+        self.cache.set_resolution(width, height)
+        if self.cache._thread is not None:
+            self.cache._thread.join(5)
+
+    def _decode(self, data):
+        import cv2
+        import numpy as np
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def test_frames_letterboxed_to_output_size(self):
+        self._add(size=(200, 200))
+        self._sync(320, 180)
+        photo_id, data = self.cache.random_frame()
+        img = self._decode(data)
+        self.assertEqual(img.shape[:2], (180, 320))
+        self.assertLess(int(img[90, 10].max()), 10)   # black bar
+        self.assertGreater(int(img[90, 160].max()), 60)
+        self.assertTrue(self.cache.get_stats()['synced'])
+
+    def test_resolution_change_rerenders_and_drops_old_size(self):
+        self._add()
+        self._sync(320, 180)
+        self._sync(640, 360)
+        self.assertEqual(self._decode(self.cache.random_frame()[1]).shape[:2], (360, 640))
+        dirs = [p.name for p in Path(self.cache.cache_dir).iterdir()]
+        self.assertEqual(dirs, ['640x360'])
+
+    def test_library_changes_resync(self):
+        first = self._add(color=(10, 200, 10))
+        self._sync()
+        second = self._add(color=(200, 10, 10))
+        self.lib.remove_photo(first)
+        self.cache.refresh()
+        self.cache._thread.join(5)
+        self.assertIsNone(self.cache.frame(first))
+        self.assertIsNotNone(self.cache.frame(second))
+        self.assertEqual(self.cache.random_frame()[0], second)
+
+    def test_frames_reused_across_restart(self):
+        self._add()
+        self._sync()
+        from replacement_cache import PhotoFrameCache
+        reopened = PhotoFrameCache(library=self.lib, cache_dir=self.cache.cache_dir)
+        with patch('replacement_cache.letterbox_jpeg', side_effect=AssertionError('re-rendered')):
+            reopened.set_resolution(320, 180)
+            if reopened._thread is not None:
+                reopened._thread.join(5)
+        self.assertIsNotNone(reopened.random_frame())
+
+    def test_no_frame_before_resolution_known(self):
+        self._add()
+        self.cache.refresh()
+        self.assertIsNone(self.cache.random_frame())
+        self.assertIsNone(self.cache.render(self.lib.random_photo_id()))
+
 
 class TestReplacementModesAPI(unittest.TestCase):
     """Web UI can GET/POST the enabled replacement kinds."""
@@ -21,6 +21,7 @@ from unittest.mock import MagicMock, patch
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+import roku_ecp
 from roku import RokuController
 
 
@@ -148,25 +149,20 @@ class TestRediscovery(unittest.TestCase):
 class TestKeypressStatusCodes(unittest.TestCase):
     """ECP returns 202 Accepted under load — must count as success."""
 
-    def _resp(self, code):
-        r = MagicMock()
-        r.status_code = code
-        return r
-
     def test_202_is_success(self):
         c = _make_controller(connected=True)
-        with patch('roku.requests.post', return_value=self._resp(202)) as post:
+        with patch('roku_ecp.EcpClient.request', return_value=(202, '')) as post:
             self.assertTrue(c._send_keypress('Back'))
             post.assert_called_once()
 
     def test_500_is_failure(self):
         c = _make_controller(connected=True)
-        with patch('roku.requests.post', return_value=self._resp(500)):
+        with patch('roku_ecp.EcpClient.request', return_value=(500, '')):
             self.assertFalse(c._send_keypress('Back'))
 
     def test_launch_202_is_success(self):
         c = _make_controller(connected=True)
-        with patch('roku.requests.post', return_value=self._resp(202)):
+        with patch('roku_ecp.EcpClient.request', return_value=(202, '')):
             self.assertTrue(c.launch_app('youtube'))
 
 
@@ -200,23 +196,25 @@ class TestActiveAppIdParsing(unittest.TestCase):
     callers treated it as query-failure, and the stuck-on-home ECP
     recovery never fired (observed live 2026-07-12, 50-min stall)."""
 
+    def setUp(self):
+        roku_ecp._clients.clear()  # No cached active-app from another test
+
     def _controller_with_response(self, body):
         c = RokuController()
         c._connected = True
         c._ip_address = '192.168.1.50'
-        resp = MagicMock(status_code=200, text=body)
-        return c, resp
+        return c, (200, body)
 
     def test_parses_numeric_youtube_id(self):
         c, resp = self._controller_with_response(
             '<active-app><app id="837" type="appl">YouTube</app></active-app>')
-        with patch('roku.requests.get', return_value=resp):
+        with patch('roku_ecp.EcpClient.request', return_value=resp):
             self.assertEqual(c.get_active_app_id(), '837')
 
     def test_parses_native_ui_home_id(self):
         c, resp = self._controller_with_response(
             '<active-app><app id="native-ui" type="appl" ui-location="home">Native UI</app></active-app>')
-        with patch('roku.requests.get', return_value=resp):
+        with patch('roku_ecp.EcpClient.request', return_value=resp):
             self.assertEqual(c.get_active_app_id(), 'native-ui')
 
 
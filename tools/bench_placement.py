@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Core placement benchmark: capture-loop jitter under background load.
+
+Stands in for the case config.PLACEMENT_POLICY is meant to fix: a
+latency-critical periodic loop (ustreamer's capture/encode, the
+GStreamer streaming threads) sharing the CPU with bursty background
+work (ASR inference, screenshot JPEG writes, web UI requests).
+
+Each run starts `--hogs` CPU-bound processes and one periodic "capture"
+process that wakes every `--period-ms`, does `--work-ms` of CPU work,
+and records how late each wakeup was and how long the work took. It runs
+twice:
+
+  float   no placement; the scheduler puts everything anywhere
+  placed  capture gets the 'capture' placement, hogs alternate between
+          'asr_worker' and 'screenshots' (src/placement.py)
+
+and prints p50/p99/max for both. Run on the device itself (as root, so
+negative nice levels apply); on a host with fewer cores than the policy
+names, the placements collapse and the two runs look alike.
+
+Usage:
+  python3 tools/bench_placement.py [--seconds 20] [--hogs 6]
+      [--period-ms 16.7] [--work-ms 2]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from placement import PlacementManager  # noqa: E402
+
+HOG_ROLES = ('asr_worker', 'screenshots')
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def hog(role, stop):
+    if role:
+        PlacementManager(enabled=True).apply(role)
+    while not stop.is_set():
+        spin(0.05)
+
+
+def capture(role, seconds, period, work, results):
+    if role:
+        PlacementManager(enabled=True).apply(role)
+    late, took = [], []
+    deadline = time.perf_counter() + period
+    end = time.perf_counter() + seconds
+    while deadline < end:
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        woke = time.perf_counter()
+        late.append(woke - deadline)
+        spin(work)
+        took.append(time.perf_counter() - woke)
+        deadline += period
+    results.put((late, took))
+
+
+def pct(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run(placed, args):
+    stop = mp.Event()
+    results = mp.Queue()
+    hogs = [mp.Process(target=hog, args=(HOG_ROLES[i % 2] if placed else None, stop))
+            for i in range(args.hogs)]
+    for p in hogs:
+        p.start()
+    time.sleep(0.5)
+    cap = mp.Process(target=capture, args=('capture' if placed else None, args.seconds,
+                                           args.period_ms / 1000, args.work_ms / 1000, results))
+    cap.start()
+    late, took = results.get()
+    cap.join()
+    stop.set()
+    for p in hogs:
+        p.join()
+    return late, took
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--hogs', type=int, default=6)
+    parser.add_argument('--period-ms', type=float, default=16.7)
+    parser.add_argument('--work-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.hogs} hogs, {args.seconds:.0f}s per run, "
+          f"period {args.period_ms}ms, work {args.work_ms}ms")
+    print(f"{'mode':8} {'wake p50':>9} {'wake p99':>9} {'wake max':>9} "
+          f"{'work p50':>9} {'work p99':>9} {'frames':>7}")
+    for mode in ('float', 'placed'):
+        late, took = run(mode == 'placed', args)
+        row = [pct(late, 0.5), pct(late, 0.99), max(late), pct(took, 0.5), pct(took, 0.99)]
+        print(f"{mode:8} " + ' '.join(f"{v * 1000:8.2f}m" for v in row) + f" {len(late):7d}")
+
+
+if __name__ == '__main__':
+    main()
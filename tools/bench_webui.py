@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Load check for the web UI server (port 80).
+
+Reproduces what used to balloon the thread count under Flask's
+development server: a burst of concurrent API requests, browser
+pre-connects that never send a request, and a few long-lived streams
+(/api/events, /stream) held open the whole time. Reports request latency,
+status codes (503 = pool saturated, by design), and the server process's
+thread count and RSS before/during/after.
+
+Compare backends by restarting minus with MINUS_WEBUI_SERVER=dev
+(Flask development server) or the default pooled server.
+
+Usage:
+  python3 tools/bench_webui.py [--url http://localhost] [--clients 32]
+      [--requests 20] [--idle 16] [--streams 3] [--pid PID]
+"""
+import argparse
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+def find_pid():
+    try:
+        out = subprocess.run(['pgrep', '-f', 'minus.py'], capture_output=True,
+                             text=True, timeout=5).stdout.split()
+        return int(out[0]) if out else None
+    except Exception:
+        return None
+
+
+def proc_stats(pid):
+    """(threads, rss_kb) from /proc, or (None, None)."""
+    if not pid:
+        return None, None
+    threads = rss = None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    threads = int(line.split()[1])
+                elif line.startswith('VmRSS:'):
+                    rss = int(line.split()[1])
+    except OSError:
+        pass
+    return threads, rss
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    ap.add_argument('--url', default='http://localhost')
+    ap.add_argument('--path', default='/api/status')
+    ap.add_argument('--clients', type=int, default=32)
+    ap.add_argument('--requests', type=int, default=20, help='per client')
+    ap.add_argument('--idle', type=int, default=16, help='connections that send nothing')
+    ap.add_argument('--streams', type=int, default=3, help='held-open /api/events streams')
+    ap.add_argument('--pid', type=int, default=None)
+    args = ap.parse_args()
+
+    pid = args.pid or find_pid()
+    parsed = urllib.parse.urlparse(args.url)
+    host, port = parsed.hostname, parsed.port or 80
+
+    before = proc_stats(pid)
+
+    idle = []
+    for _ in range(args.idle):
+        try:
+            idle.append(socket.create_connection((host, port), timeout=2))
+        except OSError:
+            break
+
+    stop = threading.Event()
+
+    def hold_stream(path):
+        try:
+            with urllib.request.urlopen(args.url + path, timeout=30) as resp:
+                while not stop.is_set() and resp.read(256):
+                    pass
+        except Exception:
+            pass
+
+    streams = [threading.Thread(target=hold_stream, daemon=True,
+                                args=('/api/events' if i % 2 == 0 else '/stream',))
+               for i in range(args.streams)]
+    for t in streams:
+        t.start()
+    time.sleep(0.5)
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    peak = [0, 0]
+
+    def client():
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(args.url + args.path, timeout=10) as resp:
+                    resp.read()
+                    code = resp.status
+            except urllib.error.HTTPError as e:
+                code = e.code
+            except Exception:
+                code = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[code] = statuses.get(code, 0) + 1
+
+    def sample():
+        while not stop.is_set():
+            threads, rss = proc_stats(pid)
+            if threads:
+                peak[0] = max(peak[0], threads)
+                peak[1] = max(peak[1], rss or 0)
+            time.sleep(0.1)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client) for _ in range(args.clients)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - started
+    stop.set()
+    for s in idle:
+        s.close()
+    time.sleep(1.0)
+    after = proc_stats(pid)
+
+    total = len(latencies)
+    print(f"requests: {total} in {wall:.1f}s ({total / wall:.0f}/s)  statuses: {statuses}")
+    print(f"latency: p50={percentile(latencies, 0.5) * 1000:.0f}ms "
+          f"p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+          f"max={max(latencies or [0]) * 1000:.0f}ms")
+    if pid:
+        print(f"server pid {pid}: threads before={before[0]} peak={peak[0]} after={after[0]}; "
+              f"RSS before={before[1]}kB peak={peak[1]}kB after={after[1]}kB")
+    else:
+        print("server pid not found (pass --pid) - thread/RSS not measured")
+
+
+if __name__ == '__main__':
+    main()
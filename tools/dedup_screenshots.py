@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Offline near-duplicate pass over the training screenshots tree.
+
+Hashes every screenshot that predates the catalog's dHash column, then
+reports (or, with --apply, deletes) screenshots within --distance bits of
+an older screenshot in the same category. The oldest copy of each
+near-duplicate cluster is kept.
+
+Stop Minus before --apply (sudo systemctl stop minus). A running Minus
+keeps its own in-memory Hamming index of the catalog: it would go on
+rejecting new screenshots as near-duplicates of the deleted ones until
+its next hourly rescan, and it never sees the hashes this pass adds
+until it restarts. A dry run only adds hashes and can run any time.
+
+Usage:
+  python3 tools/dedup_screenshots.py                 # dry run, report only
+  python3 tools/dedup_screenshots.py --apply         # delete duplicates (Minus stopped)
+  python3 tools/dedup_screenshots.py --distance 6    # stricter match
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from screenshots import DHASH_THRESHOLD, dedup_screenshot_tree  # noqa: E402
+
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / 'screenshots'
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--dir', default=str(DEFAULT_DIR),
+                    help='screenshots root (contains ads/, non_ads/, ...)')
+    ap.add_argument('--distance', type=int, default=DHASH_THRESHOLD - 1,
+                    help='max Hamming distance (bits) counted as a duplicate')
+    ap.add_argument('--apply', action='store_true',
+                    help='delete duplicates (default: report only)')
+    ap.add_argument('--list', action='store_true',
+                    help='print every duplicate filename')
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stats = dedup_screenshot_tree(Path(args.dir), max_distance=args.distance,
+                                  apply=args.apply)
+
+    for category, names in stats['duplicate_files'].items():
+        print(f"{category:12s} {len(names):6d} duplicates")
+        if args.list:
+            for name in names:
+                print(f"    {name}")
+    verb = 'removed' if args.apply else 'would remove'
+    print(f"{verb} {stats['duplicates']} files "
+          f"({stats['bytes'] / 1024 ** 2:.1f}MB); hashed {stats['hashed']} "
+          f"legacy files, {stats['unreadable']} unreadable")
+
+
+if __name__ == '__main__':
+    main()